@@ -20,7 +20,9 @@ from django.http import JsonResponse
 # Add parent directory to path to import date_detection
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
 from data_prep.date_detection import detect_date_formats, convert_date_column, standardize_date_column
-from models.VARX import adf_check
+from engine.lazy import lazy_module
+
+stationarity = lazy_module('models.stationarity')
 
 INITIAL_PREVIEW_CHUNK = 200
 METADATA_SAMPLE_LIMIT = 1000
@@ -1203,8 +1205,8 @@ def fix_stationary(request, dataset_id):
             else:
                 df.to_csv(path, index=False)
         
-        # Re-run ADF test on the new column
-        adf_result = adf_check(df[new_column_name], new_column_name)
+        # Test the new column (cached by content, so re-applying the same fix is free)
+        adf_result = stationarity.check_column(df[new_column_name], new_column_name)
         
         # Prepare response
         message = f'Transformation applied successfully. '
@@ -177,6 +177,8 @@ def _prepare_options(request, formula, df):
         'chains': int(request.POST.get('chains', '4')),
         'cores': int(request.POST.get('cores', '2')),
         'prior': request.POST.get('prior', 'auto'),
+        # 'mcmc' for full NUTS, or a fast preview approximation ('advi' / 'laplace')
+        'inference': request.POST.get('inference', 'mcmc'),
     }
     
     # Detect if dependent variable is ordered categorical to inform module selection
@@ -194,10 +196,35 @@ def _prepare_options(request, formula, df):
     return options
 
 
-def _execute_analysis(module_name, df, formula, analysis_type, options, column_types, schema_orders, outdir):
+def _preview_warm_start(session_id, formula):
+    """
+    Posterior means stored by a Bayesian preview (ADVI/Laplace) of the same formula, or None.
+    """
+    import pickle
+    
+    sess = AnalysisSession.objects.filter(pk=session_id).first()
+    if sess is None or not sess.fitted_model or sess.formula != formula:
+        return None
+    if (sess.options or {}).get('inference', 'mcmc') == 'mcmc':
+        return None
+    try:
+        fitted = pickle.loads(sess.fitted_model)
+    except Exception as e:
+        print(f"DEBUG: Could not load preview for warm start: {e}")
+        return None
+    return fitted.get('warm_start') if isinstance(fitted, dict) else None
+
+
+def _execute_analysis(module_name, df, formula, analysis_type, options, column_types, schema_orders, outdir,
+                      session_id=None):
     """
     Execute the analysis using the specified module.
     
+    Args:
+        session_id: Session being updated, if any; lets the regression module
+            reuse the session's last OLS factorization and full Bayesian runs
+            warm-start from the session's preview approximation
+    
     Returns:
         dict: Results dictionary from the module
     """
@@ -206,12 +233,20 @@ def _execute_analysis(module_name, df, formula, analysis_type, options, column_t
     from engine.modules import get_module
     
     mod = get_module(module_name)
+    run_options = options
+    if session_id:
+        # Keep the refit key out of the options saved on the session
+        run_options = {**options, 'refit_key': int(session_id)}
+        if module_name == 'bayesian' and options.get('inference', 'mcmc') == 'mcmc':
+            warm_start = _preview_warm_start(session_id, formula)
+            if warm_start:
+                run_options['warm_start'] = warm_start
     results = mod.run(
         df, 
         formula=formula, 
         analysis_type=analysis_type, 
         outdir=outdir, 
-        options=options, 
+        options=run_options, 
         schema_types=column_types, 
         schema_orders=schema_orders
     )
@@ -334,28 +369,37 @@ def _save_results(request, action, session_id, session_name, module_name, formul
             except Exception as e:
                 print(f"Failed to store VARX model results: {e}")
     
-    # Store ordinal predictions if available
-    ordinal_predictions = results.get('ordinal_predictions')
-    if ordinal_predictions:
-        try:
-            sess.ordinal_predictions = ordinal_predictions
-            print("Stored ordinal predictions in session")
-        except Exception as e:
-            print(f"Failed to store ordinal predictions: {e}")
+    # Keep the OLS factorization in memory so the next update can refit incrementally
+    ols_factorization = results.pop('ols_factorization', None)
+    
+    # Bayesian posterior draws go to disk next to the session, not into the database
+    posterior_store = results.pop('posterior_store', None)
+    
+    # Store pre-generated ordinal/multinomial predictions as a compact binary artifact
+    sess.precomputed_predictions = results.get('precomputed_predictions')
+    # Legacy JSON predictions are superseded by the binary artifact
+    sess.ordinal_predictions = None
+    sess.multinomial_predictions = None
+    if sess.precomputed_predictions:
+        print(f"Stored precomputed predictions in session ({len(sess.precomputed_predictions)} bytes)")
+    
+    sess.save()
+    
+    from models import incremental_ols
+    if ols_factorization is not None:
+        incremental_ols.remember(sess.id, ols_factorization)
+    else:
+        incremental_ols.forget(sess.id)
     
-    # Store multinomial predictions if available
-    multinomial_predictions = results.get('multinomial_predictions')
-    print(f"DEBUG: multinomial_predictions from results: {multinomial_predictions}")
-    if multinomial_predictions:
+    from models import posterior_store as posterior_files
+    if posterior_store is not None:
         try:
-            sess.multinomial_predictions = multinomial_predictions
-            print("Stored multinomial predictions in session")
+            size = posterior_store.save(posterior_files.path_for_session(sess.id))
+            print(f"Stored posterior draws for session {sess.id} ({size} bytes)")
         except Exception as e:
-            print(f"Failed to store multinomial predictions: {e}")
+            print(f"Failed to store posterior draws: {e}")
     else:
-        print("DEBUG: No multinomial predictions to store")
-    
-    sess.save()
+        posterior_files.delete_for_session(sess.id)
     
     # Track this analysis iteration in session history
     try:
@@ -503,3 +547,38 @@ def _determine_template(results, template_override, analysis_type):
     
     return template_name
 
+
+
+def _run_and_save_analysis(action, session_id, session_name, module_name, formula, analysis_type,
+                           template_override, options, dataset, df, column_types, schema_orders):
+    """
+    Execute a standard module, save the session and build the results context.
+    
+    Shared by run_analysis and the background job worker.
+    
+    Returns:
+        tuple: (template_name, context)
+    """
+    import os
+    import uuid
+    
+    outdir = os.path.join(settings.MEDIA_ROOT, str(uuid.uuid4())[:8])
+    os.makedirs(outdir, exist_ok=True)
+    
+    results = _execute_analysis(module_name, df, formula, analysis_type, options, column_types, schema_orders, outdir,
+                                session_id=session_id if action == 'update' else None)
+    
+    # Build table data
+    cols, model_table_matrix, estimate_col_index = _build_table_data(results)
+    
+    # Save results to session
+    sess = _save_results(None, action, session_id, session_name, module_name, formula,
+                         analysis_type, options, dataset, results, cols, model_table_matrix)
+    
+    # Prepare template context
+    ctx = _prepare_template_context(sess, dataset, results, cols, model_table_matrix, estimate_col_index, options)
+    
+    # Determine template
+    template_name = _determine_template(results, template_override, analysis_type)
+    
+    return template_name, ctx
@@ -0,0 +1,73 @@
+# Lazy module proxies, so importing views does not import the scientific stack.
+"""
+``lazy_module('models.regression')`` returns a stand-in for the module that
+imports it the first time one of its attributes is used. View and service
+modules bind their statistics dependencies this way at module level
+(``regression = lazy_module('models.regression')`` and then
+``regression.generate_spotlight_for_interaction(...)``). Importing
+``engine.urls`` to serve a page, the sitemap or the paper list therefore
+never loads statsmodels, scipy or plotly; the first analysis request does.
+
+``HEAVY_MODULES`` lists the libraries this is meant to keep out of web-only
+requests. ``loaded_heavy_modules()`` reports which of them are imported,
+for the startup benchmark.
+"""
+import importlib
+import sys
+import threading
+
+# Libraries that web-only requests should not import
+HEAVY_MODULES = (
+    'scipy',
+    'statsmodels',
+    'linearmodels',
+    'plotly',
+    'matplotlib',
+    'pymc',
+    'bambi',
+    'arviz',
+    'rpy2',
+)
+
+
+class LazyModule:
+    """Proxy that imports ``name`` on first attribute access and then forwards to it."""
+
+    __slots__ = ('_name', '_module', '_lock')
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    object.__setattr__(self, '_module', importlib.import_module(self._name))
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name):
+    """A proxy for module ``name`` that is imported on first use."""
+    return LazyModule(name)
+
+
+def loaded_heavy_modules():
+    """Which of HEAVY_MODULES are imported in this process."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
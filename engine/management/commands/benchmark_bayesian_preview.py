@@ -0,0 +1,132 @@
+"""
+Management command comparing Bayesian preview approximations with full MCMC.
+
+For each formula the same Bambi model is fitted with full NUTS, with each
+preview method (ADVI, Laplace) and with NUTS warm-started from the ADVI
+preview. Wall times are reported along with how far the preview's posterior
+means and standard deviations are from the MCMC ones.
+"""
+import time
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from data_prep.file_handling import _read_dataset_file
+from engine.models import Dataset
+from models.bayesian_model_cache import MODEL_CACHE
+from models.bayesian_regression import APPROXIMATE_METHODS, BayesianRegressionModule
+
+DEFAULT_FORMULAS = [
+    'y ~ x1 + x2',
+    'y ~ x1 * x2',
+    'y ~ x1 + x2 + g',
+    'y_bin ~ x1 + x2',
+]
+
+
+def _synthetic_data(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'x1': rng.normal(size=n),
+        'x2': rng.normal(size=n),
+        'g': rng.choice(['a', 'b', 'c'], size=n),
+    })
+    effect = df['g'].map({'a': 0.0, 'b': 0.5, 'c': -0.5})
+    df['y'] = 1.0 + 0.8 * df['x1'] - 0.4 * df['x2'] + 0.3 * df['x1'] * df['x2'] + effect + rng.normal(size=n)
+    df['y_bin'] = (rng.uniform(size=n) < 1 / (1 + np.exp(-(0.5 * df['x1'] - 0.7 * df['x2'])))).astype(int)
+    return df
+
+
+def _summary(fitted_model):
+    stats = (fitted_model or {}).get('summary_stats') or {}
+    return pd.DataFrame({'mean': stats.get('mean', {}), 'sd': stats.get('sd', {})})
+
+
+def _agreement(reference, candidate):
+    """Largest standardized mean difference and range of sd ratios over shared parameters."""
+    shared = reference.index.intersection(candidate.index)
+    if not len(shared):
+        return None, None, None
+    ref, cand = reference.loc[shared], candidate.loc[shared]
+    z = ((cand['mean'] - ref['mean']).abs() / ref['sd'].replace(0, np.nan)).max()
+    ratio = cand['sd'] / ref['sd'].replace(0, np.nan)
+    return float(z), float(ratio.min()), float(ratio.max())
+
+
+class Command(BaseCommand):
+    help = 'Benchmark Bayesian preview approximations (ADVI, Laplace) against full MCMC'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dataset-id',
+            type=int,
+            help='Benchmark on this dataset instead of synthetic data',
+        )
+        parser.add_argument(
+            '--formula',
+            action='append',
+            help='Formula to benchmark (repeatable; defaults to a built-in set)',
+        )
+        parser.add_argument('--draws', type=int, default=2000)
+        parser.add_argument('--tune', type=int, default=1000)
+        parser.add_argument('--chains', type=int, default=4)
+        parser.add_argument('--cores', type=int, default=2)
+
+    def handle(self, *args, **options):
+        if options['dataset_id']:
+            dataset = Dataset.objects.get(pk=options['dataset_id'])
+            df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
+        else:
+            df, column_types, schema_orders = _synthetic_data(), None, None
+        formulas = options['formula'] or DEFAULT_FORMULAS
+
+        base = {k: options[k] for k in ('draws', 'tune', 'chains', 'cores')}
+        base['prior'] = 'auto'
+        base['family'] = 'auto'
+
+        rows = []
+        for formula in formulas:
+            self.stdout.write(f"\n{formula}")
+            timings, summaries, warm_start = {}, {}, None
+            for inference in ['mcmc', *APPROXIMATE_METHODS]:
+                start = time.perf_counter()
+                _, _, stats, fitted, _ = BayesianRegressionModule._fit_models(
+                    df, formula, {**base, 'inference': inference}, column_types, schema_orders)
+                timings[inference] = time.perf_counter() - start
+                if stats.get('error'):
+                    self.stdout.write(self.style.ERROR(f"  {inference}: {stats['error']}"))
+                    continue
+                summaries[inference] = _summary(fitted)
+                if inference == 'advi':
+                    warm_start = fitted.get('warm_start')
+                self.stdout.write(f"  {inference:<8} {timings[inference]:8.2f}s")
+
+            if warm_start:
+                start = time.perf_counter()
+                BayesianRegressionModule._fit_models(
+                    df, formula, {**base, 'inference': 'mcmc', 'warm_start': warm_start}, column_types, schema_orders)
+                timings['mcmc_warm'] = time.perf_counter() - start
+                self.stdout.write(f"  {'warm mcmc':<8} {timings['mcmc_warm']:8.2f}s")
+
+            for method in APPROXIMATE_METHODS:
+                if 'mcmc' not in summaries or method not in summaries:
+                    continue
+                z, ratio_min, ratio_max = _agreement(summaries['mcmc'], summaries[method])
+                rows.append({
+                    'formula': formula,
+                    'method': method,
+                    'mcmc_s': timings['mcmc'],
+                    'preview_s': timings[method],
+                    'speedup': timings['mcmc'] / timings[method] if timings[method] else None,
+                    'warm_mcmc_s': timings.get('mcmc_warm'),
+                    'max_mean_diff_sd': z,
+                    'sd_ratio_min': ratio_min,
+                    'sd_ratio_max': ratio_max,
+                })
+
+        if not rows:
+            self.stdout.write(self.style.WARNING("No comparisons completed"))
+            return
+        self.stdout.write("\nmax_mean_diff_sd: largest |preview mean - MCMC mean| in MCMC posterior sds")
+        self.stdout.write("sd_ratio: preview posterior sd / MCMC posterior sd\n")
+        self.stdout.write(pd.DataFrame(rows).round(3).to_string(index=False))
+        self.stdout.write(f"\nCompiled model cache: {MODEL_CACHE.stats()}")
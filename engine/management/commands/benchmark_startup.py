@@ -0,0 +1,105 @@
+"""
+Management command measuring cold-start time to the first response.
+
+Each path is requested in a fresh Python process: Django is set up, the
+path is fetched with the test client, and the command reports the time from
+interpreter start to the response. It also reports which heavy scientific
+libraries (engine.lazy.HEAVY_MODULES) were imported on the way. Pages that
+never run an analysis should not load any of them. In CI,
+--max-seconds and --forbid-heavy turn regressions into a failing exit code.
+A response that is not 2xx always fails the command: an error page (e.g. a
+missing database table) returns quickly and would otherwise look like a
+clean timing.
+"""
+import json
+import os
+import subprocess
+import sys
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = ['/', '/papers/']
+
+_PROBE = '''
+import time
+started = time.perf_counter()
+import json, os, sys
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", {settings!r})
+import django
+django.setup()
+from django.test import Client
+from django.test.utils import setup_test_environment
+setup_test_environment()
+ready = time.perf_counter()
+response = Client(raise_request_exception=False).get({path!r})
+done = time.perf_counter()
+from engine.lazy import loaded_heavy_modules
+sys.stdout.write("\\n" + json.dumps({{
+    "status": response.status_code,
+    "setup_s": ready - started,
+    "first_response_s": done - started,
+    "heavy_modules": loaded_heavy_modules(),
+}}))
+'''
+
+
+def _probe(path, settings_module):
+    proc = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(settings=settings_module, path=path)],
+        capture_output=True, text=True, cwd=os.getcwd(),
+    )
+    if proc.returncode != 0:
+        raise CommandError(f"Probe for {path} failed: {(proc.stderr.strip().splitlines() or ['no output'])[-1]}")
+    return json.loads(proc.stdout.rsplit('\n', 1)[-1])
+
+
+class Command(BaseCommand):
+    help = 'Measure time to first response for web-only pages in a fresh process'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            action='append',
+            help=f'Path to request (repeatable; defaults to {", ".join(DEFAULT_PATHS)})',
+        )
+        parser.add_argument('--repeat', type=int, default=1, help='Cold starts per path; the best time is kept')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+        parser.add_argument(
+            '--max-seconds',
+            type=float,
+            help='Fail when any path takes longer than this to its first response',
+        )
+        parser.add_argument(
+            '--forbid-heavy',
+            action='store_true',
+            help='Fail when any path imports a heavy scientific library',
+        )
+
+    def handle(self, *args, **options):
+        settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'statbox.settings')
+        rows = []
+        for path in options['path'] or DEFAULT_PATHS:
+            runs = [_probe(path, settings_module) for _ in range(max(1, options['repeat']))]
+            best = min(runs, key=lambda r: r['first_response_s'])
+            ok = all(200 <= r['status'] < 300 for r in runs)
+            rows.append({'path': path, **best, 'ok': ok})
+            if not options['json']:
+                heavy = ', '.join(best['heavy_modules']) or 'none'
+                flag = '' if ok else '  FAILED: not a 2xx response, timing not meaningful'
+                self.stdout.write(
+                    f"{path:<24} {best['status']}  setup {best['setup_s']:6.3f}s  "
+                    f"first response {best['first_response_s']:6.3f}s  heavy modules: {heavy}{flag}")
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+
+        problems = [f"{r['path']} returned {r['status']}" for r in rows if not r['ok']]
+        limit = options['max_seconds']
+        if limit is not None:
+            problems += [f"{r['path']} took {r['first_response_s']:.2f}s (limit {limit:g}s)"
+                         for r in rows if r['first_response_s'] > limit]
+        if options['forbid_heavy']:
+            problems += [f"{r['path']} imported {', '.join(r['heavy_modules'])}"
+                         for r in rows if r['heavy_modules']]
+        if problems:
+            raise CommandError('; '.join(problems))
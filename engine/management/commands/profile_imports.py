@@ -0,0 +1,107 @@
+"""
+Management command printing a cold import-time profile of the analysis stack.
+
+Each library and registered analysis module is imported in a fresh Python
+process (after django.setup()), so its time includes everything it pulls in
+and nothing is shared with the previous import. ``-X importtime`` output of
+that process names the slowest submodules. Use --max-seconds in CI to catch
+startup regressions.
+"""
+import json
+import os
+import subprocess
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from engine.modules import get_registry
+from engine.warmup import configured_libraries
+
+_PROBE = '''
+import os, sys, time, importlib
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", {settings!r})
+import django
+django.setup()
+sys.stderr.write("{marker}\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+try:
+    importlib.import_module({name!r})
+    error = ""
+except Exception as e:
+    error = type(e).__name__ + ": " + str(e)
+sys.stdout.write("%.6f\\t%s" % (time.perf_counter() - start, error))
+'''
+
+_MARKER = '-- profile_imports: start --'
+
+
+def _profile(name, settings_module, top):
+    """(seconds, error, slowest submodules) for a cold import of ``name``."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(settings=settings_module, name=name, marker=_MARKER)],
+        capture_output=True, text=True, cwd=os.getcwd(),
+    )
+    if proc.returncode != 0 or '\t' not in proc.stdout:
+        return None, (proc.stderr.strip().splitlines() or ['probe failed'])[-1], []
+    seconds, error = proc.stdout.rsplit('\n', 1)[-1].split('\t', 1)
+
+    # "import time: self [us] | cumulative | imported package", for imports after the marker
+    entries = []
+    lines = proc.stderr.splitlines()
+    start = lines.index(_MARKER) + 1 if _MARKER in lines else 0
+    for line in lines[start:]:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        entries.append((module.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    if error:
+        return float(seconds), error, []
+    return float(seconds), None, sorted(entries, key=lambda e: -e[1])[:top]
+
+
+class Command(BaseCommand):
+    help = 'Print the cold import time of each analysis library and registered analysis module'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--library',
+            action='append',
+            help='Library to profile (repeatable; defaults to the warmup list plus registered modules)',
+        )
+        parser.add_argument('--top', type=int, default=5, help='Slowest submodules listed per import')
+        parser.add_argument('--json', action='store_true', help='Print the profile as JSON')
+        parser.add_argument(
+            '--max-seconds',
+            type=float,
+            help='Exit with an error when any single import takes longer than this',
+        )
+
+    def handle(self, *args, **options):
+        settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'statbox.settings')
+        names = options['library'] or (
+            configured_libraries() + [path.split(':', 1)[0] for path in get_registry().values()])
+
+        rows = []
+        for name in names:
+            seconds, error, slowest = _profile(name, settings_module, options['top'])
+            rows.append({
+                'name': name,
+                'seconds': seconds,
+                'error': error,
+                'slowest': [{'module': m, 'self_s': s, 'cumulative_s': c} for m, s, c in slowest],
+            })
+            if not options['json']:
+                shown = f"{seconds:8.3f}s" if seconds is not None else '       -'
+                line = f"{name:<32} {shown}"
+                self.stdout.write(self.style.WARNING(f"{line}  {error}") if error else line)
+                for m, s, _ in slowest:
+                    self.stdout.write(f"    {m:<40} {s * 1000:8.1f} ms self")
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+
+        limit = options['max_seconds']
+        if limit is not None:
+            slow = [r['name'] for r in rows if r['seconds'] is not None and r['seconds'] > limit]
+            if slow:
+                raise CommandError(f"Imports slower than {limit:g}s: {', '.join(slow)}")
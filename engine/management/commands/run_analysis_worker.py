@@ -0,0 +1,148 @@
+"""
+Management command that runs queued background analyses.
+
+Each job runs in its own child process, so a cancelled job is stopped by
+terminating its process rather than waiting for the analysis to finish.
+"""
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from engine.models import AnalysisJob
+from engine.services.job_service import JobService
+from engine.warmup import warm_up_from_settings
+
+
+def _run_job(job_id):
+    """Child-process entry point."""
+    import django
+    if hasattr(os, 'setpgrp'):
+        # Own process group, so cancelling also stops any sampler processes
+        os.setpgrp()
+    django.setup()
+    JobService.execute(job_id)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+def _signal_job(proc, sig):
+    """Send ``sig`` to the job's process group, falling back to the process itself."""
+    try:
+        os.killpg(proc.pid, sig)
+    except (AttributeError, OSError):
+        if sig == signal.SIGTERM:
+            proc.terminate()
+        else:
+            proc.kill()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background analysis jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=getattr(settings, 'ANALYSIS_WORKER_PROCESSES', 2),
+            help='Maximum number of analyses run at the same time',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds between queue polls',
+        )
+        parser.add_argument(
+            '--cancel-grace',
+            type=float,
+            default=5.0,
+            help='Seconds a cancelled job gets to exit before it is killed',
+        )
+
+    def handle(self, *args, **options):
+        self.host = socket.gethostname()
+        self.processes = max(1, options['processes'])
+        self.grace = options['cancel_grace']
+        # Fork keeps the already-imported scientific stack; spawn is the fallback
+        methods = multiprocessing.get_all_start_methods()
+        self.ctx = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        self.running = {}  # job id -> Process
+
+        # Forked jobs inherit whatever is imported here
+        warm_up_from_settings('jobs')
+        self._recover_orphans()
+        self.stdout.write(f"Analysis worker on {self.host} with {self.processes} process(es)")
+        try:
+            while True:
+                self._reap()
+                self._cancel_requested()
+                self._start_jobs()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping worker, cancelling running jobs")
+            for job_id in list(self.running):
+                self._stop(job_id, 'Worker stopped')
+
+    def _recover_orphans(self):
+        """Fail jobs left running on this host by a worker that died."""
+        for job in AnalysisJob.objects.filter(status=AnalysisJob.STATUS_RUNNING, worker_host=self.host):
+            if not _pid_alive(job.worker_pid):
+                JobService.finish(job.pk, AnalysisJob.STATUS_FAILED, 'Worker exited before the job finished')
+                self.stdout.write(self.style.WARNING(f"Marked orphaned job {job.pk} as failed"))
+
+    def _reap(self):
+        for job_id, proc in list(self.running.items()):
+            if proc.is_alive():
+                continue
+            proc.join()
+            del self.running[job_id]
+            # A child that exited without recording a result crashed
+            if JobService.finish(job_id, AnalysisJob.STATUS_FAILED, f'Analysis process exited with code {proc.exitcode}'):
+                self.stdout.write(self.style.ERROR(f"Job {job_id} exited with code {proc.exitcode}"))
+            else:
+                self.stdout.write(f"Job {job_id} finished")
+
+    def _cancel_requested(self):
+        if not self.running:
+            return
+        cancelled = AnalysisJob.objects.filter(
+            pk__in=list(self.running), status=AnalysisJob.STATUS_RUNNING, cancel_requested=True,
+        ).values_list('pk', flat=True)
+        for job_id in cancelled:
+            self._stop(job_id, '')
+
+    def _stop(self, job_id, error):
+        proc = self.running.pop(job_id)
+        _signal_job(proc, signal.SIGTERM)
+        proc.join(self.grace)
+        if proc.is_alive():
+            _signal_job(proc, getattr(signal, 'SIGKILL', signal.SIGTERM))
+            proc.join()
+        JobService.finish(job_id, AnalysisJob.STATUS_CANCELLED, error)
+        self.stdout.write(self.style.WARNING(f"Cancelled job {job_id}"))
+
+    def _start_jobs(self):
+        free = self.processes - len(self.running)
+        if free <= 0:
+            return
+        for job in JobService.claimable_jobs(free):
+            if not JobService.claim(job, self.host):
+                continue
+            # Children must open their own database connections
+            connections.close_all()
+            # Not a daemon: samplers may start their own processes for chains
+            proc = self.ctx.Process(target=_run_job, args=(job.pk,))
+            proc.start()
+            AnalysisJob.objects.filter(pk=job.pk).update(worker_pid=proc.pid)
+            self.running[job.pk] = proc
+            self.stdout.write(f"Started {job.module} job {job.pk} (pid {proc.pid})")
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0037_add_paper_document_model"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysissession",
+            name="precomputed_predictions",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0038_analysissession_precomputed_predictions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysissession",
+            name="batch_results",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
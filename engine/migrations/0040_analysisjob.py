@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-18 14:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("engine", "0039_analysissession_batch_results"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalysisJob",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("module", models.CharField(max_length=100)),
+                ("payload", models.JSONField(default=dict, help_text="Request parameters needed to run the analysis")),
+                ("status", models.CharField(choices=[("queued", "Queued"), ("running", "Running"), ("succeeded", "Succeeded"), ("failed", "Failed"), ("cancelled", "Cancelled")], db_index=True, default="queued", max_length=20)),
+                ("cancel_requested", models.BooleanField(default=False)),
+                ("error", models.TextField(blank=True, default="")),
+                ("template_name", models.CharField(blank=True, default="", max_length=200)),
+                ("result", models.BinaryField(blank=True, null=True)),
+                ("worker_host", models.CharField(blank=True, default="", max_length=255)),
+                ("worker_pid", models.IntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("dataset", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="analysis_jobs", to="engine.dataset")),
+                ("session", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="jobs", to="engine.analysissession")),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="analysis_jobs", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["created_at"],
+                "indexes": [models.Index(fields=["status", "created_at"], name="engine_anal_status_d5ace4_idx")],
+            },
+        ),
+    ]
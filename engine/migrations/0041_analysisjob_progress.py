@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0040_analysisjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisjob",
+            name="progress",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Latest progress event (stage, percent, ETA)",
+            ),
+        ),
+    ]
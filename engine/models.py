@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -165,6 +166,8 @@ class AnalysisSession(models.Model):
     fitted_model = models.BinaryField(null=True, blank=True)  # Store pickled fitted model
     ordinal_predictions = models.JSONField(null=True, blank=True)  # Store pre-generated ordinal predictions
     multinomial_predictions = models.JSONField(null=True, blank=True)  # Store pre-generated multinomial predictions
+    precomputed_predictions = models.BinaryField(null=True, blank=True)  # Compressed float32 ordinal/multinomial prediction arrays
+    batch_results = models.BinaryField(null=True, blank=True)  # Compressed per-specification results of a batch run
 
     def clean(self):
         """Validate foreign key constraint when dataset is explicitly set."""
@@ -185,6 +188,62 @@ class AnalysisSession(models.Model):
     def __str__(self):
         return f"{self.name} ({self.user.username if self.user else 'No User'})"
 
+
+class AnalysisJob(models.Model):
+    """
+    An analysis queued for execution by the background worker.
+
+    Jobs are claimed by ``manage.py run_analysis_worker``, which runs each one
+    in its own child process so that cancellation can terminate it. The
+    rendered-result context is pickled into ``result`` and the resulting
+    AnalysisSession is linked once the job succeeds.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analysis_jobs', null=True, blank=True)
+    dataset = models.ForeignKey(Dataset, on_delete=models.SET_NULL, related_name='analysis_jobs', null=True, blank=True)
+    session = models.ForeignKey(AnalysisSession, on_delete=models.SET_NULL, related_name='jobs', null=True, blank=True)
+    module = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, help_text="Request parameters needed to run the analysis")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    cancel_requested = models.BooleanField(default=False)
+    error = models.TextField(blank=True, default='')
+    template_name = models.CharField(max_length=200, blank=True, default='')
+    result = models.BinaryField(null=True, blank=True)  # Pickled template context of the finished analysis
+    progress = models.JSONField(default=dict, blank=True, help_text="Latest progress event (stage, percent, ETA)")
+    worker_host = models.CharField(max_length=255, blank=True, default='')
+    worker_pid = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def __str__(self):
+        return f"{self.module} job {self.id} ({self.status})"
+
 class SubscriptionPlan(models.Model):
     """
     Unified subscription plan model that combines pricing, features, limits, and workflow configuration.
@@ -10,14 +10,13 @@ from django.shortcuts import get_object_or_404, render
 from django.http import HttpResponse, JsonResponse
 from engine.models import Dataset, AnalysisSession
 from data_prep.file_handling import _read_dataset_file
-from engine.views.sessions import _list_context
 
 
 class AnalysisExecutionService:
     """Service for executing analyses."""
     
     @staticmethod
-    def execute_bma_analysis(request, action, session_id, dataset_id, formula, categorical_vars):
+    def execute_bma_analysis(request, action, session_id, dataset_id, formula, categorical_vars, engine_options=None):
         """
         Execute BMA analysis.
         
@@ -28,6 +27,7 @@ class AnalysisExecutionService:
             dataset_id: Dataset ID
             formula: Analysis formula
             categorical_vars: Categorical variables string
+            engine_options: Optional 'bma_backend' / 'bma_prior' choices
             
         Returns:
             Rendered template response
@@ -38,6 +38,21 @@ class AnalysisExecutionService:
         if not formula:
             return HttpResponse('Please enter a formula', status=400)
         
+        template_name, context = AnalysisExecutionService.compute_bma_analysis(
+            action, session_id, request.POST.get('session_name'), dataset_id, formula, categorical_vars,
+            engine_options
+        )
+        return AnalysisExecutionService.render_result(request, template_name, context)
+    
+    @staticmethod
+    def compute_bma_analysis(action, session_id, session_name, dataset_id, formula, categorical_vars,
+                             engine_options=None):
+        """
+        Run BMA analysis and save the session without rendering.
+        
+        Returns:
+            Tuple of (template_name, context)
+        """
         # Get dataset
         dataset = get_object_or_404(Dataset, pk=dataset_id)
         df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
@@ -52,28 +67,31 @@ class AnalysisExecutionService:
         options = {}
         if categorical_vars:
             options['categorical_vars'] = categorical_vars
+        for key in ('bma_backend', 'bma_prior'):
+            if (engine_options or {}).get(key):
+                options[key] = engine_options[key]
         
         # Run BMA analysis
         result = bma_module.run(df, formula, options)
         
         if not result['success']:
-            return render(request, 'engine/index.html', {
-                **_list_context(),
-                'error_message': result.get('error', 'BMA analysis failed')
-            })
+            return 'engine/index.html', {'error_message': result.get('error', 'BMA analysis failed')}
         
         # Create or update session
-        session_name = request.POST.get('session_name') or f"BMA Analysis {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        session_name = session_name or f"BMA Analysis {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
         sess = AnalysisExecutionService._create_or_update_session(
             action, session_id, session_name, 'bma', formula, 'bayesian', options, dataset, None
         )
         
-        # Render results
-        return render(request, 'engine/BMA_results.html', {
+        # Keep the numeric results so the figures can be redrawn without re-running the fit
+        from models import bma_store
+        bma_store.save(sess.pk, result['bma_data'])
+        
+        return 'engine/BMA_results.html', {
             'session': sess,
             'dataset': dataset,
             **result
-        })
+        }
     
     @staticmethod
     def execute_anova_analysis(request, action, session_id, dataset_id, formula):
@@ -96,6 +114,19 @@ class AnalysisExecutionService:
         if not formula:
             return HttpResponse('Please enter a formula', status=400)
         
+        template_name, context = AnalysisExecutionService.compute_anova_analysis(
+            action, session_id, request.POST.get('session_name'), dataset_id, formula
+        )
+        return AnalysisExecutionService.render_result(request, template_name, context)
+    
+    @staticmethod
+    def compute_anova_analysis(action, session_id, session_name, dataset_id, formula):
+        """
+        Run ANOVA analysis and save the session without rendering.
+        
+        Returns:
+            Tuple of (template_name, context)
+        """
         # Get dataset
         dataset = get_object_or_404(Dataset, pk=dataset_id)
         df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
@@ -110,13 +141,10 @@ class AnalysisExecutionService:
         result = anova_module.run(df, formula, {})
         
         if not result.get('has_results', False):
-            return render(request, 'engine/index.html', {
-                **_list_context(),
-                'error_message': result.get('error', 'ANOVA analysis failed')
-            })
+            return 'engine/index.html', {'error_message': result.get('error', 'ANOVA analysis failed')}
         
         # Create or update session
-        session_name = request.POST.get('session_name') or f"ANOVA Analysis {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        session_name = session_name or f"ANOVA Analysis {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
         sess = AnalysisExecutionService._create_or_update_session(
             action, session_id, session_name, 'anova', formula, 'frequentist', {}, dataset, None
         )
@@ -141,14 +169,13 @@ class AnalysisExecutionService:
                 except:
                     pass
         
-        # Render results
-        return render(request, 'engine/ANOVA_results.html', {
+        return 'engine/ANOVA_results.html', {
             'session': sess,
             'dataset': dataset,
             'results': result,
             'formula': formula,
             'numeric_vars': numeric_vars
-        })
+        }
     
     @staticmethod
     def execute_varx_analysis(request, action, session_id, dataset_id, formula, var_order_input, max_lags_input):
@@ -173,6 +200,25 @@ class AnalysisExecutionService:
         if not formula:
             return HttpResponse('Please enter a formula', status=400)
         
+        template_name, context = AnalysisExecutionService.compute_varx_analysis(
+            action, session_id, request.POST.get('session_name'), dataset_id, formula,
+            var_order_input, max_lags_input,
+            {k: request.POST.get(k) for k in ('window_mode', 'window_size', 'window_step')}
+        )
+        return AnalysisExecutionService.render_result(request, template_name, context)
+    
+    @staticmethod
+    def compute_varx_analysis(action, session_id, session_name, dataset_id, formula, var_order_input, max_lags_input,
+                              window_inputs=None):
+        """
+        Run VARX analysis and save the session without rendering.
+        
+        window_inputs may hold window_mode ('rolling' or 'expanding'), window_size and
+        window_step to also re-estimate the model over moving windows.
+        
+        Returns:
+            Tuple of (template_name, context)
+        """
         # Get dataset
         dataset = get_object_or_404(Dataset, pk=dataset_id)
         df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
@@ -216,6 +262,17 @@ class AnalysisExecutionService:
             'var_order': var_order,
             'max_lags': max_lags
         }
+        window_inputs = window_inputs or {}
+        window_mode = str(window_inputs.get('window_mode') or '').strip().lower()
+        if window_mode in ('rolling', 'expanding'):
+            options['window_mode'] = window_mode
+            for key in ('window_size', 'window_step'):
+                try:
+                    value = int(window_inputs.get(key))
+                    if value > 0:
+                        options[key] = value
+                except (ValueError, TypeError):
+                    pass
         print(f"DEBUG: VARX options prepared: {options}")
         
         # Run VARX analysis
@@ -223,13 +280,10 @@ class AnalysisExecutionService:
         print(f"DEBUG: VARX module run completed. has_results={result.get('has_results')}, error={result.get('error')}")
         
         if not result.get('has_results', False):
-            return render(request, 'engine/index.html', {
-                **_list_context(),
-                'error_message': result.get('error', 'VARX analysis failed')
-            })
+            return 'engine/index.html', {'error_message': result.get('error', 'VARX analysis failed')}
         
         # Create or update session
-        session_name = request.POST.get('session_name') or f"VARX Analysis {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        session_name = session_name or f"VARX Analysis {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
         sess = AnalysisExecutionService._create_or_update_session(
             action, session_id, session_name, 'varx', formula, 'frequentist', options, dataset, None
         )
@@ -253,13 +307,12 @@ class AnalysisExecutionService:
                 print(f"Note: Could not store VARX model results (may not be pickleable): {e}")
                 # This is OK - IRF service will re-run if needed
         
-        # Render results
-        return render(request, 'engine/VARX_results.html', {
+        return 'engine/VARX_results.html', {
             'session': sess,
             'dataset': dataset,
             'results': result,
             'formula': formula
-        })
+        }
     
     @staticmethod
     def execute_structural_analysis(request, action, session_id, dataset_id, formula, structural_method):
@@ -283,6 +336,24 @@ class AnalysisExecutionService:
         if not formula:
             return HttpResponse('Please enter equation(s)', status=400)
         
+        template_name, context = AnalysisExecutionService.compute_structural_analysis(
+            action, session_id, request.POST.get('session_name'), dataset_id, formula, structural_method,
+            {k: request.POST.get(k) for k in ('structural_bootstrap', 'structural_n_boot')}
+        )
+        return AnalysisExecutionService.render_result(request, template_name, context)
+    
+    @staticmethod
+    def compute_structural_analysis(action, session_id, session_name, dataset_id, formula, structural_method,
+                                    bootstrap_inputs=None):
+        """
+        Run structural model analysis and save the session without rendering.
+        
+        bootstrap_inputs may hold structural_bootstrap ('pairs' or 'residual') and
+        structural_n_boot to add bootstrap intervals to the parameter table.
+        
+        Returns:
+            Tuple of (template_name, context)
+        """
         # Get dataset
         dataset = get_object_or_404(Dataset, pk=dataset_id)
         df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
@@ -297,39 +368,51 @@ class AnalysisExecutionService:
         method_upper = structural_method.strip().upper() if structural_method else 'SUR'
         valid_methods = ['SUR', '2SLS', '3SLS']
         if method_upper not in valid_methods:
-            return render(request, 'engine/index.html', {
-                **_list_context(),
+            return 'engine/index.html', {
                 'error_message': f'Invalid method: "{structural_method}" (normalized: "{method_upper}"). Method must be one of {valid_methods}.'
-            })
+            }
         
         # Prepare options
         options = {
             'method': method_upper
         }
+        bootstrap_inputs = bootstrap_inputs or {}
+        scheme = str(bootstrap_inputs.get('structural_bootstrap') or '').strip().lower()
+        if scheme in ('pairs', 'residual'):
+            options['bootstrap'] = scheme
+            try:
+                options['n_boot'] = min(max(int(bootstrap_inputs.get('structural_n_boot')), 50), 10000)
+            except (ValueError, TypeError):
+                pass
         
         # Run structural analysis
         result = structural_module.run(df, formula, options=options)
         
         if not result.get('has_results', False):
-            return render(request, 'engine/index.html', {
-                **_list_context(),
-                'error_message': result.get('error', 'Structural model analysis failed')
-            })
+            return 'engine/index.html', {'error_message': result.get('error', 'Structural model analysis failed')}
         
         # Create or update session
-        session_name = request.POST.get('session_name') or f"Structural Model ({structural_method}) {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        session_name = session_name or f"Structural Model ({structural_method}) {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
         sess = AnalysisExecutionService._create_or_update_session(
             action, session_id, session_name, 'structural', formula, 'frequentist', options, dataset, None
         )
         
-        # Render results
-        return render(request, 'engine/structural_model_results.html', {
+        return 'engine/structural_model_results.html', {
             'session': sess,
             'dataset': dataset,
             'results': result,
             'formula': formula,
             'method': structural_method
-        })
+        }
+    
+    @staticmethod
+    def render_result(request, template_name, context):
+        """Render a computed result; error pages get the session/dataset lists added."""
+        if template_name == 'engine/index.html':
+            # Imported here: engine.views imports this service, and job workers load it first
+            from engine.views.sessions import _list_context
+            context = {**_list_context(), **context}
+        return render(request, template_name, context)
     
     @staticmethod
     def _create_or_update_session(action, session_id, session_name, module_name, formula, 
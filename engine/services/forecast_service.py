@@ -0,0 +1,164 @@
+"""
+Service for out-of-sample VARX forecasts with fan charts.
+
+Reads the fitted model stored on the session (the one IRFs use), forecasts
+it under an exogenous scenario and caches the result per normalized scenario.
+"""
+import json
+from typing import Dict, Any, Optional
+from django.core.cache import cache
+from engine.models import AnalysisSession
+from engine.lazy import lazy_module
+from engine.services.irf_service import IRFService
+from data_prep.file_handling import _read_dataset_file
+
+go = lazy_module('plotly.graph_objects')
+pio = lazy_module('plotly.io')
+subplots = lazy_module('plotly.subplots')
+varx_forecast = lazy_module('models.varx_forecast')
+
+# Observations of history drawn before the forecast
+HISTORY_POINTS = 40
+
+# Seconds a forecast stays cached; the key includes the model digest, so re-runs never hit stale entries
+CACHE_SECONDS = 24 * 3600
+
+# Fill colours of the fan, outer band first
+_FAN_COLORS = ('rgba(26,133,255,0.12)', 'rgba(26,133,255,0.22)', 'rgba(26,133,255,0.35)')
+
+
+class ForecastService:
+    """Service for VARX forecasting."""
+
+    @staticmethod
+    def validate_session_for_forecast(session: AnalysisSession):
+        """
+        Validate that session is suitable for forecasting.
+
+        Args:
+            session: AnalysisSession object
+
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        if session.module != 'varx':
+            return False, 'Forecasts are only available for VARX sessions'
+        if not session.dataset:
+            return False, 'Dataset not found for this session'
+        return True, None
+
+    @staticmethod
+    def _cache_key(session: AnalysisSession, digest: str, horizon: int, scenario: Dict[str, Any],
+                   paths: int) -> str:
+        scenario_id = varx_forecast.scenario_key(scenario)
+        return f'varx_forecast:{session.pk}:{digest}:{horizon}:{paths}:{scenario_id}'
+
+    @staticmethod
+    def generate_forecast(session: AnalysisSession, horizon: int, scenario: Optional[Dict[str, Any]] = None,
+                          paths: int = None) -> Dict[str, Any]:
+        """
+        Forecast a VARX session under an exogenous scenario.
+
+        Args:
+            session: AnalysisSession object
+            horizon: Steps ahead
+            scenario: Mapping of exogenous name -> 'last', 'mean', number or list of numbers
+            paths: Simulated paths for the fan chart
+
+        Returns:
+            Result dictionary with the forecast, plot data and whether it was cached, or an error
+        """
+        paths = paths or varx_forecast.DEFAULT_PATHS
+        try:
+            digest = IRFService._model_digest(session)
+            model_results, endog_data = None, None
+            if digest is not None:
+                model_results, endog_data, _ = IRFService._load_varx_model_results(session, None)
+            if model_results is None or endog_data is None:
+                user_id = session.dataset.user.id if session.dataset.user else None
+                df, column_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
+                model_results, endog_data, dependent_vars = IRFService._load_varx_model_results(session, df)
+                if model_results is None or endog_data is None:
+                    return {
+                        'success': False,
+                        'error': 'Could not load VARX model results. Please re-run the analysis.'
+                    }
+                # The model may have just been stored on the session by a re-run
+                digest = IRFService._model_digest(session)
+
+            # Keyed on the normalized scenario, so spellings of the same scenario share an entry
+            _, normalized = varx_forecast.exog_future(model_results, horizon, scenario)
+            key = ForecastService._cache_key(session, digest, horizon, normalized, paths) if digest is not None else None
+            if key is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    return {**cached, 'cached': True}
+
+            forecast = varx_forecast.forecast(model_results, endog_data, horizon, scenario, paths=paths)
+            history = endog_data.tail(HISTORY_POINTS)
+            result = {
+                'success': True,
+                'forecast': forecast,
+                'plot_data': ForecastService._create_fan_chart(forecast, history),
+            }
+            if key is not None:
+                cache.set(key, result, CACHE_SECONDS)
+            return {**result, 'cached': False}
+
+        except ValueError as e:
+            return {'success': False, 'error': str(e), 'status': 400}
+        except Exception as e:
+            import traceback
+            print(f"FORECAST ERROR: {e}")
+            print(traceback.format_exc())
+            return {'success': False, 'error': f'Error generating forecast: {e}'}
+
+    @staticmethod
+    def _create_fan_chart(forecast: Dict[str, Any], history) -> Dict[str, Any]:
+        """
+        Plotly fan chart, one row per endogenous variable.
+
+        History is drawn on steps ..., -1, 0 (the last observation) and the forecast on 1..horizon,
+        with nested quantile bands around the point forecast.
+        """
+        variables = forecast['variables']
+        quantiles = forecast['quantiles']
+        bands = forecast['bands']
+        horizon = forecast['horizon']
+        steps = list(range(1, horizon + 1))
+        hist_steps = list(range(-len(history) + 1, 1))
+        n_bands = len(quantiles) // 2
+
+        fig = subplots.make_subplots(rows=len(variables), cols=1, shared_xaxes=True,
+                                     subplot_titles=variables, vertical_spacing=0.06)
+        for j, name in enumerate(variables):
+            row = j + 1
+            fig.add_trace(go.Scatter(
+                x=hist_steps, y=history[name].tolist(), mode='lines', name=f'{name} (observed)',
+                line=dict(color='#374151', width=2), showlegend=False
+            ), row=row, col=1)
+            for b in range(n_bands):
+                lower = [bands[b][h][j] for h in range(horizon)]
+                upper = [bands[-b - 1][h][j] for h in range(horizon)]
+                label = f'{int(round(quantiles[b] * 100))}-{int(round(quantiles[-b - 1] * 100))}%'
+                fig.add_trace(go.Scatter(
+                    x=steps + steps[::-1], y=upper + lower[::-1], fill='toself',
+                    fillcolor=_FAN_COLORS[b % len(_FAN_COLORS)], line=dict(width=0),
+                    name=label, legendgroup=label, showlegend=(j == 0), hoverinfo='skip'
+                ), row=row, col=1)
+            fig.add_trace(go.Scatter(
+                x=steps, y=[forecast['point'][h][j] for h in range(horizon)], mode='lines+markers',
+                name='Point forecast', legendgroup='point', showlegend=(j == 0),
+                line=dict(color='#1A85FF', width=3), marker=dict(size=4, color='#1A85FF')
+            ), row=row, col=1)
+
+        fig.update_layout(
+            title='VARX Forecast',
+            height=max(320, 260 * len(variables)),
+            hovermode='x unified',
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+        )
+        fig.update_xaxes(showgrid=True, gridcolor='lightgray', title_text='Steps ahead', row=len(variables), col=1)
+        fig.update_yaxes(showgrid=True, gridcolor='lightgray')
+        return json.loads(pio.to_json(fig))
@@ -3,15 +3,29 @@ Service for generating Impulse Response Functions (IRF) for VARX/VARMAX models.
 
 This service encapsulates IRF generation logic to keep views thin.
 """
+import hashlib
 import pickle
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.io as pio
 import json
 from typing import Dict, Any, List, Optional, Tuple
 from engine.models import AnalysisSession
 from data_prep.file_handling import _read_dataset_file
+from engine.lazy import lazy_module
+from django.conf import settings
+from models import irf_engine, irf_store, progress
+
+go = lazy_module('plotly.graph_objects')
+pio = lazy_module('plotly.io')
+
+# Confidence band methods: delta-method standard errors or a Monte Carlo bootstrap
+CI_ANALYTIC = 'analytic'
+CI_BOOTSTRAP = 'bootstrap'
+CI_METHODS = (CI_ANALYTIC, CI_BOOTSTRAP)
+
+# Default replications of the bootstrap tensor, and the most a request may ask for
+IRF_REPLICATIONS = getattr(settings, 'IRF_REPLICATIONS', irf_engine.DEFAULT_REPLICATIONS)
+IRF_MAX_REPLICATIONS = 5000
 
 
 class IRFService:
@@ -43,7 +57,7 @@ class IRFService:
         
         Args:
             session: AnalysisSession object
-            df: DataFrame with the dataset
+            df: DataFrame with the dataset, or None to use only the model stored on the session
             
         Returns:
             Tuple of (model_results, endog_data, dependent_vars) or (None, None, None) on error
@@ -63,6 +77,8 @@ class IRFService:
                 print(f"Failed to load stored VARX model: {e}")
         
         # If not available, re-run analysis
+        if df is None:
+            return None, None, None
         return IRFService._rerun_varx_analysis(session, df)
     
     @staticmethod
@@ -117,12 +133,121 @@ class IRFService:
         except Exception as e:
             print(f"Note: Could not store VARX model: {e}")
     
+    @staticmethod
+    def _model_digest(session: AnalysisSession) -> Optional[str]:
+        """Digest of the stored fitted model, or None when the session has none."""
+        fitted = getattr(session, 'fitted_model', None)
+        if not fitted:
+            return None
+        return hashlib.blake2b(bytes(fitted), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _has_bands(arrays: Optional[Dict[str, Any]], ci_method: Optional[str], replications: int) -> bool:
+        """Whether stored arrays already hold what a query needs (ci_method None: no bands)."""
+        if arrays is None:
+            return False
+        if ci_method == CI_ANALYTIC:
+            return arrays['stderr'] is not None
+        if ci_method == CI_BOOTSTRAP:
+            return (arrays['replications'] is not None and arrays.get('replication_count') == replications
+                    and arrays.get('seed') == irf_engine.DEFAULT_SEED)
+        return True
+    
+    @staticmethod
+    def _load_irf_arrays(session: AnalysisSession, periods: int, orth: bool, ci_method: Optional[str],
+                         replications: int = IRF_REPLICATIONS) -> Optional[Dict[str, Any]]:
+        """
+        IRF arrays for a session, horizon and orthogonalization, computed once and stored.
+        
+        A stored entry is used as-is when it belongs to the current fit and has
+        what is asked for. Otherwise the dataset and model are loaded, the
+        missing arrays are computed (analytic standard errors, or one seeded
+        bootstrap tensor), and the entry is rewritten with them added.
+        
+        Args:
+            session: AnalysisSession object
+            periods: Number of periods for IRF
+            orth: Whether the shocks are orthogonalized (Cholesky)
+            ci_method: 'analytic', 'bootstrap' or None (no bands)
+            replications: Bootstrap replications
+            
+        Returns:
+            Dict with var_names, point, stderr and replications (None when not
+            computed), or None on error
+        """
+        digest = IRFService._model_digest(session)
+        stored = irf_store.load(session.pk, periods, orth, model_digest=digest) if digest is not None else None
+        if IRFService._has_bands(stored, ci_method, replications):
+            print(f"DEBUG IRF: Using stored responses for session {session.pk} (h={periods}, orth={orth})")
+            return stored
+        
+        user_id = session.dataset.user.id if session.dataset.user else None
+        df, column_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
+        model_results, endog_data, dependent_vars = IRFService._load_varx_model_results(session, df)
+        if model_results is None or endog_data is None:
+            return None
+        var_names = list(endog_data.columns) if hasattr(endog_data, 'columns') else list(dependent_vars)
+        k = len(var_names)
+        
+        arrays = {'point': np.zeros((periods, k, k)), 'stderr': None, 'replications': None}
+        meta = {'var_names': var_names, 'seed': None, 'replication_count': None}
+        if stored is not None:
+            arrays.update({name: stored[name] for name in arrays})
+            meta.update({name: stored.get(name) for name in ('seed', 'replication_count')})
+        
+        if stored is None or ci_method == CI_ANALYTIC:
+            try:
+                arrays['point'], arrays['stderr'] = irf_engine.analytic_irf(model_results, periods, orth)
+            except Exception as e:
+                print(f"DEBUG IRF: Analytic IRF failed: {e}")
+                try:
+                    irf_result = model_results.irf(periods)
+                    arrays['point'] = np.asarray(irf_result.orth_irfs if orth else irf_result.irfs)[:periods]
+                except Exception as e:
+                    print(f"DEBUG IRF: Error getting IRF: {e}")
+        
+        if ci_method == CI_BOOTSTRAP:
+            stage = 'irf_bootstrap'
+            progress.report(stage, 0, replications, unit='replications',
+                            message=f'Bootstrapping impulse responses ({replications} replications)')
+            try:
+                arrays['replications'] = irf_engine.bootstrap_irf(
+                    model_results, periods, orth=orth, replications=replications, seed=irf_engine.DEFAULT_SEED,
+                    on_progress=lambda done, total: progress.report(
+                        stage, done, total, unit='replications', message='Bootstrapping impulse responses'),
+                )
+                meta.update({'seed': irf_engine.DEFAULT_SEED, 'replication_count': replications})
+                print(f"DEBUG CI COMPUTE: Bootstrap tensor with {replications} replications")
+            except Exception as e:
+                print(f"DEBUG CI COMPUTE: Bootstrap failed: {e}, using analytic bands")
+                if arrays['stderr'] is None:
+                    try:
+                        arrays['point'], arrays['stderr'] = irf_engine.analytic_irf(model_results, periods, orth)
+                    except Exception as e:
+                        print(f"DEBUG CI COMPUTE: Analytic bands failed too: {e}")
+            progress.report(stage, replications, replications, unit='replications',
+                            message='Impulse responses complete')
+        
+        meta['model_digest'] = IRFService._model_digest(session)
+        try:
+            if meta['model_digest'] is not None:
+                irf_store.save(session.pk, periods, orth, meta, **arrays)
+        except OSError as e:
+            print(f"Note: Could not store IRF arrays: {e}")
+        return {**meta, **arrays}
+    
+    @staticmethod
+    def _orthogonalized(shock_type: str) -> bool:
+        """Whether a shock type uses orthogonalized (Cholesky) shocks."""
+        return shock_type != 'non-orthogonal'
+    
     @staticmethod
     def generate_irf_plot(session: AnalysisSession, periods: int, shock_var: Optional[str], 
                          response_vars: List[str], shock_type: str = 'orthogonal', 
-                         show_ci: bool = True) -> Dict[str, Any]:
+                         show_ci: bool = True, ci_method: str = CI_BOOTSTRAP,
+                         replications: int = IRF_REPLICATIONS) -> Dict[str, Any]:
         """
-        Generate IRF plot for VARX analysis using simple prediction-based approach.
+        Generate IRF plot for VARX analysis from the session's stored responses.
         
         Args:
             session: AnalysisSession object
@@ -131,32 +256,31 @@ class IRFService:
             response_vars: Variables to measure response (empty for all)
             shock_type: Type of shock ('orthogonal' or 'structural')
             show_ci: Whether to show confidence intervals
+            ci_method: 'analytic' (delta method) or 'bootstrap'
+            replications: Bootstrap replications
             
         Returns:
             Result dictionary with plot data or error
         """
         try:
-            # Load dataset and model
-            user_id = session.dataset.user.id if session.dataset.user else None
-            df, column_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
-            model_results, endog_data, dependent_vars = IRFService._load_varx_model_results(session, df)
-            
-            if model_results is None or endog_data is None:
+            arrays = IRFService._load_irf_arrays(
+                session, periods, IRFService._orthogonalized(shock_type), ci_method if show_ci else None, replications
+            )
+            if arrays is None:
                 return {
                     'success': False,
                     'error': 'Could not load VARX model results. Please re-run the analysis.'
                 }
             
             # Get variable names and indices
-            var_names = list(endog_data.columns) if hasattr(endog_data, 'columns') else dependent_vars
+            var_names = arrays['var_names']
             shock_indices, response_indices = IRFService._get_shock_response_indices(
                 var_names, shock_var, response_vars
             )
             
             # Generate IRF DataFrame
-            irf_df = IRFService._generate_irf_dataframe(
-                model_results, endog_data, var_names, periods, 
-                shock_indices, response_indices, show_ci
+            irf_df, used_method = IRFService._generate_irf_dataframe(
+                arrays, var_names, periods, shock_indices, response_indices, ci_method if show_ci else None
             )
             
             if irf_df is None or irf_df.empty:
@@ -170,7 +294,8 @@ class IRFService:
             
             return {
                 'success': True,
-                'plot_data': plot_data
+                'plot_data': plot_data,
+                'ci_method': used_method
             }
             
         except Exception as e:
@@ -201,212 +326,69 @@ class IRFService:
         return shock_indices, response_indices
     
     @staticmethod
-    def _generate_irf_dataframe(model_results, endog_data: pd.DataFrame, var_names: List[str],
-                                periods: int, shock_indices: List[int], response_indices: List[int],
-                                show_ci: bool) -> Optional[pd.DataFrame]:
+    def _generate_irf_dataframe(arrays: Dict[str, Any], var_names: List[str], periods: int,
+                                shock_indices: List[int], response_indices: List[int],
+                                ci_method: Optional[str]) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
         """
         Generate IRF DataFrame with columns: shock, response, prediction, lower_ci, upper_ci.
         
+        Bootstrap bands use the replication mean as the prediction and the
+        2.5/97.5 percentiles, computed for all pairs at once along the
+        replication axis. Analytic bands are the point response +/- 1.96
+        standard errors. When the requested bands are unavailable the other
+        kind is used if stored, and otherwise the bands are left empty.
+        
         Args:
-            model_results: Fitted VARX model results
-            endog_data: Endogenous data used for fitting
+            arrays: IRF arrays from _load_irf_arrays
             var_names: List of variable names
             periods: Number of periods
             shock_indices: Indices of variables to shock
             response_indices: Indices of variables to measure response
-            show_ci: Whether to compute confidence intervals
+            ci_method: 'analytic', 'bootstrap' or None (no bands)
             
         Returns:
-            DataFrame with IRF data or None on error
+            Tuple of (DataFrame with IRF data or None on error, CI method used or None)
         """
         try:
-            rows = []
-            baseline = endog_data.mean().values
-            
-            for shock_idx in shock_indices:
-                shock_name = var_names[shock_idx]
-                
-                for resp_idx in response_indices:
-                    resp_name = var_names[resp_idx]
-                    
-                    # Generate IRF by applying shock and predicting forward
-                    predictions, lower_ci, upper_ci = IRFService._compute_irf_predictions(
-                        model_results, endog_data, baseline, shock_idx, resp_idx, periods, show_ci
-                    )
-                    
-                    # Create rows for each period
-                    rows.extend(IRFService._create_irf_rows(
-                        shock_name, resp_name, periods, predictions, lower_ci, upper_ci, show_ci
-                    ))
-            
-            return pd.DataFrame(rows)
-            
-        except Exception as e:
-            import traceback
-            print(f"Error generating IRF DataFrame: {e}")
-            print(traceback.format_exc())
-            return None
-    
-    @staticmethod
-    def _create_irf_rows(shock_name: str, resp_name: str, periods: int, 
-                        predictions: List[float], lower_ci: Optional[List[float]], 
-                        upper_ci: Optional[List[float]], show_ci: bool) -> List[Dict]:
-        """Create list of row dictionaries for IRF DataFrame."""
-        rows = []
-        for period in range(periods):
-            pred_val = float(predictions[period]) if period < len(predictions) else 0.0
-            lower_val = (float(lower_ci[period]) if show_ci and lower_ci is not None 
-                        and period < len(lower_ci) else None)
-            upper_val = (float(upper_ci[period]) if show_ci and upper_ci is not None 
-                        and period < len(upper_ci) else None)
-            
-            rows.append({
-                'shock': shock_name,
-                'response': resp_name,
-                'period': period,
-                'prediction': pred_val,
-                'lower_ci': lower_val,
-                'upper_ci': upper_val
+            replications, stderr = arrays.get('replications'), arrays.get('stderr')
+            predictions, lower, upper, used = arrays['point'], None, None, None
+            use_bootstrap = replications is not None and (
+                ci_method == CI_BOOTSTRAP or (ci_method == CI_ANALYTIC and stderr is None))
+            if use_bootstrap:
+                predictions = replications.mean(axis=0)
+                lower, upper = np.percentile(replications, [2.5, 97.5], axis=0)
+                used = CI_BOOTSTRAP
+            elif ci_method is not None and stderr is not None:
+                lower = predictions - irf_engine.Z_95 * stderr
+                upper = predictions + irf_engine.Z_95 * stderr
+                used = CI_ANALYTIC
+            elif ci_method is not None:
+                print("DEBUG CI COMPUTE: No confidence bands available for this model")
+            
+            shocks = np.repeat(shock_indices, len(response_indices))
+            responses = np.tile(response_indices, len(shock_indices))
+            n_pairs = len(shocks)
+            period_grid = np.arange(periods)
+            
+            def cells(values):
+                # (n_pairs, periods) -> flat, pair-major like the rows
+                return values[:periods][:, responses, shocks].T.reshape(-1)
+            
+            irf_df = pd.DataFrame({
+                'shock': np.repeat([var_names[i] for i in shocks], periods),
+                'response': np.repeat([var_names[i] for i in responses], periods),
+                'period': np.tile(period_grid, n_pairs),
+                'prediction': cells(predictions).astype(float),
+                'lower_ci': cells(lower).astype(float) if lower is not None else None,
+                'upper_ci': cells(upper).astype(float) if upper is not None else None,
             })
-        return rows
-    
-    @staticmethod
-    def _compute_irf_predictions(model_results, endog_data: pd.DataFrame, baseline: np.ndarray,
-                                 shock_idx: int, resp_idx: int, periods: int, show_ci: bool):
-        """
-        Compute IRF predictions by applying shock and forecasting forward.
-        
-        Args:
-            model_results: Fitted VARX model results
-            endog_data: Endogenous data
-            baseline: Baseline values for all variables
-            shock_idx: Index of variable to shock
-            resp_idx: Index of variable to measure response
-            periods: Number of periods to forecast
-            show_ci: Whether to compute confidence intervals
-            
-        Returns:
-            Tuple of (predictions, lower_ci, upper_ci)
-        """
-        try:
-            # Get IRF predictions
-            if show_ci:
-                predictions, lower_ci, upper_ci = IRFService._get_irf_with_ci(
-                    model_results, resp_idx, shock_idx, periods
-                )
-            else:
-                predictions = IRFService._get_irf_without_ci(
-                    model_results, resp_idx, shock_idx, periods
-                )
-                lower_ci, upper_ci = None, None
-            
-            # If CIs weren't computed, try to get them from irf_result
-            if show_ci and (lower_ci is None or upper_ci is None):
-                irf_result = model_results.irf(periods)
-                lower_ci, upper_ci = IRFService._compute_ci_from_irf_result(
-                    irf_result, predictions, resp_idx, shock_idx, periods
-                )
-            
-            return predictions, lower_ci, upper_ci
+            return irf_df, used
             
         except Exception as e:
             import traceback
-            print(f"Error computing IRF predictions: {e}")
+            print(f"Error generating IRF DataFrame: {e}")
             print(traceback.format_exc())
-            return [0.0] * periods, None, None
-    
-    @staticmethod
-    def _get_irf_with_ci(model_results, resp_idx: int, shock_idx: int, periods: int):
-        """Get IRF predictions with confidence intervals using irf_resim."""
-        try:
-            irf_resim_result = model_results.irf_resim(orth=True, repl=200, steps=periods, seed=None)
-            
-            if isinstance(irf_resim_result, np.ndarray) and irf_resim_result.ndim == 4:
-                # Shape: (replications, periods, n_vars, n_vars)
-                irf_replications = irf_resim_result[:, :, resp_idx, shock_idx]
-                
-                # Mean across replications for predictions
-                predictions = [float(np.mean(irf_replications[:, h])) for h in range(periods)]
-                
-                # Compute percentiles for CIs
-                lower_ci, upper_ci = IRFService._compute_percentile_cis(irf_replications, periods)
-                
-                print(f"DEBUG CI COMPUTE: Using irf_resim with {irf_replications.shape[0]} replications")
-                return predictions, lower_ci, upper_ci
-            else:
-                raise ValueError("irf_resim returned unexpected format")
-                
-        except Exception as e:
-            print(f"DEBUG CI COMPUTE: irf_resim failed: {e}, falling back")
-            raise
-    
-    @staticmethod
-    def _compute_percentile_cis(irf_replications: np.ndarray, periods: int) -> Tuple[List[float], List[float]]:
-        """Compute confidence intervals from replications using percentiles."""
-        lower_ci = []
-        upper_ci = []
-        for h in range(periods):
-            period_values = irf_replications[:, h]
-            lower_val = float(np.percentile(period_values, 2.5))
-            upper_val = float(np.percentile(period_values, 97.5))
-            lower_ci.append(lower_val)
-            upper_ci.append(upper_val)
-        return lower_ci, upper_ci
-    
-    @staticmethod
-    def _get_irf_without_ci(model_results, resp_idx: int, shock_idx: int, periods: int) -> List[float]:
-        """Get IRF predictions without confidence intervals."""
-        try:
-            irf_result = model_results.irf(periods)
-            if hasattr(irf_result, 'irfs'):
-                irf_array = irf_result.irfs
-                return [float(irf_array[h, resp_idx, shock_idx]) for h in range(periods)]
-            return [0.0] * periods
-        except Exception as e:
-            print(f"DEBUG IRF: Error getting IRF: {e}")
-            return [0.0] * periods
-    
-    @staticmethod
-    def _compute_ci_from_irf_result(irf_result, predictions: List[float], 
-                                   resp_idx: int, shock_idx: int, periods: int):
-        """Compute confidence intervals from irf_result object."""
-        try:
-            # Try errband_mc first
-            if hasattr(irf_result, 'errband_mc'):
-                errband = irf_result.errband_mc
-                if errband is not None and errband.ndim == 4:
-                    lower_ci = [float(errband[0, h, resp_idx, shock_idx]) for h in range(periods)]
-                    upper_ci = [float(errband[1, h, resp_idx, shock_idx]) for h in range(periods)]
-                    print(f"DEBUG CI COMPUTE: Using errband_mc from irf_result")
-                    return lower_ci, upper_ci
-            
-            # Try stderr
-            if hasattr(irf_result, 'stderr'):
-                stderr_array = irf_result.stderr
-                if stderr_array is not None and stderr_array.ndim == 3:
-                    lower_ci = [float(predictions[h] - 1.96 * stderr_array[h, resp_idx, shock_idx]) 
-                               for h in range(periods)]
-                    upper_ci = [float(predictions[h] + 1.96 * stderr_array[h, resp_idx, shock_idx]) 
-                               for h in range(periods)]
-                    print(f"DEBUG CI COMPUTE: Using stderr from irf_result")
-                    return lower_ci, upper_ci
-            
-            # Fallback
-            raise ValueError("irf_result has no CI attributes")
-            
-        except Exception as e:
-            print(f"DEBUG CI COMPUTE: Could not get CIs from irf_result: {e}")
-            return IRFService._compute_ci_fallback(predictions)
-    
-    @staticmethod
-    def _compute_ci_fallback(predictions: List[float]) -> Tuple[List[float], List[float]]:
-        """Fallback CI computation using standard error approximation."""
-        se_base = (np.std(predictions) if len(predictions) > 1 and np.std(predictions) > 0 
-                  else (abs(max(predictions, key=abs)) * 0.15 if predictions else 0.1))
-        lower_ci = [float(p - 1.96 * se_base) for p in predictions]
-        upper_ci = [float(p + 1.96 * se_base) for p in predictions]
-        print(f"DEBUG CI COMPUTE: Using fallback SE approximation: se_base={se_base}")
-        return lower_ci, upper_ci
+            return None, None
     
     @staticmethod
     def _create_plot_from_dataframe(irf_df: pd.DataFrame, show_ci: bool) -> Dict[str, Any]:
@@ -442,7 +424,7 @@ class IRFService:
         return json.loads(plot_json)
     
     @staticmethod
-    def _create_ci_traces(group: pd.DataFrame, shock: str, response: str) -> List[go.Scatter]:
+    def _create_ci_traces(group: pd.DataFrame, shock: str, response: str) -> List['go.Scatter']:
         """Create confidence interval traces for plotting."""
         if 'lower_ci' not in group.columns or 'upper_ci' not in group.columns:
             return []
@@ -487,7 +469,7 @@ class IRFService:
     
     @staticmethod
     def _create_irf_trace(periods: np.ndarray, predictions: np.ndarray, 
-                         shock: str, response: str) -> go.Scatter:
+                         shock: str, response: str) -> 'go.Scatter':
         """Create main IRF trace."""
         return go.Scatter(
             x=periods,
@@ -499,7 +481,7 @@ class IRFService:
         )
     
     @staticmethod
-    def _create_figure(traces: List[go.Scatter]) -> go.Figure:
+    def _create_figure(traces: List['go.Scatter']) -> 'go.Figure':
         """Create Plotly figure with traces."""
         fig = go.Figure(data=traces)
         fig.update_layout(
@@ -517,7 +499,8 @@ class IRFService:
     
     @staticmethod
     def generate_irf_data(session: AnalysisSession, periods: int, shock_var: Optional[str], 
-                         response_vars: List[str]) -> Dict[str, Any]:
+                         response_vars: List[str], ci_method: str = CI_BOOTSTRAP,
+                         replications: int = IRF_REPLICATIONS) -> Dict[str, Any]:
         """
         Generate IRF data (not plot) for VARX analysis.
         
@@ -526,32 +509,30 @@ class IRFService:
             periods: Number of periods for IRF
             shock_var: Variable to shock (None for all)
             response_vars: Variables to measure response (empty for all)
+            ci_method: 'analytic' (delta method) or 'bootstrap'
+            replications: Bootstrap replications
             
         Returns:
             Result dictionary with IRF data or error
         """
         try:
-            # Load dataset and model
-            user_id = session.dataset.user.id if session.dataset.user else None
-            df, column_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
-            model_results, endog_data, dependent_vars = IRFService._load_varx_model_results(session, df)
-            
-            if model_results is None or endog_data is None:
+            arrays = IRFService._load_irf_arrays(session, periods, orth=True, ci_method=ci_method,
+                                                 replications=replications)
+            if arrays is None:
                 return {
                     'success': False,
                     'error': 'Could not load VARX model results. Please re-run the analysis.'
                 }
             
             # Get variable names and indices
-            var_names = list(endog_data.columns) if hasattr(endog_data, 'columns') else dependent_vars
+            var_names = arrays['var_names']
             shock_indices, response_indices = IRFService._get_shock_response_indices(
                 var_names, shock_var, response_vars
             )
             
             # Generate IRF DataFrame
-            irf_df = IRFService._generate_irf_dataframe(
-                model_results, endog_data, var_names, periods, 
-                shock_indices, response_indices, show_ci=True
+            irf_df, used_method = IRFService._generate_irf_dataframe(
+                arrays, var_names, periods, shock_indices, response_indices, ci_method
             )
             
             if irf_df is None or irf_df.empty:
@@ -565,7 +546,8 @@ class IRFService:
             
             return {
                 'success': True,
-                'data': irf_data
+                'data': irf_data,
+                'ci_method': used_method
             }
             
         except Exception as e:
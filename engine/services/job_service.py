@@ -0,0 +1,347 @@
+"""
+Service for background analysis jobs.
+
+Analyses submitted with ``run_in_background`` are stored as AnalysisJob rows
+and executed by ``manage.py run_analysis_worker``, which runs every job in
+its own child process. This service builds job payloads from requests, runs
+a claimed job inside the worker child (storing its progress events on the
+job row), and serves status, progress streams, results and cancellation to
+the views.
+"""
+import json
+import pickle
+import hashlib
+import traceback
+from datetime import datetime
+from typing import Dict, Any, Tuple
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from engine.models import AnalysisJob, AnalysisSession, Dataset
+from models import progress
+
+# Request parameters carried into the job payload for each special module
+_MODULE_PARAMS = {
+    'bma': ('categorical_vars', 'bma_backend', 'bma_prior'),
+    'anova': (),
+    'varx': ('var_order', 'max_lags', 'window_mode', 'window_size', 'window_step'),
+    'structural': ('structural_method', 'structural_bootstrap', 'structural_n_boot'),
+}
+
+
+class JobService:
+    """Service for queuing, running and cancelling background analyses."""
+
+    @staticmethod
+    def wants_background(request) -> bool:
+        """Whether the client asked for the analysis to run as a background job."""
+        return str(request.POST.get('run_in_background', '')).lower() in ('1', 'true', 'on', 'yes')
+
+    @staticmethod
+    def payload_from_request(request, module_name: str, **extra) -> Dict[str, Any]:
+        """
+        Collect the request parameters needed to re-run the analysis in the worker.
+
+        Args:
+            request: Django request object
+            module_name: Module to run
+            **extra: Additional payload entries (e.g. prepared options)
+
+        Returns:
+            JSON-serializable payload dict
+        """
+        payload = {
+            'action': request.POST.get('action', 'new'),
+            'session_id': request.POST.get('session_id'),
+            'session_name': request.POST.get('session_name'),
+            'dataset_id': request.POST.get('dataset_id'),
+            'formula': request.POST.get('formula', ''),
+        }
+        for key in _MODULE_PARAMS.get(module_name, ()):
+            payload[key] = request.POST.get(key)
+        payload.update(extra)
+        return payload
+
+    @staticmethod
+    def enqueue(request, module_name: str, payload: Dict[str, Any]) -> JsonResponse:
+        """
+        Queue an analysis and return the job handle (HTTP 202).
+
+        Returns:
+            JsonResponse with the job id and the status/result/cancel URLs
+        """
+        user = request.user if getattr(request, 'user', None) is not None and request.user.is_authenticated else None
+        job = AnalysisJob.objects.create(
+            user=user,
+            dataset_id=payload.get('dataset_id') or None,
+            module=module_name,
+            payload=payload,
+        )
+        print(f"DEBUG: Queued {module_name} job {job.id}")
+        return JsonResponse({'success': True, **JobService.status_dict(job)}, status=202)
+
+    @staticmethod
+    def status_dict(job: AnalysisJob) -> Dict[str, Any]:
+        """JSON-ready job status with links for polling, results and cancellation."""
+        elapsed = None
+        if job.started_at:
+            elapsed = round(((job.finished_at or timezone.now()) - job.started_at).total_seconds(), 1)
+        return {
+            'job_id': str(job.id),
+            'module': job.module,
+            'status': job.status,
+            'cancel_requested': job.cancel_requested,
+            'error': job.error or None,
+            'session_id': job.session_id,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+            'elapsed_seconds': elapsed,
+            'progress': job.progress or None,
+            'stalled': JobService.is_stalled(job),
+            'status_url': reverse('analysis_job_status', args=[job.id]),
+            'events_url': reverse('analysis_job_events', args=[job.id]),
+            'result_url': reverse('analysis_job_result', args=[job.id]),
+            'cancel_url': reverse('cancel_analysis_job', args=[job.id]),
+        }
+
+    @staticmethod
+    def is_stalled(job: AnalysisJob) -> bool:
+        """Whether a running job has gone ANALYSIS_JOB_STALL_SECONDS without reporting progress."""
+        if job.status != AnalysisJob.STATUS_RUNNING:
+            return False
+        last = job.started_at
+        updated_at = (job.progress or {}).get('updated_at')
+        if updated_at:
+            try:
+                last = datetime.fromisoformat(updated_at)
+            except ValueError:
+                pass
+        if last is None:
+            return False
+        limit = getattr(settings, 'ANALYSIS_JOB_STALL_SECONDS', 300)
+        return (timezone.now() - last).total_seconds() > limit
+
+    @staticmethod
+    def _progress_sink(job_id):
+        """Progress sink that stores the latest event on the job row."""
+        def _store(event):
+            AnalysisJob.objects.filter(pk=job_id).update(progress=event)
+        return _store
+
+    @staticmethod
+    def event_stream(job_id, last_event_id: str = None, poll_interval: float = 0.5, heartbeat: float = 15.0,
+                     max_duration: float = None):
+        """
+        Server-Sent Events for a job: a ``progress`` event whenever the stored
+        progress or status changes, comment heartbeats in between, and a final
+        ``done`` event once the job reaches a final state.
+
+        Each stream ends after ``max_duration`` seconds (ANALYSIS_EVENT_STREAM_SECONDS)
+        so it does not hold a WSGI worker for the length of the job; EventSource
+        reconnects and sends back the id of the last event, and a state the
+        client already has is not sent again.
+        """
+        import time
+
+        if max_duration is None:
+            max_duration = getattr(settings, 'ANALYSIS_EVENT_STREAM_SECONDS', 30)
+        last_state = None
+        last_sent = started = time.monotonic()
+        yield 'retry: 2000\n\n'
+        while True:
+            job = AnalysisJob.objects.filter(pk=job_id).first()
+            if job is None:
+                yield 'event: error\ndata: {"error": "Job not found"}\n\n'
+                return
+            if not job.is_active:
+                yield f'event: done\ndata: {json.dumps(JobService.status_dict(job))}\n\n'
+                return
+            now = time.monotonic()
+            state = (job.status, job.cancel_requested, json.dumps(job.progress, sort_keys=True))
+            if state != last_state:
+                event_id = hashlib.blake2b(json.dumps(state).encode(), digest_size=8).hexdigest()
+                if last_state is not None or event_id != last_event_id:
+                    yield f'id: {event_id}\nevent: progress\ndata: {json.dumps(JobService.status_dict(job))}\n\n'
+                    last_sent = now
+                last_state = state
+            elif now - last_sent >= heartbeat:
+                yield ': keep-alive\n\n'
+                last_sent = now
+            if now - started >= max_duration:
+                # EventSource reconnects on its own with Last-Event-ID
+                return
+            time.sleep(poll_interval)
+
+    @staticmethod
+    def cancel(job: AnalysisJob) -> AnalysisJob:
+        """
+        Cancel a job.
+
+        Queued jobs are cancelled immediately. Running jobs are flagged and the
+        worker terminates their process on its next poll.
+        """
+        now = timezone.now()
+        if AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_QUEUED).update(
+                status=AnalysisJob.STATUS_CANCELLED, cancel_requested=True, finished_at=now):
+            print(f"DEBUG: Cancelled queued job {job.pk}")
+        elif AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_RUNNING).update(cancel_requested=True):
+            print(f"DEBUG: Cancellation requested for running job {job.pk}")
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def _compute(job: AnalysisJob) -> Tuple[str, Dict[str, Any]]:
+        """Run the analysis described by the job payload and return (template_name, context)."""
+        from engine.services.analysis_execution_service import AnalysisExecutionService
+
+        p = job.payload
+        action, session_id, session_name = p.get('action', 'new'), p.get('session_id'), p.get('session_name')
+        if job.module == 'bma':
+            return AnalysisExecutionService.compute_bma_analysis(
+                action, session_id, session_name, p['dataset_id'], p['formula'], p.get('categorical_vars') or '',
+                {k: p.get(k) for k in ('bma_backend', 'bma_prior')})
+        if job.module == 'anova':
+            return AnalysisExecutionService.compute_anova_analysis(
+                action, session_id, session_name, p['dataset_id'], p['formula'])
+        if job.module == 'varx':
+            return AnalysisExecutionService.compute_varx_analysis(
+                action, session_id, session_name, p['dataset_id'], p['formula'],
+                p.get('var_order'), p.get('max_lags') or 10,
+                {k: p.get(k) for k in ('window_mode', 'window_size', 'window_step')})
+        if job.module == 'spec_curve':
+            from engine.services.specification_curve_service import SpecificationCurveService
+            return SpecificationCurveService.compute_job(p)
+        if job.module == 'structural':
+            return AnalysisExecutionService.compute_structural_analysis(
+                action, session_id, session_name, p['dataset_id'], p['formula'], p.get('structural_method') or 'SUR',
+                {k: p.get(k) for k in ('structural_bootstrap', 'structural_n_boot')})
+
+        from data_prep.file_handling import _read_dataset_file
+        from engine.helpers.analysis_helpers import _run_and_save_analysis
+
+        dataset = Dataset.objects.get(pk=p['dataset_id'])
+        df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
+        if p.get('sample_size'):
+            df = df.sample(n=min(int(p['sample_size']), len(df)), random_state=42)
+        return _run_and_save_analysis(
+            action, session_id, session_name, job.module, p['formula'], p.get('analysis_type', 'frequentist'),
+            p.get('template_override', ''), p.get('options') or {}, dataset, df, column_types, schema_orders)
+
+    @staticmethod
+    def _pickle_context(context: Dict[str, Any]) -> bytes:
+        """Pickle a template context, dropping model instances and values that cannot be pickled."""
+        context = {k: v for k, v in context.items() if k not in ('session', 'dataset')}
+        try:
+            return pickle.dumps(context)
+        except Exception:
+            kept = {}
+            for key, value in context.items():
+                try:
+                    pickle.dumps(value)
+                    kept[key] = value
+                except Exception as e:
+                    print(f"DEBUG: Dropping unpicklable context entry '{key}': {e}")
+            return pickle.dumps(kept)
+
+    @staticmethod
+    def execute(job_id) -> None:
+        """
+        Run a claimed job to completion. Called inside the worker's child process.
+
+        The job is only moved to a final state if it is still running, so a
+        cancellation recorded by the worker is never overwritten.
+        """
+        # Connections inherited from the worker must not be shared with the child
+        connections.close_all()
+        job = AnalysisJob.objects.get(pk=job_id)
+        try:
+            with progress.channel(JobService._progress_sink(job_id)):
+                progress.report('starting', message=f'Starting {job.module} analysis')
+                template_name, context = JobService._compute(job)
+            session = context.get('session')
+            updates = {
+                'status': AnalysisJob.STATUS_SUCCEEDED,
+                'template_name': template_name,
+                'result': JobService._pickle_context(context),
+                'session': session if isinstance(session, AnalysisSession) else None,
+                'finished_at': timezone.now(),
+            }
+            if template_name == 'engine/index.html':
+                updates['status'] = AnalysisJob.STATUS_FAILED
+                updates['error'] = str(context.get('error_message', 'Analysis failed'))
+        except Exception as e:
+            print(f"JOB ERROR: {job_id}: {e}")
+            print(traceback.format_exc())
+            updates = {
+                'status': AnalysisJob.STATUS_FAILED,
+                'error': str(e),
+                'finished_at': timezone.now(),
+            }
+        AnalysisJob.objects.filter(pk=job_id, status=AnalysisJob.STATUS_RUNNING).update(**updates)
+        connections.close_all()
+
+    @staticmethod
+    def render_result(request, job: AnalysisJob):
+        """Render the stored results page of a finished job, or None if it has none."""
+        if job.module == 'spec_curve' and job.session_id:
+            from engine.services.specification_curve_service import SpecificationCurveService
+            return JsonResponse({'session_id': job.session_id,
+                                 'results': SpecificationCurveService.load_results(job.session)})
+        if not job.result or not job.template_name:
+            return None
+        from engine.services.analysis_execution_service import AnalysisExecutionService
+
+        context = pickle.loads(job.result)
+        if job.session_id:
+            context['session'] = job.session
+        if job.template_name != 'engine/index.html':
+            context['dataset'] = job.session.dataset if job.session_id else job.dataset
+        return AnalysisExecutionService.render_result(request, job.template_name, context)
+
+    @staticmethod
+    def claimable_jobs(limit: int):
+        """
+        Queued jobs the worker may start now, oldest first, honouring ANALYSIS_JOBS_PER_USER.
+
+        Anonymous jobs (no user) cannot be told apart by owner, so they are
+        exempt from the per-user cap and limited only by the worker's own
+        concurrency; otherwise every anonymous visitor would share one slot.
+        """
+        per_user = max(1, getattr(settings, 'ANALYSIS_JOBS_PER_USER', 1))
+        running = {}
+        for user_id in AnalysisJob.objects.filter(status=AnalysisJob.STATUS_RUNNING,
+                                                  user__isnull=False).values_list('user_id', flat=True):
+            running[user_id] = running.get(user_id, 0) + 1
+
+        jobs = []
+        for job in AnalysisJob.objects.filter(status=AnalysisJob.STATUS_QUEUED, cancel_requested=False)[:limit * 10]:
+            if len(jobs) >= limit:
+                break
+            if job.user_id is not None:
+                if running.get(job.user_id, 0) >= per_user:
+                    continue
+                running[job.user_id] = running.get(job.user_id, 0) + 1
+            jobs.append(job)
+        return jobs
+
+    @staticmethod
+    def claim(job: AnalysisJob, host: str) -> bool:
+        """Atomically move a queued job to running; False if another worker got it first."""
+        return bool(AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_QUEUED).update(
+            status=AnalysisJob.STATUS_RUNNING, started_at=timezone.now(), worker_host=host))
+
+    @staticmethod
+    def finish(job_id, status: str, error: str = '') -> bool:
+        """Record a final state for a job still marked running (used by the worker)."""
+        return bool(AnalysisJob.objects.filter(pk=job_id, status=AnalysisJob.STATUS_RUNNING).update(
+            status=status, error=error, finished_at=timezone.now()))
+
+    @staticmethod
+    def active_jobs_for_session(session_id) -> list:
+        """Queued or running jobs that update the given session."""
+        session_id = str(session_id)
+        return [job for job in AnalysisJob.objects.filter(status__in=AnalysisJob.ACTIVE_STATUSES)
+                if str(job.payload.get('session_id') or '') == session_id or str(job.session_id) == session_id]
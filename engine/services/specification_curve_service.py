@@ -0,0 +1,152 @@
+"""
+Service for batch specification-curve analyses.
+
+This service parses batch requests (a base formula plus optional control
+blocks), runs every specification through the shared-design runner in
+models.specification_curve and stores the compact per-spec results on an
+AnalysisSession. Batches run either in a streaming request or as a
+background job (module 'spec_curve') through JobService.
+"""
+from typing import Dict, Any, Optional, Tuple, Callable
+from django.utils import timezone
+from engine.models import AnalysisSession, Dataset
+from data_prep.file_handling import _read_dataset_file
+from models import progress
+from models.specification_curve import (
+    MAX_SPECIFICATIONS,
+    SpecificationCurveResults,
+    run_specification_curve,
+)
+
+
+class SpecificationCurveService:
+    """Service for specification-curve batch runs."""
+
+    @staticmethod
+    def parse_request(data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Parse and validate a batch request.
+
+        Args:
+            data: Request payload with 'formula' (e.g. "y ~ x + age"), optional
+                'focal' term (defaults to the first right-hand-side term),
+                'control_blocks' (list of "a + b" strings or lists of terms)
+                and optional 'alpha'
+
+        Returns:
+            Tuple of (spec dict, error message)
+        """
+        formula = (data.get('formula') or '').strip()
+        if '~' not in formula:
+            return None, 'Base formula must have the form "y ~ x + controls"'
+
+        lhs, rhs = formula.split('~', 1)
+        outcome = lhs.strip()
+        terms = [t.strip() for t in rhs.split('+') if t.strip()]
+        if not outcome or not terms:
+            return None, 'Base formula needs an outcome and at least one predictor'
+
+        focal = (data.get('focal') or terms[0]).strip()
+        base_controls = [t for t in terms if t != focal]
+
+        blocks = []
+        for block in data.get('control_blocks') or []:
+            if isinstance(block, str):
+                block = [t.strip() for t in block.split('+')]
+            block = [t.strip() for t in block if t and t.strip()]
+            if block:
+                blocks.append(block)
+        if not blocks:
+            return None, 'Provide at least one optional control block'
+        if 2 ** len(blocks) > MAX_SPECIFICATIONS:
+            return None, f'{len(blocks)} control blocks give {2 ** len(blocks)} specifications (limit {MAX_SPECIFICATIONS})'
+
+        try:
+            alpha = float(data.get('alpha', 0.05))
+        except (TypeError, ValueError):
+            alpha = 0.05
+        if not 0 < alpha < 1:
+            alpha = 0.05
+
+        return {
+            'formula': formula,
+            'outcome': outcome,
+            'focal': focal,
+            'base_controls': base_controls,
+            'control_blocks': blocks,
+            'alpha': alpha,
+        }, None
+
+    @staticmethod
+    def run(dataset, spec: Dict[str, Any],
+            progress: Optional[Callable[[int, int], None]] = None) -> SpecificationCurveResults:
+        """
+        Run every specification on the dataset.
+
+        Args:
+            dataset: Dataset object
+            spec: Parsed request from parse_request
+            progress: Optional callback progress(done, total)
+
+        Returns:
+            SpecificationCurveResults
+        """
+        df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
+        return run_specification_curve(
+            df,
+            spec['outcome'],
+            spec['focal'],
+            spec['base_controls'],
+            spec['control_blocks'],
+            alpha=spec['alpha'],
+            progress=progress,
+        )
+
+    @staticmethod
+    def compute_job(payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Run a queued batch inside the job worker and store it on a new session.
+
+        Returns:
+            Tuple of ('', context); there is no results page, the stored set is
+            served by the session's spec-curve endpoint
+        """
+        dataset = Dataset.objects.get(pk=payload['dataset_id'])
+        spec = payload['spec']
+        results = SpecificationCurveService.run(
+            dataset, spec,
+            progress=lambda done, total: progress.report(
+                'fitting', done, total, unit='specifications', message=f'Fitted {done} of {total} specifications'),
+        )
+        sess = SpecificationCurveService.save_results(dataset, spec, results, payload.get('session_name'))
+        return '', {'session': sess, 'n_specs': len(results)}
+
+    @staticmethod
+    def save_results(dataset, spec: Dict[str, Any], results: SpecificationCurveResults,
+                     session_name: Optional[str] = None) -> AnalysisSession:
+        """Store the batch as a 'spec_curve' session with compact binary results."""
+        sess = AnalysisSession(
+            name=session_name or f"Specification Curve {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            module='spec_curve',
+            formula=spec['formula'],
+            analysis_type='frequentist',
+            options={k: spec[k] for k in ('focal', 'control_blocks', 'alpha')},
+            dataset=dataset,
+            user=None,
+        )
+        sess.batch_results = results.to_bytes()
+        sess.save()
+        print(f"Stored specification curve ({len(results)} specs, {len(sess.batch_results)} bytes) in session {sess.id}")
+        return sess
+
+    @staticmethod
+    def load_results(session: AnalysisSession) -> Optional[Dict[str, Any]]:
+        """Load stored batch results as a JSON-ready dict, or None if absent."""
+        if not session.batch_results:
+            return None
+        try:
+            results = SpecificationCurveResults.from_bytes(session.batch_results)
+        except Exception as e:
+            print(f"Failed to load specification curve results: {e}")
+            return None
+        return results.to_dict() if results is not None else None
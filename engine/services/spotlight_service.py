@@ -12,7 +12,9 @@ from django.conf import settings
 from engine.models import AnalysisSession
 from engine.modules import get_module
 from data_prep.file_handling import _read_dataset_file
-from models.regression import generate_spotlight_for_interaction
+from engine.lazy import lazy_module
+
+regression = lazy_module('models.regression')
 
 
 class SpotlightService:
@@ -62,6 +64,66 @@ class SpotlightService:
         
         return fitted_model
     
+    @staticmethod
+    def load_precomputed_predictions(session: AnalysisSession) -> Optional[Any]:
+        """
+        Load pre-generated ordinal/multinomial predictions for a session.
+        
+        Reads the compact binary artifact, falling back to the legacy JSON
+        fields for sessions saved before it existed.
+        
+        Args:
+            session: AnalysisSession object
+            
+        Returns:
+            PrecomputedPredictions or None if unavailable
+        """
+        from models.prediction_store import PrecomputedPredictions
+        
+        try:
+            if getattr(session, 'precomputed_predictions', None):
+                return PrecomputedPredictions.from_bytes(session.precomputed_predictions)
+            if getattr(session, 'ordinal_predictions', None):
+                return PrecomputedPredictions.from_legacy_dict('ordinal', session.ordinal_predictions)
+            if getattr(session, 'multinomial_predictions', None):
+                return PrecomputedPredictions.from_legacy_dict('multinomial', session.multinomial_predictions)
+        except Exception as e:
+            print(f"Failed to load precomputed predictions: {e}")
+        return None
+    
+    @staticmethod
+    def generate_bayesian_spotlight(
+        session: AnalysisSession,
+        df: pd.DataFrame,
+        interaction: str,
+        options: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        Generate a Bayesian spotlight plot from the session's stored posterior draws.
+        
+        Args:
+            session: AnalysisSession object
+            df: DataFrame with the dataset
+            interaction: Interaction string
+            options: Options dictionary
+            
+        Returns:
+            Plot JSON string or None if no posterior is stored
+        """
+        from models import posterior_store
+        from models.bayesian_regression import build_posterior_spotlight_json
+        
+        store = posterior_store.PosteriorStore.open(posterior_store.path_for_session(session.pk))
+        if store is None:
+            print(f"DEBUG: No stored posterior for session {session.pk}")
+            return None
+        x_var, moderator_var = SpotlightService.parse_interaction(interaction)
+        plot_options = options.copy()
+        if options.get('moderator_var'):
+            plot_options['moderator_display_name'] = options['moderator_var']
+        with store:
+            return build_posterior_spotlight_json(store, df, x_var, moderator_var, plot_options)
+    
     @staticmethod
     def prepare_spotlight_options(request, session: AnalysisSession) -> Dict[str, Any]:
         """
@@ -235,7 +297,7 @@ class SpotlightService:
         Returns:
             Plot JSON string or None on error
         """
-        return generate_spotlight_for_interaction(
+        return regression.generate_spotlight_for_interaction(
             fitted_model, 
             df, 
             interaction, 
@@ -5,16 +5,21 @@ and ANOVA plots.
 This service encapsulates visualization logic to keep views thin and
 improve maintainability.
 """
+import os
 import json
+import hashlib
 import pandas as pd
 from typing import List, Dict, Any, Optional, Tuple
+from django.core.cache import cache
 from engine.models import AnalysisSession
 from data_prep.file_handling import _read_dataset_file
-from models.regression import (
-    _build_correlation_heatmap_json,
-    _get_continuous_variables,
-    _get_continuous_variables_from_formula
-)
+from engine.lazy import lazy_module
+
+regression = lazy_module('models.regression')
+granger = lazy_module('models.granger')
+
+# Seconds an ANOVA plot stays cached; the key includes the dataset file's size and mtime
+ANOVA_PLOT_CACHE_SECONDS = 24 * 3600
 
 
 class VisualizationService:
@@ -82,11 +87,11 @@ class VisualizationService:
         df, schema_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
         
         # Get continuous variables from the equation (default behavior)
-        continuous_vars = _get_continuous_variables_from_formula(df, session.formula)
+        continuous_vars = regression._get_continuous_variables_from_formula(df, session.formula)
         
         # If no continuous variables in equation, fall back to all continuous variables
         if len(continuous_vars) < 2:
-            continuous_vars = _get_continuous_variables(df)
+            continuous_vars = regression._get_continuous_variables(df)
             if len(continuous_vars) < 2:
                 raise ValueError('Need at least 2 continuous variables for correlation heatmap')
         
@@ -129,14 +134,17 @@ class VisualizationService:
             session: AnalysisSession object
             x_vars: List of x-axis variables
             y_vars: List of y-axis variables
-            options: Options dictionary (show_significance, color_scheme)
+            options: Options dictionary (show_significance, color_scheme, correlation_type)
             
         Returns:
             Heatmap JSON string or None on error
         """
         user_id = session.dataset.user.id if session.dataset.user else None
         df, schema_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
-        return _build_correlation_heatmap_json(df, x_vars, y_vars, options)
+        # Only numeric columns go to the vectorized correlation engine
+        columns = [v for v in dict.fromkeys(x_vars + y_vars) if v in df.columns]
+        numeric = df[columns].select_dtypes(include=['number', 'bool'])
+        return regression._build_correlation_heatmap_json(numeric, x_vars, y_vars, options)
     
     @staticmethod
     def prepare_heatmap_options(request) -> Dict[str, Any]:
@@ -149,11 +157,108 @@ class VisualizationService:
         Returns:
             Options dictionary
         """
+        correlation_type = request.POST.get('correlation_type', 'pearson').lower()
         return {
             'show_significance': request.POST.get('show_significance', 'true').lower() == 'true',
-            'color_scheme': request.POST.get('color_scheme', 'RdBu')
+            'color_scheme': request.POST.get('color_scheme', 'RdBu'),
+            'correlation_type': correlation_type if correlation_type in ('pearson', 'partial') else 'pearson',
         }
     
+    @staticmethod
+    def generate_granger_heatmap(
+        session: AnalysisSession,
+        variables: List[str],
+        lags: Optional[int] = None,
+        alpha: float = 0.05
+    ) -> Dict[str, Any]:
+        """
+        Generate the Granger causality matrix of a VARX session and its heatmap.
+        
+        Args:
+            session: AnalysisSession object (VARX)
+            variables: Endogenous variables to include (empty for all)
+            lags: VAR lag order (None uses the session's fitted order)
+            alpha: Significance level marked on the heatmap
+            
+        Returns:
+            Dictionary with the test results and heatmap JSON string
+        """
+        from engine.services.irf_service import IRFService
+        
+        user_id = session.dataset.user.id if session.dataset.user else None
+        df, column_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
+        model_results, endog_data, dependent_vars = IRFService._load_varx_model_results(session, df)
+        if model_results is None or endog_data is None:
+            raise RuntimeError('Could not load VARX model results. Please re-run the analysis.')
+        
+        unknown = [v for v in variables if v not in endog_data.columns]
+        if unknown:
+            raise ValueError(f"Not endogenous variables of this model: {', '.join(unknown)}")
+        endog = endog_data[variables] if variables else endog_data
+        exog = getattr(model_results, 'exog', None)
+        result = granger.granger_causality_matrix(endog, exog, lags or int(model_results.k_ar))
+        return {
+            'results': result,
+            'heatmap': granger.build_granger_heatmap_json(result, alpha),
+        }
+    
+    @staticmethod
+    def _dataset_version(session: AnalysisSession) -> Optional[str]:
+        """Version of the session's dataset file (size and modification time), or None if it cannot be read."""
+        try:
+            st = os.stat(session.dataset.file_path)
+        except (OSError, TypeError, ValueError):
+            return None
+        return f'{st.st_size}-{st.st_mtime_ns}'
+    
+    @staticmethod
+    def _anova_plot_key(session: AnalysisSession, version: str, request: Dict[str, Any], sig_level: float) -> str:
+        spec = json.dumps([request['x_var'], request['y_var'], request.get('group_var') or None,
+                           float(request.get('x_std', 1.0)), float(request.get('group_std', 1.0)), float(sig_level)])
+        digest = hashlib.blake2b(spec.encode(), digest_size=12).hexdigest()
+        return f'anova_plot:{session.dataset.pk}:{version}:{digest}'
+    
+    @staticmethod
+    def generate_anova_plots(
+        session: AnalysisSession,
+        requests: List[Dict[str, Any]],
+        sig_level: float = 0.05
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate many ANOVA plots in one pass.
+        
+        Plots are cached per dataset version, so only the requests missing
+        from the cache read the dataset (once) and are computed together.
+        
+        Args:
+            session: AnalysisSession object
+            requests: List of dictionaries with x_var, y_var, group_var, x_std, group_std
+            sig_level: Significance level for asterisks
+            
+        Returns:
+            One result dictionary per request, in order
+        """
+        from models.ANOVA import generate_anova_plots
+        
+        version = VisualizationService._dataset_version(session)
+        keys = [VisualizationService._anova_plot_key(session, version, r, sig_level) for r in requests] \
+            if version is not None else [None] * len(requests)
+        cached = cache.get_many([k for k in keys if k]) if version is not None else {}
+        results = [cached.get(k) if k else None for k in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        print(f"DEBUG: ANOVA plots: {len(requests) - len(missing)} cached, {len(missing)} to compute")
+        if not missing:
+            return results
+        
+        user_id = session.dataset.user.id if session.dataset.user else None
+        df, column_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
+        computed = generate_anova_plots(df, [requests[i] for i in missing], sig_level)
+        for i, result in zip(missing, computed):
+            results[i] = result
+        if version is not None:
+            cache.set_many({keys[i]: r for i, r in zip(missing, computed)}, ANOVA_PLOT_CACHE_SECONDS)
+        return results
+    
     @staticmethod
     def generate_anova_plot_data(
         session: AnalysisSession,
@@ -169,18 +274,7 @@ class VisualizationService:
         Returns:
             Result dictionary from ANOVA plot generation
         """
-        from models.ANOVA import generate_anova_plot
-        
-        user_id = session.dataset.user.id if session.dataset.user else None
-        df, column_types, schema_orders = _read_dataset_file(session.dataset.file_path, user_id=user_id)
-        
-        return generate_anova_plot(
-            df,
-            plot_params['x_var'],
-            plot_params['y_var'],
-            plot_params.get('group_var'),
-            plot_params.get('x_std', 1.0),
-            plot_params.get('group_std', 1.0),
-            plot_params.get('sig_level', 0.05)
-        )
+        return VisualizationService.generate_anova_plots(
+            session, [plot_params], plot_params.get('sig_level', 0.05)
+        )[0]
 
@@ -12,8 +12,10 @@ from engine.views.sessions import (
 )
 from engine.views.analysis import (
     run_analysis, run_bma_analysis, run_anova_analysis, run_varx_analysis,
-    generate_varx_irf_view, generate_varx_irf_data_view, calculate_summary_stats,
-    add_model_errors_to_dataset, cancel_bayesian_analysis
+    generate_varx_irf_view, generate_varx_irf_data_view, generate_varx_forecast_view, calculate_summary_stats,
+    add_model_errors_to_dataset, cancel_bayesian_analysis,
+    run_specification_curve, specification_curve_results,
+    analysis_job_status, analysis_job_events, analysis_job_result, cancel_analysis_job
 )
 from engine.views.utils import download_file
 from engine.views.datasets import (
@@ -23,7 +25,8 @@ from engine.views.datasets import (
 )
 from engine.views.visualization import (
     visualize_data, generate_plot, generate_spotlight_plot,
-    generate_correlation_heatmap, generate_anova_plot_view,
+    generate_correlation_heatmap, generate_granger_heatmap, generate_anova_plot_view, generate_anova_plot_grid_view,
+    generate_trace_plot, posterior_summary, bma_plot,
     _generate_multinomial_ordinal_spotlight_from_predictions
 )
 from engine.views.papers import (
@@ -59,6 +62,10 @@ urlpatterns = [
     path('dataprep/convert-date-format/<int:dataset_id>/', dataprep_views.convert_date_format_api, name='dataprep_convert_date_format'),
     path('session/<int:session_id>/spotlight/', generate_spotlight_plot, name='generate_spotlight_plot'),
     path('session/<int:session_id>/correlation-heatmap/', generate_correlation_heatmap, name='generate_correlation_heatmap'),
+    path('session/<int:session_id>/granger-heatmap/', generate_granger_heatmap, name='generate_granger_heatmap'),
+    path('session/<int:session_id>/trace-plot/', generate_trace_plot, name='generate_trace_plot'),
+    path('api/session/<int:session_id>/posterior/', posterior_summary, name='posterior_summary'),
+    path('api/session/<int:session_id>/bma-plot/', bma_plot, name='bma_plot'),
     path('api/dataset/<int:dataset_id>/variables/', get_dataset_variables, name='get_dataset_variables'),
     path('api/dataset/<int:dataset_id>/update-sessions/', update_sessions_for_variable_rename, name='update_sessions_for_variable_rename'),
     path('api/dataset/<int:dataset_id>/preview-drop/', preview_drop_rows, name='preview_drop_rows'),
@@ -70,11 +77,19 @@ urlpatterns = [
     path('bma/', run_bma_analysis, name='run_bma_analysis'),
     path('anova/', run_anova_analysis, name='run_anova_analysis'),
     path('session/<int:session_id>/anova-plot/', generate_anova_plot_view, name='generate_anova_plot'),
+    path('session/<int:session_id>/anova-plots/', generate_anova_plot_grid_view, name='generate_anova_plot_grid'),
     path('varx/', run_varx_analysis, name='run_varx_analysis'),
     path('session/<int:session_id>/varx-irf/', generate_varx_irf_view, name='generate_varx_irf'),
     path('session/<int:session_id>/varx-irf-data/', generate_varx_irf_data_view, name='generate_varx_irf_data'),
+    path('session/<int:session_id>/varx-forecast/', generate_varx_forecast_view, name='generate_varx_forecast'),
     path('session/<int:session_id>/history/', download_session_history_view, name='download_session_history'),
     path('session/<int:session_id>/add-model-errors/', add_model_errors_to_dataset, name='add_model_errors_to_dataset'),
+    path('api/spec-curve/', run_specification_curve, name='run_specification_curve'),
+    path('api/session/<int:session_id>/spec-curve/', specification_curve_results, name='specification_curve_results'),
+    path('api/jobs/<uuid:job_id>/', analysis_job_status, name='analysis_job_status'),
+    path('api/jobs/<uuid:job_id>/events/', analysis_job_events, name='analysis_job_events'),
+    path('api/jobs/<uuid:job_id>/cancel/', cancel_analysis_job, name='cancel_analysis_job'),
+    path('jobs/<uuid:job_id>/result/', analysis_job_result, name='analysis_job_result'),
     # Papers
     path('papers/', paper_list, name='paper_list'),
     path('papers/create/', paper_create, name='paper_create'),
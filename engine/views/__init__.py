@@ -40,16 +40,28 @@ from .analysis import (
     run_varx_analysis,
     generate_varx_irf_view,
     generate_varx_irf_data_view,
+    generate_varx_forecast_view,
     calculate_summary_stats,
     add_model_errors_to_dataset,
     cancel_bayesian_analysis,
+    run_specification_curve,
+    specification_curve_results,
+    analysis_job_status,
+    analysis_job_events,
+    analysis_job_result,
+    cancel_analysis_job,
 )
 from .visualization import (
     visualize_data,
     generate_plot,
     generate_spotlight_plot,
     generate_correlation_heatmap,
+    generate_granger_heatmap,
     generate_anova_plot_view,
+    generate_anova_plot_grid_view,
+    generate_trace_plot,
+    posterior_summary,
+    bma_plot,
     _generate_multinomial_ordinal_spotlight_from_predictions,
 )
 from .utils import download_file
@@ -83,15 +95,27 @@ __all__ = [
     'run_varx_analysis',
     'generate_varx_irf_view',
     'generate_varx_irf_data_view',
+    'generate_varx_forecast_view',
     'calculate_summary_stats',
     'add_model_errors_to_dataset',
     'cancel_bayesian_analysis',
+    'run_specification_curve',
+    'specification_curve_results',
+    'analysis_job_status',
+    'analysis_job_events',
+    'analysis_job_result',
+    'cancel_analysis_job',
     # Visualization
     'visualize_data',
     'generate_plot',
     'generate_spotlight_plot',
     'generate_correlation_heatmap',
+    'generate_granger_heatmap',
     'generate_anova_plot_view',
+    'generate_anova_plot_grid_view',
+    'generate_trace_plot',
+    'posterior_summary',
+    'bma_plot',
     '_generate_multinomial_ordinal_spotlight_from_predictions',
     # Utils
     'download_file',
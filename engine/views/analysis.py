@@ -1,30 +1,31 @@
 """
 Views for analysis execution (run_analysis, BMA, ANOVA, VARX, etc.).
 """
-import os
-import uuid
 import json
 import pandas as pd
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponse, JsonResponse
-from django.conf import settings
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from engine.models import Dataset, AnalysisSession
+from engine.models import Dataset, AnalysisSession, AnalysisJob
 from engine.modules import get_module
 from data_prep.file_handling import _read_dataset_file
 from engine.helpers.analysis_helpers import (
     _validate_equation,
     _prepare_options,
-    _execute_analysis,
-    _build_table_data,
-    _save_results,
-    _prepare_template_context,
-    _determine_template,
+    _run_and_save_analysis,
 )
 from engine.services.analysis_execution_service import AnalysisExecutionService
-from engine.services.irf_service import IRFService
+from engine.services.job_service import JobService
+from engine.services.irf_service import (
+    IRFService, CI_BOOTSTRAP, CI_METHODS, IRF_MAX_REPLICATIONS, IRF_REPLICATIONS,
+)
+from engine.services.forecast_service import ForecastService
+from models.varx_forecast import (
+    DEFAULT_HORIZON as DEFAULT_FORECAST_HORIZON, DEFAULT_PATHS as DEFAULT_FORECAST_PATHS,
+    MAX_HORIZON as MAX_FORECAST_HORIZON, MAX_PATHS as MAX_FORECAST_PATHS,
+)
 from engine.services.dataset_validation_service import DatasetValidationService
 from engine.views.sessions import _list_context
 
@@ -44,6 +45,7 @@ def run_analysis(request):
         return HttpResponse('Please select a dataset from the dropdown', status=400)
     dataset = get_object_or_404(Dataset, pk=dataset_id)
 
+    sample_size = None
     try:
         df, column_types, schema_orders = _read_dataset_file(dataset.file_path)
         
@@ -105,25 +107,22 @@ def run_analysis(request):
     if module_name == 'structural':
         return run_structural_analysis(request)
     
-    # Execute analysis
-    job_id = str(uuid.uuid4())[:8]
-    outdir = os.path.join(settings.MEDIA_ROOT, job_id)
-    os.makedirs(outdir, exist_ok=True)
-    
-    results = _execute_analysis(module_name, df, formula, analysis_type, options, column_types, schema_orders, outdir)
-    
-    # Build table data
-    cols, model_table_matrix, estimate_col_index = _build_table_data(results)
-    
-    # Save results to session
-    sess = _save_results(request, action, session_id, session_name, module_name, formula, 
-                         analysis_type, options, dataset, results, cols, model_table_matrix)
-    
-    # Prepare template context
-    ctx = _prepare_template_context(sess, dataset, results, cols, model_table_matrix, estimate_col_index, options)
+    # Queue long-running analyses for the background worker
+    if JobService.wants_background(request):
+        return JobService.enqueue(request, module_name, JobService.payload_from_request(
+            request, module_name,
+            session_name=session_name,
+            analysis_type=analysis_type,
+            template_override=template_override,
+            options=options,
+            sample_size=sample_size if len(df) == sample_size else None,
+        ))
     
-    # Determine template
-    template_name = _determine_template(results, template_override, analysis_type)
+    # Execute analysis, save the session and build the results context
+    template_name, ctx = _run_and_save_analysis(
+        action, session_id, session_name, module_name, formula, analysis_type,
+        template_override, options, dataset, df, column_types, schema_orders
+    )
     
     return render(request, template_name, ctx)
 
@@ -170,23 +169,31 @@ def calculate_summary_stats(request, session_id):
 @csrf_exempt
 @require_http_methods(["POST"])
 def cancel_bayesian_analysis(request):
-    """Cancel a running Bayesian analysis"""
+    """Cancel a running Bayesian analysis (by job ID, or every active job for a session)"""
     try:
         data = json.loads(request.body)
+        job_id = data.get('job_id')
         session_id = data.get('session_id')
         
-        if session_id:
-            # Cancel specific session
-            session = get_object_or_404(AnalysisSession, pk=session_id)
-            
-            # Instead of marking as cancelled, we'll just return success
-            # The frontend will reload to show the previous state
+        if job_id:
+            jobs = [get_object_or_404(AnalysisJob, pk=job_id)]
+        elif session_id:
+            get_object_or_404(AnalysisSession, pk=session_id)
+            jobs = JobService.active_jobs_for_session(session_id)
+        else:
+            return JsonResponse({'error': 'Job ID or session ID required'}, status=400)
+        
+        jobs = [JobService.cancel(job) for job in jobs]
+        if not jobs:
             return JsonResponse({
-                'success': True,
-                'message': 'Analysis cancellation requested'
+                'success': False,
+                'message': 'No queued or running analysis found for this session'
             })
-        else:
-            return JsonResponse({'error': 'Session ID required'}, status=400)
+        return JsonResponse({
+            'success': True,
+            'message': 'Analysis cancellation requested',
+            'jobs': [JobService.status_dict(job) for job in jobs]
+        })
             
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON data'}, status=400)
@@ -194,11 +201,57 @@ def cancel_bayesian_analysis(request):
         return JsonResponse({'error': f'Error cancelling analysis: {str(e)}'}, status=500)
 
 
+def analysis_job_status(request, job_id):
+    """Poll the status of a background analysis job."""
+    job = get_object_or_404(AnalysisJob, pk=job_id)
+    return JsonResponse(JobService.status_dict(job))
+
+
+def analysis_job_events(request, job_id):
+    """Stream progress of a background analysis job as Server-Sent Events."""
+    from django.http import StreamingHttpResponse
+
+    get_object_or_404(AnalysisJob, pk=job_id)
+    last_event_id = request.headers.get('Last-Event-ID')
+    response = StreamingHttpResponse(JobService.event_stream(job_id, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Let nginx pass events through unbuffered
+    return response
+
+
+def analysis_job_result(request, job_id):
+    """Render the results page of a finished background job."""
+    job = get_object_or_404(AnalysisJob, pk=job_id)
+    if job.is_active:
+        return JsonResponse({'error': 'Analysis has not finished yet', **JobService.status_dict(job)}, status=409)
+    response = JobService.render_result(request, job)
+    if response is not None:
+        return response
+    message = job.error or f'Analysis {job.status}'
+    return render(request, 'engine/index.html', {
+        **_list_context(),
+        'error_message': message
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def cancel_analysis_job(request, job_id):
+    """Cancel a queued or running background analysis job."""
+    job = get_object_or_404(AnalysisJob, pk=job_id)
+    job = JobService.cancel(job)
+    return JsonResponse({'success': job.cancel_requested or job.status == AnalysisJob.STATUS_CANCELLED,
+                         **JobService.status_dict(job)})
+
+
 def run_bma_analysis(request):
     """Handle BMA analysis requests"""
     if request.method != 'POST':
         return HttpResponse('POST only', status=405)
     
+    if JobService.wants_background(request):
+        return JobService.enqueue(request, 'bma', JobService.payload_from_request(request, 'bma'))
+    
     try:
         # Get parameters from request
         action = request.POST.get('action', 'new')
@@ -206,10 +259,11 @@ def run_bma_analysis(request):
         dataset_id = request.POST.get('dataset_id')
         formula = request.POST.get('formula', '')
         categorical_vars = request.POST.get('categorical_vars', '')
+        engine_options = {k: request.POST.get(k, '') for k in ('bma_backend', 'bma_prior')}
         
         # Execute BMA analysis using service
         return AnalysisExecutionService.execute_bma_analysis(
-            request, action, session_id, dataset_id, formula, categorical_vars
+            request, action, session_id, dataset_id, formula, categorical_vars, engine_options
         )
         
     except Exception as e:
@@ -224,6 +278,9 @@ def run_anova_analysis(request):
     if request.method != 'POST':
         return HttpResponse('POST only', status=405)
     
+    if JobService.wants_background(request):
+        return JobService.enqueue(request, 'anova', JobService.payload_from_request(request, 'anova'))
+    
     try:
         # Get parameters from request
         action = request.POST.get('action', 'new')
@@ -252,6 +309,9 @@ def run_varx_analysis(request):
     if request.method != 'POST':
         return HttpResponse('POST only', status=405)
     
+    if JobService.wants_background(request):
+        return JobService.enqueue(request, 'varx', JobService.payload_from_request(request, 'varx'))
+    
     try:
         # Get parameters from request
         action = request.POST.get('action', 'new')
@@ -296,6 +356,9 @@ def run_structural_analysis(request):
     if request.method != 'POST':
         return HttpResponse('POST only', status=405)
     
+    if JobService.wants_background(request):
+        return JobService.enqueue(request, 'structural', JobService.payload_from_request(request, 'structural'))
+    
     try:
         # Get parameters from request
         action = request.POST.get('action', 'new')
@@ -320,6 +383,20 @@ def run_structural_analysis(request):
         })
 
 
+def _irf_ci_params(data):
+    """(ci_method, replications, error) from an IRF request body."""
+    ci_method = data.get('ci_method') or data.get('irf_ci_method') or CI_BOOTSTRAP
+    if ci_method not in CI_METHODS:
+        return None, None, f"ci_method must be one of: {', '.join(CI_METHODS)}"
+    try:
+        replications = int(data.get('replications') or data.get('irf_replications') or IRF_REPLICATIONS)
+    except (TypeError, ValueError):
+        return None, None, 'replications must be an integer'
+    if not 1 <= replications <= IRF_MAX_REPLICATIONS:
+        return None, None, f'replications must be between 1 and {IRF_MAX_REPLICATIONS}'
+    return ci_method, replications, None
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def generate_varx_irf_view(request, session_id):
@@ -343,10 +420,13 @@ def generate_varx_irf_view(request, session_id):
                 response_vars = [response_var]
         shock_type = data.get('shock_type', 'orthogonal')
         show_ci = data.get('show_ci', data.get('irf_show_ci', True))
+        ci_method, replications, error = _irf_ci_params(data)
+        if error:
+            return JsonResponse({'error': error}, status=400)
         
         # Generate IRF using service
         result = IRFService.generate_irf_plot(
-            session, periods, shock_var, response_vars, shock_type, show_ci
+            session, periods, shock_var, response_vars, shock_type, show_ci, ci_method, replications
         )
         
         if not result.get('success', True):
@@ -380,8 +460,12 @@ def generate_varx_irf_data_view(request, session_id):
             if response_var:
                 response_vars = [response_var]
         
+        ci_method, replications, error = _irf_ci_params(data)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+        
         # Generate IRF data using service
-        result = IRFService.generate_irf_data(session, periods, shock_var, response_vars)
+        result = IRFService.generate_irf_data(session, periods, shock_var, response_vars, ci_method, replications)
         
         if not result.get('success', True):
             return JsonResponse({'error': result.get('error', 'Failed to generate IRF data')}, status=500)
@@ -392,6 +476,43 @@ def generate_varx_irf_data_view(request, session_id):
         return JsonResponse({'error': f'Error generating IRF data: {str(e)}'}, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def generate_varx_forecast_view(request, session_id):
+    """Forecast a VARX session under an exogenous scenario, with a fan chart"""
+    try:
+        session = get_object_or_404(AnalysisSession, pk=session_id)
+        
+        is_valid, error = ForecastService.validate_session_for_forecast(session)
+        if not is_valid:
+            return JsonResponse({'error': error}, status=400)
+        
+        data = json.loads(request.body or '{}')
+        try:
+            horizon = int(data.get('horizon', DEFAULT_FORECAST_HORIZON))
+            paths = int(data.get('paths', DEFAULT_FORECAST_PATHS))
+        except (TypeError, ValueError):
+            return JsonResponse({'error': 'horizon and paths must be integers'}, status=400)
+        if not 1 <= horizon <= MAX_FORECAST_HORIZON:
+            return JsonResponse({'error': f'horizon must be between 1 and {MAX_FORECAST_HORIZON}'}, status=400)
+        if not 100 <= paths <= MAX_FORECAST_PATHS:
+            return JsonResponse({'error': f'paths must be between 100 and {MAX_FORECAST_PATHS}'}, status=400)
+        scenario = data.get('scenario') or {}
+        if not isinstance(scenario, dict):
+            return JsonResponse({'error': 'scenario must map exogenous variables to a rule, value or path'}, status=400)
+        
+        result = ForecastService.generate_forecast(session, horizon, scenario, paths)
+        if not result.get('success'):
+            return JsonResponse({'error': result.get('error', 'Failed to generate forecast')},
+                                status=result.get('status', 500))
+        return JsonResponse(result)
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': f'Error generating forecast: {str(e)}'}, status=500)
+
+
 
 
 def add_model_errors_to_dataset(request, session_id):
@@ -514,3 +635,82 @@ def add_model_errors_to_dataset(request, session_id):
         print(error_msg)
         return JsonResponse({'error': f'Failed to add model errors: {str(e)}'}, status=500)
 
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def run_specification_curve(request):
+    """
+    Run a batch specification curve and stream progress as newline-delimited JSON.
+    
+    Each line is a JSON object: {"stage": "fitting", "done": i, "total": n}
+    while specifications are solved, then a final {"stage": "done", ...} with
+    the session id and the result set (or {"stage": "error", "error": ...}).
+    With "run_in_background" the batch is queued as a 'spec_curve' job instead
+    and the job handle is returned (HTTP 202).
+    """
+    import queue
+    import threading
+    from django.db import connection
+    from django.http import StreamingHttpResponse
+    from engine.services.specification_curve_service import SpecificationCurveService
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    
+    dataset_id = data.get('dataset_id')
+    if not dataset_id:
+        return JsonResponse({'error': 'dataset_id is required'}, status=400)
+    dataset = get_object_or_404(Dataset, pk=dataset_id)
+    
+    spec, error = SpecificationCurveService.parse_request(data)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+    
+    if str(data.get('run_in_background', '')).lower() in ('1', 'true', 'on', 'yes'):
+        return JobService.enqueue(request, 'spec_curve', {
+            'dataset_id': dataset.pk,
+            'session_name': data.get('session_name'),
+            'spec': spec,
+        })
+    
+    events = queue.Queue()
+    
+    def worker():
+        try:
+            results = SpecificationCurveService.run(
+                dataset, spec, progress=lambda done, total: events.put({'stage': 'fitting', 'done': done, 'total': total})
+            )
+            sess = SpecificationCurveService.save_results(dataset, spec, results, data.get('session_name'))
+            events.put({'stage': 'done', 'session_id': sess.id, 'results': results.to_dict()})
+        except Exception as e:
+            print(f"DEBUG: Specification curve failed: {e}")
+            events.put({'stage': 'error', 'error': str(e)})
+        finally:
+            # This thread's database connection is not closed by the request cycle
+            connection.close()
+    
+    def stream():
+        yield json.dumps({'stage': 'started', 'total': 2 ** len(spec['control_blocks'])}) + '\n'
+        while True:
+            event = events.get()
+            yield json.dumps(event) + '\n'
+            if event['stage'] in ('done', 'error'):
+                break
+    
+    # Not a daemon, so a recycling worker waits for the session write to finish
+    threading.Thread(target=worker).start()
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
+
+def specification_curve_results(request, session_id):
+    """Return the stored specification-curve result set for a session."""
+    from engine.services.specification_curve_service import SpecificationCurveService
+    
+    session = get_object_or_404(AnalysisSession, pk=session_id)
+    results = SpecificationCurveService.load_results(session)
+    if results is None:
+        return JsonResponse({'error': 'No specification curve results for this session'}, status=404)
+    return JsonResponse({'session_id': session.id, 'results': results})
@@ -7,6 +7,7 @@ from django.conf import settings
 from engine.models import AnalysisSession, Dataset, Paper
 from engine.modules import get_registry
 from history.history import download_session_history
+from models import bma_store, irf_store, posterior_store
 import os
 import shutil
 
@@ -117,6 +118,9 @@ def delete_session(request, pk: int):
             # Ignore any filesystem errors; deletion of the DB row still proceeds
             pass
 
+    posterior_store.delete_for_session(s.pk)
+    bma_store.delete_for_session(s.pk)
+    irf_store.delete_for_session(s.pk)
     s.delete()
     return redirect('index')
 
@@ -153,6 +157,9 @@ def bulk_delete_sessions(request):
                 # Ignore any filesystem errors; deletion of the DB row still proceeds
                 pass
         
+        posterior_store.delete_for_session(session.pk)
+        bma_store.delete_for_session(session.pk)
+        irf_store.delete_for_session(session.pk)
         session.delete()
         deleted_count += 1
     
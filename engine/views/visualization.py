@@ -10,7 +10,9 @@ from engine.models import Dataset, AnalysisSession
 from engine.services.spotlight_service import SpotlightService
 from engine.services.visualization_service import VisualizationService
 from data_prep.file_handling import _read_dataset_file
-from models.regression import generate_spotlight_for_interaction
+
+# Plots one ANOVA grid request may ask for
+MAX_ANOVA_PLOTS = 50
 
 def visualize_data(request):
     """Handle visualization requests"""
@@ -143,7 +145,6 @@ def generate_plot(request):
 def _generate_multinomial_ordinal_spotlight_from_predictions(predictions, interaction, category, options):
     """Generate spotlight plot from pre-generated ordinal or multinomial predictions."""
     try:
-        import plotly.graph_objects as go
         import plotly.io as pio
         
         # Parse interaction to get variable names
@@ -151,26 +152,12 @@ def _generate_multinomial_ordinal_spotlight_from_predictions(predictions, intera
         if not x or not m:
             return None
         
-        # Get moderator levels (should be exactly 2: low and high)
-        moderator_levels = list(predictions.keys())
-        print(f"DEBUG: Available moderator levels: {moderator_levels}")
-        if len(moderator_levels) < 2:
-            print(f"DEBUG: Not enough moderator levels: {len(moderator_levels)}")
-            return None
-        
-        # Sort levels to ensure consistent low/high ordering
-        low_level, high_level = _get_moderator_levels(moderator_levels)
-        
-        # Validate predictions data
-        if not _validate_predictions_data(predictions, low_level, high_level, category):
+        # Slice the (interaction, level, category, x) arrays directly
+        sliced = predictions.slice(interaction, category) if predictions is not None else None
+        if sliced is None:
+            print(f"DEBUG: No precomputed predictions for interaction '{interaction}', category '{category}'")
             return None
-        
-        # Get data for both levels
-        low_data = predictions[low_level][category]
-        high_data = predictions[high_level][category]
-        x_values = low_data['x_values']
-        low_probs = low_data['probabilities']
-        high_probs = high_data['probabilities']
+        x_values, low_probs, high_probs = sliced
         
         # Create the plot
         fig = _build_spotlight_figure(x_values, low_probs, high_probs, x, m, category, options)
@@ -183,42 +170,6 @@ def _generate_multinomial_ordinal_spotlight_from_predictions(predictions, intera
         return None
 
 
-def _get_moderator_levels(moderator_levels):
-    """Get low and high moderator levels from list."""
-    numeric_levels = []
-    for level in moderator_levels:
-        try:
-            numeric_levels.append(float(level))
-        except ValueError:
-            continue
-    
-    if numeric_levels:
-        numeric_levels.sort()
-        return str(numeric_levels[0]), str(numeric_levels[1])
-    else:
-        return moderator_levels[0], moderator_levels[1]
-
-
-def _validate_predictions_data(predictions, low_level, high_level, category):
-    """Validate that predictions data exists for both levels and category."""
-    print(f"DEBUG: Selected low_level: {low_level}, high_level: {high_level}")
-    print(f"DEBUG: Available categories in low_level: {list(predictions[low_level].keys()) if low_level in predictions else 'Not found'}")
-    print(f"DEBUG: Available categories in high_level: {list(predictions[high_level].keys()) if high_level in predictions else 'Not found'}")
-    print(f"DEBUG: Looking for category: {category}")
-    
-    if (low_level not in predictions or high_level not in predictions or 
-        category not in predictions[low_level] or 
-        category not in predictions[high_level]):
-        print(f"DEBUG: Missing data - low_level in predictions: {low_level in predictions}")
-        print(f"DEBUG: Missing data - high_level in predictions: {high_level in predictions}")
-        if low_level in predictions:
-            print(f"DEBUG: Missing data - category in low_level: {category in predictions[low_level]}")
-        if high_level in predictions:
-            print(f"DEBUG: Missing data - category in high_level: {category in predictions[high_level]}")
-        return False
-    return True
-
-
 def _build_spotlight_figure(x_values, low_probs, high_probs, x, m, category, options):
     """Build Plotly figure for spotlight plot."""
     import plotly.graph_objects as go
@@ -343,18 +294,25 @@ def generate_spotlight_plot(request, session_id):
 
 def _generate_spotlight_by_type(session, fitted_model, df, interaction, custom_options, is_ordinal, is_multinomial):
     """Generate spotlight plot based on regression type."""
-    # Handle ordinal regression with precomputed predictions
-    if is_ordinal and hasattr(session, 'ordinal_predictions') and session.ordinal_predictions:
-        return _handle_ordinal_spotlight(session, fitted_model, df, interaction, custom_options, is_ordinal)
+    if isinstance(fitted_model, dict) and fitted_model.get('model_type') == 'bambi':
+        # Bayesian bands come from the stored posterior draws, without refitting
+        return SpotlightService.generate_bayesian_spotlight(session, df, interaction, custom_options)
     
-    # Handle multinomial regression
-    if is_multinomial:
-        print(f"DEBUG: Multinomial regression detected, using regular generation")
-        multinomial_category = custom_options.get('multinomial_category')
-        print(f"DEBUG: multinomial_category = {multinomial_category}")
-        print(f"DEBUG: interaction = {interaction}")
-        print(f"DEBUG: is_multinomial = {is_multinomial}")
+    if is_ordinal or is_multinomial:
+        predictions = SpotlightService.load_precomputed_predictions(session)
+        category_key = 'ordinal_category' if is_ordinal else 'multinomial_category'
+        category = custom_options.get(category_key)
+        
+        # Use precomputed predictions when they cover this interaction and the default moderator split
+        if predictions is not None and category and predictions.has_interaction(interaction):
+            spotlight_json = _handle_precomputed_spotlight(predictions, interaction, category, custom_options)
+            if spotlight_json:
+                return spotlight_json
+        
+        if is_ordinal:
+            return _generate_ordinal_fallback(fitted_model, df, interaction, custom_options, is_ordinal)
         
+        print(f"DEBUG: Multinomial regression detected, using regular generation")
         return SpotlightService.generate_spotlight_plot(
             fitted_model, df, interaction, custom_options, is_ordinal=False, is_multinomial=True
         )
@@ -365,15 +323,8 @@ def _generate_spotlight_by_type(session, fitted_model, df, interaction, custom_o
     )
 
 
-def _handle_ordinal_spotlight(session, fitted_model, df, interaction, custom_options, is_ordinal):
-    """Handle ordinal regression spotlight plot generation."""
-    ordinal_category = custom_options.get('ordinal_category')
-    
-    if not ordinal_category or interaction not in session.ordinal_predictions:
-        # Fall back to regular generation
-        return _generate_ordinal_fallback(fitted_model, df, interaction, custom_options, is_ordinal)
-    
-    # Check if we can use precomputed predictions
+def _handle_precomputed_spotlight(predictions, interaction, category, custom_options):
+    """Slice precomputed predictions when the moderator split matches how they were generated."""
     separation_method = custom_options.get('moderator_separation', 'mean')
     std_dev_multiplier_raw = custom_options.get('moderator_std_dev_multiplier', 1.0)
     
@@ -383,25 +334,18 @@ def _handle_ordinal_spotlight(session, fitted_model, df, interaction, custom_opt
         std_dev_multiplier = 1.0
         print(f"DEBUG: Could not convert std_dev_multiplier '{std_dev_multiplier_raw}' to float, using 1.0")
     
-    print(f"DEBUG: Ordinal regression - separation_method: {separation_method}, std_dev_multiplier: {std_dev_multiplier}")
-    
-    if SpotlightService.should_use_precomputed_predictions(separation_method, std_dev_multiplier):
-        print(f"DEBUG: Using pre-generated ordinal predictions")
-        ordinal_options = SpotlightService.prepare_ordinal_options(interaction, custom_options)
-        
-        return _generate_multinomial_ordinal_spotlight_from_predictions(
-            session.ordinal_predictions[interaction],
-            interaction,
-            ordinal_category,
-            ordinal_options
-        )
-    else:
+    if not SpotlightService.should_use_precomputed_predictions(separation_method, std_dev_multiplier):
         # Regenerate with custom parameters
-        print(f"DEBUG: Regenerating ordinal spotlight with custom parameters")
-        print(f"DEBUG: Ordinal category being passed to regeneration: {ordinal_category}")
-        return SpotlightService.generate_spotlight_plot(
-            fitted_model, df, interaction, custom_options, is_ordinal=is_ordinal, is_multinomial=False
-        )
+        return None
+    
+    print(f"DEBUG: Using pre-generated {predictions.kind} predictions")
+    options = SpotlightService.prepare_ordinal_options(interaction, custom_options)
+    if predictions.kind == 'multinomial' and not custom_options.get('y_name'):
+        options['y_name'] = f'Probability of {category}'
+    
+    return _generate_multinomial_ordinal_spotlight_from_predictions(
+        predictions, interaction, category, options
+    )
 
 
 def _generate_ordinal_fallback(fitted_model, df, interaction, custom_options, is_ordinal):
@@ -499,6 +443,121 @@ def generate_correlation_heatmap(request, session_id):
 
 
 
+def generate_granger_heatmap(request, session_id):
+    """Granger causality matrix of a VARX session as a heatmap plus the test table."""
+    if request.method != 'POST':
+        return HttpResponse('POST only', status=405)
+    
+    session = get_object_or_404(AnalysisSession, pk=session_id)
+    if session.module != 'varx' or not session.dataset:
+        return JsonResponse({'error': 'Granger causality is only available for VARX sessions with a dataset'}, status=400)
+    
+    try:
+        variables = request.POST.getlist('variables[]')
+        lags = request.POST.get('lags')
+        lags = int(lags) if lags else None
+        alpha = float(request.POST.get('alpha', 0.05))
+        if lags is not None and not 1 <= lags <= 24:
+            return JsonResponse({'error': 'lags must be between 1 and 24'}, status=400)
+        if not 0 < alpha < 1:
+            return JsonResponse({'error': 'alpha must be between 0 and 1'}, status=400)
+        
+        output = VisualizationService.generate_granger_heatmap(session, variables, lags, alpha)
+        return JsonResponse({
+            'success': True,
+            'plot_data': json.loads(output['heatmap']),
+            'results': output['results'],
+        })
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        import traceback
+        print(f"GRANGER ERROR: {e}")
+        print(traceback.format_exc())
+        return JsonResponse({'error': f'Error computing Granger causality: {str(e)}'}, status=500)
+
+
+
+
+def _open_posterior(session):
+    from models import posterior_store
+    return posterior_store.PosteriorStore.open(posterior_store.path_for_session(session.pk))
+
+
+def generate_trace_plot(request, session_id):
+    """Generate a trace plot for one posterior parameter from the session's stored draws."""
+    if request.method != 'POST':
+        return HttpResponse('POST only', status=405)
+    
+    session = get_object_or_404(AnalysisSession, pk=session_id)
+    parameter = request.POST.get('parameter')
+    if not parameter:
+        return HttpResponse('Parameter required', status=400)
+    
+    store = _open_posterior(session)
+    if store is None:
+        return HttpResponse('No posterior draws stored for this session; re-run the analysis', status=404)
+    try:
+        with store:
+            if parameter not in store.variables:
+                return HttpResponse(f'Unknown parameter "{parameter}". Available: {store.variables}', status=400)
+            options = {'element': request.POST.get('element'), 'y_name': request.POST.get('y_name')}
+            return HttpResponse(store.trace_plot_json(parameter, options), content_type='application/json')
+    except Exception as e:
+        import traceback
+        error_msg = f'Error: {str(e)}\nTraceback: {traceback.format_exc()}'
+        return HttpResponse(error_msg, status=500)
+
+
+def posterior_summary(request, session_id):
+    """Posterior summary of a Bayesian session computed from its stored draws."""
+    session = get_object_or_404(AnalysisSession, pk=session_id)
+    store = _open_posterior(session)
+    if store is None:
+        return JsonResponse({'error': 'No posterior draws stored for this session'}, status=404)
+    try:
+        hdi_prob = float(request.GET.get('hdi_prob', 0.94))
+        if not 0 < hdi_prob < 1:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'error': 'hdi_prob must be between 0 and 1'}, status=400)
+    
+    names = request.GET.getlist('parameter') or None
+    with store:
+        unknown = [n for n in names or [] if n not in store.variables]
+        if unknown:
+            return JsonResponse({'error': f'Unknown parameters: {unknown}'}, status=400)
+        return JsonResponse({
+            'parameters': store.variables,
+            'inference': store.meta.get('inference'),
+            'hdi_prob': hdi_prob,
+            'summary': store.summary(names, hdi_prob),
+        })
+
+
+def bma_plot(request, session_id):
+    """BMA figure (inclusion probabilities, coefficients or model space) built from the session's stored results."""
+    from models import bma_store
+    from models.BMA import (get_bma_coefficients_plot_data, get_bma_model_space_plot_data,
+                            get_bma_plot_data)
+    builders = {
+        'inclusion': get_bma_plot_data,
+        'coefficients': get_bma_coefficients_plot_data,
+        'model_space': get_bma_model_space_plot_data,
+    }
+    session = get_object_or_404(AnalysisSession, pk=session_id)
+    kind = request.GET.get('kind', 'inclusion')
+    if kind not in builders:
+        return JsonResponse({'error': f'Unknown plot "{kind}". Available: {list(builders)}'}, status=400)
+    
+    bma_results = bma_store.load(session.pk)
+    if bma_results is None:
+        return JsonResponse({'error': 'No BMA results stored for this session; re-run the analysis'}, status=404)
+    plot_data = builders[kind](bma_results)
+    if plot_data is None:
+        return JsonResponse({'error': f'No data for the {kind} plot'}, status=404)
+    return JsonResponse({'success': True, 'kind': kind, 'plot_data': plot_data})
+
 
 def generate_anova_plot_view(request, session_id):
     """Generate ANOVA plot with t-tests"""
@@ -541,4 +600,41 @@ def generate_anova_plot_view(request, session_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+def generate_anova_plot_grid_view(request, session_id):
+    """Generate many ANOVA plots (e.g. a grid of X/Y/group splits) in one request"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST only'}, status=405)
+    
+    try:
+        session = get_object_or_404(AnalysisSession, pk=session_id)
+        
+        # Parse JSON body: {"plots": [{x_var, y_var, group_var, x_std, group_std}, ...], "sig_level": 0.05}
+        data = json.loads(request.body)
+        plots = data.get('plots')
+        if not isinstance(plots, list) or not plots:
+            return JsonResponse({'success': False, 'error': 'A non-empty list of plots is required'}, status=400)
+        if len(plots) > MAX_ANOVA_PLOTS:
+            return JsonResponse({'success': False, 'error': f'At most {MAX_ANOVA_PLOTS} plots per request'}, status=400)
+        
+        requests = []
+        for spec in plots:
+            if not isinstance(spec, dict) or not spec.get('x_var') or not spec.get('y_var'):
+                return JsonResponse({'success': False, 'error': 'X and Y variables required for every plot'}, status=400)
+            requests.append({
+                'x_var': spec['x_var'],
+                'y_var': spec['y_var'],
+                'group_var': spec.get('group_var'),
+                'x_std': float(spec.get('x_std', 1.0)),
+                'group_std': float(spec.get('group_std', 1.0)),
+            })
+        
+        results = VisualizationService.generate_anova_plots(session, requests, float(data.get('sig_level', 0.05)))
+        return JsonResponse({'success': True, 'plots': results})
+        
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
 
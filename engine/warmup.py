@@ -0,0 +1,101 @@
+# Preloading of the analysis stack when a web or job worker starts.
+"""
+Analysis modules are registered by dotted path and imported on first use,
+and many code paths import statsmodels, plotly, bambi or rpy2 inside
+functions. Without a warmup the first analysis a worker serves pays for all
+of those imports, plus starting R for BMA.
+
+``warm_up`` imports the configured libraries and every registered analysis
+module, timing each one. It can also start the R worker pool. The WSGI
+application calls it once per process when ANALYSIS_WARMUP is set. The
+background job runner calls it before forking, so every job inherits the
+loaded modules.
+"""
+import importlib
+import importlib.util
+import os
+import time
+from typing import List, Optional, Tuple
+from django.conf import settings
+
+# Libraries preloaded before the analysis modules, dependencies first
+DEFAULT_LIBRARIES = (
+    'numpy',
+    'pandas',
+    'scipy.stats',
+    'statsmodels.api',
+    'linearmodels',
+    'patsy',
+    'plotly.graph_objects',
+    'pymc',
+    'bambi',
+    'arviz',
+)
+
+
+def configured_libraries() -> List[str]:
+    return list(getattr(settings, 'ANALYSIS_WARMUP_LIBRARIES', None) or DEFAULT_LIBRARIES)
+
+
+def _timed_import(name: str) -> Tuple[str, float, Optional[str]]:
+    start = time.perf_counter()
+    try:
+        importlib.import_module(name)
+        error = None
+    except ImportError as e:
+        error = f'not installed ({e})'
+    except Exception as e:
+        error = str(e)
+    return name, time.perf_counter() - start, error
+
+
+def warm_up(libraries=None, modules=True, start_r=False, verbose=True):
+    """
+    Import the analysis stack now rather than on the first request.
+
+    Args:
+        libraries: Library names to import first (defaults to the configured list)
+        modules: Also import every registered analysis module
+        start_r: Start the R worker pool (BAS preloaded) in the background
+        verbose: Print the time taken by each import
+
+    Returns:
+        List of (name, seconds, error) in import order; error is None on success.
+        Times are incremental: a library already pulled in by an earlier one costs ~0.
+    """
+    from engine.modules import get_registry
+
+    timings = []
+    names = list(libraries if libraries is not None else configured_libraries())
+    if modules:
+        names += [path.split(':', 1)[0] for path in get_registry().values()]
+    for name in names:
+        timings.append(_timed_import(name))
+
+    if start_r:
+        start = time.perf_counter()
+        error = None
+        if importlib.util.find_spec('rpy2') is None:
+            error = 'rpy2 not installed'
+        else:
+            from models.r_worker_pool import get_pool
+            get_pool().warm()
+        timings.append(('R worker pool', time.perf_counter() - start, error))
+
+    if verbose:
+        total = sum(t for _, t, _ in timings)
+        print(f"DEBUG: Analysis warmup took {total:.2f}s in process {os.getpid()}")
+        for name, seconds, error in timings:
+            print(f"DEBUG:   {name:<28} {seconds * 1000:8.1f} ms{'  (' + error + ')' if error else ''}")
+    return timings
+
+
+def warm_up_from_settings(role='web'):
+    """Run the warmup configured by ANALYSIS_WARMUP ('', 'imports' or 'imports+r') for a worker role."""
+    mode = (getattr(settings, 'ANALYSIS_WARMUP', '') or '').lower()
+    if not mode or mode in ('0', 'off', 'false', 'none'):
+        return []
+    # R workers belong to the process that started them; forked job processes make their own
+    start_r = mode == 'imports+r' and role == 'web'
+    return warm_up(start_r=start_r)
+
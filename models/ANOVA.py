@@ -5,6 +5,7 @@ from statsmodels.formula.api import ols
 import plotly.graph_objects as go
 from scipy import stats
 import re
+import warnings
 
 
 class ANOVAModule:
@@ -294,338 +295,262 @@ class ANOVAModule:
                 'has_results': False
             }
 
-def generate_anova_plot(df, x_var, y_var, group_var=None, x_std=1.0, group_std=1.0, sig_level=0.05):
+# Split sides of one request: (x side, group side); None means "either"
+_GROUPED_CELLS = (('high', 'high'), ('high', 'low'), ('low', 'high'), ('low', 'low'), ('high', None), ('low', None))
+_SIMPLE_CELLS = (('high', None), ('low', None))
+
+# Welch t-tests of a request, as pairs of cells
+_GROUPED_TESTS = {
+    'high_x': (('high', 'high'), ('high', 'low')),
+    'low_x': (('low', 'high'), ('low', 'low')),
+    'high_vs_low': (('high', None), ('low', None)),
+}
+_SIMPLE_TESTS = {'high_vs_low': (('high', None), ('low', None))}
+
+
+def _finite(value):
+    """Float of a statistic, None when it is NaN or infinite (e.g. a test of two constant cells)."""
+    return float(value) if np.isfinite(value) else None
+
+
+def _is_binary(values):
+    """Whether a column holds exactly the values 0 and 1 (NaN ignored)."""
+    unique_vals = np.unique(values[~np.isnan(values)])
+    return len(unique_vals) == 2 and set(unique_vals.tolist()) == {0.0, 1.0}
+
+
+def anova_split_stats(df, requests):
     """
-    Generate a bar chart with t-tests between high/low groups on X in terms of Y.
-    
-    Parameters:
-    - df: DataFrame containing the data
-    - x_var: X axis variable name
-    - y_var: Y axis variable name  
-    - group_var: Optional grouping variable name
-    - x_std: Number of standard deviations to split X by
-    - group_std: Number of standard deviations to split group by
-    - sig_level: Significance level for asterisks (0.01, 0.05, or 0.10)
-    
+    High/low split statistics for many ANOVA plot requests at once.
+
+    Every referenced column is converted once into a shared (n, c) array.
+    Each distinct (variable, std) split becomes one pair of boolean masks.
+    Each cell of each request (e.g. high X and low group) becomes one column
+    of a (n, cells) mask matrix. Counts, means, variances and SEs of all
+    cells, and Welch t-tests of all cell pairs, are then computed with
+    array operations, without a loop over the data per request.
+
+    Args:
+        df: DataFrame
+        requests: List of dicts with x_var, y_var and optional group_var,
+            x_std (default 1) and group_std (default 1)
+
     Returns:
-    Dictionary with plot data and statistical results
+        One dict per request, either {'success': False, 'error': ...} or
+        {'success': True, ...} with labels, binary flags, cells (mean, se, n
+        per (x side, group side)) and tests (t, df, p_value per comparison)
     """
-    
-    def is_binary(vec):
-        """Check if a variable is binary (only 0 and 1)"""
-        unique_vals = pd.Series(vec).dropna().unique()
-        return set(unique_vals).issubset({0, 1}) and len(unique_vals) == 2
-    
-    def check_group_size(groups, group_name=""):
-        """Check if each group has at least 2 data points"""
-        for group_name_val, group_mask in groups.items():
-            if np.sum(group_mask) < 2:
-                return False, f"{group_name_val}"
-        return True, None
-    
-    # Check if variables exist
-    if x_var not in df.columns or y_var not in df.columns:
-        return {'success': False, 'error': 'Variables not found in dataset'}
-    
-    if group_var and group_var not in df.columns:
-        return {'success': False, 'error': 'Group variable not found in dataset'}
-    
-    # Get data
-    x_data = df[x_var].values
-    y_data = df[y_var].values
-    
-    # Check if X is binary
-    x_is_binary = is_binary(x_data)
-    
-    # Split X into high/low
-    if x_is_binary:
-        high_x = x_data == 1
-        low_x = x_data == 0
-        x_labels = ['Low (0)', 'High (1)']
-    else:
-        mean_x = np.nanmean(x_data)
-        sd_x = np.nanstd(x_data) * x_std
-        high_x = x_data > (mean_x + sd_x)
-        low_x = x_data < (mean_x - sd_x)
-        x_labels = ['Low', 'High']
-    
-    # Check if we have enough data in high_x and low_x groups
-    if np.sum(high_x) < 2 or np.sum(low_x) < 2:
-        return {
-            'success': False, 
-            'error': 'Insufficient data for comparison. Please adjust the X split standard deviation (current: {:.1f}). At least one group has fewer than 2 data points.'.format(x_std)
+    columns = []
+    for req in requests:
+        for name in (req['x_var'], req['y_var'], req.get('group_var')):
+            if name and name in df.columns and name not in columns:
+                columns.append(name)
+    index = {name: j for j, name in enumerate(columns)}
+    data = np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float) for c in columns]) \
+        if columns else np.empty((len(df), 0))
+    # Columns with values that are not numbers (e.g. categorical labels) cannot be split
+    numeric = {c: int((~np.isnan(data[:, j])).sum()) == int(df[c].notna().sum()) for c, j in index.items()}
+    binary = np.array([_is_binary(data[:, j]) for j in range(data.shape[1])], dtype=bool)
+    with warnings.catch_warnings():
+        # All-NaN columns make nanmean/nanstd warn; their splits are simply empty
+        warnings.simplefilter('ignore', RuntimeWarning)
+        col_mean = np.nanmean(data, axis=0) if len(data) else np.full(len(columns), np.nan)
+        col_sd = np.nanstd(data, axis=0) if len(data) else np.full(len(columns), np.nan)
+
+    # One (low, high) mask pair per distinct split; binary columns split at 0/1
+    splits = {}
+    for req in requests:
+        for var, std in ((req['x_var'], req.get('x_std', 1.0)), (req.get('group_var'), req.get('group_std', 1.0))):
+            if var in index:
+                splits.setdefault((var, float(std)), len(splits))
+    split_keys = list(splits)
+    cols = np.array([index[var] for var, _ in split_keys], dtype=int)
+    widths = np.array([std for _, std in split_keys], dtype=float)
+    upper = np.where(binary[cols], 0.5, col_mean[cols] + col_sd[cols] * widths) if len(cols) else np.empty(0)
+    lower = np.where(binary[cols], 0.5, col_mean[cols] - col_sd[cols] * widths) if len(cols) else np.empty(0)
+    with np.errstate(invalid='ignore'):
+        high = data[:, cols] > upper
+        low = data[:, cols] < lower
+
+    # Cells of every valid request, as columns of one mask matrix
+    results, cell_masks, cell_y, layout = [], [], [], []
+    for req in requests:
+        x_var, y_var, group_var = req['x_var'], req['y_var'], req.get('group_var')
+        if x_var not in index or y_var not in index:
+            results.append({'success': False, 'error': 'Variables not found in dataset'})
+            continue
+        if group_var and group_var not in index:
+            results.append({'success': False, 'error': 'Group variable not found in dataset'})
+            continue
+        not_numeric = [v for v in (x_var, y_var, group_var) if v and not numeric[v]]
+        if not_numeric:
+            results.append({
+                'success': False,
+                'error': "Variable '{}' is not numeric. High/low splits and means need a numeric or 0/1 column.".format(not_numeric[0])
+            })
+            continue
+        xs = splits[(x_var, float(req.get('x_std', 1.0)))]
+        gs = splits[(group_var, float(req.get('group_std', 1.0)))] if group_var else None
+        sides = {'high': high, 'low': low}
+        first = len(cell_masks)
+        for x_side, g_side in (_GROUPED_CELLS if group_var else _SIMPLE_CELLS):
+            mask = sides[x_side][:, xs]
+            if g_side is not None:
+                mask = mask & sides[g_side][:, gs]
+            cell_masks.append(mask)
+            cell_y.append(index[y_var])
+        layout.append((len(results), first))
+        results.append(None)
+
+    if cell_masks:
+        masks = np.column_stack(cell_masks)
+        y = data[:, cell_y]
+        valid = masks & ~np.isnan(y)
+        count = valid.sum(axis=0)
+        y0 = np.where(valid, y, 0.0)
+        with np.errstate(all='ignore'):
+            mean = y0.sum(axis=0) / count
+            var = (np.where(valid, y - mean, 0.0) ** 2).sum(axis=0) / (count - 1)
+            se = np.sqrt(var / count)
+
+    pending = []
+    for pos, first in layout:
+        req = requests[pos]
+        group_var = req.get('group_var')
+        cell_names = _GROUPED_CELLS if group_var else _SIMPLE_CELLS
+        cell_index = {cell: first + i for i, cell in enumerate(cell_names)}
+        if count[cell_index[('high', None)]] < 2 or count[cell_index[('low', None)]] < 2:
+            results[pos] = {
+                'success': False,
+                'error': 'Insufficient data for comparison. Please adjust the X split standard deviation (current: {:.1f}). At least one group has fewer than 2 data points.'.format(req.get('x_std', 1.0))
+            }
+            continue
+        if group_var and any(count[cell_index[c]] < 2 for c in cell_names[:4]):
+            results[pos] = {
+                'success': False,
+                'error': 'Insufficient data for comparison. Please adjust the X and group variable division (X std: {:.1f}, Group std: {:.1f}). At least one t-test cannot be done due to lack of enough data points.'.format(req.get('x_std', 1.0), req.get('group_std', 1.0))
+            }
+            continue
+        x_binary = binary[index[req['x_var']]]
+        g_binary = bool(group_var) and binary[index[group_var]]
+        results[pos] = {
+            'success': True,
+            'x_var': req['x_var'],
+            'y_var': req['y_var'],
+            'group_var': group_var or None,
+            'x_binary': bool(x_binary),
+            'group_binary': bool(g_binary),
+            'x_labels': ['Low (0)', 'High (1)'] if x_binary else ['Low', 'High'],
+            'group_labels': (['Low (0)', 'High (1)'] if g_binary else ['Low', 'High']) if group_var else None,
+            'cells': {cell: {'mean': float(mean[j]), 'se': float(se[j]), 'n': int(count[j])}
+                      for cell, j in cell_index.items()},
+            'tests': {},
         }
-    
-    # Handle grouping variable
+        for name, (a, b) in (_GROUPED_TESTS if group_var else _SIMPLE_TESTS).items():
+            pending.append((pos, name, cell_index[a], cell_index[b]))
+
+    # Welch t-tests of all pending pairs at once
+    if pending:
+        a = np.array([p[2] for p in pending])
+        b = np.array([p[3] for p in pending])
+        va, vb = var[a] / count[a], var[b] / count[b]
+        with np.errstate(all='ignore'):
+            t = (mean[a] - mean[b]) / np.sqrt(va + vb)
+            dof = (va + vb) ** 2 / (va ** 2 / (count[a] - 1) + vb ** 2 / (count[b] - 1))
+            p = 2 * stats.t.sf(np.abs(t), dof)
+        for (pos, name, _, _), t_k, df_k, p_k in zip(pending, t, dof, p):
+            results[pos]['tests'][name] = {'t': _finite(t_k), 'df': _finite(df_k), 'p_value': _finite(p_k)}
+    return results
+
+
+def _sig_symbol(p):
+    if p < 0.001: return "***"
+    elif p < 0.01: return "**"
+    elif p < 0.05: return "*"
+    else: return ""
+
+
+def _add_significance_bracket(fig, x0, x1, y, y_max, p_value):
+    """Horizontal line from x0 to x1 at height y with end caps and the significance stars above its centre."""
+    for xa, ya, xb, yb in ((x0, y, x1, y),
+                           (x0, y - 0.01 * y_max, x0, y + 0.01 * y_max),
+                           (x1, y - 0.01 * y_max, x1, y + 0.01 * y_max)):
+        fig.add_shape(
+            type="line",
+            x0=xa, y0=ya,
+            x1=xb, y1=yb,
+            line=dict(color='black', width=1),
+            xref="x", yref="y"
+        )
+    fig.add_annotation(
+        xref="x",
+        yref="y",
+        x=(x0 + x1) / 2,
+        y=y + 0.02 * y_max,
+        text=_sig_symbol(p_value),
+        showarrow=False,
+        font=dict(size=16, color='black'),
+        bgcolor="white",
+        bordercolor="white",
+        borderwidth=0
+    )
+
+
+def _significant(test, sig_level):
+    return test is not None and test['p_value'] is not None and test['p_value'] <= sig_level
+
+
+def build_anova_figure(result, sig_level=0.05):
+    """
+    Bar chart of one ``anova_split_stats`` result with significance brackets.
+
+    Returns:
+        Dictionary with plot data (dict and JSON), the statistics and variable names
+    """
+    x_var, y_var, group_var = result['x_var'], result['y_var'], result['group_var']
+    x_labels = result['x_labels']
+    cells, tests = result['cells'], result['tests']
+    fig = go.Figure()
+
     if group_var:
-        group_data = df[group_var].values
-        group_is_binary = is_binary(group_data)
-        
-        if group_is_binary:
-            high_group = group_data == 1
-            low_group = group_data == 0
-            group_labels = ['Low (0)', 'High (1)']
-        else:
-            mean_group = np.nanmean(group_data)
-            sd_group = np.nanstd(group_data) * group_std
-            high_group = group_data > (mean_group + sd_group)
-            low_group = group_data < (mean_group - sd_group)
-            group_labels = ['Low', 'High']
-        
-        # Check if we have enough data in each group combination
-        if (np.sum(high_x & high_group) < 2 or 
-            np.sum(high_x & low_group) < 2 or 
-            np.sum(low_x & high_group) < 2 or 
-            np.sum(low_x & low_group) < 2):
-            return {
-                'success': False, 
-                'error': 'Insufficient data for comparison. Please adjust the X and group variable division (X std: {:.1f}, Group std: {:.1f}). At least one t-test cannot be done due to lack of enough data points.'.format(x_std, group_std)
-            }
-        
-        # Calculate means for each group combination
-        mean_high_x_high_group = np.nanmean(y_data[high_x & high_group]) if np.any(high_x & high_group) else np.nan
-        mean_high_x_low_group = np.nanmean(y_data[high_x & low_group]) if np.any(high_x & low_group) else np.nan
-        mean_low_x_high_group = np.nanmean(y_data[low_x & high_group]) if np.any(low_x & high_group) else np.nan
-        mean_low_x_low_group = np.nanmean(y_data[low_x & low_group]) if np.any(low_x & low_group) else np.nan
-        
-        # Perform t-tests with error handling
-        t_test_high_x = None
-        try:
-            high_x_high_group = y_data[high_x & high_group]
-            high_x_low_group = y_data[high_x & low_group]
-            if len(high_x_high_group) >= 2 and len(high_x_low_group) >= 2:
-                t_test_high_x = stats.ttest_ind(high_x_high_group, high_x_low_group, nan_policy='omit')
-        except Exception:
-            pass
-        
-        t_test_low_x = None
-        try:
-            low_x_high_group = y_data[low_x & high_group]
-            low_x_low_group = y_data[low_x & low_group]
-            if len(low_x_high_group) >= 2 and len(low_x_low_group) >= 2:
-                t_test_low_x = stats.ttest_ind(low_x_high_group, low_x_low_group, nan_policy='omit')
-        except Exception:
-            pass
-        
-        t_test_high_vs_low = None
-        try:
-            high_x_data = y_data[high_x]
-            low_x_data = y_data[low_x]
-            if len(high_x_data) >= 2 and len(low_x_data) >= 2:
-                t_test_high_vs_low = stats.ttest_ind(high_x_data, low_x_data, nan_policy='omit')
-        except Exception:
-            pass
-        
-        # Create plot data with variable names
+        group_labels = result['group_labels']
         # X-axis categories: High x_var, Low x_var
-        x_categories = [
-            f"{x_labels[1]} {x_var}",  # High x_var
-            f"{x_labels[0]} {x_var}"   # Low x_var
-        ]
-        
+        x_categories = [f"{x_labels[1]} {x_var}", f"{x_labels[0]} {x_var}"]
         # Means order: [High X Low Group, High X High Group, Low X Low Group, Low X High Group]
-        means = [mean_high_x_low_group, mean_high_x_high_group, mean_low_x_low_group, mean_low_x_high_group]
-        
-        # Calculate significance symbols
-        def get_sig_symbol(p):
-            if p < 0.001: return "***"
-            elif p < 0.01: return "**"
-            elif p < 0.05: return "*"
-            else: return ""
-        
-        # Create the plot with legend for group variable
-        fig = go.Figure()
-        
-        # Add bars split by group variable (legend)
-        # At "High x_var" position: Low group and High group bars
-        # At "Low x_var" position: Low group and High group bars
+        means = [cells[('high', 'low')]['mean'], cells[('high', 'high')]['mean'],
+                 cells[('low', 'low')]['mean'], cells[('low', 'high')]['mean']]
         fig.add_trace(go.Bar(
             name=f"{group_labels[0]} {group_var}",  # Low group
             x=x_categories,
-            y=[means[0], means[2]],  # High X Low Group, Low X Low Group
+            y=[means[0], means[2]],
             marker_color='#cccccc',
-            marker_line_color=['black', 'black'],  # Border color for each bar in this trace
+            marker_line_color=['black', 'black'],
             marker_line_width=1,
             text=[f'{means[0]:.2f}', f'{means[2]:.2f}'],
             textposition='outside'
         ))
-        
         fig.add_trace(go.Bar(
             name=f"{group_labels[1]} {group_var}",  # High group
             x=x_categories,
-            y=[means[1], means[3]],  # High X High Group, Low X High Group
+            y=[means[1], means[3]],
             marker_color='#333333',
-            marker_line_color=['black', 'black'],  # Border color for each bar in this trace
+            marker_line_color=['black', 'black'],
             marker_line_width=1,
             text=[f'{means[1]:.2f}', f'{means[3]:.2f}'],
             textposition='outside'
         ))
-        
-        # Add significance asterisks
-        def get_sig_symbol(p):
-            if p < 0.001: return "***"
-            elif p < 0.01: return "**"
-            elif p < 0.05: return "*"
-            else: return ""
-        
-        # Check if we have any valid means
+
         valid_means = [m for m in means if not np.isnan(m)]
-        if not valid_means:
-            return {
-                'success': False,
-                'error': 'Insufficient data for comparison. Please adjust the X and group variable division (X std: {:.1f}, Group std: {:.1f}). At least one t-test cannot be done due to lack of enough data points.'.format(x_std, group_std)
-            }
         y_max = max(valid_means)
         asterisk_y = y_max * 1.15
-        
-        # Add significance lines for high x group (first position)
-        if t_test_high_x and not np.isnan(t_test_high_x.pvalue):
-            if t_test_high_x.pvalue <= sig_level:
-                # Get the two bar positions for this x category (for grouped bars)
-                # At x position 0, bars are at -0.2 and 0.2 (for grouped bar mode)
-                bar_x_left = -0.2  # Left bar position
-                bar_x_right = 0.2  # Right bar position
-                
-                # Add horizontal line connecting the two bars within high x group
-                fig.add_shape(
-                    type="line",
-                    x0=bar_x_left, y0=asterisk_y,
-                    x1=bar_x_right, y1=asterisk_y,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add vertical cap on left side
-                fig.add_shape(
-                    type="line",
-                    x0=bar_x_left, y0=asterisk_y - 0.01 * y_max,
-                    x1=bar_x_left, y1=asterisk_y + 0.01 * y_max,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add vertical cap on right side
-                fig.add_shape(
-                    type="line",
-                    x0=bar_x_right, y0=asterisk_y - 0.01 * y_max,
-                    x1=bar_x_right, y1=asterisk_y + 0.01 * y_max,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add asterisk centered above the line
-                sig_symbol = get_sig_symbol(t_test_high_x.pvalue)
-                fig.add_annotation(
-                    xref="x",
-                    yref="y",
-                    x=0,  # Center of x position
-                    y=asterisk_y + 0.02 * y_max,
-                    text=sig_symbol,
-                    showarrow=False,
-                    font=dict(size=16, color='black'),
-                    bgcolor="white",
-                    bordercolor="white",
-                    borderwidth=0
-                )
-        
-        # Add significance lines for low x group (second position)
-        if t_test_low_x and not np.isnan(t_test_low_x.pvalue):
-            if t_test_low_x.pvalue <= sig_level:
-                # Get the two bar positions for this x category (for grouped bars)
-                # At x position 1, bars are at 0.8 and 1.2 (for grouped bar mode)
-                bar_x_left = 0.8  # Left bar position
-                bar_x_right = 1.2  # Right bar position
-                
-                # Add horizontal line connecting the two bars within low x group
-                fig.add_shape(
-                    type="line",
-                    x0=bar_x_left, y0=asterisk_y,
-                    x1=bar_x_right, y1=asterisk_y,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add vertical cap on left side
-                fig.add_shape(
-                    type="line",
-                    x0=bar_x_left, y0=asterisk_y - 0.01 * y_max,
-                    x1=bar_x_left, y1=asterisk_y + 0.01 * y_max,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add vertical cap on right side
-                fig.add_shape(
-                    type="line",
-                    x0=bar_x_right, y0=asterisk_y - 0.01 * y_max,
-                    x1=bar_x_right, y1=asterisk_y + 0.01 * y_max,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add asterisk centered above the line
-                sig_symbol = get_sig_symbol(t_test_low_x.pvalue)
-                fig.add_annotation(
-                    xref="x",
-                    yref="y",
-                    x=1,  # Center of x position
-                    y=asterisk_y + 0.02 * y_max,
-                    text=sig_symbol,
-                    showarrow=False,
-                    font=dict(size=16, color='black'),
-                    bgcolor="white",
-                    bordercolor="white",
-                    borderwidth=0
-                )
-        
-        # Add significance line for overall high_x vs low_x comparison
-        if t_test_high_vs_low and not np.isnan(t_test_high_vs_low.pvalue):
-            if t_test_high_vs_low.pvalue <= sig_level:
-                overall_y = y_max * 1.25  # Slightly higher than the within-group lines
-                
-                # Add horizontal line spanning from first to second position
-                fig.add_shape(
-                    type="line",
-                    x0=0, y0=overall_y,
-                    x1=1, y1=overall_y,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add vertical cap on left side (at x=0)
-                fig.add_shape(
-                    type="line",
-                    x0=0, y0=overall_y - 0.01 * y_max,
-                    x1=0, y1=overall_y + 0.01 * y_max,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add vertical cap on right side (at x=1)
-                fig.add_shape(
-                    type="line",
-                    x0=1, y0=overall_y - 0.01 * y_max,
-                    x1=1, y1=overall_y + 0.01 * y_max,
-                    line=dict(color='black', width=1),
-                    xref="x", yref="y"
-                )
-                
-                # Add centered asterisk
-                sig_symbol = get_sig_symbol(t_test_high_vs_low.pvalue)
-                fig.add_annotation(
-                    xref="x",
-                    yref="y",
-                    x=0.5,  # Center between the two positions
-                    y=overall_y + 0.02 * y_max,
-                    text=sig_symbol,
-                    showarrow=False,
-                    font=dict(size=16, color='black'),
-                    bgcolor="white",
-                    bordercolor="white",
-                    borderwidth=0
-                )
-        
-        # Update layout with legend and white background
+        # Grouped bars sit at -0.2/0.2 around the high X position and 0.8/1.2 around the low one
+        if _significant(tests.get('high_x'), sig_level):
+            _add_significance_bracket(fig, -0.2, 0.2, asterisk_y, y_max, tests['high_x']['p_value'])
+        if _significant(tests.get('low_x'), sig_level):
+            _add_significance_bracket(fig, 0.8, 1.2, asterisk_y, y_max, tests['low_x']['p_value'])
+        if _significant(tests.get('high_vs_low'), sig_level):
+            _add_significance_bracket(fig, 0, 1, y_max * 1.25, y_max, tests['high_vs_low']['p_value'])
+
         fig.update_layout(
             title=f'T-test: {y_var} by {x_var} and {group_var}',
             xaxis_title=x_var,
@@ -643,121 +568,23 @@ def generate_anova_plot(df, x_var, y_var, group_var=None, x_std=1.0, group_std=1
             ),
             height=500
         )
-        
-        # Convert to JSON format
-        plot_json = fig.to_json()
-        
-        # Include variable names for customization
-        return {
-            'success': True,
-            'plot_data': fig.to_dict(),
-            'plot_json': plot_json,
-            'x_var': x_var,
-            'y_var': y_var,
-            'group_var': group_var
-        }
-        
     else:
-        # No grouping variable - simple comparison
-        mean_high_x = np.nanmean(y_data[high_x]) if np.any(high_x) else np.nan
-        mean_low_x = np.nanmean(y_data[low_x]) if np.any(low_x) else np.nan
-        
-        # Perform t-test with error handling
-        t_test = None
-        try:
-            high_x_data = y_data[high_x]
-            low_x_data = y_data[low_x]
-            if len(high_x_data) >= 2 and len(low_x_data) >= 2:
-                t_test = stats.ttest_ind(high_x_data, low_x_data, nan_policy='omit')
-        except Exception:
-            pass
-        
-        # Create plot data with variable names
-        # Format: "Low x_var" and "High x_var"
         categories = [f"{x_labels[0]} {x_var}", f"{x_labels[1]} {x_var}"]
-        means = [mean_low_x, mean_high_x]
-        
-        # Create the plot
-        fig = go.Figure()
-        
-        # Determine colors for each bar
-        # Bars are: 0=Low, 1=High
+        means = [cells[('low', None)]['mean'], cells[('high', None)]['mean']]
         # Colors: low group = grey80 (#cccccc), high group = grey20 (#333333)
-        bar_colors = ['#cccccc', '#333333']  # Low, High
-        
-        # Add bars with border colors (black for both)
-        bar_border_colors = ['black', 'black']  # Low, High
         fig.add_trace(go.Bar(
             x=categories,
             y=means,
-            marker_color=bar_colors,
-            marker_line_color=bar_border_colors,
+            marker_color=['#cccccc', '#333333'],
+            marker_line_color=['black', 'black'],
             marker_line_width=1,
             text=[f'{m:.2f}' for m in means],
             textposition='outside'
         ))
-        
-        # Add significance asterisk if significant
-        if t_test and not np.isnan(t_test.pvalue) and t_test.pvalue <= sig_level:
-            def get_sig_symbol(p):
-                if p < 0.001: return "***"
-                elif p < 0.01: return "**"
-                elif p < 0.05: return "*"
-                else: return ""
-            
-            # Check if we have any valid means
-            valid_means = [m for m in means if not np.isnan(m)]
-            if not valid_means:
-                return {
-                    'success': False,
-                    'error': 'Insufficient data for comparison. Please adjust the X split standard deviation (current: {:.1f}). At least one group has fewer than 2 data points.'.format(x_std)
-                }
-            y_max = max(valid_means)
-            asterisk_y = y_max * 1.1
-            
-            # Add horizontal line connecting the two bars
-            fig.add_shape(
-                type="line",
-                x0=0, y0=asterisk_y,
-                x1=1, y1=asterisk_y,
-                line=dict(color="black", width=1),
-                xref="x", yref="y"
-            )
-            
-            # Add vertical cap on left side (at x=0)
-            fig.add_shape(
-                type="line",
-                x0=0, y0=asterisk_y - 0.01 * y_max,
-                x1=0, y1=asterisk_y + 0.01 * y_max,
-                line=dict(color="black", width=1),
-                xref="x", yref="y"
-            )
-            
-            # Add vertical cap on right side (at x=1)
-            fig.add_shape(
-                type="line",
-                x0=1, y0=asterisk_y - 0.01 * y_max,
-                x1=1, y1=asterisk_y + 0.01 * y_max,
-                line=dict(color="black", width=1),
-                xref="x", yref="y"
-            )
-            
-            # Add single asterisk symbol as annotation centered between the two groups
-            sig_symbol = get_sig_symbol(t_test.pvalue)
-            fig.add_annotation(
-                xref="x",
-                yref="y",
-                x=0.5,  # Center between first (0) and second (1) category
-                y=asterisk_y + 0.02 * y_max,
-                text=sig_symbol,
-                showarrow=False,
-                font=dict(size=16, color='black'),
-                bgcolor="white",
-                bordercolor="white",
-                borderwidth=0
-            )
-        
-        # Update layout with white background
+        if _significant(tests.get('high_vs_low'), sig_level):
+            y_max = max(m for m in means if not np.isnan(m))
+            _add_significance_bracket(fig, 0, 1, y_max * 1.1, y_max, tests['high_vs_low']['p_value'])
+
         fig.update_layout(
             title=f'T-test: {y_var} by {x_var}',
             xaxis_title=x_var,
@@ -767,17 +594,41 @@ def generate_anova_plot(df, x_var, y_var, group_var=None, x_std=1.0, group_std=1
             paper_bgcolor='white',
             height=500
         )
-        
-        # Convert to JSON format
-        plot_json = fig.to_json()
-        
-        # Include variable names for customization
-        return {
-            'success': True,
-            'plot_data': fig.to_dict(),
-            'plot_json': plot_json,
-            'x_var': x_var,
-            'y_var': y_var,
-            'group_var': None
-        }
 
+    return {
+        'success': True,
+        'plot_data': fig.to_dict(),
+        'plot_json': fig.to_json(),
+        'x_var': x_var,
+        'y_var': y_var,
+        'group_var': group_var,
+        'stats': {
+            'cells': [{'x': x, 'group': g, **v} for (x, g), v in result['cells'].items()],
+            'tests': result['tests'],
+        },
+    }
+
+
+def generate_anova_plots(df, requests, sig_level=0.05):
+    """Figures for many (x, y, group, std) requests, with all statistics computed in one vectorized pass."""
+    return [build_anova_figure(r, sig_level) if r['success'] else r for r in anova_split_stats(df, requests)]
+
+
+def generate_anova_plot(df, x_var, y_var, group_var=None, x_std=1.0, group_std=1.0, sig_level=0.05):
+    """
+    Generate a bar chart with Welch t-tests between high/low groups on X in terms of Y.
+    
+    Parameters:
+    - df: DataFrame containing the data
+    - x_var: X axis variable name
+    - y_var: Y axis variable name  
+    - group_var: Optional grouping variable name
+    - x_std: Number of standard deviations to split X by
+    - group_std: Number of standard deviations to split group by
+    - sig_level: Significance level for asterisks (0.01, 0.05, or 0.10)
+    
+    Returns:
+    Dictionary with plot data and statistical results
+    """
+    request = {'x_var': x_var, 'y_var': y_var, 'group_var': group_var, 'x_std': x_std, 'group_std': group_std}
+    return generate_anova_plots(df, [request], sig_level)[0]
@@ -6,11 +6,48 @@
 
 import pandas as pd
 import numpy as np
-from rpy2.robjects import r, pandas2ri
-import rpy2.robjects as ro
-from rpy2.robjects.conversion import localconverter
 import json
 import re
+from models import progress
+from models.r_worker_pool import RJobError, get_pool
+from models.bma_native import MODEL_SPACE_MODELS, PRIORS, TOP_MODELS, run_bma_analysis_native
+
+BACKENDS = ('auto', 'native', 'r')
+
+
+def _resolve_backend(requested):
+    """'native' or 'r' for a requested backend, falling back to the BMA_BACKEND setting."""
+    import importlib.util
+    from django.conf import settings
+
+    backend = (requested or getattr(settings, 'BMA_BACKEND', 'auto') or 'auto').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown BMA backend '{backend}'. Choose from {BACKENDS}")
+    if backend == 'auto':
+        return 'r' if importlib.util.find_spec('rpy2') is not None else 'native'
+    return backend
+
+
+def _console_progress(stage):
+    """R console callback forwarding printed lines to the progress channel."""
+    def _write(text):
+        print(text, end='')
+        line = text.strip().removeprefix('[1] ').strip('"')
+        if line:
+            progress.report(stage, message=line)
+    return _write
+
+
+def _r_setup_error(e):
+    return RuntimeError(
+        f"R is not available or rpy2 is not properly configured. "
+        f"Error: {str(e)}\n\n"
+        f"To fix this:\n"
+        f"1. Install R: sudo apt install r-base r-base-dev (Ubuntu/Debian)\n"
+        f"2. Install rpy2: pip install rpy2\n"
+        f"3. Install BAS package in R: Rscript -e 'install.packages(\"BAS\", repos=\"https://cloud.r-project.org\")'\n"
+        f"4. Restart the application"
+    )
 
 def _quote_column_names_with_special_chars(df, formula):
     """Handle column names with spaces, dots, and other special characters for R processing"""
@@ -45,7 +82,7 @@ def _quote_column_names_with_special_chars(df, formula):
     
     return formula, df_renamed, column_mapping
 
-def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None, original_formula=None, label_map=None, media_path=None):
+def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None, original_formula=None, label_map=None):
     """
     Run Bayesian Model Averaging analysis using R's BAS library with MCMC method
     
@@ -69,23 +106,6 @@ def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None
     dict : Dictionary containing BMA results and summary statistics
     """
     
-    # Check if rpy2 and R are available
-    try:
-        import rpy2.robjects as ro
-        # Try to execute a simple R command to verify R is working
-        ro.r('print("R is available")')
-    except Exception as e:
-        error_msg = (
-            f"R is not available or rpy2 is not properly configured. "
-            f"Error: {str(e)}\n\n"
-            f"To fix this:\n"
-            f"1. Install R: sudo apt install r-base r-base-dev (Ubuntu/Debian)\n"
-            f"2. Install rpy2: pip install rpy2\n"
-            f"3. Install BAS package in R: Rscript -e 'install.packages(\"BAS\", repos=\"https://cloud.r-project.org\")'\n"
-            f"4. Restart the application"
-        )
-        raise RuntimeError(error_msg) from e
-    
     try:
         # Handle column names with special characters for proper processing
         if original_formula:
@@ -98,16 +118,6 @@ def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None
         # Prepare the dataset for R using renamed columns
         analysis_df = df_renamed[[response_var] + predictor_vars].copy()
         
-        # Send dataset to R
-        with localconverter(ro.default_converter + pandas2ri.converter):
-            ro.globalenv["df"] = analysis_df
-        
-        # Send label_map to R if provided
-        if label_map is not None:
-            # Convert Python dict to R list
-            r_label_map = ro.ListVector(label_map)
-            ro.globalenv["label_map"] = r_label_map
-        
         # Convert categorical variables to factors in R
         if categorical_vars is None:
             categorical_vars = []
@@ -117,192 +127,24 @@ def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None
             if var in analysis_df.columns:
                 factor_conversion += f"df${var} <- as.factor(df${var})\n"
         
-        r(f'''
-        df <- as.data.frame(df)
-        {factor_conversion}
-        ''')
-        
         # Use the processed formula (already handles special characters)
         # Clean formula: remove carriage returns and strip whitespace
         formula_str = formula.replace('\r', '').replace('\n', ' ').strip()
         
-        # Load BAS and run bas.lm with MCMC method
-        # Set default media path if not provided
-        import os
-        if media_path is None:
-            media_path = os.path.join(os.getcwd(), 'media')
-        
-        # Ensure media directory exists
-        os.makedirs(media_path, exist_ok=True)
-        
+        # Run bas.lm with MCMC method (BAS is preloaded in the R workers).
+        # R returns numbers only; every figure is built in Python from these arrays.
         r_code = f'''
-        # Check if R can install packages, then install and load BAS package
-        tryCatch({{
-          if (!requireNamespace("BAS", quietly = TRUE)) {{
-            # Try to install BAS package
-            install_result <- tryCatch({{
-              install.packages("BAS", repos="https://cloud.r-project.org", quiet = TRUE)
-            }}, error = function(e) {{
-              stop(paste("Failed to install BAS package:", e$message, 
-                         "\\nPlease ensure R is installed and you have write permissions to the R library directory.",
-                         "\\nYou can install BAS manually in R with: install.packages(\\"BAS\\")"))
-            }})
-            
-            # Check if installation was successful
-            if (!requireNamespace("BAS", quietly = TRUE)) {{
-              stop("BAS package installation completed but package is still not available.")
-            }}
-          }}
-          library(BAS)
-        }}, error = function(e) {{
-          stop(paste("BMA Analysis Error:", e$message,
-                     "\\n\\nTroubleshooting:",
-                     "\\n1. Ensure R is installed: R --version",
-                     "\\n2. Install BAS package manually: Rscript -e 'install.packages(\\"BAS\\", repos=\\"https://cloud.r-project.org\\")'",
-                     "\\n3. Check R library permissions: Rscript -e '.libPaths()'"))
-        }})
-        
-        # Define plotting function matching the R template
-        plot_bma_results <- function(file_path, model_name, bma_model, label_map = NULL) {{
-          pic_name <- paste0(file_path, "/", model_name, ".png")
-          
-          coef_info <- coef(bma_model, probne0 = TRUE)
-          
-          # Extract and process coefficients
-          pip <- coef_info$probne0[-1]  # Remove intercept
-          post_means <- coef_info$postmean[-1]
-          post_sds <- coef_info$postsd[-1]
-          predictors <- coef_info$namesx[-1]
-          
-          # Calculate 95% confidence intervals
-          ci_lower <- post_means - 1.96 * post_sds
-          ci_upper <- post_means + 1.96 * post_sds
-          
-          # Create a data frame and sort by PIP in descending order
-          coef_df <- data.frame(predictors, pip, post_means, post_sds, ci_lower, ci_upper)
-          coef_df <- coef_df[order(-coef_df$pip), ]
-          
-          # Update vectors with sorted values
-          pip <- coef_df$pip
-          post_means <- coef_df$post_means
-          post_sds <- coef_df$post_sds
-          predictors <- coef_df$predictors
-          ci_lower <- coef_df$ci_lower
-          ci_upper <- coef_df$ci_upper
-          
-          # Apply label mapping if provided
-          if (!is.null(label_map)) {{
-            predictors <- ifelse(predictors %in% names(label_map),
-                                 label_map[predictors],
-                                 predictors)
-          }}
-          
-          # Open PNG device
-          png(pic_name, width = 12, height = 6, units = "in", res = 300)
-          
-          # Set up modern plotting parameters with consistent font
-          par(mfrow = c(1, 2), 
-              mar = c(12, 5, 6, 2) + 0.1, 
-              mgp = c(3.5, 1, 0), 
-              cex.axis = 0.9,
-              cex.lab = 1.1,
-              cex.main = 1.2,
-              family = "sans")
-          
-          # Modern color palette for PIP bars
-          pip_colors <- ifelse(pip < 0.5, 
-                               "#E5E7EB",  # Light gray for low PIP
-                               "#3B82F6")  # Modern blue for high PIP
-          
-          # Add gradient effect for high PIP bars
-          pip_colors_gradient <- ifelse(pip < 0.5, 
-                                        "#E5E7EB",
-                                        ifelse(pip < 0.7, "#60A5FA", "#1D4ED8"))
-          
-          # Plot modern PIP barplot
-          bp_pip <- barplot(
-            pip,
-            names.arg = predictors,
-            xlab = "",
-            ylim = c(0, 1.05),
-            col = pip_colors_gradient,
-            border = "white",
-            main = paste("Posterior Inclusion Probabilities\\\\n", model_name),
-            ylab = "Inclusion Probability",
-            cex.names = 0.8,
-            las = 2,
-            space = 0.3,
-            col.main = "#1F2937",
-            col.lab = "#374151",
-            col.axis = "#6B7280"
-          )
-          
-          # Add modern reference line
-          abline(h = 0.5, col = "#EF4444", lty = 2, lwd = 2.5)
-          
-          # Add subtle grid lines
-          grid(nx = NA, ny = NULL, col = "#F3F4F6", lty = 1, lwd = 0.5)
-          
-          # Add value labels on top of bars
-          text(x = bp_pip, y = pip + 0.03, 
-               labels = paste0(round(pip * 100, 1), "%"), 
-               cex = 0.7, col = "#374151", font = 2)
-          
-          # Plot modern coefficient barplot with error bars
-          bp_coef <- barplot(
-            post_means,
-            names.arg = predictors,
-            xlab = "",
-            col = "#10B981",  # Modern emerald green
-            border = "white",
-            main = paste("Model-averaged Coefficients ±1 SD\\\\n", model_name),
-            ylab = "Coefficient Estimate",
-            cex.names = 0.8,
-            las = 2,
-            space = 0.3,
-            col.main = "#1F2937",
-            col.lab = "#374151",
-            col.axis = "#6B7280",
-            ylim = range(c(post_means - post_sds, post_means + post_sds)) * 1.2
-          )
-          
-          # Add modern error bars
-          arrows(
-            x0 = bp_coef,
-            y0 = post_means - post_sds,
-            x1 = bp_coef,
-            y1 = post_means + post_sds,
-            angle = 90,
-            code = 3,
-            length = 0.08,
-            lwd = 2.5,
-            col = "#374151"
-          )
-          
-          # Add horizontal reference line at zero
-          abline(h = 0, col = "#6B7280", lty = 1, lwd = 1.5)
-          
-          # Add subtle grid lines
-          grid(nx = NA, ny = NULL, col = "#F3F4F6", lty = 1, lwd = 0.5)
-          
-          # Add coefficient value labels
-          text(x = bp_coef, y = post_means + sign(post_means) * post_sds + 
-               sign(post_means) * 0.05 * diff(range(c(post_means - post_sds, post_means + post_sds))), 
-               labels = paste0(round(post_means, 3)), 
-               cex = 0.7, col = "#374151", font = 2)
-          
-          dev.off()
-          
-          return(coef_df)
-        }}
+        df <- as.data.frame(df)
+        {factor_conversion}
         
         # Initialize variables
-        bma_fit <- NULL
         bma_results <- data.frame(
           predictors = character(0),
           pip = numeric(0),
           post_means = numeric(0),
-          post_sds = numeric(0)
+          post_sds = numeric(0),
+          ci_lower = numeric(0),
+          ci_upper = numeric(0)
         )
         n_models <- 0
         r_squared <- 0
@@ -312,8 +154,8 @@ def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None
           log_marginal_likelihood = 0,
           R2 = 0
         )
-        top_models <- NULL
-        top_model_probs <- NULL
+        model_space <- NULL
+        model_space_probs <- NULL
         
         # Fit BMA model using BAS with MCMC method
         tryCatch({{
@@ -328,97 +170,89 @@ def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None
           
           print("Model fitted successfully")
           
-          # Generate plots and get coefficient table
-          model_name <- "BMA_Analysis"
-          file_path <- "{media_path}"
-          
-          # Use label_map from global environment if available
-          r_label_map <- NULL
-          if (exists("label_map")) {{
-            r_label_map <- label_map
-          }}
-          
-          bma_results <- plot_bma_results(file_path, model_name, bma_fit, r_label_map)
+          # Coefficient table without the intercept, sorted by PIP
+          coef_info <- coef(bma_fit)
+          bma_results <- data.frame(
+            predictors = coef_info$namesx[-1],
+            pip = coef_info$probne0[-1],
+            post_means = coef_info$postmean[-1],
+            post_sds = coef_info$postsd[-1]
+          )
+          bma_results$ci_lower <- bma_results$post_means - 1.96 * bma_results$post_sds
+          bma_results$ci_upper <- bma_results$post_means + 1.96 * bma_results$post_sds
+          bma_results <- bma_results[order(-bma_results$pip), ]
           
           # Get model information
           n_models <- length(bma_fit$logmarg)
-          
-          # Calculate fit statistics
-          fit_stats <- data.frame(
-            model_index = seq_along(bma_fit$logmarg),
-            log_marginal_likelihood = bma_fit$logmarg,
-            R2 = bma_fit$R2
-          )
-          
-          # Best model based on log marginal likelihood
           best_model_index <- which.max(bma_fit$logmarg)
-          best_model_fit <- fit_stats[best_model_index, ]
+          best_model_fit <- data.frame(
+            model_index = best_model_index,
+            log_marginal_likelihood = bma_fit$logmarg[best_model_index],
+            R2 = bma_fit$R2[best_model_index]
+          )
           # Weighted R2 (model-averaged R2)
           weighted_R2 <- sum(bma_fit$postprobs * bma_fit$R2)
-          # Calculate R-squared for the best model (for backward compatibility)
-          # Use the R2 from the best model directly
-          r_squared <- best_model_fit$R2
-          # Get top models - simplified approach
-          top_models <- NULL
-          top_model_probs <- NULL
+          r_squared <- bma_fit$R2[best_model_index]
+          
+          # Inclusion indicators (0/1) of the most probable models, for the model-space image
+          n_vars <- length(bma_fit$namesx)
+          ord <- order(-bma_fit$postprobs)[seq_len(min({MODEL_SPACE_MODELS}, length(bma_fit$postprobs)))]
+          model_space <- t(vapply(bma_fit$which[ord],
+                                  function(w) as.integer((seq_len(n_vars) - 1) %in% w),
+                                  integer(n_vars)))
+          model_space <- as.data.frame(model_space[, -1, drop = FALSE])
+          names(model_space) <- bma_fit$namesx[-1]
+          model_space_probs <- bma_fit$postprobs[ord]
           
         }}, error = function(e) {{
           print(paste("Error in BMA fitting:", e$message))
-          # Keep the initialized empty results
-          n_models <- 0
-          r_squared <- 0
-          weighted_R2 <- 0
-          best_model_fit <- data.frame(
-            model_index = 0,
-            log_marginal_likelihood = 0,
-            R2 = 0
-          )
-          top_models <- NULL
-          top_model_probs <- NULL
         }})
         '''
-        r(r_code)
+        progress.report('bma_fitting', message='Fitting BMA model in R')
+        try:
+            out = get_pool().submit(
+                r_code, analysis_df,
+                outputs=['bma_results', 'n_models', 'r_squared', 'weighted_R2',
+                         'best_model_fit', 'model_space', 'model_space_probs'],
+                on_console=_console_progress('bma_fitting'),
+            )
+        except RJobError as e:
+            if str(e).startswith('R worker could not start'):
+                raise _r_setup_error(e) from e
+            raise
         
-        # Bring the results back into Python
-        with localconverter(ro.default_converter + pandas2ri.converter):
-            bma_table = r['bma_results']
-            n_models = r['n_models'][0] if len(r['n_models']) > 0 else 0
-            r_squared = r['r_squared'][0] if len(r['r_squared']) > 0 else 0.0
-            print("sd")
-            print(r_squared)
-            weighted_R2 = r['weighted_R2'][0] if len(r['weighted_R2']) > 0 else 0.0
-            best_model_fit = r['best_model_fit']
-            top_models = r['top_models']
-            top_model_probs = r['top_model_probs']
+        # Results come back as plain Python values
+        bma_table = out['bma_results']
+        n_models = out['n_models'][0] if out['n_models'] else 0
+        r_squared = out['r_squared'][0] if out['r_squared'] else 0.0
+        weighted_R2 = out['weighted_R2'][0] if out['weighted_R2'] else 0.0
+        best_model_fit = out['best_model_fit']
+        space = out['model_space']
+        space_probs = [float(p) for p in out['model_space_probs'] or []]
         
-        # Convert to more readable format
-        top_models_list = []
-        try:
-            # Check if top_models is not NULL and has content
-            if top_models is not None and hasattr(top_models, '__len__') and len(top_models) > 0:
-                for i in range(min(5, len(top_models))):
-                    model_dict = {'model_id': i+1, 'variables': 'Model ' + str(i+1)}
-                    top_models_list.append(model_dict)
-        except Exception as e:
-            # Silently handle NULL case - this is expected when top_models is NULL
-            top_models_list = []
+        label_map = label_map or {}
         
         # Format the clean results table
         bma_summary = []
         for _, row in bma_table.iterrows():
             bma_summary.append({
-                'Variable': row['predictors'],
-                'PosteriorMean': row['post_means'],
-                'PosteriorSD': row['post_sds'],
-                'InclusionProb': row['pip'],
-                'CILower': row['ci_lower'],
-                'CIUpper': row['ci_upper']
+                'Variable': label_map.get(row['predictors'], row['predictors']),
+                'PosteriorMean': float(row['post_means']),
+                'PosteriorSD': float(row['post_sds']),
+                'InclusionProb': float(row['pip']),
+                'CILower': float(row['ci_lower']),
+                'CIUpper': float(row['ci_upper'])
             })
         
-        try:
-            top_model_probs_list = [float(p) for p in top_model_probs] if top_model_probs is not None else []
-        except Exception as e:
-            top_model_probs_list = []
+        model_space = None
+        top_models_list = []
+        if space is not None and len(space):
+            variables = [label_map.get(c, c) for c in space.columns]
+            inclusion = space.to_numpy(dtype=int).tolist()
+            model_space = {'variables': variables, 'inclusion': inclusion, 'probs': space_probs}
+            top_models_list = [
+                {var: bool(flag) for var, flag in zip(variables, row)} for row in inclusion[:TOP_MODELS]
+            ]
         
         results = {
             'success': True,
@@ -426,12 +260,11 @@ def run_bma_analysis_bas(df, response_var, predictor_vars, categorical_vars=None
             'n_models_evaluated': int(n_models) if n_models is not None else 0,
             'r_squared': float(r_squared) if r_squared is not None else 0.0,
             'top_models': top_models_list,
-            'top_model_probs': top_model_probs_list,
+            'top_model_probs': space_probs[:len(top_models_list)],
+            'model_space': model_space,
             'formula_used': formula_str,
             'response_variable': response_var,
-            'predictor_variables': predictor_vars,
-            'plot_generated': True,
-            'plot_filename': 'BMA_Analysis.png'
+            'predictor_variables': predictor_vars
         }
         
         # Add new statistics to results
@@ -496,10 +329,6 @@ def run_bma_analysis(df, response_var, predictor_vars, categorical_vars=None, or
         # Prepare the dataset for R
         analysis_df = df[[response_var] + predictor_vars].copy()
         
-        # Send dataset to R
-        with localconverter(ro.default_converter + pandas2ri.converter):
-            ro.globalenv["df"] = analysis_df
-        
         # Convert categorical variables to factors in R
         if categorical_vars is None:
             categorical_vars = []
@@ -509,18 +338,16 @@ def run_bma_analysis(df, response_var, predictor_vars, categorical_vars=None, or
             if var in analysis_df.columns:
                 factor_conversion += f"df${var} <- as.factor(df${var})\n"
         
-        r(f'''
-        df <- as.data.frame(df)
-        {factor_conversion}
-        ''')
-        
         # Use the processed formula (already handles special characters)
         # Clean formula: remove carriage returns and strip whitespace
+        formula = original_formula or f"{response_var} ~ " + " + ".join(predictor_vars)
         formula_str = formula.replace('\r', '').replace('\n', ' ').strip()
         
-        # Load BMA and run bic.glm with plotting
+        # Run bic.glm with plotting (BMA is loaded in the R workers when installed)
         r_code = f'''
-        if (!requireNamespace("BMA", quietly = TRUE)) install.packages("BMA", repos="https://cloud.r-project.org")
+        df <- as.data.frame(df)
+        {factor_conversion}
+        if (!requireNamespace("BMA", quietly = TRUE)) stop("The BMA package is not installed in R")
         library(BMA)
         
         # Define plotting function
@@ -680,15 +507,17 @@ def run_bma_analysis(df, response_var, predictor_vars, categorical_vars=None, or
           top_model_probs <- NULL
         }}
         '''
-        r(r_code)
+        out = get_pool().submit(
+            r_code, analysis_df,
+            outputs=['bma_results', 'n_models', 'r_squared', 'top_models', 'top_model_probs'],
+        )
         
-        # Bring the results back into Python
-        with localconverter(ro.default_converter + pandas2ri.converter):
-            bma_table = r['bma_results']
-            n_models = r['n_models'][0] if len(r['n_models']) > 0 else 0
-            r_squared = r['r_squared'][0] if len(r['r_squared']) > 0 else 0.0
-            top_models = r['top_models']
-            top_model_probs = r['top_model_probs']
+        # Results come back as plain Python values
+        bma_table = out['bma_results']
+        n_models = out['n_models'][0] if out['n_models'] else 0
+        r_squared = out['r_squared'][0] if out['r_squared'] else 0.0
+        top_models = out['top_models']
+        top_model_probs = out['top_model_probs']
         
         # Debug output removed for production
         
@@ -1035,6 +864,105 @@ def get_bma_coefficients_plot_data(bma_results):
         'layout': layout
     }
 
+def get_bma_model_space_plot_data(bma_results):
+    """
+    Generate plot data for the BMA model-space image
+    
+    Each row is one of the most probable models (best at the top) and each
+    column a variable; a cell is filled when the model includes the variable.
+    
+    Parameters:
+    -----------
+    bma_results : dict
+        Results from run_bma_analysis_bas or run_bma_analysis_native
+        
+    Returns:
+    --------
+    dict : Plot data for the model-space heatmap
+    """
+    
+    space = bma_results.get('model_space') if bma_results.get('success') else None
+    if not space or not space.get('inclusion'):
+        return None
+    
+    inclusion = np.asarray(space['inclusion'], dtype=float)
+    probs = np.asarray(space['probs'], dtype=float)
+    model_labels = [f"Model {i + 1}" for i in range(len(probs))]
+    
+    # Excluded cells are left blank; included cells are coloured by the model's posterior probability
+    z = np.where(inclusion > 0, probs[:, None], np.nan)
+    
+    plot_data = {
+        'type': 'heatmap',
+        'x': space['variables'],
+        'y': model_labels,
+        'z': [[None if np.isnan(v) else float(v) for v in row] for row in z],
+        'customdata': [[f"{p * 100:.1f}%"] * len(space['variables']) for p in probs],
+        'colorscale': [
+            [0.0, '#BFDBFE'],
+            [1.0, '#1D4ED8']
+        ],
+        'zmin': 0,
+        'zmax': float(probs.max()) if len(probs) else 1,
+        'xgap': 2,
+        'ygap': 2,
+        'showscale': True,
+        'colorbar': {
+            'title': {
+                'text': 'Posterior Model Probability',
+                'font': {'size': 14, 'color': '#374151', 'family': 'system-ui, -apple-system, Segoe UI, Roboto, "Helvetica Neue", Arial, sans-serif'}
+            },
+            'titleside': 'right',
+            'tickformat': '.0%',
+            'tickfont': {'size': 12, 'color': '#6B7280', 'family': 'system-ui, -apple-system, Segoe UI, Roboto, "Helvetica Neue", Arial, sans-serif'},
+            'len': 0.8,
+            'thickness': 25
+        },
+        'hovertemplate': '<b>%{y}</b> (%{customdata})<br>' +
+                        'Includes %{x}<br>' +
+                        '<extra></extra>',
+        'hoverongaps': False
+    }
+    
+    layout = {
+        'title': {
+            'text': 'Model Space - Most Probable Models',
+            'font': {'size': 18, 'color': '#1f2937', 'family': 'system-ui, -apple-system, Segoe UI, Roboto, "Helvetica Neue", Arial, sans-serif'},
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        'xaxis': {
+            'title': {
+                'text': 'Variables',
+                'font': {'size': 15, 'color': '#374151', 'family': 'system-ui, -apple-system, Segoe UI, Roboto, "Helvetica Neue", Arial, sans-serif'}
+            },
+            'side': 'bottom',
+            'tickangle': -45,
+            'tickfont': {'family': 'system-ui, -apple-system, Segoe UI, Roboto, "Helvetica Neue", Arial, sans-serif', 'size': 13, 'color': '#6B7280'},
+            'showgrid': False
+        },
+        'yaxis': {
+            'autorange': 'reversed',
+            'tickfont': {'family': 'system-ui, -apple-system, Segoe UI, Roboto, "Helvetica Neue", Arial, sans-serif', 'size': 12, 'color': '#6B7280'},
+            'showgrid': False
+        },
+        'height': max(360, 28 * len(probs) + 220),
+        'margin': {
+            'l': 100,
+            'r': 150,
+            't': 80,
+            'b': 160
+        },
+        'plot_bgcolor': '#F9FAFB',
+        'paper_bgcolor': 'rgba(0,0,0,0)',
+        'showlegend': False
+    }
+    
+    return {
+        'data': [plot_data],
+        'layout': layout
+    }
+
 def format_bma_results(bma_results):
     """
     Format BMA results for display in HTML template
@@ -1091,8 +1019,7 @@ def format_bma_results(bma_results):
         'predictor_variables': bma_results['predictor_variables'],
         'plot_data': get_bma_plot_data(bma_results),
         'coefficients_plot_data': get_bma_coefficients_plot_data(bma_results),
-        'plot_generated': bma_results.get('plot_generated', False),
-        'plot_filename': bma_results.get('plot_filename', 'BMA_Analysis.png'),
+        'model_space_plot_data': get_bma_model_space_plot_data(bma_results),
         'weighted_R2': bma_results.get('weighted_R2', 0.0),
         'best_model_fit': bma_results.get('best_model_fit', {})
     }
@@ -1118,6 +1045,25 @@ class BMAModule:
                 'placeholder': 'e.g., region, category, group',
                 'help': 'Comma-separated list of categorical variable names (will be converted to factors)',
                 'required': False
+            },
+            'bma_backend': {
+                'type': 'select',
+                'label': 'Engine',
+                'options': [
+                    {'value': 'auto', 'label': 'Automatic'},
+                    {'value': 'native', 'label': 'Native (NumPy)'},
+                    {'value': 'r', 'label': 'R (BAS)'},
+                ],
+                'default': 'auto',
+                'help': 'Native enumerates every model up to 20 candidate terms and samples with MC3 above that',
+                'required': False
+            },
+            'bma_prior': {
+                'type': 'select',
+                'label': 'Model Prior (Native Engine)',
+                'options': [{'value': p, 'label': p} for p in PRIORS],
+                'default': 'BIC',
+                'required': False
             }
         }
     
@@ -1191,11 +1137,15 @@ class BMAModule:
             if missing_vars:
                 raise ValueError(f"Predictor variables not found in dataset: {missing_vars}")
             
-            # Run BMA analysis using BAS library with MCMC method
-            import os
-            from django.conf import settings
-            media_path = getattr(settings, 'MEDIA_ROOT', os.path.join(os.getcwd(), 'media'))
-            bma_results = run_bma_analysis_bas(df_renamed, response_var, predictor_vars, categorical_vars, original_formula=formula, media_path=media_path)
+            backend = _resolve_backend(options.get('bma_backend'))
+            print(f"DEBUG: BMA backend: {backend}")
+            if backend == 'native':
+                bma_results = run_bma_analysis_native(
+                    df_renamed, response_var, predictor_vars, categorical_vars, original_formula=formula,
+                    prior=options.get('bma_prior') or 'BIC')
+            else:
+                # Run BMA analysis using BAS library with MCMC method
+                bma_results = run_bma_analysis_bas(df_renamed, response_var, predictor_vars, categorical_vars, original_formula=formula)
             
             if not bma_results['success']:
                 return {
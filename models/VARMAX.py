@@ -2,76 +2,226 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from statsmodels.tsa.statespace.varmax import VARMAX
+from statsmodels.tsa.statespace.tools import prepare_trend_data
 from statsmodels.tools.eval_measures import aic, bic
 from statsmodels.stats.stattools import durbin_watson
-from statsmodels.tsa.stattools import adfuller
 import re
 import plotly.graph_objects as go
 from io import BytesIO
 import base64
+import os
 import warnings
+from functools import partial
+from models import process_pool, stationarity
 warnings.filterwarnings("ignore")
 
 
 def adf_check(series, name):
     """
     Perform the Augmented Dickey-Fuller test on a time series and return results.
-    
+
+    The result comes from models.stationarity, which caches it by the
+    column's content, so an unchanged column is not tested again. KPSS
+    fields are included alongside the ADF ones.
+
     Parameters:
     - series: pd.Series - The time series data to be tested
     - name: str - The name of the time series (for labeling purposes)
-    
+
     Returns:
     - dict: Dictionary containing test statistic, p-value, critical values, and stationarity status
     """
+    return stationarity.check_column(series, name)
+
+
+# Information criteria an order search can minimize
+ORDER_CRITERIA = ('aic', 'bic', 'hqic')
+
+
+def _build_model(endog_df, exog_df, order, trend, enforce_stationarity):
+    """Unfitted VARMAX; an exog frame without columns means no exogenous regressors."""
+    exog = exog_df if exog_df is not None and exog_df.shape[1] else None
+    return VARMAX(endog_df, exog=exog, order=order, trend=trend, enforce_stationarity=enforce_stationarity)
+
+
+def _exog_constraints(mod, endog_names, exog_names, exog_map):
+    """
+    Zero constraints for the exogenous coefficients each equation excludes.
+
+    Names come from the unfitted model, where the coefficient of exog x in
+    the equation of y is 'beta.x.y'.
+    """
+    names = set(mod.param_names)
+    constraints = {}
+    for y in endog_names:
+        allowed = set(exog_map.get(y, []))
+        for x in exog_names:
+            name = f'beta.{x}.{y}'
+            if x not in allowed and name in names:
+                constraints[name] = 0.0
+    return constraints
+
+
+def _ols_start_params(mod, endog_df, exog_df, exog_map):
+    """
+    Starting values from equation-by-equation least squares.
+
+    Each equation regresses y_t on the trend, its allowed exogenous
+    variables and p lags of every endogenous series (VARMAX's intercept
+    form), so excluded coefficients start exactly at their constrained zero.
+    Estimates are placed by parameter name; MA terms keep the model's own
+    starting values. Falls back to those entirely if the AR part is not
+    stationary when stationarity is enforced.
+    """
+    params = np.array(mod.start_params, dtype=float)
+    p = mod.k_ar
+    if p == 0:
+        return params
+    y = np.asarray(endog_df, dtype=float)
+    T, k = y.shape
+    endog_names = list(endog_df.columns)
+    exog_names = list(exog_df.columns) if exog_df is not None else []
+    blocks = []
+    if mod.k_trend > 0:
+        trend_data = prepare_trend_data(mod.polynomial_trend, mod.k_trend, mod.nobs, mod.trend_offset)
+        blocks.append(np.asarray(trend_data, dtype=float)[p:])
+    lags = np.hstack([y[p - lag:T - lag] for lag in range(1, p + 1)])
+    Y = y[p:]
+
+    trend = np.zeros((k, mod.k_trend))
+    ar = np.zeros((k, k * p))
+    beta = np.zeros((k, len(exog_names)))
+    resid = np.empty_like(Y)
+    for i, name in enumerate(endog_names):
+        cols = [j for j, x in enumerate(exog_names) if x in set(exog_map.get(name, []))]
+        X = np.hstack(blocks + ([np.asarray(exog_df, dtype=float)[p:, cols]] if cols else []) + [lags])
+        coef = np.linalg.lstsq(X, Y[:, i], rcond=None)[0]
+        resid[:, i] = Y[:, i] - X @ coef
+        trend[i] = coef[:mod.k_trend]
+        beta[i, cols] = coef[mod.k_trend:mod.k_trend + len(cols)]
+        ar[i] = coef[mod.k_trend + len(cols):]
+
+    if mod.enforce_stationarity:
+        companion = np.zeros((k * p, k * p))
+        companion[:k] = ar
+        companion[k:, :-k] = np.eye(k * (p - 1))
+        if np.max(np.abs(np.linalg.eigvals(companion))) >= 1:
+            print("DEBUG: OLS start values are not stationary; using VARMAX defaults")
+            return params
+
+    # VARMAX lists the trend terms first, equation by equation
+    values = dict(zip(mod.param_names[:k * mod.k_trend], trend.ravel()))
+    for i, eq in enumerate(endog_names):
+        for lag in range(1, p + 1):
+            for j, lagged in enumerate(endog_names):
+                values[f'L{lag}.{lagged}.{eq}'] = ar[i, (lag - 1) * k + j]
+        for j, x in enumerate(exog_names):
+            values[f'beta.{x}.{eq}'] = beta[i, j]
+    sigma_u = resid.T @ resid / (Y.shape[0] - X.shape[1])
     try:
-        # Drop NaN values before testing
-        series_clean = series.dropna()
-        
-        if len(series_clean) < 4:  # Need at least 4 observations for ADF test
-            return {
-                'variable': name,
-                'test_statistic': None,
-                'p_value': None,
-                'critical_value_1pct': None,
-                'critical_value_5pct': None,
-                'critical_value_10pct': None,
-                'is_stationary': False,
-                'error': 'Insufficient data (need at least 4 observations)'
-            }
-        
-        # Perform ADF test
-        result = adfuller(series_clean, autolag='AIC')
-        
-        # Extract results
-        test_statistic = result[0]
-        p_value = result[1]
-        critical_values = result[4]
-        
-        # Determine stationarity (p-value < 0.05 indicates stationarity)
-        is_stationary = bool(p_value < 0.05)
-        
-        return {
-            'variable': name,
-            'test_statistic': float(test_statistic),
-            'p_value': float(p_value),
-            'critical_value_1pct': float(critical_values['1%']),
-            'critical_value_5pct': float(critical_values['5%']),
-            'critical_value_10pct': float(critical_values['10%']),
-            'is_stationary': is_stationary,
-            'interpretation': 'Stationary' if is_stationary else 'Non-stationary'
-        }
+        if mod.error_cov_type == 'unstructured':
+            chol = np.linalg.cholesky(sigma_u)
+            for r, c in zip(*np.tril_indices(k)):
+                name = f'sqrt.var.{endog_names[r]}' if r == c else f'sqrt.cov.{endog_names[c]}.{endog_names[r]}'
+                values[name] = chol[r, c]
+        elif mod.error_cov_type == 'diagonal':
+            values.update((f'sigma2.{eq}', var) for eq, var in zip(endog_names, sigma_u.diagonal()))
+    except np.linalg.LinAlgError:
+        pass
+    # Names the model does not have (e.g. betas when exog is not estimated by MLE) are skipped
+    index = {name: i for i, name in enumerate(mod.param_names)}
+    for name, value in values.items():
+        if name in index:
+            params[index[name]] = value
+    return params
+
+
+def _fit_restricted(endog_df, exog_df, exog_map, order, trend, enforce_stationarity, start_params=None):
+    """One maximum-likelihood fit of VARMAX with the per-equation exogenous restrictions."""
+    endog_names = list(endog_df.columns)
+    exog_names = list(exog_df.columns) if exog_df is not None else []
+    mod = _build_model(endog_df, exog_df, order, trend, enforce_stationarity)
+    constraints = _exog_constraints(mod, endog_names, exog_names, exog_map)
+    if start_params is None:
+        start_params = _ols_start_params(mod, endog_df, exog_df, exog_map)
+    else:
+        start_params = np.array(start_params, dtype=float)
+    for name, value in constraints.items():
+        start_params[mod.param_names.index(name)] = value
+
+    if constraints:
+        try:
+            return mod.fit_constrained(constraints, start_params=start_params, includes_fixed=True, disp=False)
+        except Exception as e:
+            print(f"Constraint fit failed, falling back to unconstrained fit. Reason: {str(e)}")
+    return mod.fit(start_params=start_params, disp=False)
+
+
+def _order_fit(endog_df, exog_df, exog_map, trend, enforce_stationarity, order):
+    """(order, criteria, params) of one candidate order, or criteria None if it fails (runs in pool workers)."""
+    try:
+        res = _fit_restricted(endog_df, exog_df, exog_map, order, trend, enforce_stationarity)
+        criteria = {'aic': float(res.aic), 'bic': float(res.bic), 'hqic': float(res.hqic), 'llf': float(res.llf)}
+        return order, criteria, np.asarray(res.params)
     except Exception as e:
-        return {
-            'variable': name,
-            'test_statistic': None,
-            'p_value': None,
-            'critical_value_1pct': None,
-            'critical_value_5pct': None,
-            'critical_value_10pct': None,
-            'is_stationary': False,
-            'error': str(e)
-        }
+        print(f"DEBUG: VARMAX order {order} failed: {e}")
+        return order, None, None
+
+
+def select_varmax_order(endog_df, exog_df, exog_map, max_p=4, max_q=2, ic='aic', trend='c',
+                        enforce_stationarity=True, patience=1, workers=None):
+    """
+    Grid search over VARMAX (p, q) orders with early stopping.
+
+    Orders are visited by total size p + q. The orders of one size are fitted
+    together on a process pool, and the search stops once ``patience``
+    consecutive sizes fail to improve the best criterion.
+
+    Args:
+        endog_df: Endogenous series
+        exog_df: Exogenous series
+        exog_map: Allowed exogenous variables per equation
+        max_p: Largest AR order
+        max_q: Largest MA order
+        ic: Criterion minimized ('aic', 'bic' or 'hqic')
+        trend: VARMAX trend
+        enforce_stationarity: Whether to enforce stationarity
+        patience: Sizes without improvement before stopping
+        workers: Worker processes (None reads ANALYSIS_POOL_WORKERS; 1 runs in-process)
+
+    Returns:
+        (best_order, best_params, table) where table lists the fitted orders
+        with their criteria, and best_params can warm-start the final fit
+    """
+    if ic not in ORDER_CRITERIA:
+        raise ValueError(f"Order criterion must be one of {', '.join(ORDER_CRITERIA)}, not {ic!r}")
+    fit_one = partial(_order_fit, endog_df, exog_df, exog_map, trend, enforce_stationarity)
+
+    table = []
+    best = (np.inf, None, None)
+    stale = 0
+    for size in range(1, max_p + max_q + 1):
+        orders = [(p, size - p) for p in range(min(size, max_p), -1, -1) if size - p <= max_q]
+        if not orders:
+            continue
+        fitted = process_pool.run(fit_one, orders, workers, label='VARMAX order')
+
+        improved = False
+        for order, criteria, params in fitted:
+            table.append({'p': order[0], 'q': order[1], **(criteria or {}), 'failed': criteria is None})
+            if criteria is not None and np.isfinite(criteria[ic]) and criteria[ic] < best[0]:
+                best = (criteria[ic], order, params)
+                improved = True
+        stale = 0 if improved else stale + 1
+        print(f"DEBUG: VARMAX order search size {size}: best {ic}={best[0]:.4f} at {best[1]}")
+        if stale >= patience:
+            break
+
+    if best[1] is None:
+        raise ValueError('No VARMAX order could be estimated')
+    for row in table:
+        row['selected'] = (row['p'], row['q']) == best[1]
+    return best[1], best[2], table
 
 
 def fit_varmax_per_eq_exog(
@@ -82,11 +232,16 @@ def fit_varmax_per_eq_exog(
     trend="c",
     enforce_stationarity=True,
     steps_irf=12,
-    alpha=0.05
+    alpha=0.05,
+    start_params=None
 ):
     """
     Fit VARMAX model with per-equation exogenous controls.
     
+    Coefficients of exogenous variables outside an equation's list are fixed
+    at zero, and the model is fitted once from equation-by-equation OLS
+    starting values.
+    
     Parameters:
     - endog_df: DataFrame with columns = endogenous series in desired order
     - exog_df: DataFrame with all candidate exogenous controls (union across equations)
@@ -97,6 +252,7 @@ def fit_varmax_per_eq_exog(
     - enforce_stationarity: Whether to enforce stationarity constraints
     - steps_irf: horizon for IRF
     - alpha: Significance level for confidence intervals
+    - start_params: Optional full parameter vector to start from (e.g. from an order search)
     
     Returns:
     - res: Fitted VARMAX model results
@@ -111,47 +267,7 @@ def fit_varmax_per_eq_exog(
         if y not in exog_map:
             exog_map[y] = []  # allow none by default
     
-    # Fit an initial model so we can discover parameter names reliably
-    mod0 = VARMAX(
-        endog_df, 
-        exog=exog_df, 
-        order=order, 
-        trend=trend, 
-        enforce_stationarity=enforce_stationarity
-    )
-    res0 = mod0.fit(disp=False)
-    
-    # Build zero constraints for disallowed exog-by-equation coefficients
-    param_names = res0.param_names
-    zero_constraints = []
-    
-    # Create a quick lookup of allowed exogs per equation
-    allowed = {y: set(exog_map.get(y, [])) for y in endog_names}
-    all_exogs = set(exog_df.columns)
-    
-    # For each equation y, all exogs not in allowed[y] should be zero
-    for y in endog_names:
-        disallowed_for_y = all_exogs - allowed[y]
-        for pname in param_names:
-            # Heuristic: match beta parameters that look tied to exog and endog
-            low = pname.lower()
-            if ('beta' in low or 'exog' in low) and y.lower() in low:
-                for x in disallowed_for_y:
-                    if x.lower() in low:
-                        zero_constraints.append(f"{pname} = 0")
-    
-    # Build constraint string
-    constraint_str = " , ".join(sorted(set(zero_constraints)))
-    
-    # Fit constrained if we have any constraints, else keep res0
-    if constraint_str:
-        try:
-            res = mod0.fit_constrained(constraint_str, disp=False)
-        except Exception as e:
-            print(f"Constraint fit failed, falling back to unconstrained fit. Reason: {str(e)}")
-            res = res0
-    else:
-        res = res0
+    res = _fit_restricted(endog_df, exog_df, exog_map, order, trend, enforce_stationarity, start_params)
     
     # ---- Tidy parameter table ----
     params = res.params
@@ -207,10 +323,13 @@ def fit_varmax_per_eq_exog(
     })
     
     # ---- IRF ----
-    irf_array = res.impulse_responses(steps_irf)  # shape: (steps, k_endog, k_endog)
+    # impulse_responses covers one impulse at a time, for horizons 0..steps
+    k = len(endog_names)
+    irf_array = np.stack(
+        [np.asarray(res.impulse_responses(steps_irf - 1, impulse=i)) for i in range(k)], axis=2
+    )  # shape: (steps, k_endog response, k_endog impulse)
     # Build a tidy IRF DataFrame: columns = ['step','impulse','response','irf']
     records = []
-    k = len(endog_names)
     for h in range(steps_irf):
         for i_imp in range(k):
             for j_resp in range(k):
@@ -236,7 +355,8 @@ class VARMAXModule:
         - formula: Formula string with multiple equations (e.g., "y1 ~ x1 + x2\n y2 ~ x3")
         - analysis_type: Not used in VARMAX
         - outdir: Output directory for results
-        - options: Dictionary of analysis options (e.g., {'order': (2,0), 'steps_irf': 12})
+        - options: Dictionary of analysis options (e.g., {'order': (2,0), 'steps_irf': 12});
+          'order_search': True picks (p, q) up to 'max_p'/'max_q' by 'order_ic'
         - schema_types: Column type information
         - schema_orders: Column ordering information
         
@@ -407,6 +527,21 @@ class VARMAXModule:
             # Get enforce_stationarity from options (default to True)
             enforce_stationarity = options.get('enforce_stationarity', True) if options else True
             
+            # Optional (p, q) grid search; the winner's estimates warm-start the final fit
+            order_search_table = []
+            start_params = None
+            if options and options.get('order_search'):
+                order_ic = options.get('order_ic', 'aic')
+                order, start_params, order_search_table = select_varmax_order(
+                    endog_df, exog_df, exog_map,
+                    max_p=int(options.get('max_p', 4)),
+                    max_q=int(options.get('max_q', 2)),
+                    ic=order_ic,
+                    trend=trend,
+                    enforce_stationarity=enforce_stationarity
+                )
+                print(f"Order search selected {order} by {order_ic.upper()} ({len(order_search_table)} orders fitted)")
+            
             # Fit VARMAX model
             print(f"Fitting VARMAX model with order {order}, trend={trend}, enforce_stationarity={enforce_stationarity}")
             print(f"Endogenous variables: {list(endog_df.columns)}")
@@ -421,7 +556,8 @@ class VARMAXModule:
                 trend=trend,
                 enforce_stationarity=enforce_stationarity,
                 steps_irf=steps_irf,
-                alpha=0.05
+                alpha=0.05,
+                start_params=start_params
             )
             
             # Convert parameter table to list of dicts for template
@@ -549,6 +685,7 @@ class VARMAXModule:
                 'formula': formula,
                 'var_order': order[0] if isinstance(order, tuple) else order,  # For display
                 'order': order,  # Full order tuple
+                'order_search_table': order_search_table,  # Orders fitted by the (p, q) search, if requested
                 'steps_irf': steps_irf,
                 'model_results': res,  # Store for potential future use (IRF generation)
                 'endog_data': endog_df,  # Store for IRF generation
@@ -4,75 +4,34 @@ import matplotlib.pyplot as plt
 from statsmodels.tsa.api import VAR, VARMAX
 from statsmodels.tools.eval_measures import aic, bic, mse, rmse
 from statsmodels.stats.stattools import durbin_watson
-from statsmodels.tsa.stattools import adfuller
 import re
 import plotly.graph_objects as go
 from io import BytesIO
 import base64
 import warnings
+from models import progress
+from models.var_lag_selection import var_lag_selection_table
+from models import stationarity
+from models import varx_rolling
 warnings.filterwarnings("ignore")
 
 
 def adf_check(series, name):
     """
     Perform the Augmented Dickey-Fuller test on a time series and return results.
-    
+
+    The result comes from models.stationarity, which caches it by the
+    column's content, so an unchanged column is not tested again. KPSS
+    fields are included alongside the ADF ones.
+
     Parameters:
     - series: pd.Series - The time series data to be tested
     - name: str - The name of the time series (for labeling purposes)
-    
+
     Returns:
     - dict: Dictionary containing test statistic, p-value, critical values, and stationarity status
     """
-    try:
-        # Drop NaN values before testing
-        series_clean = series.dropna()
-        
-        if len(series_clean) < 4:  # Need at least 4 observations for ADF test
-            return {
-                'variable': name,
-                'test_statistic': None,
-                'p_value': None,
-                'critical_value_1pct': None,
-                'critical_value_5pct': None,
-                'critical_value_10pct': None,
-                'is_stationary': False,
-                'error': 'Insufficient data (need at least 4 observations)'
-            }
-        
-        # Perform ADF test
-        result = adfuller(series_clean, autolag='AIC')
-        
-        # Extract results
-        test_statistic = result[0]
-        p_value = result[1]
-        critical_values = result[4]
-        
-        # Determine stationarity (p-value < 0.05 indicates stationarity)
-        # Ensure is_stationary is a Python bool, not numpy bool
-        is_stationary = bool(p_value < 0.05)
-        
-        return {
-            'variable': name,
-            'test_statistic': float(test_statistic),
-            'p_value': float(p_value),
-            'critical_value_1pct': float(critical_values['1%']),
-            'critical_value_5pct': float(critical_values['5%']),
-            'critical_value_10pct': float(critical_values['10%']),
-            'is_stationary': is_stationary,
-            'interpretation': 'Stationary' if is_stationary else 'Non-stationary'
-        }
-    except Exception as e:
-        return {
-            'variable': name,
-            'test_statistic': None,
-            'p_value': None,
-            'critical_value_1pct': None,
-            'critical_value_5pct': None,
-            'critical_value_10pct': None,
-            'is_stationary': False,
-            'error': str(e)
-        }
+    return stationarity.check_column(series, name)
 
 
 class VARXModule:
@@ -380,6 +339,7 @@ class VARXModule:
         # Check stationarity of endogenous variables using ADF test
         # If a {var}_stationary column exists and is not constant, use that instead of the original variable
         stationarity_results = []
+        tested_columns = {}
         # Use dependent_vars (original names) for display, but check what column is actually being used
         for orig_var in dependent_vars:
             # Get the actual column name being used (from var_mapping or original)
@@ -403,13 +363,8 @@ class VARXModule:
                         print(f"DEBUG: Stationary column '{stationary_var_name}' is constant, using original variable '{orig_var}' for ADF test")
             
             if var_to_test in df_work.columns:
-                adf_result = adf_check(df_work[var_to_test], var_to_test)
-                # Update the variable name in the result to show the original variable name
-                # but indicate if it's using the transformed version
-                adf_result['variable'] = orig_var  # Original variable name for display
-                adf_result['tested_column'] = var_to_test  # Column actually tested
-                adf_result['is_transformed'] = (var_to_test != orig_var)  # Whether using transformed column
-                stationarity_results.append(adf_result)
+                tested_columns[orig_var] = var_to_test
+                stationarity_results.append(None)  # Filled in below, once all columns are tested together
             else:
                 # Variable not found in dataframe
                 stationarity_results.append({
@@ -424,6 +379,20 @@ class VARXModule:
                     'tested_column': orig_var,
                     'is_transformed': False
                 })
+
+        # One batch, so uncached columns are tested in parallel and cached ones are reused
+        checked = stationarity.check_columns({col: df_work[col] for col in set(tested_columns.values())})
+        pending_vars = iter(tested_columns.items())
+        for i, entry in enumerate(stationarity_results):
+            if entry is None:
+                orig_var, var_to_test = next(pending_vars)
+                adf_result = dict(checked[var_to_test])
+                # Update the variable name in the result to show the original variable name
+                # but indicate if it's using the transformed version
+                adf_result['variable'] = orig_var  # Original variable name for display
+                adf_result['tested_column'] = var_to_test  # Column actually tested
+                adf_result['is_transformed'] = (var_to_test != orig_var)  # Whether using transformed column
+                stationarity_results[i] = adf_result
         
         # Get VAR order from options
         # If var_order is not specified or is 0, use automatic lag selection
@@ -581,129 +550,33 @@ class VARXModule:
             endog_clean = endog_clean.astype('float64')
             exog_clean = exog_clean.astype('float64')
             
-            # Initialize VAR model (without exog for lag selection)
-            # Note: select_order() only works with endogenous variables
-            model = VAR(endog_clean)
-            
-            # Perform automatic lag selection (always do it to show the table)
-            lag_selection_results = None
-            lag_selection_table = []
-            
-            # Always perform lag selection to show the comparison table
-            # This helps users see which lag is optimal even if they specified a manual lag
-            # Always use max_lags_to_test (user's setting) for the table, regardless of auto-selection
+            # Lag selection table (always shown, even when the user fixed the lag).
+            # All orders are compared on the same trimmed sample from one QR factorization
+            # of the largest lagged design, instead of one VAR fit per lag.
             max_lags_for_table = max_lags_to_test
-            
             print(f"DEBUG: Creating lag selection table (testing up to {max_lags_for_table} lags)")
-            
-            # Use the simpler approach: fit model for each lag and collect AIC/BIC/HQIC/LL
-            # This is more reliable than using select_order() which may not work with exog
-            # Always generate the table, even if select_order fails
-            
-            # Try to get optimal lags using select_order (without exog, for reference)
-            # But don't fail if this doesn't work - we'll determine optimal from the table itself
+            progress.report('lag_selection', 0, max_lags_for_table, unit='lags',
+                            message=f'Lag selection: comparing lags 1 to {max_lags_for_table}')
             lag_selection_results = None
+            lag_selection_table = []
             try:
-                lag_selection = model.select_order(maxlags=max_lags_for_table, verbose=False)
-                lag_selection_results = {
-                    'aic': lag_selection.aic,
-                    'bic': lag_selection.bic,
-                    'fpe': lag_selection.fpe if hasattr(lag_selection, 'fpe') else None,
-                    'hqic': lag_selection.hqic if hasattr(lag_selection, 'hqic') else None
-                }
-                print(f"DEBUG: Got optimal lags from select_order: AIC={lag_selection_results['aic']}, BIC={lag_selection_results['bic']}")
+                lag_selection_table, lag_selection_results = var_lag_selection_table(
+                    endog_clean, exog_clean, max_lags_for_table)
+                for row in lag_selection_table:
+                    if row['aic'] is None:
+                        print(f"DEBUG: Lag {row['lag']}: not estimable on the common sample")
+                    else:
+                        print(f"DEBUG: Lag {row['lag']}: AIC={row['aic']:.4f}, BIC={row['bic']:.4f}, "
+                              f"HQIC={row['hqic']:.4f}, LL={row['log_likelihood']:.4f}")
+                if all(v is None for v in lag_selection_results.values()):
+                    lag_selection_results = None
             except Exception as e:
-                print(f"DEBUG: select_order failed (this is OK, we'll determine optimal from table): {e}")
+                print(f"DEBUG: Lag selection table failed: {e}")
+                import traceback
+                traceback.print_exc()
                 lag_selection_results = None
-            
-            # Now fit models with exog for each lag to get the full table
-            # Fit VARX model for each lag and collect AIC/BIC/HQIC/LL
-            print(f"DEBUG: Fitting VARX models for lags 1 to {max_lags_for_table}")
-            aic_values = []
-            bic_values = []
-            hqic_values = []
-            
-            for lag in range(1, max_lags_for_table + 1):
-                try:
-                    # Fit VARX model with exogenous variables
-                    temp_model = VAR(endog_clean, exog=exog_clean)
-                    fitted = temp_model.fit(lag, verbose=False)
-                    
-                    aic_val = fitted.aic
-                    bic_val = fitted.bic
-                    hqic_val = fitted.hqic if hasattr(fitted, 'hqic') else None
-                    ll_val = fitted.llf
-                    
-                    aic_values.append((lag, aic_val))
-                    bic_values.append((lag, bic_val))
-                    if hqic_val is not None:
-                        hqic_values.append((lag, hqic_val))
-                    
-                    # Mark optimal lags (use select_order results if available, otherwise determine from table)
-                    if lag_selection_results:
-                        is_aic_optimal = (lag == lag_selection_results['aic'])
-                        is_bic_optimal = (lag == lag_selection_results['bic'])
-                        is_fpe_optimal = (lag == lag_selection_results['fpe']) if lag_selection_results['fpe'] else False
-                        is_hqic_optimal = (lag == lag_selection_results['hqic']) if lag_selection_results['hqic'] else False
-                    else:
-                        # Determine optimal from the values we collect (will be set after loop)
-                        is_aic_optimal = False
-                        is_bic_optimal = False
-                        is_fpe_optimal = False
-                        is_hqic_optimal = False
-                    
-                    lag_selection_table.append({
-                        'lag': lag,
-                        'aic': aic_val,
-                        'bic': bic_val,
-                        'hqic': hqic_val,
-                        'log_likelihood': ll_val,
-                        'aic_optimal': is_aic_optimal,
-                        'bic_optimal': is_bic_optimal,
-                        'fpe_optimal': is_fpe_optimal,
-                        'hqic_optimal': is_hqic_optimal
-                    })
-                    print(f"DEBUG: Lag {lag}: AIC={aic_val:.4f}, BIC={bic_val:.4f}, HQIC={hqic_val if hqic_val else 'N/A'}, LL={ll_val:.4f}")
-                except Exception as e:
-                    print(f"DEBUG: Could not fit VARX model at lag {lag}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    # Add row with None values
-                    lag_selection_table.append({
-                        'lag': lag,
-                        'aic': None,
-                        'bic': None,
-                        'hqic': None,
-                        'log_likelihood': None,
-                        'aic_optimal': False,
-                        'bic_optimal': False,
-                        'fpe_optimal': False,
-                        'hqic_optimal': False
-                    })
-                    continue
-            
-            # If select_order failed, determine optimal lags from the table
-            if not lag_selection_results and len(aic_values) > 0:
-                # Find optimal lags (minimum AIC, BIC, HQIC)
-                optimal_aic_lag = min(aic_values, key=lambda x: x[1])[0] if aic_values else None
-                optimal_bic_lag = min(bic_values, key=lambda x: x[1])[0] if bic_values else None
-                optimal_hqic_lag = min(hqic_values, key=lambda x: x[1])[0] if hqic_values and len(hqic_values) > 0 else None
-                
-                lag_selection_results = {
-                    'aic': optimal_aic_lag,
-                    'bic': optimal_bic_lag,
-                    'fpe': None,
-                    'hqic': optimal_hqic_lag
-                }
-                
-                # Update optimal flags in the table
-                for row in lag_selection_table:
-                    if row['lag'] == optimal_aic_lag:
-                        row['aic_optimal'] = True
-                    if row['lag'] == optimal_bic_lag:
-                        row['bic_optimal'] = True
-                    if row['lag'] == optimal_hqic_lag and optimal_hqic_lag:
-                        row['hqic_optimal'] = True
+            progress.report('lag_selection', max_lags_for_table, max_lags_for_table, unit='lags',
+                            message='Lag selection table complete')
             
             # Choose best lag by AIC (most common criterion) only if auto-selection was requested
             # IMPORTANT: If manual_lag_provided is True, we MUST use that lag and NOT override it
@@ -748,6 +621,7 @@ class VARXModule:
             # Fit VARX model with exogenous variables using the selected lag order
             # VAR will handle lagging internally, but endog and exog must have same length
             model = VAR(endog_clean, exog=exog_clean)
+            progress.report('fitting', message=f'Fitting VARX model with {var_order} lags')
             results = model.fit(maxlags=var_order, verbose=False)
             
             # Debug: Check what parameters VAR returned
@@ -1275,6 +1149,21 @@ class VARXModule:
                 cov_data = []
                 formatted_cov_columns = []
             
+            # Rolling/expanding window re-estimation (recursive least squares, one pass over the sample)
+            rolling_window = None
+            window_mode = (options or {}).get('window_mode') or None
+            if window_mode:
+                progress.report('rolling', message=f'Re-estimating over {window_mode} windows')
+                try:
+                    rolling_window = varx_rolling.rolling_varx(
+                        endog_clean, exog_clean, lags=var_order, mode=window_mode,
+                        window_size=options.get('window_size'), step=options.get('window_step') or 1)
+                    rolling_window['plot_data'] = varx_rolling.build_rolling_plot_json(rolling_window)
+                    rolling_window['error'] = None
+                except (ValueError, np.linalg.LinAlgError) as e:
+                    print(f"DEBUG: Rolling window estimation failed: {e}")
+                    rolling_window = {'mode': window_mode, 'error': str(e)}
+            
             # Store results for IRF generation
             # Note: independent_vars may include dummy-encoded variable names
             # Store original variable names for display purposes
@@ -1312,6 +1201,7 @@ class VARXModule:
                 'model_results': results,  # Store for IRF generation
                 'endog_data': endog_clean,  # Store for IRF generation
                 'constant_stationary_vars': constant_stationary_vars,  # Variables with constant stationary columns (will use original instead)
+                'rolling_window': rolling_window,  # Window coefficient, variance and IRF paths (None unless requested)
                 'error': None
             }
             
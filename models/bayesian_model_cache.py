@@ -0,0 +1,170 @@
+# models/bayesian_model_cache.py
+"""
+Bounded cache of built Bambi models and their compiled NUTS log-densities.
+
+Building a Bambi model (design matrices plus the PyMC graph) and compiling
+the joint log-density and its gradient often takes longer than sampling a
+small model. Runs that differ only in sampler settings (draws, tuning,
+chains) or inference method reuse both instead.
+
+Only the compiled function is shared between runs. Every run gets a new
+NUTS step from PyMC's default jitter+adapt_diag initialisation (jittered
+chain starts, a fresh diagonal mass matrix and step size), so no adaptation
+carries over from an earlier fit.
+
+Entries are keyed by formula, family, prior specification and a fingerprint
+of the data (shape, dtypes and content). Bambi bakes the design matrices into
+the graph as constants, so new data is a new entry rather than a value
+swapped into a shared variable.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Entries kept in this process, most recently used last
+_MAX_CACHED = 8
+
+# Attempts per chain at a jittered start with a finite log-density (as in PyMC)
+_JITTER_RETRIES = 10
+
+
+def data_fingerprint(df):
+    """Shape, dtypes and a content hash of ``df``."""
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(df, index=True).values.tobytes(), digest_size=16)
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    return f"{df.shape[0]}x{df.shape[1]}:{digest.hexdigest()}"
+
+
+class CachedModel:
+    """A built Bambi model and, once sampled with NUTS, its compiled log-density and gradient."""
+
+    def __init__(self, model):
+        self.model = model
+        self.compilations = 0
+        self._logp_dlogp = None
+        self._compiled_for = None
+        # Bambi keeps fit state on the model object, so fits of one entry run one at a time
+        self.lock = threading.Lock()
+
+    def pymc_model(self):
+        """The PyMC model behind the Bambi model, building it if needed."""
+        if not self.model.built:
+            self.model.build()
+        return self.model.backend.model
+
+    def logp_dlogp_function(self):
+        """Compiled joint log-density and gradient, as NUTS compiles it, built on first use."""
+        pm_model = self.pymc_model()
+        if self._compiled_for is not pm_model:
+            func = pm_model.logp_dlogp_function(pm_model.value_vars, ravel_inputs=True)
+            func.trust_input = True
+            self._logp_dlogp, self._compiled_for = func, pm_model
+            self.compilations += 1
+        return self._logp_dlogp
+
+    def nuts_step(self, chains, random_seed, initvals=None):
+        """
+        New NUTS step and jittered chain starts that reuse the compiled log-density.
+
+        Follows PyMC's jitter+adapt_diag initialisation: each chain starts at
+        the initial point (or ``initvals``) plus a uniform jitter, retried until
+        the log-density is finite, and the step gets a fresh adaptive diagonal
+        mass matrix centred on the mean start.
+
+        Returns:
+            Tuple of (initial points, step), or (None, None) when the model has
+            discrete parameters and PyMC must choose the samplers itself
+        """
+        import pymc as pm
+        from pymc.blocking import DictToArrayBijection
+        from pymc.initial_point import make_initial_point_fns_per_chain
+        from pymc.sampling.mcmc import all_continuous
+        from pymc.step_methods.hmc.quadpotential import QuadPotentialDiagAdapt
+
+        pm_model = self.pymc_model()
+        if not all_continuous(pm_model.value_vars):
+            return None, None
+        func = self.logp_dlogp_function()
+        seeds = np.random.default_rng(random_seed).integers(2 ** 30, size=chains)
+        point_fns = make_initial_point_fns_per_chain(
+            model=pm_model, overrides=initvals, jitter_rvs=set(pm_model.free_RVs), chains=chains)
+        names = {var.name for var in pm_model.value_vars}
+
+        initial_points = []
+        for point_fn, seed in zip(point_fns, seeds):
+            rng = np.random.default_rng(seed)
+            for _ in range(_JITTER_RETRIES + 1):
+                point = {name: value for name, value in point_fn(seed).items() if name in names}
+                if np.isfinite(func([DictToArrayBijection.map(point).data], extra_vars={})[0]):
+                    break
+                seed = rng.integers(2 ** 30)
+            initial_points.append(point)
+
+        starts = np.array([DictToArrayBijection.map(point).data for point in initial_points])
+        mean = starts.mean(axis=0)
+        potential = QuadPotentialDiagAdapt(len(mean), mean, np.ones_like(mean), 10, rng=int(seeds[0]))
+        step = pm.NUTS(pm_model.value_vars, model=pm_model, potential=potential, rng=int(seeds[0]),
+                       initial_point=initial_points[0], logp_dlogp_func=func)
+        return initial_points, step
+
+
+class CompiledModelCache:
+    """LRU cache of ``CachedModel`` entries with hit-rate accounting."""
+
+    def __init__(self, max_entries=_MAX_CACHED):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(formula, family, prior, df):
+        return (formula, family, repr(prior), data_fingerprint(df))
+
+    def get_or_build(self, key, build):
+        """
+        Cached entry for ``key``, calling ``build()`` to create the Bambi model on a miss.
+
+        Returns:
+            Tuple of (CachedModel, hit flag)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, True
+            self.misses += 1
+
+        entry = CachedModel(build())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry, False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache used by the Bayesian regression module
+MODEL_CACHE = CompiledModelCache()
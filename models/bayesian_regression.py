@@ -6,6 +6,9 @@ import plotly.graph_objects as go
 import plotly.io as pio
 from scipy import stats
 import warnings
+from models import progress
+from models.bayesian_model_cache import MODEL_CACHE
+from models.posterior_store import PosteriorStore
 warnings.filterwarnings('ignore')
 
 # Import Bambi and ArviZ for proper Bayesian inference
@@ -213,6 +216,234 @@ def _build_spotlight_json(fitted_model, df, x_var, m_var, options):
         return None
 
 
+def build_posterior_spotlight_json(store, df, x_var, m_var, opts):
+    """
+    Spotlight plot with posterior credible bands, computed from stored draws.
+    
+    The mean response is evaluated on an x grid at a low and a high moderator
+    value, with other predictors held at their mean (numeric) or most frequent
+    value (categorical). Lines are posterior means, bands the central 95%.
+    """
+    if x_var not in df.columns or m_var not in df.columns:
+        return None
+    if not pd.api.types.is_numeric_dtype(df[x_var]):
+        print(f"DEBUG: Posterior spotlight needs a numeric x, '{x_var}' is categorical")
+        return None
+    
+    # Moderator levels, split the same way as the frequentist spotlight
+    mod_vals = np.sort(df[m_var].dropna().unique())
+    if len(mod_vals) <= 2 or not pd.api.types.is_numeric_dtype(df[m_var]):
+        mod_levels = [mod_vals[0], mod_vals[-1]] if len(mod_vals) > 1 else list(mod_vals)
+    else:
+        multiplier = float(opts.get('moderator_std_dev_multiplier', 1.0))
+        center = df[m_var].median() if opts.get('moderator_separation') == 'median' else df[m_var].mean()
+        spread = df[m_var].std(ddof=0) * multiplier
+        mod_levels = [center - spread, center + spread]
+    labels = ["Low", "High"][:len(mod_levels)]
+    if opts.get("legend_low"):
+        labels[0] = opts.get("legend_low")
+    if opts.get("legend_high") and len(labels) > 1:
+        labels[1] = opts.get("legend_high")
+    
+    xx = df[x_var].dropna()
+    x_grid = np.sort(xx.unique()) if xx.nunique() <= 6 else np.linspace(xx.min(), xx.max(), 100)
+    n = len(x_grid)
+    
+    # Everything else at a typical value
+    base = {}
+    for col in df.columns:
+        if col in (x_var, m_var):
+            continue
+        series = df[col].dropna()
+        if series.empty:
+            continue
+        if pd.api.types.is_numeric_dtype(series):
+            base[col] = np.full(n, float(series.mean()))
+        else:
+            base[col] = np.full(n, series.mode().iloc[0], dtype=object)
+    
+    dash_map = {"solid": None, "dashed": "dash", "dotted": "dot", "dashdot": "dashdot"}
+    colors = [opts.get("color_low") or "#999999", opts.get("color_high") or "#111111"]
+    dashes = [dash_map.get(opts.get("line_style_low", "solid")), dash_map.get(opts.get("line_style_high", "solid"))]
+    display_moderator = (opts.get('moderator_display_name') or '').strip() or m_var
+    show_ci = opts.get("show_ci", opts.get("spotlight_ci", True))
+    if isinstance(show_ci, str):
+        show_ci = show_ci == 'true'
+    
+    traces, bands = [], []
+    for idx, mval in enumerate(mod_levels):
+        m_column = np.full(n, mval, dtype=float if pd.api.types.is_numeric_dtype(df[m_var]) else object)
+        draws = store.expected_response({**base, x_var: x_grid.astype(float), m_var: m_column}, n)
+        if draws.size == 0:
+            return None
+        mean = draws.mean(axis=0)
+        traces.append(go.Scatter(
+            x=x_grid, y=mean, mode="lines", name=f"{labels[idx]} {display_moderator}",
+            line=dict(width=2.5, color=colors[idx], dash=dashes[idx])
+        ))
+        if show_ci:
+            lo, hi = np.percentile(draws, [2.5, 97.5], axis=0)
+            bands.append(go.Scatter(
+                x=np.concatenate([x_grid, x_grid[::-1]]),
+                y=np.concatenate([hi, lo[::-1]]),
+                fill="toself", fillcolor=colors[idx], opacity=0.12,
+                line=dict(color="rgba(0,0,0,0)"), hoverinfo="skip", showlegend=False
+            ))
+    
+    background_color = opts.get('background_color', 'white')
+    show_grid = opts.get('show_grid', True)
+    default_y = "Predicted Probability" if store.family == 'bernoulli' else f"Predicted {store.meta.get('outcome_var') or 'outcome'}"
+    fig = go.Figure(data=bands + traces)
+    fig.update_layout(
+        template="plotly_white",
+        margin=dict(l=60, r=10, t=20, b=50),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        xaxis_title=opts.get("x_name") or x_var,
+        yaxis_title=opts.get("y_name") or default_y,
+        height=420,
+        plot_bgcolor=background_color,
+        paper_bgcolor=background_color,
+        xaxis=dict(showgrid=show_grid),
+        yaxis=dict(showgrid=show_grid)
+    )
+    return pio.to_json(fig, pretty=False)
+
+
+# Fast posterior approximations offered as a preview before full MCMC
+APPROXIMATE_METHODS = {
+    'advi': 'ADVI',
+    'laplace': 'Laplace',
+}
+
+# ADVI stops early once the variational parameters settle
+ADVI_MAX_ITERATIONS = 30000
+
+
+def _posterior_parameters(model):
+    """Names of the model's free parameters as reported in MCMC summaries (no offsets or deterministics)."""
+    if model.backend is None:
+        model.build()
+    return [rv.name for rv in model.backend.model.free_RVs if not rv.name.endswith('_offset')]
+
+
+def _approximate_posterior(model, method, draws, random_seed=42):
+    """
+    Fit a Bambi model with a fast posterior approximation.
+    
+    'advi' runs mean-field ADVI until the variational parameters converge;
+    'laplace' uses a Gaussian at the posterior mode with the curvature there
+    as covariance. Either way ``draws`` independent samples are returned as
+    single-chain InferenceData restricted to the free parameters.
+    """
+    import pymc as pm
+    
+    if method == 'laplace':
+        progress.report('approximating', message='Laplace approximation at the posterior mode')
+        idata = model.fit(inference_method='laplace', draws=draws, random_seed=random_seed)
+    else:
+        callbacks = [pm.callbacks.CheckParametersConvergence(diff='absolute', tolerance=1e-2)]
+        if progress.active():
+            callbacks.append(lambda approx, losses, i: progress.report(
+                'approximating', i, ADVI_MAX_ITERATIONS, unit='iterations',
+                message=f'ADVI iteration {i:,} (loss {losses[-1]:,.2f})' if len(losses) else 'ADVI'))
+        approx = model.fit(inference_method='vi', method='advi', n=ADVI_MAX_ITERATIONS,
+                           callbacks=callbacks, random_seed=random_seed, progressbar=False)
+        idata = approx.sample(draws, random_seed=random_seed)
+    
+    names = [name for name in _posterior_parameters(model) if name in idata.posterior]
+    idata.posterior = idata.posterior[names]
+    return idata
+
+
+def _warm_start_values(model, idata):
+    """Posterior means of the free parameters, JSON-ready, for warm-starting MCMC."""
+    values = {}
+    for name in _posterior_parameters(model):
+        if name in idata.posterior:
+            values[name] = np.asarray(idata.posterior[name].mean(dim=('chain', 'draw'))).tolist()
+    return values
+
+
+def _initvals_for(model, warm_start):
+    """MCMC initial values from stored preview means, keeping only parameters this model still has."""
+    if not warm_start:
+        return None
+    names = set(_posterior_parameters(model))
+    initvals = {name: np.asarray(value, dtype=float) for name, value in warm_start.items() if name in names}
+    return initvals or None
+
+
+def _posterior_terms(model, idata, columns):
+    """Posterior variables that are regression coefficients, mapped to the columns they multiply."""
+    import re
+    
+    names = list(model.terms.keys()) if hasattr(model, 'terms') else list(idata.posterior.data_vars)
+    terms = {}
+    for name in names:
+        if name not in idata.posterior:
+            continue
+        if name == 'Intercept':
+            terms[name] = []
+            continue
+        components = [re.sub(r'^C\((.*)\)$', r'\1', part.strip()) for part in name.split(':')]
+        if all(comp in columns for comp in components):
+            terms[name] = components
+    return terms
+
+
+def _build_bambi_model(formula, df_clean, family, prior_type):
+    """Create the Bambi model and apply the requested prior specification."""
+    model = bmb.Model(formula, data=df_clean, family=family)
+    print(f"DEBUG: Bambi model created successfully")
+    print(f"DEBUG: Model formula: {model.formula}")
+    print(f"DEBUG: Model family: {model.family}")
+    
+    # Debug: Print available terms
+    print(f"DEBUG: Available terms in model: {list(model.terms.keys()) if hasattr(model, 'terms') else 'No terms attribute'}")
+    if hasattr(model, 'terms'):
+        for term_name, term_obj in model.terms.items():
+            print(f"DEBUG: Term '{term_name}': {type(term_obj)}")
+    
+    # Set priors based on prior_type
+    if prior_type != 'auto':
+        print(f"DEBUG: Setting priors to {prior_type}")
+        try:
+            if prior_type == 'weakly_informative':
+                # Set weakly informative priors (larger variance)
+                # Get all terms from the model and set priors for them
+                priors = {'Intercept': bmb.Prior('Normal', mu=0, sigma=10)}
+    
+                # Add priors for all terms in the model
+                for term_name in model.terms:
+                    if term_name != 'Intercept':
+                        priors[term_name] = bmb.Prior('Normal', mu=0, sigma=5)
+    
+                model.set_priors(priors)
+                print(f"DEBUG: Set weakly informative priors for terms: {list(priors.keys())}")
+    
+            elif prior_type == 'informative':
+                # Set informative priors (smaller variance)
+                priors = {'Intercept': bmb.Prior('Normal', mu=0, sigma=1)}
+    
+                # Add priors for all terms in the model
+                for term_name in model.terms:
+                    if term_name != 'Intercept':
+                        priors[term_name] = bmb.Prior('Normal', mu=0, sigma=0.5)
+    
+                model.set_priors(priors)
+                print(f"DEBUG: Set informative priors for terms: {list(priors.keys())}")
+    
+            print(f"DEBUG: Priors set to {prior_type}")
+        except Exception as e:
+            print(f"DEBUG: Error setting priors: {e}")
+            print(f"DEBUG: Available terms: {list(model.terms.keys()) if hasattr(model, 'terms') else 'No terms available'}")
+            print(f"DEBUG: Using default priors instead")
+    else:
+        print(f"DEBUG: Using default Bambi priors (auto)")
+    
+    return model
+
+
 class BayesianRegressionModule:
     """Bayesian regression module using Bambi and ArviZ."""
     
@@ -274,6 +505,7 @@ class BayesianRegressionModule:
             
             # Print loading status updates
             print("BAYESIAN_STATUS: Initializing Bayesian regression analysis...")
+            progress.report('preparing', message='Initializing Bayesian regression analysis')
             
             # Handle column names with special characters for proper processing
             formula, df_renamed, column_mapping = _quote_column_names_with_special_chars(df, formula)
@@ -325,57 +557,18 @@ class BayesianRegressionModule:
             
             print(f"DEBUG: Using family: {family}")
             print("BAYESIAN_STATUS: Creating Bayesian model with Bambi...")
+            progress.report('building_model', message='Creating Bayesian model')
             
-            # Create Bambi model
+            # Create the Bambi model, or reuse a cached one built and compiled for the same model and data
             try:
-                model = bmb.Model(formula, data=df_clean, family=family)
-                print(f"DEBUG: Bambi model created successfully")
-                print(f"DEBUG: Model formula: {model.formula}")
-                print(f"DEBUG: Model family: {model.family}")
-                
-                # Debug: Print available terms
-                print(f"DEBUG: Available terms in model: {list(model.terms.keys()) if hasattr(model, 'terms') else 'No terms attribute'}")
-                if hasattr(model, 'terms'):
-                    for term_name, term_obj in model.terms.items():
-                        print(f"DEBUG: Term '{term_name}': {type(term_obj)}")
-                
-                # Set priors based on prior_type
-                if prior_type != 'auto':
-                    print(f"DEBUG: Setting priors to {prior_type}")
-                    try:
-                        if prior_type == 'weakly_informative':
-                            # Set weakly informative priors (larger variance)
-                            # Get all terms from the model and set priors for them
-                            priors = {'Intercept': bmb.Prior('Normal', mu=0, sigma=10)}
-                            
-                            # Add priors for all terms in the model
-                            for term_name in model.terms:
-                                if term_name != 'Intercept':
-                                    priors[term_name] = bmb.Prior('Normal', mu=0, sigma=5)
-                            
-                            model.set_priors(priors)
-                            print(f"DEBUG: Set weakly informative priors for terms: {list(priors.keys())}")
-                            
-                        elif prior_type == 'informative':
-                            # Set informative priors (smaller variance)
-                            priors = {'Intercept': bmb.Prior('Normal', mu=0, sigma=1)}
-                            
-                            # Add priors for all terms in the model
-                            for term_name in model.terms:
-                                if term_name != 'Intercept':
-                                    priors[term_name] = bmb.Prior('Normal', mu=0, sigma=0.5)
-                            
-                            model.set_priors(priors)
-                            print(f"DEBUG: Set informative priors for terms: {list(priors.keys())}")
-                        
-                        print(f"DEBUG: Priors set to {prior_type}")
-                    except Exception as e:
-                        print(f"DEBUG: Error setting priors: {e}")
-                        print(f"DEBUG: Available terms: {list(model.terms.keys()) if hasattr(model, 'terms') else 'No terms available'}")
-                        print(f"DEBUG: Using default priors instead")
-                else:
-                    print(f"DEBUG: Using default Bambi priors (auto)")
-                
+                cache_key = MODEL_CACHE.key(formula, family, prior_type, df_clean)
+                cached, cache_hit = MODEL_CACHE.get_or_build(
+                    cache_key, lambda: _build_bambi_model(formula, df_clean, family, prior_type)
+                )
+                model = cached.model
+                cache_stats = MODEL_CACHE.stats()
+                print(f"DEBUG: Compiled model cache {'hit' if cache_hit else 'miss'} "
+                      f"(hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['entries']}/{cache_stats['max_entries']} entries)")
                 print("BAYESIAN_STATUS: Model created successfully")
             except Exception as e:
                 print(f"DEBUG: Error creating Bambi model: {e}")
@@ -383,25 +576,68 @@ class BayesianRegressionModule:
             
             # Fit model with MCMC
             print("BAYESIAN_STATUS: Starting MCMC sampling...")
-            print(f"BAYESIAN_STATUS: Running {chains} chains with {draws} draws each (tuning: {tune} steps)")
-            try:
-                results = model.fit(
-                    draws=draws,
-                    tune=tune,
-                    chains=chains,
-                    cores=cores,
-                    random_seed=42,
-                    progressbar=False
-                )
-                print(f"DEBUG: MCMC sampling completed")
-                print(f"DEBUG: Results type: {type(results)}")
-                print("BAYESIAN_STATUS: MCMC sampling completed successfully")
-            except Exception as e:
-                print(f"DEBUG: Error during MCMC sampling: {e}")
-                raise
+            inference = options.get('inference', 'mcmc')
+            approximate = inference in APPROXIMATE_METHODS
+            warm_start = None
+            with cached.lock:
+                if approximate:
+                    print(f"BAYESIAN_STATUS: Fitting fast {APPROXIMATE_METHODS[inference]} approximation (preview)...")
+                    try:
+                        results = _approximate_posterior(model, inference, draws)
+                        warm_start = _warm_start_values(model, results)
+                        print("BAYESIAN_STATUS: Approximation completed successfully")
+                    except Exception as e:
+                        print(f"DEBUG: Error during {inference} approximation: {e}")
+                        raise
+                else:
+                    print(f"BAYESIAN_STATUS: Running {chains} chains with {draws} draws each (tuning: {tune} steps)")
+                    progress.report('sampling', 0, chains * (tune + draws), unit='draws',
+                                    message=f'Starting MCMC: {chains} chains, {draws} draws, {tune} tuning steps')
+                    sample_kwargs = {}
+                    if progress.active():
+                        sample_kwargs['callback'] = progress.mcmc_callback(chains, tune, draws)
+                    initvals = _initvals_for(model, options.get('warm_start'))
+                    if initvals:
+                        # Start every chain at the preview's posterior mean instead of jittered defaults
+                        print(f"BAYESIAN_STATUS: Warm-starting MCMC from the preview approximation ({len(initvals)} parameters)")
+                    
+                    def sample(start_values):
+                        # A fresh NUTS step per run, reusing this model's compiled log-density and gradient
+                        compilations = cached.compilations
+                        initial_points, step = cached.nuts_step(chains, 42, start_values)
+                        print(f"DEBUG: NUTS log-density {'compiled' if cached.compilations > compilations else 'reused from cache'}")
+                        step_kwargs = {'step': step, 'initvals': initial_points} if step is not None else (
+                            {'initvals': start_values} if start_values else {})
+                        return model.fit(
+                            draws=draws,
+                            tune=tune,
+                            chains=chains,
+                            cores=cores,
+                            random_seed=42,
+                            progressbar=False,
+                            **step_kwargs,
+                            **sample_kwargs
+                        )
+                    
+                    try:
+                        try:
+                            results = sample(initvals)
+                        except Exception as e:
+                            if not initvals:
+                                raise
+                            # Stale preview values (e.g. changed factor levels) should never block the full run
+                            print(f"DEBUG: Warm start rejected ({e}), sampling from default initial values")
+                            results = sample(None)
+                        print(f"DEBUG: MCMC sampling completed")
+                        print(f"DEBUG: Results type: {type(results)}")
+                        print("BAYESIAN_STATUS: MCMC sampling completed successfully")
+                    except Exception as e:
+                        print(f"DEBUG: Error during MCMC sampling: {e}")
+                        raise
             
             # Get summary statistics
             print("BAYESIAN_STATUS: Computing posterior summary statistics...")
+            progress.report('summarizing', message='Computing posterior summary statistics')
             try:
                 summary = az.summary(results, round_to=4)
                 print(f"DEBUG: Summary shape: {summary.shape}")
@@ -445,8 +681,9 @@ class BayesianRegressionModule:
                     f"{std_val:.4f}",
                     f"{hpd_low:.4f}",
                     f"{hpd_high:.4f}",
-                    f"{rhat:.3f}",
-                    f"{ess:.0f}"
+                    # Convergence diagnostics do not apply to independent draws from an approximation
+                    "—" if approximate else f"{rhat:.3f}",
+                    "—" if approximate else f"{ess:.0f}"
                 ])
             
             print(f"DEBUG: Created {len(model_rows)} model rows")
@@ -460,8 +697,16 @@ class BayesianRegressionModule:
                 'tune': tune,
                 'chains': chains,
                 'model_type': f'Bayesian {family.title()} Regression',
-                'family': family
+                'family': family,
+                'inference': inference,
+                'approximate': approximate,
+                'inference_label': APPROXIMATE_METHODS.get(inference, 'MCMC (NUTS)'),
+                'model_cache_hit': cache_hit,
+                'model_cache': MODEL_CACHE.stats(),
             }
+            if approximate:
+                model_stats['chains'] = 1
+                model_stats['tune'] = 0
             
             # Determine regression type
             if family == 'gaussian':
@@ -472,6 +717,18 @@ class BayesianRegressionModule:
                 regression_type = 'Bayesian Poisson Regression'
             else:
                 regression_type = f'Bayesian {family.title()} Regression'
+            if approximate:
+                regression_type += f' (approximate, {APPROXIMATE_METHODS[inference]})'
+            
+            # Keep the draws as a compact float32 artifact for later summaries and plots
+            posterior_store = None
+            try:
+                posterior_store = PosteriorStore.from_inference_data(
+                    results, _posterior_terms(model, results, df_clean.columns), family, outcome_var,
+                    inference, column_mapping,
+                )
+            except Exception as e:
+                print(f"DEBUG: Could not collect posterior draws for storage: {e}")
             
             # Store fitted model for later use (avoid pickling complex objects)
             fitted_model = {
@@ -479,7 +736,12 @@ class BayesianRegressionModule:
                 'family': family,
                 'formula': formula,
                 'model_type': 'bambi',
-                'summary_stats': summary.to_dict() if hasattr(summary, 'to_dict') else None
+                'summary_stats': summary.to_dict() if hasattr(summary, 'to_dict') else None,
+                'inference': inference,
+                # Posterior means from a preview, used to warm-start the full MCMC run
+                'warm_start': warm_start,
+                # Removed by run() before the fitted model is pickled onto the session
+                'posterior_store': posterior_store,
             }
             
             print(f"DEBUG: Returning - model_cols: {len(model_cols)}, model_rows: {len(model_rows)}")
@@ -511,8 +773,10 @@ class BayesianRegressionModule:
             )
             
             print("BAYESIAN_STATUS: Generating additional analysis components...")
+            progress.report('postprocessing', message='Generating plots and diagnostics')
             
             print(f"DEBUG: _fit_models returned - cols: {len(model_cols)}, rows: {len(model_rows)}")
+            posterior_store = fitted_model.pop('posterior_store', None) if fitted_model else None
             
             # 2) Parse formula to get interactions
             _, _, interactions = _parse_formula(formula)
@@ -585,6 +849,10 @@ class BayesianRegressionModule:
                 # Bootstrap results
                 'bootstrap_results': bootstrap_results,
                 
+                # Posterior draws, written to disk when the session is saved
+                'posterior_store': posterior_store,
+                'posterior_parameters': posterior_store.variables if posterior_store else [],
+                
                 # Backward compatibility
                 'spotlight_path': None,
                 'spotlight_rel': None,
@@ -0,0 +1,365 @@
+# models/bma_native.py
+"""
+Bayesian Model Averaging for linear regression in NumPy.
+
+An alternative to the R/BAS backend that needs no R and never copies the
+data across a language boundary. Predictors are standardized and the model
+space is explored with sweep-operator updates of the cross-product matrix
+[X'X X'y; y'X y'y]. Sweeping a predictor in or out costs O(k^2), and the
+swept matrix directly gives the OLS coefficients, their (X'X)^-1 diagonal
+and the residual sum of squares of the current model.
+
+* Up to ``ENUMERATION_MAX_PREDICTORS`` candidates every model is visited.
+  The models are taken in Gray-code order, so each one differs from the last
+  by a single predictor and needs one sweep.
+* Above that an MC3 sampler (Metropolis on single-predictor flips, same
+  sweep update) explores the space. Posterior probabilities are then
+  renormalized over the distinct models it visited, as BAS does.
+
+Marginal likelihoods use the BIC approximation (BAS ``prior="BIC"``) or
+Zellner's g-prior with g = n. Model priors are uniform. Results are returned
+in the same dict shape as ``run_bma_analysis_bas``.
+"""
+import heapq
+import numpy as np
+import pandas as pd
+import patsy
+from models import progress
+
+# Largest candidate count enumerated exhaustively (2^20 ~ 1M models)
+ENUMERATION_MAX_PREDICTORS = 20
+
+# MC3 steps when the model space is too large to enumerate
+MC3_ITERATIONS = 50000
+
+# Models listed in the top-models table
+TOP_MODELS = 5
+
+# Most probable models kept for the model-space image
+MODEL_SPACE_MODELS = 20
+
+# Models whose statistics are buffered before being folded into the averages
+_BLOCK = 4096
+
+PRIORS = ('BIC', 'g-prior')
+
+
+def _sweep(A, j, reverse=False):
+    """Sweep (or reverse-sweep) the symmetric matrix ``A`` on pivot ``j`` in place."""
+    d = A[j, j]
+    col = A[:, j].copy()
+    A -= np.outer(col, col) / d
+    A[:, j] = (-col if reverse else col) / d
+    A[j, :] = A[:, j]
+    A[j, j] = -1.0 / d
+
+
+class _Accumulator:
+    """Streams per-model statistics into model-averaged estimates without storing every model."""
+
+    def __init__(self, k, prior, n, sst):
+        self.k = k
+        self.prior = prior
+        self.n = n
+        self.sst = sst
+        self.g = float(n)
+        self.log_scale = -np.inf
+        self.total = 0.0
+        self.incl = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.second = np.zeros(k)
+        self.r2 = 0.0
+        self.top = []  # min-heap of (logmarg, mask bytes, r2) for the best models
+        self.best = None
+        self.n_models = 0
+        self._reset_block()
+
+    def _reset_block(self):
+        self._rss = np.empty(_BLOCK)
+        self._size = np.empty(_BLOCK, dtype=int)
+        self._masks = np.zeros((_BLOCK, self.k), dtype=bool)
+        self._beta = np.zeros((_BLOCK, self.k))
+        self._inv = np.zeros((_BLOCK, self.k))
+        self._fill = 0
+
+    def add(self, mask, A):
+        """Record the model currently swept into ``A`` (predictors in ``mask``)."""
+        i = self._fill
+        k = self.k
+        self._rss[i] = A[k, k]
+        self._size[i] = mask.sum()
+        self._masks[i] = mask
+        self._beta[i] = np.where(mask, A[:k, k], 0.0)
+        self._inv[i] = np.where(mask, -A.diagonal()[:k], 0.0)
+        self._fill += 1
+        if self._fill == _BLOCK:
+            self.flush()
+
+    def flush(self):
+        m = self._fill
+        if not m:
+            return
+        n, sst = self.n, self.sst
+        rss = np.maximum(self._rss[:m], 1e-300)
+        p = self._size[:m]
+        beta, inv, masks = self._beta[:m], self._inv[:m], self._masks[:m]
+        r2 = np.clip(1.0 - rss / sst, 0.0, 1.0)
+        df_resid = n - p - 1
+        valid = df_resid > 0
+
+        if self.prior == 'g-prior':
+            g = self.g
+            logmarg = 0.5 * (n - 1 - p) * np.log1p(g) - 0.5 * (n - 1) * np.log1p(g * (1.0 - r2))
+            shrink = g / (1.0 + g)
+            sigma2 = (sst - shrink * (sst - rss)) / np.maximum(n - 3, 1)
+            beta = shrink * beta
+            var = shrink * sigma2[:, None] * inv
+        else:
+            logmarg = -0.5 * n * np.log(rss / sst) - 0.5 * p * np.log(n)
+            sigma2 = rss / np.where(valid, df_resid, 1)
+            var = sigma2[:, None] * inv
+        logmarg = np.where(valid, logmarg, -np.inf)
+
+        # Running log-sum-exp: rescale earlier sums when a better model appears
+        block_max = logmarg.max()
+        if block_max > self.log_scale:
+            factor = np.exp(self.log_scale - block_max) if np.isfinite(self.log_scale) else 0.0
+            self.total *= factor
+            self.incl *= factor
+            self.mean *= factor
+            self.second *= factor
+            self.r2 *= factor
+            self.log_scale = block_max
+        w = np.exp(logmarg - self.log_scale)
+        self.total += w.sum()
+        self.incl += w @ masks
+        self.mean += w @ beta
+        self.second += w @ (var + beta ** 2)
+        self.r2 += w @ r2
+        self.n_models += int(valid.sum())
+
+        for j in np.argsort(logmarg)[-MODEL_SPACE_MODELS:]:
+            if not np.isfinite(logmarg[j]):
+                continue
+            entry = (float(logmarg[j]), masks[j].tobytes(), float(r2[j]))
+            if len(self.top) < MODEL_SPACE_MODELS:
+                heapq.heappush(self.top, entry)
+            elif entry > self.top[0]:
+                heapq.heapreplace(self.top, entry)
+        self._fill = 0
+
+    def result(self):
+        self.flush()
+        mean = self.mean / self.total
+        second = self.second / self.total
+        return {
+            'pip': np.minimum(self.incl / self.total, 1.0),
+            'mean': mean,
+            'sd': np.sqrt(np.maximum(second - mean ** 2, 0.0)),
+            'weighted_r2': self.r2 / self.total,
+            'top': sorted(self.top, reverse=True),
+            'log_norm': self.log_scale + np.log(self.total),
+        }
+
+
+def _enumerate(A, k, acc):
+    """Visit all 2^k models in Gray-code order, one sweep per model."""
+    mask = np.zeros(k, dtype=bool)
+    acc.add(mask, A)
+    total = 1 << k
+    for i in range(1, total):
+        j = (i & -i).bit_length() - 1
+        _sweep(A, j, reverse=mask[j])
+        mask[j] = not mask[j]
+        acc.add(mask, A)
+        if i % 65536 == 0:
+            progress.report('bma_enumeration', i, total, unit='models',
+                            message=f'Enumerated {i:,} of {total:,} models')
+
+
+def _mc3(A, k, acc, iterations, seed, n, prior):
+    """Metropolis over models by single-predictor flips; each distinct model is recorded once."""
+    rng = np.random.default_rng(seed)
+    g = float(n)
+    sst = A[k, k]
+
+    def logmarg(p, rss):
+        if n - p - 1 <= 0:
+            return -np.inf
+        if prior == 'g-prior':
+            r2 = 1.0 - rss / sst
+            return 0.5 * (n - 1 - p) * np.log1p(g) - 0.5 * (n - 1) * np.log1p(g * (1.0 - r2))
+        return -0.5 * n * np.log(max(rss, 1e-300) / sst) - 0.5 * p * np.log(n)
+
+    mask = np.zeros(k, dtype=bool)
+    current = logmarg(0, A[k, k])
+    seen = {mask.tobytes()}
+    acc.add(mask, A)
+    for it in range(iterations):
+        j = rng.integers(k)
+        _sweep(A, j, reverse=mask[j])
+        mask[j] = not mask[j]
+        proposed = logmarg(int(mask.sum()), A[k, k])
+        if np.log(rng.random()) < proposed - current:
+            current = proposed
+            key = mask.tobytes()
+            if key not in seen:
+                seen.add(key)
+                acc.add(mask, A)
+        else:
+            _sweep(A, j, reverse=mask[j])
+            mask[j] = not mask[j]
+        if it % 5000 == 0:
+            progress.report('bma_mc3', it, iterations, unit='steps',
+                            message=f'MC3 step {it:,} of {iterations:,} ({len(seen):,} models visited)')
+
+
+def run_bma_analysis_native(df, response_var, predictor_vars, categorical_vars=None, original_formula=None,
+                            prior='BIC', iterations=MC3_ITERATIONS, seed=42):
+    """
+    Run Bayesian Model Averaging for a linear model in NumPy.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The dataset to analyze
+    response_var : str
+        Name of the response variable
+    predictor_vars : list
+        List of predictor variable names
+    categorical_vars : list, optional
+        Variables treated as categorical (dummy coded)
+    original_formula : str, optional
+        Formula whose right-hand side defines the candidate terms (interactions allowed)
+    prior : str
+        'BIC' or 'g-prior' (Zellner, g = n)
+    iterations : int
+        MC3 steps when there are more than ENUMERATION_MAX_PREDICTORS candidates
+
+    Returns:
+    --------
+    dict : Same structure as ``run_bma_analysis_bas``
+    """
+    formula_str = (original_formula or f"{response_var} ~ " + " + ".join(predictor_vars))
+    formula_str = formula_str.replace('\r', '').replace('\n', ' ').strip()
+    try:
+        if prior not in PRIORS:
+            raise ValueError(f"Unknown BMA prior '{prior}'. Choose from {PRIORS}")
+        data = df.copy()
+        for var in categorical_vars or []:
+            if var in data.columns:
+                data[var] = data[var].astype(str).where(data[var].notna())
+        y, X = patsy.dmatrices(formula_str, data, return_type='dataframe', NA_action='drop')
+        X = X.drop(columns=[c for c in X.columns if c == 'Intercept'])
+        names = list(X.columns)
+        n, k = X.shape
+        if k == 0:
+            raise ValueError("The formula has no candidate predictors")
+        if n <= 2:
+            raise ValueError("Not enough complete observations for BMA")
+
+        # Exactly collinear columns (e.g. a dummy implied by others) cannot enter any model
+        Xv = X.to_numpy(dtype=float)
+        scale = Xv.std(axis=0)
+        keep = scale > 1e-12
+        Z = (Xv[:, keep] - Xv[:, keep].mean(axis=0)) / scale[keep]
+        _, r = np.linalg.qr(Z)
+        independent = np.abs(np.diag(r)) > 1e-8 * np.sqrt(n)
+        kept = np.flatnonzero(keep)[independent]
+        Z = Z[:, independent]
+        dropped = [names[i] for i in range(k) if i not in set(kept)]
+        if dropped:
+            print(f"DEBUG: BMA dropping constant or collinear columns: {dropped}")
+        names_kept = [names[i] for i in kept]
+        k_eff = len(names_kept)
+
+        yc = y.to_numpy(dtype=float).ravel()
+        yc = yc - yc.mean()
+        sst = float(yc @ yc)
+        if sst <= 0:
+            raise ValueError(f"Response variable '{response_var}' is constant")
+        A = np.empty((k_eff + 1, k_eff + 1))
+        A[:k_eff, :k_eff] = Z.T @ Z
+        A[:k_eff, k_eff] = A[k_eff, :k_eff] = Z.T @ yc
+        A[k_eff, k_eff] = sst
+
+        acc = _Accumulator(k_eff, prior, n, sst)
+        exhaustive = k_eff <= ENUMERATION_MAX_PREDICTORS
+        print(f"DEBUG: Native BMA with {k_eff} candidates, "
+              f"{'enumerating ' + format(1 << k_eff, ',') + ' models' if exhaustive else f'MC3 for {iterations:,} steps'}")
+        if exhaustive:
+            _enumerate(A, k_eff, acc)
+        else:
+            _mc3(A, k_eff, acc, iterations, seed, n, prior)
+        res = acc.result()
+
+        # Back to the original scale of each column
+        sd_cols = scale[kept]
+        post_means = res['mean'] / sd_cols
+        post_sds = res['sd'] / sd_cols
+
+        bma_summary = []
+        for j, name in enumerate(names_kept):
+            bma_summary.append({
+                'Variable': name,
+                'PosteriorMean': float(post_means[j]),
+                'PosteriorSD': float(post_sds[j]),
+                'InclusionProb': float(res['pip'][j]),
+                'CILower': float(post_means[j] - 1.96 * post_sds[j]),
+                'CIUpper': float(post_means[j] + 1.96 * post_sds[j]),
+            })
+        bma_summary.sort(key=lambda row: -row['InclusionProb'])
+
+        inclusion, probs = [], []
+        for logmarg, mask_bytes, _ in res['top']:
+            inclusion.append(np.frombuffer(mask_bytes, dtype=bool).astype(int).tolist())
+            probs.append(float(np.exp(logmarg - res['log_norm'])))
+        # Model-space columns in the same order as the summary table
+        order = [names_kept.index(row['Variable']) for row in bma_summary]
+        model_space = {
+            'variables': [names_kept[j] for j in order],
+            'inclusion': [[row[j] for j in order] for row in inclusion],
+            'probs': probs,
+        }
+        top_models = [
+            {name: bool(row[j]) for j, name in enumerate(names_kept)} for row in inclusion[:TOP_MODELS]
+        ]
+        top_model_probs = probs[:TOP_MODELS]
+        best_logmarg, _, best_r2 = res['top'][0]
+
+        return {
+            'success': True,
+            'bma_summary': bma_summary,
+            'n_models_evaluated': acc.n_models,
+            'r_squared': best_r2,
+            'top_models': top_models,
+            'top_model_probs': top_model_probs,
+            'model_space': model_space,
+            'formula_used': formula_str,
+            'response_variable': response_var,
+            'predictor_variables': predictor_vars,
+            'weighted_R2': float(res['weighted_r2']),
+            'best_model_fit': {
+                'model_index': 1,
+                'log_marginal_likelihood': best_logmarg,
+                'R2': best_r2,
+            },
+            'backend': 'native',
+            'search': 'enumeration' if exhaustive else 'MC3',
+            'prior': prior,
+            'dropped_columns': dropped,
+        }
+
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'bma_summary': [],
+            'n_models_evaluated': 0,
+            'r_squared': 0.0,
+            'top_models': [],
+            'top_model_probs': [],
+            'formula_used': formula_str,
+            'response_variable': response_var,
+            'predictor_variables': predictor_vars
+        }
@@ -0,0 +1,72 @@
+# models/bma_store.py
+"""
+Numeric results of a BMA session, kept so its figures can be drawn on demand.
+
+The coefficient table and the model-space inclusion matrix are saved as
+arrays in one compressed ``.npz`` per session under MEDIA_ROOT/bma; the
+scalar results go in a JSON member. ``load`` returns the same dict that the
+BMA engines produce, so the plot builders in ``models.BMA`` work on it
+unchanged. Nothing is rendered or written at fit time besides this file.
+"""
+import json
+import os
+import numpy as np
+
+_META_KEY = '__meta__'
+
+# Columns of the stored coefficient table, in order
+_SUMMARY_FIELDS = ('PosteriorMean', 'PosteriorSD', 'InclusionProb', 'CILower', 'CIUpper')
+
+
+def path_for_session(session_id):
+    from django.conf import settings
+    return os.path.join(settings.MEDIA_ROOT, 'bma', f'session_{session_id}.npz')
+
+
+def delete_for_session(session_id):
+    try:
+        os.remove(path_for_session(session_id))
+    except OSError:
+        pass
+
+
+def save(session_id, bma_results):
+    """Write the arrays of a successful BMA run for a session, replacing any earlier ones."""
+    path = path_for_session(session_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    summary = bma_results.get('bma_summary') or []
+    space = bma_results.get('model_space') or {}
+    arrays = {
+        'variables': np.array([row['Variable'] for row in summary], dtype=str),
+        'summary': np.array([[row[f] for f in _SUMMARY_FIELDS] for row in summary], dtype=np.float64)
+        .reshape(len(summary), len(_SUMMARY_FIELDS)),
+        'space_variables': np.array(space.get('variables') or [], dtype=str),
+        'inclusion': np.array(space.get('inclusion') or [], dtype=np.uint8),
+        'probs': np.array(space.get('probs') or [], dtype=np.float64),
+    }
+    meta = {k: v for k, v in bma_results.items() if k not in ('bma_summary', 'model_space')}
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as fh:
+        np.savez_compressed(fh, **{_META_KEY: np.array(json.dumps(meta, default=str))}, **arrays)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def load(session_id):
+    """The stored BMA results of a session as a results dict, or None if there are none."""
+    path = path_for_session(session_id)
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as archive:
+        results = json.loads(str(archive[_META_KEY]))
+        results['bma_summary'] = [
+            {'Variable': str(name), **{f: float(v) for f, v in zip(_SUMMARY_FIELDS, row)}}
+            for name, row in zip(archive['variables'], archive['summary'])
+        ]
+        if archive['probs'].size:
+            results['model_space'] = {
+                'variables': [str(v) for v in archive['space_variables']],
+                'inclusion': archive['inclusion'].astype(int).tolist(),
+                'probs': archive['probs'].tolist(),
+            }
+    return results
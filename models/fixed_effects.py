@@ -0,0 +1,329 @@
+# models/fixed_effects.py
+"""
+Absorbed fixed-effects OLS for high-cardinality categoricals.
+
+Formulas opt in with ``y ~ x1 + x2 | firm + year``. Instead of expanding the
+factors after ``|`` into dummy columns, the outcome and every regressor are
+demeaned within those factors (the within transformation, iterated by
+alternating projections when there is more than one factor) and OLS runs on
+the demeaned data. Only the coefficients of interest are estimated; the
+residual degrees of freedom account for the absorbed levels and standard
+errors are clustered.
+"""
+import numpy as np
+import pandas as pd
+import patsy
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.stats import t as tdist
+
+
+def split_absorbed_formula(formula):
+    """
+    Split ``y ~ x1 + x2 | firm + year`` into the regression formula and the absorbed factors.
+
+    Returns:
+        Tuple of (formula, absorb_vars); absorb_vars is empty when there is no ``|`` part
+    """
+    if "|" not in formula or "~" not in formula:
+        return formula, []
+    lhs, rhs = formula.split("~", 1)
+    rhs, absorbed = rhs.split("|", 1)
+    absorb_vars = [v.strip() for v in absorbed.replace("|", "+").split("+") if v.strip()]
+    rhs = rhs.strip() or "1"
+    return f"{lhs.strip()} ~ {rhs}", list(dict.fromkeys(absorb_vars))
+
+
+def _group_operator(codes, n_groups):
+    """Sparse (n_groups x n) indicator used for group sums."""
+    n = len(codes)
+    return sparse.csr_matrix((np.ones(n), (codes, np.arange(n))), shape=(n_groups, n))
+
+
+def _factorize(df, absorb_vars):
+    """Integer codes and level counts for each absorbed factor."""
+    codes, n_levels = [], []
+    for var in absorb_vars:
+        c, uniques = pd.factorize(df[var], sort=False)
+        codes.append(c.astype(np.int64))
+        n_levels.append(len(uniques))
+    return codes, n_levels
+
+
+def _singleton_mask(codes):
+    """Iteratively flag observations that are alone in some absorbed group."""
+    keep = np.ones(len(codes[0]), dtype=bool)
+    changed = True
+    while changed:
+        changed = False
+        for c in codes:
+            counts = np.bincount(c[keep], minlength=c.max() + 1)
+            singletons = keep & (counts[c] == 1)
+            if singletons.any():
+                keep &= ~singletons
+                changed = True
+    return keep
+
+
+def demean(matrix, codes, tol=1e-10, max_iter=10000):
+    """
+    Remove group means of every column for all factors in ``codes``.
+
+    A single factor is an exact within transformation. Several factors are
+    swept in turn (alternating projections) until the largest group-mean
+    correction falls below ``tol`` relative to the column scale.
+
+    Returns:
+        Tuple of (demeaned matrix, iterations used, converged flag)
+    """
+    out = np.array(matrix, dtype=float, copy=True)
+    if out.ndim == 1:
+        out = out[:, None]
+    operators = []
+    for c in codes:
+        n_groups = int(c.max()) + 1
+        op = _group_operator(c, n_groups)
+        counts = np.asarray(op.sum(axis=1)).ravel()
+        operators.append((c, op, counts))
+
+    scale = np.maximum(np.abs(out).max(axis=0), 1.0)
+    for iteration in range(1, max_iter + 1):
+        largest = 0.0
+        for c, op, counts in operators:
+            means = (op @ out) / counts[:, None]
+            out -= means[c]
+            largest = max(largest, float(np.max(np.abs(means) / scale)) if means.size else 0.0)
+        if len(operators) <= 1 or largest < tol:
+            return out, iteration, True
+    return out, max_iter, False
+
+
+def _absorbed_dof(codes, n_levels, nested=()):
+    """
+    Number of absorbed parameters after removing redundant levels.
+
+    The first factor contributes all its levels. A second factor loses one
+    level per connected component of the bipartite graph between the two
+    factors, which is exact for two-way effects; further factors
+    conservatively lose one level each. Factors listed in ``nested`` (nested
+    within the cluster variable) are excluded, as their levels are already
+    accounted for by the cluster correction.
+    """
+    total = 0
+    for i, (c, g) in enumerate(zip(codes, n_levels)):
+        if i in nested:
+            continue
+        if i == 0:
+            total += g
+        elif i == 1:
+            graph = sparse.csr_matrix(
+                (np.ones(len(c)), (codes[0], c + n_levels[0])),
+                shape=(n_levels[0] + g, n_levels[0] + g),
+            )
+            n_components, _ = connected_components(graph, directed=False)
+            total += g - n_components
+        else:
+            total += g - 1
+    return total
+
+
+class _AbsorbedSpec:
+    """Minimal stand-in for ``results.model`` used by the table and plot helpers."""
+
+    def __init__(self, formula, endog_name, exog_names, exog, absorb_vars):
+        self.formula = formula
+        self.endog_names = endog_name
+        self.exog_names = list(exog_names)
+        self.exog = exog
+        self.absorb_vars = list(absorb_vars)
+
+
+class _Prediction:
+    def __init__(self, predicted_mean, se_mean):
+        self.predicted_mean = predicted_mean
+        self.se_mean = se_mean
+
+
+class AbsorbedOLSResults:
+    """Coefficients, clustered covariance and fit statistics of an absorbed-FE regression."""
+
+    def __init__(self, params, cov, df_resid, dof_t, nobs, ssr, tss, tss_within,
+                 n_absorbed, resid, spec, levels, offset, absorbed_levels,
+                 cluster_var=None, n_clusters=None, n_iter=1, n_singletons=0):
+        self.params = params
+        self._cov = cov
+        self.bse = pd.Series(np.sqrt(np.clip(np.diag(cov.values), 0, None)), index=params.index)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.tvalues = self.params / self.bse
+        self.dof_t = dof_t
+        self.pvalues = pd.Series(2 * tdist.sf(np.abs(self.tvalues.values), dof_t), index=params.index)
+        self.nobs = nobs
+        self.df_resid = df_resid
+        self.df_absorbed = n_absorbed
+        self.ssr = ssr
+        self.rsquared = 1.0 - ssr / tss if tss > 0 else np.nan
+        self.rsquared_within = 1.0 - ssr / tss_within if tss_within > 0 else np.nan
+        self.rsquared_adj = 1.0 - (1.0 - self.rsquared) * (nobs - 1) / df_resid if df_resid > 0 else np.nan
+        self.llf = -nobs / 2.0 * (np.log(2 * np.pi) + np.log(ssr / nobs) + 1.0)
+        k_total = len(params) + n_absorbed
+        self.aic = -2.0 * self.llf + 2.0 * k_total
+        self.bic = -2.0 * self.llf + np.log(nobs) * k_total
+        self.resid = resid
+        self.model = spec
+        self.absorbed_levels = absorbed_levels
+        self.cluster_var = cluster_var
+        self.n_clusters = n_clusters
+        self.n_iter = n_iter
+        self.n_singletons = n_singletons
+        self._levels = levels
+        self._offset = offset
+
+    @property
+    def condition_number(self):
+        exog = self.model.exog
+        if exog is None or exog.size == 0:
+            return np.nan
+        return float(np.linalg.cond(exog))
+
+    def cov_params(self):
+        return self._cov
+
+    def conf_int(self, alpha=0.05):
+        q = tdist.ppf(1 - alpha / 2, self.dof_t)
+        return pd.DataFrame({0: self.params - q * self.bse, 1: self.params + q * self.bse})
+
+    def _design(self, exog):
+        rhs = self.model.formula.split("~", 1)[1]
+        data = exog.copy()
+        for col, categories in self._levels.items():
+            if col in data.columns:
+                data[col] = pd.Categorical(data[col], categories=categories)
+        design = patsy.dmatrix(rhs, data, return_type='dataframe', NA_action='raise')
+        return design.reindex(columns=self.params.index, fill_value=0.0)
+
+    def predict(self, exog):
+        """
+        Predict at the average fixed effect.
+
+        The absorbed effects are not estimated individually, so predictions are
+        x'b plus the sample-average fixed effect; differences and slopes are exact.
+        """
+        X = self._design(exog)
+        return pd.Series(X.to_numpy() @ self.params.to_numpy() + self._offset, index=exog.index)
+
+    def get_prediction(self, exog):
+        X = self._design(exog)
+        values = X.to_numpy()
+        mean = values @ self.params.to_numpy() + self._offset
+        se = np.sqrt(np.clip(np.einsum('ij,jk,ik->i', values, self._cov.to_numpy(), values), 0, None))
+        return _Prediction(pd.Series(mean, index=exog.index), pd.Series(se, index=exog.index))
+
+
+def fit_absorbed_ols(df, formula, absorb_vars, cluster=None, tol=1e-10, max_iter=10000):
+    """
+    Fit OLS with the given factors absorbed.
+
+    Args:
+        df: DataFrame with the outcome, regressors and absorbed factors (no missing values)
+        formula: Regression formula without the ``|`` part
+        absorb_vars: Factor columns to absorb
+        cluster: Column to cluster standard errors on; None for the classical
+            (homoskedastic) covariance
+        tol: Convergence tolerance for the alternating projections
+        max_iter: Maximum number of projection sweeps
+
+    Returns:
+        AbsorbedOLSResults
+    """
+    missing = [v for v in list(absorb_vars) + ([cluster] if cluster else []) if v not in df.columns]
+    if missing:
+        raise KeyError(f"Fixed-effect variables not found: {missing}")
+
+    data = df.copy()
+    lhs, rhs = formula.split("~", 1)
+    levels = {}
+    for col in data.columns:
+        if col in absorb_vars or col == cluster:
+            continue
+        if not pd.api.types.is_numeric_dtype(data[col]):
+            data[col] = pd.Categorical(data[col])
+            levels[col] = list(data[col].cat.categories)
+
+    codes, _ = _factorize(data, absorb_vars)
+    keep = _singleton_mask(codes)
+    n_singletons = int((~keep).sum())
+    if n_singletons:
+        print(f"DEBUG: Dropping {n_singletons} singleton observations in absorbed groups")
+        data = data.loc[keep]
+        codes, _ = _factorize(data, absorb_vars)
+    n_levels = [int(c.max()) + 1 for c in codes]
+
+    y_df, X_df = patsy.dmatrices(formula, data, return_type='dataframe', NA_action='raise')
+    X_df = X_df.drop(columns=[c for c in X_df.columns if c == 'Intercept'])
+    y = y_df.iloc[:, 0].to_numpy(dtype=float)
+    X = X_df.to_numpy(dtype=float)
+    n = len(y)
+
+    stacked, n_iter, converged = demean(np.column_stack([y, X]), codes, tol=tol, max_iter=max_iter)
+    if not converged:
+        print(f"DEBUG: Alternating projections did not converge after {n_iter} sweeps")
+    y_dm, X_dm = stacked[:, 0], stacked[:, 1:]
+
+    # Regressors that are constant within an absorbed factor vanish after demeaning
+    raw_ss = ((X - X.mean(axis=0)) ** 2).sum(axis=0)
+    dm_ss = (X_dm ** 2).sum(axis=0)
+    keep_cols = dm_ss > 1e-9 * np.maximum(raw_ss, 1e-300)
+    if not keep_cols.all():
+        print(f"DEBUG: Omitting regressors collinear with the fixed effects: {list(X_df.columns[~keep_cols])}")
+    names = list(X_df.columns[keep_cols])
+    X, X_dm = X[:, keep_cols], X_dm[:, keep_cols]
+    k = X_dm.shape[1]
+    if k == 0:
+        raise ValueError("No regressors remain after absorbing the fixed effects")
+
+    q, r = np.linalg.qr(X_dm)
+    beta = np.linalg.solve(r, q.T @ y_dm)
+    r_inv = np.linalg.solve(r, np.eye(k))
+    bread = r_inv @ r_inv.T
+    resid = y_dm - X_dm @ beta
+    ssr = float(resid @ resid)
+
+    cluster_codes = None
+    nested = ()
+    if cluster:
+        cluster_codes = pd.factorize(data[cluster])[0]
+        # A factor is nested in the clusters if each of its levels falls in a single cluster
+        nested = tuple(
+            i for i, c in enumerate(codes)
+            if (pd.Series(cluster_codes).groupby(c).nunique() == 1).all()
+        )
+    n_absorbed_total = _absorbed_dof(codes, n_levels)
+    df_resid = n - k - n_absorbed_total
+
+    if cluster_codes is not None:
+        n_clusters = int(cluster_codes.max()) + 1
+        scores = _group_operator(cluster_codes, n_clusters) @ (X_dm * resid[:, None])
+        meat = scores.T @ scores
+        k_small = k + _absorbed_dof(codes, n_levels, nested=nested)
+        correction = n_clusters / (n_clusters - 1) * (n - 1) / (n - k_small) if n_clusters > 1 else np.nan
+        cov = correction * bread @ meat @ bread
+        dof_t = n_clusters - 1
+    else:
+        n_clusters = None
+        cov = ssr / df_resid * bread if df_resid > 0 else np.full((k, k), np.nan)
+        dof_t = df_resid
+
+    params = pd.Series(beta, index=names)
+    cov = pd.DataFrame(cov, index=names, columns=names)
+    offset = float(np.mean(y - X @ beta))
+    spec = _AbsorbedSpec(formula, lhs.strip(), names, X, absorb_vars)
+    return AbsorbedOLSResults(
+        params, cov, df_resid, dof_t, n, ssr,
+        tss=float(((y - y.mean()) ** 2).sum()),
+        tss_within=float((y_dm ** 2).sum()),
+        n_absorbed=n_absorbed_total, resid=pd.Series(resid, index=data.index),
+        spec=spec, levels=levels, offset=offset,
+        absorbed_levels=dict(zip(absorb_vars, n_levels)),
+        cluster_var=cluster, n_clusters=n_clusters, n_iter=n_iter,
+        n_singletons=n_singletons,
+    )
@@ -0,0 +1,186 @@
+# models/granger.py
+"""
+Granger causality among all pairs (and blocks) of VAR(X) variables.
+
+The unrestricted VAR is estimated once on the lagged design from
+``models.var_lag_selection`` ([const, exog_t, lag blocks]). Each test
+drops the lags of the causing variables from the equations of the caused
+ones. That restricted fit is never computed: its Wald statistic comes from
+the unrestricted coefficients B, G = (Z'Z)^-1 and the residual covariance
+S, as
+
+    W = theta' (G_rr kron S_cc)^-1 theta,    theta = vec of B[r, c]
+
+where r are the causing lag rows and c the caused equations. This is the
+statistic of statsmodels' ``VARResults.test_causality`` (F form: W / q with
+(q, k * df_resid) degrees of freedom). Every test is then a small solve, so
+only very large matrices are spread over a process pool.
+"""
+from functools import partial
+
+import numpy as np
+
+from models import process_pool
+from models.var_lag_selection import _lagged_design
+
+SIGNIFICANCE = 0.05
+
+# Fewer tests than this run in-process; each one is a few small solves
+PARALLEL_MIN_TESTS = 400
+
+
+def _fit(endog, exog, lags):
+    """Unrestricted VAR(X) on the common sample: (B, G, sigma_u, n_det, df_resid)."""
+    Y, Z = _lagged_design(endog, exog, lags)
+    n, q = Z.shape
+    k = Y.shape[1]
+    Q, R = np.linalg.qr(Z)
+    B = np.linalg.solve(R, Q.T @ Y)
+    R_inv = np.linalg.solve(R, np.eye(q))
+    G = R_inv @ R_inv.T
+    resid = Y - Z @ B
+    df_resid = n - q
+    if df_resid <= 0:
+        raise ValueError(f'Not enough observations ({n}) for {lags} lags of {k} variables')
+    sigma_u = resid.T @ resid / df_resid
+    return B, G, sigma_u, q - k * lags, df_resid
+
+
+def _wald(B, G, sigma_u, n_det, k, lags, caused, causing):
+    """Wald statistic and number of restrictions for 'causing' -> 'caused' (index lists)."""
+    rows = [n_det + lag * k + j for lag in range(lags) for j in causing]
+    theta = B[np.ix_(rows, caused)].ravel()
+    cov = np.kron(G[np.ix_(rows, rows)], sigma_u[np.ix_(caused, caused)])
+    return float(theta @ np.linalg.solve(cov, theta)), len(theta)
+
+
+def _run_tests(B, G, sigma_u, n_det, k, lags, df_denom, tests):
+    """(F statistic, p-value, df_num) per (caused, causing) test (runs in pool workers)."""
+    from scipy import stats
+
+    out = []
+    for caused, causing in tests:
+        wald, q = _wald(B, G, sigma_u, n_det, k, lags, caused, causing)
+        f_stat = wald / q
+        out.append((f_stat, float(stats.f.sf(f_stat, q, df_denom)), q))
+    return out
+
+
+def _evaluate(args, tests, workers):
+    """Run tests, in chunks on the pool when there are many."""
+    workers = process_pool.configured_workers() if workers is None else workers
+    if workers > 1 and len(tests) >= PARALLEL_MIN_TESTS:
+        size = -(-len(tests) // workers)
+        chunks = [tests[i:i + size] for i in range(0, len(tests), size)]
+        parts = process_pool.run(partial(_run_tests, *args), chunks, workers, label='Granger')
+        return [r for part in parts for r in part]
+    return _run_tests(*args, tests)
+
+
+def granger_causality_matrix(endog, exog=None, lags=1, blocks=None, workers=None):
+    """
+    Granger causality F tests for every ordered pair of variables, plus blocks.
+
+    Args:
+        endog: (T, k) DataFrame of endogenous series
+        exog: (T, m) exogenous series entering at time t, or None
+        lags: VAR lag order
+        blocks: Optional mapping of block name -> list of variables; each
+            block is tested as a cause of every variable outside it. By
+            default the only block is 'All others' for each variable.
+        workers: Worker processes (None reads ANALYSIS_POOL_WORKERS)
+
+    Returns:
+        Dict with variables, lags, nobs, df_denom, f_stat and p_value
+        (k x k lists, [caused][causing], None on the diagonal) and
+        block_tests (list of dicts with block, causing, caused, f_stat,
+        p_value, df_num, significant)
+    """
+    variables = list(endog.columns)
+    k = len(variables)
+    if k < 2:
+        raise ValueError('Granger causality needs at least two endogenous variables')
+    B, G, sigma_u, n_det, df_resid = _fit(endog, exog, lags)
+    df_denom = k * df_resid
+    args = (B, G, sigma_u, n_det, k, lags, df_denom)
+
+    index = {name: i for i, name in enumerate(variables)}
+    tests = [([i], [j]) for i in range(k) for j in range(k) if i != j]
+    block_specs = []
+    if blocks:
+        for name, members in blocks.items():
+            unknown = [m for m in members if m not in index]
+            if unknown:
+                raise ValueError(f"Unknown variable(s) in block '{name}': {', '.join(unknown)}")
+            causing = [index[m] for m in members]
+            for i in range(k):
+                if i not in causing:
+                    block_specs.append((name, i, causing))
+    else:
+        block_specs = [('All others', i, [j for j in range(k) if j != i]) for i in range(k)]
+    tests += [([i], causing) for _, i, causing in block_specs]
+
+    results = _evaluate(args, tests, workers)
+
+    f_stat = [[None] * k for _ in range(k)]
+    p_value = [[None] * k for _ in range(k)]
+    for ((caused,), (causing,)), (f, p, _) in zip(tests[:k * (k - 1)], results):
+        f_stat[caused][causing] = f
+        p_value[caused][causing] = p
+    block_tests = [
+        {
+            'block': name,
+            'causing': [variables[j] for j in causing],
+            'caused': variables[i],
+            'f_stat': f,
+            'p_value': p,
+            'df_num': q,
+            'significant': p < SIGNIFICANCE,
+        }
+        for (name, i, causing), (f, p, q) in zip(block_specs, results[k * (k - 1):])
+    ]
+    return {
+        'variables': variables,
+        'lags': lags,
+        'nobs': len(endog) - lags,
+        'df_denom': df_denom,
+        'f_stat': f_stat,
+        'p_value': p_value,
+        'block_tests': block_tests,
+    }
+
+
+def build_granger_heatmap_json(result, alpha=SIGNIFICANCE):
+    """Plotly heatmap of -log10 p-values, caused variables as rows and causes as columns."""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    variables = result['variables']
+    z, text = [], []
+    for i, row in enumerate(result['p_value']):
+        z.append([None if p is None else float(-np.log10(max(p, 1e-300))) for p in row])
+        text.append(['' if p is None else (f'{p:.3f}' + ('*' if p < alpha else '')) for p in row])
+
+    fig = go.Figure(data=go.Heatmap(
+        z=z,
+        x=variables,
+        y=variables,
+        text=text,
+        texttemplate="%{text}",
+        textfont={"size": 10},
+        colorscale='Blues',
+        zmin=0,
+        colorbar=dict(title='-log10 p'),
+        hoverongaps=False,
+        hovertemplate="<b>%{x}</b> → <b>%{y}</b><br>p-value: %{text}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f"Granger Causality (VAR lags = {result['lags']}; * p < {alpha:g})",
+        xaxis_title="Causing variable",
+        yaxis_title="Caused variable",
+        height=max(400, len(variables) * 40 + 120),
+        width=max(500, len(variables) * 40 + 160),
+        margin=dict(l=80, r=20, t=60, b=80),
+        template="plotly_white"
+    )
+    return pio.to_json(fig, pretty=False)
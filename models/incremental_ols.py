@@ -0,0 +1,234 @@
+# models/incremental_ols.py
+"""
+Incremental OLS refits via QR updates.
+
+The thin QR factorization of the last OLS design is kept per session. When
+an update only adds or drops terms on the same sample, columns are appended
+by (re-orthogonalized) Gram-Schmidt and deleted with Givens rotations, each
+costing O(nk) instead of refactorizing the whole design in O(nk^2). Any
+change to the sample or to the data behind an unchanged column falls back
+to a full fit.
+
+Factorizations stay in a small LRU in the process that fitted them; a refit
+handled by another process starts from scratch.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from statsmodels.regression.linear_model import OLS, OLSResults, RegressionResultsWrapper
+
+# Factorizations kept in this process, most recently used last
+_MAX_CACHED = 16
+_FACTORIZATIONS = OrderedDict()
+
+# Relative size of the smallest diagonal entry of R before the design is treated as singular
+_RANK_TOL = 1e-10
+
+
+def _digest(values):
+    return hashlib.blake2b(np.ascontiguousarray(values, dtype=float).tobytes(), digest_size=16).hexdigest()
+
+
+def _givens(a, b):
+    r = np.hypot(a, b)
+    if r == 0.0:
+        return 1.0, 0.0
+    return a / r, b / r
+
+
+class _FactorizedOLS(OLS):
+    """OLS fitted from a QR factorization; pinv(X) = R^-1 Q' is only formed if something reads it."""
+
+    @property
+    def pinv_wexog(self):
+        factors = self.__dict__.pop('_pinv_factors', None)
+        if factors is not None:
+            R_inv, Q, order = factors
+            self.__dict__['_pinv_wexog'] = (R_inv @ Q.T)[order]
+        return self.__dict__.get('_pinv_wexog')
+
+    @pinv_wexog.setter
+    def pinv_wexog(self, value):
+        self.__dict__.pop('_pinv_factors', None)
+        self.__dict__['_pinv_wexog'] = value
+
+
+class OLSFactorization:
+    """Thin QR factorization X = QR of an OLS design, with Q'y."""
+
+    def __init__(self, columns, col_keys, row_key, Q, R, qty):
+        self.columns = list(columns)
+        self.col_keys = dict(col_keys)
+        self.row_key = row_key
+        self.Q = Q
+        self.R = R
+        self.qty = qty
+
+    @staticmethod
+    def row_key_for(index, y):
+        return _digest(np.concatenate([np.asarray(index, dtype=float).ravel(), np.asarray(y, dtype=float)]))
+
+    @classmethod
+    def from_design(cls, exog, endog, columns, index):
+        """Factorize the full design from scratch."""
+        X = np.asarray(exog, dtype=float)
+        y = np.asarray(endog, dtype=float)
+        Q, R = np.linalg.qr(X)
+        return cls(
+            columns,
+            {name: _digest(X[:, j]) for j, name in enumerate(columns)},
+            cls.row_key_for(index, y),
+            Q, R, Q.T @ y,
+        )
+
+    def is_full_rank(self):
+        d = np.abs(np.diag(self.R))
+        return d.size > 0 and d.min() > _RANK_TOL * max(d.max(), 1.0)
+
+    def _append(self, x, y):
+        """Append one column with two passes of classical Gram-Schmidt."""
+        r = self.Q.T @ x
+        v = x - self.Q @ r
+        r2 = self.Q.T @ v
+        v -= self.Q @ r2
+        r += r2
+        rho = np.linalg.norm(v)
+        q = v / rho if rho > 0 else v
+        k = self.R.shape[0]
+        R = np.zeros((k + 1, k + 1))
+        R[:k, :k] = self.R
+        R[:k, k] = r
+        R[k, k] = rho
+        self.Q = np.column_stack([self.Q, q])
+        self.R = R
+        self.qty = np.append(self.qty, q @ y)
+
+    def _delete(self, j):
+        """Delete column j and restore triangularity with Givens rotations."""
+        R = np.delete(self.R, j, axis=1)
+        Q = self.Q
+        qty = self.qty
+        k = R.shape[1]
+        for i in range(j, k):
+            c, s = _givens(R[i, i], R[i + 1, i])
+            Ri, Ri1 = R[i, i:].copy(), R[i + 1, i:].copy()
+            R[i, i:] = c * Ri + s * Ri1
+            R[i + 1, i:] = -s * Ri + c * Ri1
+            qi, qi1 = Q[:, i].copy(), Q[:, i + 1].copy()
+            Q[:, i] = c * qi + s * qi1
+            Q[:, i + 1] = -s * qi + c * qi1
+            ti, ti1 = qty[i], qty[i + 1]
+            qty[i] = c * ti + s * ti1
+            qty[i + 1] = -s * ti + c * ti1
+        self.R = R[:k, :]
+        self.Q = Q[:, :k]
+        self.qty = qty[:k]
+        del self.col_keys[self.columns.pop(j)]
+
+    def updated(self, exog, endog, columns, index):
+        """
+        Factorization for a new design on the same sample, or None when a full fit is needed.
+
+        Returns None if the sample or outcome changed, if a column present in
+        both designs holds different data, or if so many terms changed that
+        refactorizing is cheaper.
+        """
+        X = np.asarray(exog, dtype=float)
+        y = np.asarray(endog, dtype=float)
+        if X.shape[0] != self.Q.shape[0] or self.row_key_for(index, y) != self.row_key:
+            return None
+
+        columns = list(columns)
+        positions = {name: j for j, name in enumerate(columns)}
+        kept = [c for c in self.columns if c in positions]
+        dropped = [c for c in self.columns if c not in positions]
+        added = [c for c in columns if c not in self.col_keys]
+        if len(dropped) + len(added) > max(2, len(kept) // 2):
+            return None
+        for name in kept:
+            if _digest(X[:, positions[name]]) != self.col_keys[name]:
+                return None
+
+        fact = OLSFactorization(self.columns, self.col_keys, self.row_key,
+                                self.Q.copy(), self.R.copy(), self.qty.copy())
+        for name in dropped:
+            fact._delete(fact.columns.index(name))
+        for name in added:
+            x = X[:, positions[name]]
+            fact._append(x, y)
+            fact.columns.append(name)
+            fact.col_keys[name] = _digest(x)
+        return fact
+
+    def results(self, model):
+        """Build statsmodels OLS results for ``model`` from this factorization."""
+        order = [self.columns.index(name) for name in model.exog_names]
+        R_inv = np.linalg.solve(self.R, np.eye(self.R.shape[0]))
+        beta = (R_inv @ self.qty)[order]
+        normalized_cov = (R_inv @ R_inv.T)[np.ix_(order, order)]
+
+        # Mirror what OLS.fit stores on the model so nothing is recomputed from exog.
+        # pinv(X) = R^-1 Q' costs O(nk^2), so it is left for the robust covariances
+        # (HC0-HC3, cluster, HAC) to build on first use
+        if type(model) is OLS:
+            model.__class__ = _FactorizedOLS
+            model.__dict__.pop('pinv_wexog', None)
+            model._pinv_factors = (R_inv, self.Q, order)
+        else:
+            model.pinv_wexog = (R_inv @ self.Q.T)[order]
+        model.normalized_cov_params = normalized_cov
+        model.wexog_singular_values = np.linalg.svd(self.R, compute_uv=False)
+        model.rank = self.R.shape[0]
+        if model._df_model is None:
+            model._df_model = float(model.rank - model.k_constant)
+        if model._df_resid is None:
+            model.df_resid = model.nobs - model.rank
+        return RegressionResultsWrapper(OLSResults(model, beta, normalized_cov_params=normalized_cov))
+
+
+def fit(model, key=None):
+    """
+    Fit an unfitted ``statsmodels`` OLS model, reusing the cached factorization for ``key``.
+
+    Args:
+        model: Unfitted OLS model (e.g. from ``smf.ols``)
+        key: Cache key (the session id); None disables caching
+
+    Returns:
+        Tuple of (results, factorization or None, incremental flag)
+    """
+    columns = list(model.exog_names)
+    index = model.data.row_labels if model.data.row_labels is not None else np.arange(model.nobs)
+    try:
+        index_values = np.asarray(index, dtype=float)
+    except (TypeError, ValueError):
+        index_values = np.arange(model.nobs)
+
+    cached = _FACTORIZATIONS.get(key) if key is not None else None
+    fact = None
+    incremental = False
+    if cached is not None:
+        fact = cached.updated(model.wexog, model.wendog, columns, index_values)
+        incremental = fact is not None
+    if fact is None:
+        fact = OLSFactorization.from_design(model.wexog, model.wendog, columns, index_values)
+
+    if not fact.is_full_rank():
+        # Leave rank-deficient designs to the pseudoinverse fit
+        return model.fit(), None, False
+    return fact.results(model), fact, incremental
+
+
+def remember(key, factorization):
+    """Keep ``factorization`` as the latest OLS fit for ``key``."""
+    if key is None or factorization is None:
+        return
+    _FACTORIZATIONS[key] = factorization
+    _FACTORIZATIONS.move_to_end(key)
+    while len(_FACTORIZATIONS) > _MAX_CACHED:
+        _FACTORIZATIONS.popitem(last=False)
+
+
+def forget(key):
+    _FACTORIZATIONS.pop(key, None)
@@ -0,0 +1,71 @@
+# models/irf_store.py
+"""
+Impulse responses of a VARX session, kept so IRF queries only slice arrays.
+
+One compressed ``.npz`` per (session, horizon, orthogonalization) under
+MEDIA_ROOT/irf holds the point responses (periods, k, k) and, once
+confidence bands have been asked for, their delta-method standard errors
+and/or the seeded bootstrap tensor (replications, periods, k, k) from
+``models.irf_engine``. The variable names, the bootstrap seed and count,
+and the digest of the fitted model they came from go in a JSON member, so a
+re-run session never reads responses of its previous fit.
+"""
+import glob
+import json
+import os
+import numpy as np
+
+_META_KEY = '__meta__'
+
+# Arrays that may be stored; any of them can be missing
+_ARRAYS = ('point', 'stderr', 'replications')
+
+
+def path_for(session_id, periods, orth):
+    from django.conf import settings
+    kind = 'orth' if orth else 'plain'
+    return os.path.join(settings.MEDIA_ROOT, 'irf', f'session_{session_id}_h{int(periods)}_{kind}.npz')
+
+
+def delete_for_session(session_id):
+    from django.conf import settings
+    for path in glob.glob(os.path.join(settings.MEDIA_ROOT, 'irf', f'session_{session_id}_h*.npz')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def save(session_id, periods, orth, meta, **arrays):
+    """Write the IRF arrays of a session for one horizon and orthogonalization, replacing earlier ones."""
+    path = path_for(session_id, periods, orth)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stored = {name: np.asarray(arrays[name], dtype=np.float64) for name in _ARRAYS if arrays.get(name) is not None}
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as fh:
+        np.savez_compressed(fh, **{_META_KEY: np.array(json.dumps(meta, default=str))}, **stored)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def load(session_id, periods, orth, model_digest=None):
+    """
+    The stored IRF arrays and metadata as one dict, or None.
+
+    None is returned when nothing is stored or, if ``model_digest`` is given,
+    when the stored arrays belong to a different fit.
+    """
+    path = path_for(session_id, periods, orth)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            result = json.loads(str(archive[_META_KEY]))
+            if model_digest is not None and result.get('model_digest') != model_digest:
+                return None
+            for name in _ARRAYS:
+                result[name] = archive[name] if name in archive.files else None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"DEBUG: Could not read IRF store {path}: {e}")
+        return None
+    return result
@@ -0,0 +1,324 @@
+# models/posterior_store.py
+"""
+Compact on-disk storage for the posterior draws of Bayesian fits.
+
+Draws are kept as float32 arrays shaped (chain, draw, *dims), one compressed
+member per variable in an ``.npz`` archive under MEDIA_ROOT/posteriors. Opening
+the archive reads only its index; each variable is decompressed the first time
+it is asked for, so a summary of one coefficient or a trace plot never loads
+the whole posterior.
+
+Besides the draws the archive records the model family, the regression terms
+(which posterior variables are coefficients on which columns) and the column
+renaming applied before fitting. That is enough to rebuild the linear
+predictor for posterior spotlight bands without the Bambi model.
+"""
+import itertools
+import json
+import os
+import numpy as np
+
+# Points per chain drawn in trace plots; longer chains are thinned
+MAX_TRACE_POINTS = 1000
+
+# Draws used for spotlight bands; larger posteriors are subsampled
+MAX_PREDICTIVE_DRAWS = 2000
+
+_META_KEY = '__meta__'
+
+
+def path_for_session(session_id):
+    from django.conf import settings
+    return os.path.join(settings.MEDIA_ROOT, 'posteriors', f'session_{session_id}.npz')
+
+
+def delete_for_session(session_id):
+    try:
+        os.remove(path_for_session(session_id))
+    except OSError:
+        pass
+
+
+class PosteriorStore:
+    """Posterior draws of one fit, loaded variable by variable."""
+
+    def __init__(self, meta, arrays=None, archive=None):
+        self.meta = meta
+        self._arrays = dict(arrays or {})
+        self._archive = archive
+
+    @classmethod
+    def from_inference_data(cls, idata, terms, family, outcome_var, inference, column_mapping=None):
+        """
+        Collect the posterior of a fit as float32 arrays.
+
+        Args:
+            idata: ArviZ InferenceData returned by the fit
+            terms: Posterior variable name -> list of columns the coefficient
+                multiplies ([] for the intercept)
+            family: Bambi family name, used for the inverse link
+            outcome_var: Response column
+            inference: 'mcmc' or a preview method
+            column_mapping: Safe column name -> original column name
+        """
+        variables, arrays = [], {}
+        for i, name in enumerate(idata.posterior.data_vars):
+            da = idata.posterior[name]
+            key = f'v{i}'
+            arrays[key] = np.asarray(da.values, dtype=np.float32)
+            extra_dims = [d for d in da.dims if d not in ('chain', 'draw')]
+            variables.append({
+                'name': str(name),
+                'key': key,
+                'dims': [str(d) for d in extra_dims],
+                'coords': [[str(c) for c in da.coords[d].values] for d in extra_dims],
+            })
+        meta = {
+            'variables': variables,
+            'terms': {k: list(v) for k, v in terms.items()},
+            'family': family,
+            'outcome_var': outcome_var,
+            'inference': inference,
+            'column_mapping': column_mapping or {},
+        }
+        return cls(meta, arrays)
+
+    def save(self, path):
+        """Write the archive, replacing any earlier one atomically."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as fh:
+            np.savez_compressed(fh, **{_META_KEY: np.array(json.dumps(self.meta))}, **self._arrays)
+        os.replace(tmp, path)
+        return os.path.getsize(path)
+
+    @classmethod
+    def open(cls, path):
+        """Open a saved archive without decompressing any draws, or None if there is none."""
+        if not os.path.exists(path):
+            return None
+        archive = np.load(path, allow_pickle=False)
+        meta = json.loads(str(archive[_META_KEY]))
+        return cls(meta, archive=archive)
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def variables(self):
+        return [v['name'] for v in self.meta['variables']]
+
+    @property
+    def family(self):
+        return self.meta.get('family')
+
+    def _variable(self, name):
+        for v in self.meta['variables']:
+            if v['name'] == name:
+                return v
+        raise KeyError(name)
+
+    def draws(self, name):
+        """Draws of one variable as float32 (chain, draw, *dims), loaded on first use."""
+        var = self._variable(name)
+        if var['key'] not in self._arrays:
+            self._arrays[var['key']] = self._archive[var['key']]
+        return self._arrays[var['key']]
+
+    def _flat(self, name):
+        """(label, draws of shape (chain, draw)) for each scalar element of a variable."""
+        var = self._variable(name)
+        values = self.draws(name)
+        if not var['dims']:
+            return [(name, values)]
+        n_chain, n_draw = values.shape[:2]
+        values = values.reshape(n_chain, n_draw, -1)
+        labels = [', '.join(combo) for combo in itertools.product(*var['coords'])]
+        return [(f"{name}[{label}]", values[:, :, j]) for j, label in enumerate(labels)]
+
+    def summary(self, names=None, hdi_prob=0.94):
+        """
+        Posterior summary of the stored draws.
+
+        Returns:
+            Dict of parameter label -> mean, sd, HDI bounds, split R-hat and effective sample size
+        """
+        lo_label = f"hdi_{100 * (1 - hdi_prob) / 2:g}%"
+        hi_label = f"hdi_{100 * (1 + hdi_prob) / 2:g}%"
+        rows = {}
+        for name in names or self.variables:
+            for label, values in self._flat(name):
+                values = values.astype(np.float64)
+                lo, hi = _hdi(values.ravel(), hdi_prob)
+                rows[label] = {
+                    'mean': float(values.mean()),
+                    'sd': float(values.std(ddof=1)) if values.size > 1 else 0.0,
+                    lo_label: lo,
+                    hi_label: hi,
+                    'r_hat': _split_rhat(values),
+                    'ess': _ess(values),
+                }
+        return rows
+
+    def linear_predictor(self, columns, n):
+        """
+        Posterior draws of the linear predictor at ``n`` new rows.
+
+        Args:
+            columns: Column name -> length-n array of values; terms on columns
+                that are missing contribute nothing (reference level or zero)
+            n: Number of rows
+
+        Returns:
+            Array of shape (draws, n)
+        """
+        mapping = self.meta.get('column_mapping') or {}
+        values = {safe: columns[orig] for safe, orig in mapping.items() if orig in columns}
+        values.update({k: v for k, v in columns.items() if k not in values})
+
+        eta = None
+        for name, components in self.meta['terms'].items():
+            var = self._variable(name)
+            coef = self.draws(name)
+            coef = coef.reshape(-1, *coef.shape[2:]).astype(np.float64)
+            if eta is None:
+                eta = np.zeros((coef.shape[0], n))
+            design = np.ones(n)
+            level_mask = None
+            for comp in components:
+                column = values.get(comp)
+                if column is None:
+                    design = None
+                    break
+                column = np.asarray(column)
+                if np.issubdtype(column.dtype, np.number):
+                    design = design * column.astype(float)
+                elif var['dims']:
+                    # Indicator for each non-reference level of a categorical column
+                    level_mask = column[:, None].astype(str) == np.asarray(var['coords'][0])[None, :]
+                else:
+                    design = None
+                    break
+            if design is None:
+                continue
+            if level_mask is not None:
+                eta += (coef @ level_mask.T.astype(float)) * design[None, :]
+            elif coef.ndim == 1:
+                eta += coef[:, None] * design[None, :]
+        if eta is None:
+            return np.zeros((0, n))
+        if eta.shape[0] > MAX_PREDICTIVE_DRAWS:
+            idx = np.linspace(0, eta.shape[0] - 1, MAX_PREDICTIVE_DRAWS).astype(int)
+            eta = eta[idx]
+        return eta
+
+    def expected_response(self, columns, n):
+        """Posterior draws of the mean response at new rows (inverse link applied)."""
+        eta = self.linear_predictor(columns, n)
+        if self.family == 'bernoulli':
+            return 1.0 / (1.0 + np.exp(-eta))
+        if self.family in ('poisson', 'negativebinomial'):
+            return np.exp(eta)
+        return eta
+
+    def trace_plot_json(self, name, options=None):
+        """Plotly trace plot (draws per chain) and marginal histogram for one variable."""
+        import plotly.graph_objects as go
+        import plotly.io as pio
+        from plotly.subplots import make_subplots
+
+        options = options or {}
+        elements = self._flat(name)
+        element = options.get('element')
+        if element:
+            elements = [e for e in elements if e[0] == element] or elements[:1]
+        label, values = elements[0]
+        n_chain, n_draw = values.shape
+        step = max(1, int(np.ceil(n_draw / MAX_TRACE_POINTS)))
+
+        fig = make_subplots(rows=1, cols=2, column_widths=[0.7, 0.3], shared_yaxes=True, horizontal_spacing=0.02)
+        for chain in range(n_chain):
+            fig.add_trace(go.Scatter(
+                x=np.arange(0, n_draw, step), y=values[chain, ::step], mode='lines',
+                name=f'Chain {chain + 1}', line=dict(width=1), opacity=0.8,
+            ), row=1, col=1)
+        fig.add_trace(go.Histogram(
+            y=values.ravel(), nbinsy=60, marker_color='#6b7280', opacity=0.7, showlegend=False,
+        ), row=1, col=2)
+        fig.update_layout(
+            template='plotly_white',
+            margin=dict(l=60, r=10, t=30, b=50),
+            legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+            title=dict(text=label, x=0.01, font=dict(size=14)),
+            height=360,
+        )
+        fig.update_xaxes(title_text='Draw', row=1, col=1)
+        fig.update_yaxes(title_text=options.get('y_name') or label, row=1, col=1)
+        return pio.to_json(fig, pretty=False)
+
+
+def _hdi(values, prob):
+    """Narrowest interval containing ``prob`` of the draws."""
+    values = np.sort(values)
+    n = len(values)
+    width = int(np.floor(prob * n))
+    if n == 0 or width >= n:
+        return (float(values[0]), float(values[-1])) if n else (float('nan'), float('nan'))
+    intervals = values[width:] - values[:n - width]
+    i = int(np.argmin(intervals))
+    return float(values[i]), float(values[i + width])
+
+
+def _split_rhat(values):
+    """Split-chain potential scale reduction factor for (chain, draw) draws."""
+    n_chain, n_draw = values.shape
+    half = n_draw // 2
+    if half < 2:
+        return None
+    split = np.concatenate([values[:, :half], values[:, -half:]], axis=0)
+    within = split.var(axis=1, ddof=1).mean()
+    between = half * split.mean(axis=1).var(ddof=1)
+    if within == 0:
+        return None
+    var_plus = (half - 1) / half * within + between / half
+    return float(np.sqrt(var_plus / within))
+
+
+def _ess(values):
+    """Effective sample size from chain autocorrelations (Geyer's initial monotone sequence)."""
+    n_chain, n_draw = values.shape
+    if n_draw < 4:
+        return float(values.size)
+    centered = values - values.mean(axis=1, keepdims=True)
+    size = 1 << int(np.ceil(np.log2(2 * n_draw)))
+    spectrum = np.fft.rfft(centered, n=size, axis=1)
+    acov = np.fft.irfft(spectrum * np.conj(spectrum), n=size, axis=1)[:, :n_draw] / n_draw
+    chain_var = acov[:, 0] * n_draw / (n_draw - 1)
+    within = chain_var.mean()
+    var_plus = within * (n_draw - 1) / n_draw
+    if n_chain > 1:
+        var_plus += values.mean(axis=1).var(ddof=1)
+    if var_plus == 0:
+        return float(values.size)
+    rho = 1 - (within - acov.mean(axis=0)) / var_plus
+    rho[0] = 1.0
+
+    # Sum autocorrelation pairs while they stay positive, forcing them to decrease
+    tau = -1.0
+    previous = np.inf
+    for t in range(0, n_draw - 1, 2):
+        pair = rho[t] + rho[t + 1]
+        if pair < 0:
+            break
+        pair = min(pair, previous)
+        tau += 2 * pair
+        previous = pair
+    return float(n_chain * n_draw / max(tau, 1e-12))
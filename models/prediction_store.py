@@ -0,0 +1,180 @@
+# models/prediction_store.py
+"""
+Compact binary storage for pre-generated ordinal/multinomial predictions.
+
+Predictions are held as one dense float32 array indexed by
+(interaction, moderator level, category, x) plus the x grid per interaction.
+The arrays are serialized with ``np.savez_compressed`` so they can live in a
+BinaryField on the session instead of a nested JSON document.
+"""
+import io
+import numpy as np
+
+
+class PrecomputedPredictions:
+    """Dense predicted-probability tensor for every interaction of a model."""
+
+    def __init__(self, kind, interactions, levels, categories, x_values, probabilities):
+        self.kind = kind
+        self.interactions = list(interactions)
+        self.levels = [list(lv) for lv in levels]
+        # Moderator levels actually stored per interaction; the rest of the level axis is NaN padding
+        self.n_levels = np.array([len(lv) for lv in self.levels], dtype=np.int32)
+        self.categories = list(categories)
+        # (n_interactions, n_x) with NaN padding for shorter categorical grids
+        self.x_values = np.asarray(x_values, dtype=np.float32)
+        # (n_interactions, n_levels, n_categories, n_x)
+        self.probabilities = np.asarray(probabilities, dtype=np.float32)
+
+    @classmethod
+    def from_blocks(cls, kind, categories, blocks):
+        """
+        Assemble the store from per-interaction blocks.
+
+        Args:
+            kind: 'ordinal' or 'multinomial'
+            categories: Ordered list of dependent-variable categories
+            blocks: List of (interaction, level_labels, x_grid, probs) where
+                probs has shape (n_levels, n_categories, n_x)
+
+        Returns:
+            PrecomputedPredictions or None if there are no blocks
+        """
+        if not blocks:
+            return None
+        n_levels = max(len(b[1]) for b in blocks)
+        n_x = max(len(b[2]) for b in blocks)
+        n_cat = len(categories)
+
+        x_values = np.full((len(blocks), n_x), np.nan, dtype=np.float32)
+        probs = np.full((len(blocks), n_levels, n_cat, n_x), np.nan, dtype=np.float32)
+        levels = []
+        for i, (_, level_labels, x_grid, block) in enumerate(blocks):
+            block = np.asarray(block, dtype=np.float32)
+            x_values[i, :len(x_grid)] = _as_float_grid(x_grid)
+            probs[i, :block.shape[0], :block.shape[1], :block.shape[2]] = block
+            levels.append([str(lv) for lv in level_labels])
+
+        return cls(kind, [b[0] for b in blocks], levels, [str(c) for c in categories],
+                   x_values, probs)
+
+    @classmethod
+    def from_legacy_dict(cls, kind, predictions):
+        """Convert the nested-dict JSON format stored by older sessions."""
+        if not predictions:
+            return None
+        categories = []
+        for by_level in predictions.values():
+            for by_category in by_level.values():
+                for category in by_category.keys():
+                    if category not in categories:
+                        categories.append(category)
+
+        blocks = []
+        for interaction, by_level in predictions.items():
+            level_labels = _order_levels(list(by_level.keys()))
+            if not level_labels:
+                continue
+            x_grid = []
+            block = np.full((len(level_labels), len(categories), 0), np.nan)
+            for li, level in enumerate(level_labels):
+                for category, data in by_level[level].items():
+                    values = np.array([np.nan if p is None else p for p in data.get('probabilities', [])],
+                                      dtype=float)
+                    if block.shape[2] < len(values):
+                        block = np.pad(block, ((0, 0), (0, 0), (0, len(values) - block.shape[2])),
+                                       constant_values=np.nan)
+                        x_grid = data.get('x_values', [])
+                    block[li, categories.index(category), :len(values)] = values
+            blocks.append((interaction, level_labels, x_grid, block))
+
+        return cls.from_blocks(kind, categories, blocks)
+
+    def to_bytes(self):
+        """Serialize to a compressed ``.npz`` payload."""
+        buf = io.BytesIO()
+        # Interactions can have different numbers of levels, so the labels are padded to a rectangle
+        width = int(self.n_levels.max()) if len(self.n_levels) else 0
+        np.savez_compressed(
+            buf,
+            kind=np.array(self.kind),
+            interactions=np.array(self.interactions, dtype=str),
+            levels=np.array([lv + [''] * (width - len(lv)) for lv in self.levels], dtype=str).reshape(-1, width),
+            n_levels=self.n_levels,
+            categories=np.array(self.categories, dtype=str),
+            x_values=self.x_values,
+            probabilities=self.probabilities,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """Load a payload written by ``to_bytes``."""
+        if not payload:
+            return None
+        with np.load(io.BytesIO(bytes(payload)), allow_pickle=False) as data:
+            levels = data['levels'].tolist()
+            if 'n_levels' in data.files:
+                levels = [lv[:n] for lv, n in zip(levels, data['n_levels'].tolist())]
+            return cls(
+                str(data['kind']),
+                data['interactions'].tolist(),
+                levels,
+                data['categories'].tolist(),
+                data['x_values'],
+                data['probabilities'],
+            )
+
+    def has_interaction(self, interaction):
+        return interaction in self.interactions
+
+    def category_index(self, category):
+        """Find a category by label, tolerating '1' vs '1.0' style mismatches."""
+        label = str(category)
+        if label in self.categories:
+            return self.categories.index(label)
+        try:
+            target = float(label)
+        except (TypeError, ValueError):
+            return None
+        for i, c in enumerate(self.categories):
+            try:
+                if float(c) == target:
+                    return i
+            except (TypeError, ValueError):
+                continue
+        return None
+
+    def slice(self, interaction, category):
+        """
+        Return (x_values, low_probs, high_probs) for one interaction/category.
+
+        Returns None when the interaction or category is not stored.
+        """
+        if interaction not in self.interactions:
+            return None
+        ci = self.category_index(category)
+        if ci is None:
+            return None
+        ii = self.interactions.index(interaction)
+        x = self.x_values[ii]
+        valid = ~np.isnan(x)
+        low = self.probabilities[ii, 0, ci][valid]
+        high = self.probabilities[ii, self.n_levels[ii] - 1, ci][valid]
+        return x[valid].tolist(), low.tolist(), high.tolist()
+
+
+def _as_float_grid(x_grid):
+    """Coerce the x grid to float; non-numeric grids are stored by position."""
+    try:
+        return np.asarray(x_grid, dtype=np.float32)
+    except (TypeError, ValueError):
+        return np.arange(len(x_grid), dtype=np.float32)
+
+
+def _order_levels(labels):
+    """Order moderator level labels low→high when they are numeric."""
+    try:
+        return sorted(labels, key=float)
+    except (TypeError, ValueError):
+        return labels
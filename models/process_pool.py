@@ -0,0 +1,111 @@
+# models/process_pool.py
+"""
+One process pool shared by the parallel analysis engines.
+
+Stationarity tests, IRF and structural bootstraps, Granger matrices and the
+VARMAX order search all spread independent work over worker processes. They
+share this pool, sized by the ANALYSIS_POOL_WORKERS setting, so a process
+holds at most one set of workers. It is shut down at exit.
+
+A forked child (e.g. a background job) never reuses its parent's pool, and
+a pool that breaks is dropped and the work finished in-process, so callers
+always get their results.
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+DEFAULT_WORKERS = 2
+
+_POOL = None
+_POOL_PID = None
+_POOL_SIZE = None
+_LOCK = threading.Lock()
+_AT_EXIT = False
+
+
+def configured_workers():
+    """ANALYSIS_POOL_WORKERS, or the default outside a configured Django process."""
+    try:
+        from django.conf import settings
+        return getattr(settings, 'ANALYSIS_POOL_WORKERS', DEFAULT_WORKERS) if settings.configured else DEFAULT_WORKERS
+    except ImportError:
+        return DEFAULT_WORKERS
+
+
+def get_pool(workers):
+    """The process-wide pool with ``workers`` processes, created (or resized) on demand."""
+    global _POOL, _POOL_PID, _POOL_SIZE, _AT_EXIT
+    with _LOCK:
+        if _POOL is not None and _POOL_PID != os.getpid():
+            # Forked child: the parent's workers are not ours
+            _POOL = None
+        if _POOL is not None and _POOL_SIZE != workers:
+            _POOL.shutdown(wait=False)
+            _POOL = None
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=workers)
+            _POOL_PID = os.getpid()
+            _POOL_SIZE = workers
+            if not _AT_EXIT:
+                atexit.register(shutdown)
+                _AT_EXIT = True
+        return _POOL
+
+
+def shutdown():
+    """Stop this process's pool, if it has one."""
+    global _POOL
+    with _LOCK:
+        if _POOL is not None and _POOL_PID == os.getpid():
+            _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+
+def _discard(pool):
+    global _POOL
+    with _LOCK:
+        if _POOL is pool:
+            _POOL = None
+
+
+def run(fn, items, workers=None, label='Process', on_result=None):
+    """
+    ``[fn(item) for item in items]``, on the shared pool when there is more than one item.
+
+    Args:
+        fn: Picklable callable
+        items: Arguments, one call each
+        workers: Worker processes (None reads ANALYSIS_POOL_WORKERS; 1 runs in-process)
+        label: Name used in the message when the pool breaks
+        on_result: Optional callable(index, result) called as each call finishes
+
+    Returns:
+        Results in the order of ``items``
+    """
+    items = list(items)
+    workers = configured_workers() if workers is None else workers
+    results = [None] * len(items)
+    done = [False] * len(items)
+    if workers > 1 and len(items) > 1:
+        pool = None
+        try:
+            pool = get_pool(workers)
+            futures = {pool.submit(fn, item): i for i, item in enumerate(items)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done[i] = True
+                if on_result:
+                    on_result(i, results[i])
+        except (BrokenProcessPool, OSError) as e:
+            print(f"DEBUG: {label} pool failed ({e}); running in-process")
+            _discard(pool)
+    for i, item in enumerate(items):
+        if not done[i]:
+            results[i] = fn(item)
+            if on_result:
+                on_result(i, results[i])
+    return results
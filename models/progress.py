@@ -0,0 +1,113 @@
+# models/progress.py
+"""
+Structured progress reporting for long-running fits.
+
+Model code calls ``report(stage, done, total, ...)`` at natural checkpoints
+(MCMC draws, lag-table fits, bootstrap replications, equations). The events
+go to whatever sink the caller installed with ``channel(sink)``; without a
+sink ``report`` does nothing, so modules can report unconditionally.
+
+Each event is a JSON-ready dict with the stage, a message, completed/total
+units, percent, an ETA extrapolated from the stage's rate so far and a
+timestamp, which also serves as a heartbeat for detecting stalled fits.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+_TRACKER = contextvars.ContextVar('progress_tracker', default=None)
+
+
+class ProgressTracker:
+    """Turns ``report`` calls into throttled progress events for one sink."""
+
+    def __init__(self, sink, min_interval=0.5):
+        self.sink = sink
+        self.min_interval = min_interval
+        self.stage = None
+        self.stage_started = None
+        self.last_emit = 0.0
+
+    def report(self, stage, done=None, total=None, message=None, unit='steps'):
+        now = time.monotonic()
+        new_stage = stage != self.stage
+        if new_stage:
+            self.stage = stage
+            self.stage_started = now
+        finished = done is not None and total and done >= total
+        if not (new_stage or finished or now - self.last_emit >= self.min_interval):
+            return
+        self.last_emit = now
+
+        percent = eta = None
+        if done is not None and total:
+            percent = round(100.0 * min(done, total) / total, 1)
+            elapsed = now - self.stage_started
+            if 0 < done < total and elapsed > 0:
+                eta = round(elapsed * (total - done) / done, 1)
+            elif done >= total:
+                eta = 0.0
+        event = {
+            'stage': stage,
+            'message': message or stage.replace('_', ' ').capitalize(),
+            'done': done,
+            'total': total,
+            'unit': unit,
+            'percent': percent,
+            'eta_seconds': eta,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            self.sink(event)
+        except Exception as e:
+            print(f"DEBUG: Progress sink failed: {e}")
+
+
+@contextmanager
+def channel(sink, min_interval=0.5):
+    """Send progress reported inside this block to ``sink(event)``."""
+    token = _TRACKER.set(ProgressTracker(sink, min_interval))
+    try:
+        yield
+    finally:
+        _TRACKER.reset(token)
+
+
+def active():
+    """Whether anyone is listening for progress in this context."""
+    return _TRACKER.get() is not None
+
+
+def report(stage, done=None, total=None, message=None, unit='steps'):
+    """
+    Report progress of the current fit.
+
+    Args:
+        stage: Short machine-readable stage name (e.g. 'sampling')
+        done: Units of work completed in this stage
+        total: Total units of work in this stage
+        message: Human-readable status line
+        unit: What done/total count (e.g. 'draws', 'lags', 'replications')
+    """
+    tracker = _TRACKER.get()
+    if tracker is not None:
+        tracker.report(stage, done, total, message, unit)
+
+
+def mcmc_callback(chains, tune, draws):
+    """
+    PyMC ``pm.sample(callback=...)`` hook reporting draws completed across all chains.
+
+    Tuning steps count towards the total, so the ETA covers the whole run.
+    """
+    total = chains * (tune + draws)
+    state = {'done': 0}
+
+    def _callback(trace=None, draw=None):
+        state['done'] += 1
+        tuning = getattr(draw, 'tuning', False)
+        report('sampling', state['done'], total, unit='draws',
+               message=f"{'Tuning' if tuning else 'Sampling'}: {state['done']:,} of {total:,} draws ({chains} chains)")
+
+    return _callback
@@ -0,0 +1,346 @@
+# models/r_worker_pool.py
+"""
+Pool of long-lived R worker processes for analyses that run R code.
+
+Embedding R in the request thread has two problems. Every call pays for
+loading the R packages, and concurrent requests share R's global
+environment, so one request's ``df`` overwrites another's. Here each worker
+is a separate Python process that starts R once, preloads the packages, and
+then runs jobs one at a time, each in a fresh environment.
+
+The data frame goes to the worker through a spill file, Feather when pyarrow
+is installed and pickle otherwise, rather than through the pipe. Results come
+back as plain Python objects, named R lists as dicts. R console output is
+forwarded to the caller as it is printed. A job that runs past its timeout or
+is cancelled has its worker killed; a replacement is started in its place.
+
+Workers are spawned rather than forked, so R is never initialised in the
+web process itself. They inherit the caller's process group, so a background
+analysis that is cancelled by signalling its group also stops its R workers.
+"""
+import atexit
+import itertools
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import multiprocessing
+
+import pandas as pd
+
+# R run once per worker before it accepts jobs
+BAS_PRELOAD = '''
+if (!requireNamespace("BAS", quietly = TRUE)) {
+  tryCatch(
+    install.packages("BAS", repos = "https://cloud.r-project.org", quiet = TRUE),
+    error = function(e) stop(paste("Failed to install BAS package:", e$message))
+  )
+}
+suppressPackageStartupMessages(library(BAS))
+if (requireNamespace("BMA", quietly = TRUE)) suppressPackageStartupMessages(library(BMA))
+invisible(NULL)
+'''
+
+# Seconds a new worker gets to start R and load its packages
+STARTUP_TIMEOUT = 300
+
+try:
+    import pyarrow  # noqa: F401
+    FEATHER_AVAILABLE = True
+except ImportError:
+    FEATHER_AVAILABLE = False
+
+
+class RJobError(RuntimeError):
+    """An R job failed, timed out or was cancelled."""
+
+
+class RJobTimeout(RJobError):
+    pass
+
+
+class RJobCancelled(RJobError):
+    pass
+
+
+def _write_frame(df, directory, job_id):
+    if FEATHER_AVAILABLE:
+        path = os.path.join(directory, f'{job_id}.feather')
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        path = os.path.join(directory, f'{job_id}.pkl')
+        df.to_pickle(path, protocol=5)
+    return path
+
+
+def _read_frame(path):
+    if path.endswith('.feather'):
+        return pd.read_feather(path)
+    return pd.read_pickle(path)
+
+
+def _to_python(value):
+    """Convert an R object (after pandas2ri conversion) to something picklable.
+
+    Objects with non-NULL ``names`` (named lists and vectors) become dicts.
+    """
+    import numpy as np
+    try:
+        from rpy2.rinterface_lib.sexp import NULLType
+    except ImportError:
+        NULLType = type(None)
+
+    if value is None or isinstance(value, NULLType):
+        return None
+    if isinstance(value, (pd.DataFrame, str, int, float, bool)):
+        return value
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    try:
+        items = [_to_python(v) for v in value]
+    except TypeError:
+        return str(value)
+    names = getattr(value, 'names', None)
+    if callable(names):
+        names = names()
+    if names is None or isinstance(names, NULLType):
+        return items
+    names = [str(name) for name in names]
+    if len(names) != len(items) or not any(names):
+        return items
+    # Unnamed elements of a partly named list keep their 1-based R position as key
+    return {name or str(i + 1): item for i, (name, item) in enumerate(zip(names, items))}
+
+
+def _worker_main(conn, preload):
+    """Worker process: start R, preload packages, then run jobs until told to stop."""
+    try:
+        import rpy2.robjects as ro
+        from rpy2.robjects import pandas2ri
+        from rpy2.robjects.conversion import localconverter
+        from rpy2.rinterface_lib import callbacks
+
+        callbacks.consolewrite_print = lambda text: conn.send(('console', None, text))
+        callbacks.consolewrite_warnerror = lambda text: conn.send(('console', None, text))
+        ro.r(preload)
+    except Exception as e:
+        conn.send(('failed', None, str(e)))
+        return
+    conn.send(('ready', None, None))
+
+    new_env = ro.r('function() new.env(parent = globalenv())')
+    run_in = ro.r('function(code, env) eval(parse(text = code), envir = env)')
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        job_id, code, data_path, inputs, outputs = job
+        try:
+            env = new_env()
+            with localconverter(ro.default_converter + pandas2ri.converter):
+                env['df'] = _read_frame(data_path)
+                for name, value in (inputs or {}).items():
+                    env[name] = ro.ListVector(value) if isinstance(value, dict) else value
+            run_in(code, env)
+            result = {}
+            with localconverter(ro.default_converter + pandas2ri.converter):
+                defined = set(env.keys())
+                for name in outputs:
+                    result[name] = _to_python(env[name]) if name in defined else None
+            conn.send(('done', job_id, result))
+        except Exception as e:
+            conn.send(('error', job_id, str(e)))
+        finally:
+            ro.r('invisible(gc())')
+
+
+class _Worker:
+    def __init__(self, ctx, preload, worker_main=_worker_main):
+        parent_conn, child_conn = ctx.Pipe()
+        self.conn = parent_conn
+        self.process = ctx.Process(target=worker_main, args=(child_conn, preload), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.started = time.monotonic()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+
+class RWorkerPool:
+    """
+    Fixed-size pool of R worker processes sharing one preload script.
+
+    ``worker_main(conn, preload)`` is the function each worker process runs;
+    it speaks the pipe protocol of ``_worker_main`` (tests pass a stub).
+    """
+
+    def __init__(self, size=2, preload=BAS_PRELOAD, timeout=600, worker_main=_worker_main):
+        self.size = max(1, size)
+        self.preload = preload
+        self.timeout = timeout
+        self.worker_main = worker_main
+        self._ctx = multiprocessing.get_context('spawn')
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = 0
+        self._ids = itertools.count(1)
+        self._spill_dir = tempfile.mkdtemp(prefix='r_pool_')
+        self._pid = os.getpid()
+
+    def _acquire(self, wait):
+        """An idle worker, starting one while the pool is below its size."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._started < self.size:
+                self._started += 1
+                return _Worker(self._ctx, self.preload, self.worker_main)
+        try:
+            return self._idle.get(timeout=wait)
+        except queue.Empty:
+            raise RJobTimeout(f'All {self.size} R workers stayed busy for {wait:.0f}s') from None
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            self._started -= 1
+
+    def warm(self):
+        """Start every worker now so the first job does not pay for R startup."""
+        workers = [self._acquire(0) for _ in range(self.size - self._started)]
+        for worker in workers:
+            self._idle.put(worker)
+
+    def submit(self, code, df, inputs=None, outputs=(), timeout=None, cancel_check=None, on_console=None):
+        """
+        Run R code against ``df`` in a worker and wait for the result.
+
+        Args:
+            code: R code, evaluated in a fresh environment holding ``df`` and ``inputs``
+            df: Data frame bound to ``df`` in that environment
+            inputs: Extra variables for the environment (dicts become named R lists)
+            outputs: Names of variables to return once the code has run
+            timeout: Seconds before the job is abandoned (defaults to the pool timeout)
+            cancel_check: Called while waiting; returning True cancels the job
+            on_console: Called with each line R prints
+
+        Returns:
+            Dict of output name -> value (DataFrame, list, scalar or None)
+
+        Raises:
+            RJobError: R raised an error or the worker died
+            RJobTimeout: The job ran longer than ``timeout``
+            RJobCancelled: ``cancel_check`` returned True
+        """
+        timeout = timeout or self.timeout
+        worker = self._acquire(timeout)
+        job_id = next(self._ids)
+        data_path = _write_frame(df, self._spill_dir, job_id)
+        deadline = time.monotonic() + timeout
+        try:
+            if not worker.ready:
+                try:
+                    self._wait_ready(worker, on_console)
+                except RJobError:
+                    worker = None
+                    raise
+            worker.conn.send((job_id, code, data_path, inputs, list(outputs)))
+            while True:
+                if cancel_check is not None and cancel_check():
+                    self._discard(worker)
+                    worker = None
+                    raise RJobCancelled('R job cancelled')
+                if time.monotonic() > deadline:
+                    self._discard(worker)
+                    worker = None
+                    raise RJobTimeout(f'R job exceeded {timeout:.0f}s and was stopped')
+                if not worker.conn.poll(0.25):
+                    continue
+                kind, _, payload = worker.conn.recv()
+                if kind == 'console':
+                    if on_console is not None:
+                        on_console(payload)
+                elif kind == 'done':
+                    return payload
+                elif kind == 'error':
+                    raise RJobError(payload)
+        except (EOFError, OSError) as e:
+            self._discard(worker)
+            worker = None
+            raise RJobError(f'R worker exited unexpectedly: {e}') from e
+        finally:
+            if worker is not None:
+                self._idle.put(worker)
+            try:
+                os.remove(data_path)
+            except OSError:
+                pass
+
+    def _wait_ready(self, worker, on_console):
+        deadline = worker.started + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if not worker.conn.poll(0.25):
+                if not worker.process.is_alive():
+                    break
+                continue
+            kind, _, payload = worker.conn.recv()
+            if kind == 'ready':
+                worker.ready = True
+                return
+            if kind == 'failed':
+                self._discard(worker)
+                raise RJobError(f'R worker could not start: {payload}')
+            if kind == 'console' and on_console is not None:
+                on_console(payload)
+        self._discard(worker)
+        raise RJobError('R worker could not start: no response from R')
+
+    def shutdown(self):
+        if os.getpid() != self._pid:
+            return
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker.conn.send(None)
+                worker.process.join(2)
+            except (OSError, ValueError):
+                pass
+            worker.kill()
+        self._started = 0
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool():
+    """The process-wide R worker pool, created on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL._pid != os.getpid():
+            # Forked child (e.g. a background job): the parent's workers are not ours
+            _POOL = None
+        if _POOL is None:
+            from django.conf import settings
+            _POOL = RWorkerPool(
+                size=getattr(settings, 'R_WORKER_PROCESSES', 2),
+                timeout=getattr(settings, 'R_JOB_TIMEOUT', 600),
+            )
+            atexit.register(_POOL.shutdown)
+        return _POOL
@@ -8,6 +8,9 @@ import statsmodels.api as sm
 import statsmodels.formula.api as smf
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 
+from models import incremental_ols, progress
+from models.fixed_effects import AbsorbedOLSResults, fit_absorbed_ols, split_absorbed_formula
+
 
 def _stars(p):
     try:
@@ -419,57 +422,13 @@ def _corr_pvalue(x, y):
     return r, p
 
 def _partial_corr(y, x, controls_df):
-    # residualize y and x on controls, then correlate residuals
+    # partial correlation of y and x given controls, read off one precision matrix
     if controls_df.shape[1] == 0:
         return _corr_pvalue(x, y)
+    from models.correlation import partial_correlation
     df = pd.DataFrame({"y": y, "x": x}).join(controls_df)
-    df = df.dropna()
-    if df.shape[0] < 3:
-        return np.nan, np.nan
-    # add const
-    Xc = sm.add_constant(df[controls_df.columns], has_constant="add")
-    ry = sm.OLS(df["y"], Xc).fit().resid
-    rx = sm.OLS(df["x"], Xc).fit().resid
-    return _corr_pvalue(ry, rx)
-
-def _calculate_correlation_matrix(df, x_vars, y_vars):
-    """Calculate correlation matrix between x and y variables."""
-    all_vars = list(set(x_vars + y_vars))
-    corr_data = df[all_vars].corr()
-    
-    corr_matrix = np.zeros((len(y_vars), len(x_vars)))
-    for i, y_var in enumerate(y_vars):
-        for j, x_var in enumerate(x_vars):
-            if y_var == x_var:
-                corr_matrix[i, j] = 1.0
-            elif y_var in corr_data.index and x_var in corr_data.columns:
-                corr_matrix[i, j] = corr_data.loc[y_var, x_var]
-            else:
-                corr_matrix[i, j] = np.nan
-    return corr_matrix
-
-def _calculate_p_values(df, x_vars, y_vars):
-    """Calculate p-values for correlation significance."""
-    from scipy.stats import pearsonr
-    p_values = np.ones((len(y_vars), len(x_vars)))
-    
-    for i, y_var in enumerate(y_vars):
-        for j, x_var in enumerate(x_vars):
-            if y_var == x_var:
-                p_values[i, j] = 0.0
-            else:
-                try:
-                    data1 = df[y_var].dropna()
-                    data2 = df[x_var].dropna()
-                    common_idx = data1.index.intersection(data2.index)
-                    if len(common_idx) >= 3:
-                        _, p_val = pearsonr(data1[common_idx], data2[common_idx])
-                        p_values[i, j] = p_val
-                    else:
-                        p_values[i, j] = np.nan
-                except Exception:
-                    p_values[i, j] = np.nan
-    return p_values
+    result = partial_correlation(df, ["y", "x"] + list(controls_df.columns))
+    return result["r"][0, 1], result["p"][0, 1]
 
 def _format_correlation_text(corr_val, p_val, show_significance):
     """Format correlation value with significance asterisks."""
@@ -497,9 +456,11 @@ def _build_correlation_heatmap_json(df, x_vars, y_vars, options):
     if len(x_vars) < 1 or len(y_vars) < 1:
         return None
     
-    # Calculate correlation matrix and p-values using helper functions
-    corr_matrix = _calculate_correlation_matrix(df, x_vars, y_vars)
-    p_values = _calculate_p_values(df, x_vars, y_vars)
+    # Calculate correlation and p-value matrices in one vectorized pass
+    from models.correlation import correlation_matrices
+    corr_matrix, p_values = correlation_matrices(
+        df, x_vars, y_vars, method=options.get('correlation_type', 'pearson')
+    )
     
     # Create text matrix with correlation coefficients and significance
     show_significance = options.get('show_significance', True)
@@ -552,7 +513,7 @@ def _build_correlation_heatmap_json(df, x_vars, y_vars, options):
     
     # Update layout
     fig.update_layout(
-        title="Correlation Heatmap",
+        title="Partial Correlation Heatmap" if options.get('correlation_type') == 'partial' else "Correlation Heatmap",
         xaxis_title="X Variables",
         yaxis_title="Y Variables",
         height=max(400, len(y_vars) * 40 + 100),
@@ -1805,6 +1766,15 @@ class RegressionModule:
         print(f"DEBUG: Formula after safe-name replacement: {formula}")
         print(f"DEBUG: Columns after renaming: {list(df_renamed.columns)}")
         
+        # Split off absorbed fixed effects (y ~ x1 + x2 | firm + year)
+        formula, absorb_vars = split_absorbed_formula(formula)
+        if absorb_vars:
+            print(f"DEBUG: Absorbing fixed effects for: {absorb_vars}")
+            missing_fe = [v for v in absorb_vars if v not in df_renamed.columns]
+            if missing_fe:
+                missing_fe = [column_mapping.get(v, v) for v in missing_fe]
+                return ["Term", "Estimate"], [{"Term": "Variable Error", "Estimate": f"Fixed-effect variables not found: {missing_fe}. Available columns: {list(df.columns)}"}], {"N": int(df.shape[0])}, None, "Error"
+        
         lhs, _ = formula.split("~", 1)
         y = [s.strip() for s in lhs.split("+") if s.strip()][0]
         
@@ -1869,10 +1839,15 @@ class RegressionModule:
             if error_result[0]:  # Check if error tuple returned
                 return error_result[:5]  # Return first 5 elements (error result)
             df_clean = error_result[5]  # Get cleaned dataframe
+            if absorb_vars:
+                df_clean = df_clean.dropna(subset=absorb_vars)
             
             print(f"DEBUG: Clean dataset shape: {df_clean.shape}")
             print(f"DEBUG: Rows dropped: {df_renamed.shape[0] - df_clean.shape[0]}")
             
+            if absorb_vars and (is_ordinal or is_multinomial or y_bin):
+                return ["Term", "Estimate"], [{"Term": "Model Error", "Estimate": "Absorbed fixed effects (y ~ x | fe) are only supported for OLS regression with a continuous dependent variable."}], {"N": int(df.shape[0])}, None, "Error"
+            
             if is_ordinal:
                 print(f"DEBUG: Taking ordinal regression branch")
                 print(f"DEBUG: is_ordinal = {is_ordinal}, is_multinomial = {is_multinomial}")
@@ -2430,8 +2405,23 @@ class RegressionModule:
                 print(f"DEBUG: Dataframe shape: {df_clean_typed.shape}")
                 print(f"DEBUG: First 3 rows of dataframe sent to OLS model:")
                 print(df_clean_typed.head(3).to_string())
-                print(f"DEBUG: EQUATION BEING FED TO smf.ols: '{modified_formula}'")
-                model = smf.ols(formula=modified_formula, data=df_clean_typed).fit()
+                if absorb_vars:
+                    # Cluster on the first absorbed factor unless told otherwise
+                    cluster_var = options.get("cluster_var") or absorb_vars[0]
+                    if str(cluster_var).lower() == "none":
+                        cluster_var = None
+                    else:
+                        cluster_var = {orig: safe for safe, orig in column_mapping.items()}.get(cluster_var, cluster_var)
+                    print(f"DEBUG: EQUATION BEING FED TO fit_absorbed_ols: '{modified_formula}' | {absorb_vars} (cluster={cluster_var})")
+                    model = fit_absorbed_ols(df_clean_typed, modified_formula, absorb_vars, cluster=cluster_var)
+                else:
+                    print(f"DEBUG: EQUATION BEING FED TO smf.ols: '{modified_formula}'")
+                    # Reuse the session's last QR factorization when only terms changed
+                    model, factorization, incremental = incremental_ols.fit(
+                        smf.ols(formula=modified_formula, data=df_clean_typed), options.get("refit_key")
+                    )
+                    print(f"DEBUG: OLS fit {'updated incrementally' if incremental else 'computed from scratch'}")
+                    setattr(model, "_ols_factorization", factorization)
                 # Attach mapping info for downstream use
                 setattr(model, "_column_mapping", column_mapping)
                 setattr(model, "_original_endog_name", column_mapping.get(y, y))
@@ -2993,6 +2983,8 @@ class RegressionModule:
             # For linear regression, use standard R²
             stats_all["R²"] = float(getattr(model, "rsquared", np.nan))
             stats_all["Adj. R²"] = float(getattr(model, "rsquared_adj", np.nan))
+            if isinstance(model, AbsorbedOLSResults):
+                stats_all["Within_R²"] = float(model.rsquared_within)
         stats_all["AIC"] = float(getattr(model, "aic", np.nan))
         stats_all["BIC"] = float(getattr(model, "bic", np.nan))
 
@@ -3022,8 +3014,16 @@ class RegressionModule:
                 # For linear regression, use standard R²
                 stats_filtered["R²"] = stats_all.get("R²")
                 stats_filtered["Adj. R²"] = stats_all.get("Adj. R²")
+                if "Within_R²" in stats_all:
+                    stats_filtered["Within_R²"] = stats_all["Within_R²"]
         if options.get("show_aic"): stats_filtered["AIC"] = stats_all["AIC"]
         if options.get("show_bic"): stats_filtered["BIC"] = stats_all["BIC"]
+        if isinstance(model, AbsorbedOLSResults):
+            stats_filtered["Fixed_Effects"] = ", ".join(
+                f"{column_mapping.get(v, v)} ({n})" for v, n in model.absorbed_levels.items()
+            )
+            if model.cluster_var:
+                stats_filtered["Clustered_SE"] = f"{column_mapping.get(model.cluster_var, model.cluster_var)} ({model.n_clusters} clusters)"
         
         # Get diagnostics if available (for all regression types)
         diagnostics = None
@@ -3033,415 +3033,183 @@ class RegressionModule:
         return cols, rows, stats_filtered, model, regression_type, diagnostics
 
     @staticmethod
-    def _pre_generate_multinomial_predictions(fitted_model, df, interactions):
-        """Pre-generate probability predictions for all multinomial regression level/interaction combinations."""
-        print(f"DEBUG: _pre_generate_multinomial_predictions called")
-        print(f"DEBUG: interactions = {interactions}")
-        print(f"DEBUG: fitted_model type = {type(fitted_model)}")
-        print(f"DEBUG: fitted_model str = {str(type(fitted_model))}")
-        
-        if not interactions or not fitted_model:
-            print(f"DEBUG: No interactions or fitted_model, returning None")
-            return None
-            
-        # Check if this is a multinomial regression model - use same logic as ordinal
-        if not ('MultinomialResults' in str(type(fitted_model)) or hasattr(fitted_model, 'model') and 'mnlogit' in str(type(fitted_model.model))):
-            print(f"DEBUG: Not a multinomial model, returning None")
-            print(f"DEBUG: Model type: {type(fitted_model)}")
-            return None
-            
-        # Get the dependent variable and its categories
+    def _prediction_grid(df, x, m):
+        """Return the x grid and the (low, high) moderator levels used for precomputed predictions."""
+        x_vals = df[x].dropna()
+        m_vals = df[m].dropna()
+
+        if pd.api.types.is_numeric_dtype(x_vals):
+            x_grid = np.linspace(x_vals.min(), x_vals.max(), 50)
+        else:
+            x_grid = x_vals.unique()
+
+        if pd.api.types.is_numeric_dtype(m_vals):
+            # Use mean ± 1sd for low/high moderator levels
+            mean_val = m_vals.mean()
+            std_val = m_vals.std()
+            mod_levels = [mean_val - std_val, mean_val + std_val]
+        else:
+            # For categorical, use first and last unique values
+            unique_vals = m_vals.unique()
+            mod_levels = [unique_vals[0], unique_vals[-1]] if len(unique_vals) >= 2 else list(unique_vals)
+
+        return x_grid, mod_levels
+
+    @staticmethod
+    def _stacked_level_grid(x, m, x_grid, mod_levels):
+        """Stack the x grid once per moderator level so a single predict() covers all levels."""
+        n_x = len(x_grid)
+        return pd.DataFrame({
+            x: np.tile(np.asarray(x_grid), len(mod_levels)),
+            m: np.repeat(np.asarray(mod_levels, dtype=object), n_x),
+        }).infer_objects()
+
+    @staticmethod
+    def _fill_default_regressors(grid, df, names):
+        """Hold regressors not on the grid at their mean (numeric) or mode (categorical)."""
+        for nm in names:
+            if nm in ("Intercept", "const") or nm in grid.columns or nm not in df.columns:
+                continue
+            if pd.api.types.is_numeric_dtype(df[nm]):
+                grid[nm] = df[nm].mean()
+            else:
+                grid[nm] = df[nm].mode().iloc[0]
+        return grid
+
+    @staticmethod
+    def _multinomial_design(fitted_model, df, grid):
+        """Build the exog frame for a manually parsed (non-formula) MNLogit model."""
+        exog_names = list(fitted_model.model.exog_names)
+        design = pd.DataFrame(index=grid.index)
+        for var_name in exog_names:
+            if var_name == 'const':
+                design['const'] = 1.0
+            elif ':' in var_name:
+                parts = var_name.split(':')
+                if all(part in grid.columns for part in parts) and all(
+                        pd.api.types.is_numeric_dtype(grid[p]) for p in parts):
+                    design[var_name] = np.prod(
+                        [pd.to_numeric(grid[p], errors='coerce').fillna(0.0).to_numpy() for p in parts],
+                        axis=0,
+                    )
+                elif all(part in grid.columns for part in parts):
+                    value = grid[parts[0]].astype(str)
+                    for part in parts[1:]:
+                        value = value + "_" + grid[part].astype(str)
+                    design[var_name] = value
+                else:
+                    design[var_name] = 0.0
+            elif var_name in grid.columns:
+                design[var_name] = grid[var_name]
+            else:
+                design[var_name] = 0.0
+        return design[exog_names]
+
+    @staticmethod
+    def _ordinal_design(fitted_model, df, grid, x, m):
+        """Add the regressors an OrderedModel expects to the stacked grid."""
+        # Threshold parameters contain digits and do not correspond to variables
+        param_vars = [nm for nm in fitted_model.params.index if not any(ch.isdigit() for ch in str(nm))]
+        for nm in param_vars:
+            if nm in grid.columns:
+                continue
+            if nm in df.columns:
+                grid[nm] = df[nm].mean() if pd.api.types.is_numeric_dtype(df[nm]) else df[nm].mode().iloc[0]
+            elif '[' in nm and ']' in nm:
+                # Dummy column from categorical encoding
+                grid[nm] = 0
+            else:
+                similar_vars = [col for col in df.columns if col.lower() == nm.lower()]
+                if similar_vars:
+                    actual = df[similar_vars[0]]
+                    grid[nm] = actual.mean() if pd.api.types.is_numeric_dtype(actual) else actual.mode().iloc[0]
+                else:
+                    grid[nm] = 0
+        if f"{x}:{m}" in param_vars:
+            grid[f"{x}:{m}"] = grid[x] * grid[m]
+        return grid
+
+    @staticmethod
+    def _pre_generate_predictions(fitted_model, df, interactions, kind):
+        """
+        Pre-generate probability predictions for every interaction as a dense array store.
+
+        Each interaction is predicted with one call over the stacked (level, x) grid and
+        reshaped to (level, category, x), so no Python loop runs over grid points or categories.
+        """
+        from models.prediction_store import PrecomputedPredictions
+
         y_var = fitted_model.model.endog_names
         if y_var not in df.columns:
+            print(f"DEBUG: y_var {y_var} not in df.columns, skipping {kind} predictions")
             return None
-            
+
         categories = sorted(df[y_var].dropna().unique())
-        print(f"DEBUG: Categories found: {categories}")
-        predictions = {}
-        
+        is_formula_model = hasattr(fitted_model.model, 'formula') and fitted_model.model.formula is not None
+        blocks = []
+
         for interaction in interactions:
-            if "*" in interaction:
-                x, m = [p.strip() for p in interaction.split("*", 1)]
-            else:
-                parts = interaction.split(":")
-                if len(parts) == 2:
-                    x, m = parts[0].strip(), parts[1].strip()
-                else:
-                    continue
-                    
-            if x not in df.columns or m not in df.columns:
+            x, m = _parse_interaction_variables(interaction)
+            if not x or not m or interaction.count(':') > 1 or x not in df.columns or m not in df.columns:
                 continue
-                
-            # Generate predictions for this interaction
-            interaction_predictions = {}
-            
-            # Create grid for predictions (similar to spotlight plot logic)
-            x_vals = df[x].dropna()
-            m_vals = df[m].dropna()
-            
-            if pd.api.types.is_numeric_dtype(x_vals):
-                x_grid = np.linspace(x_vals.min(), x_vals.max(), 50)
-            else:
-                x_grid = x_vals.unique()
-                
-            if pd.api.types.is_numeric_dtype(m_vals):
-                # Use mean ± 1sd for low/high moderator levels
-                mean_val = m_vals.mean()
-                std_val = m_vals.std()
-                mod_levels = [mean_val - std_val, mean_val + std_val]  # low and high
-            else:
-                # For categorical, use first and last unique values
-                unique_vals = m_vals.unique()
-                if len(unique_vals) >= 2:
-                    mod_levels = [unique_vals[0], unique_vals[-1]]
+
+            x_grid, mod_levels = RegressionModule._prediction_grid(df, x, m)
+            if len(mod_levels) == 0 or len(x_grid) == 0:
+                continue
+            grid = RegressionModule._stacked_level_grid(x, m, x_grid, mod_levels)
+
+            try:
+                if kind == 'ordinal':
+                    grid = RegressionModule._ordinal_design(fitted_model, df, grid, x, m)
+                    pred = fitted_model.predict(grid)
                 else:
-                    mod_levels = unique_vals
-            
-            # Generate predictions for each moderator level
-            for mval in mod_levels:
-                grid = pd.DataFrame({x: x_grid, m: mval})
-                
-                # Add missing regressors at default values
-                for nm in fitted_model.model.exog_names:
-                    if nm in ("Intercept", "const"): 
-                        continue
-                    if nm not in grid.columns and nm in df.columns:
-                        if pd.api.types.is_numeric_dtype(df[nm]):
-                            grid[nm] = df[nm].mean()
-                        else:
-                            # For categorical variables, use mode (most frequent value)
-                            grid[nm] = df[nm].mode().iloc[0]
-                
-                try:
-                    print(f"DEBUG: About to predict with grid shape: {grid.shape}")
-                    print(f"DEBUG: Grid columns: {grid.columns.tolist()}")
-                    print(f"DEBUG: Grid sample (first row): {grid.iloc[0].tolist()}")
-                    print(f"DEBUG: Model exog_names: {fitted_model.model.exog_names}")
-                    
-                    # Check if this is a formula-based model or manually parsed model
-                    if hasattr(fitted_model, 'model') and hasattr(fitted_model.model, 'formula'):
-                        # Formula-based model: pass original variables and let patsy handle design matrix
-                        print(f"DEBUG: Using formula-based prediction")
-                        pred_probs = fitted_model.predict(grid)
+                    grid = RegressionModule._fill_default_regressors(grid, df, fitted_model.model.exog_names)
+                    if is_formula_model:
+                        pred = fitted_model.predict(grid)
                     else:
-                        # Manually parsed model: need to build design matrix manually
-                        print(f"DEBUG: Using manual design matrix construction")
-                        
-                        # Build the design matrix in the same format as the model
-                        grid_for_pred = pd.DataFrame()
-                        
-                        # Add constant term if present
-                        if 'const' in fitted_model.model.exog_names:
-                            grid_for_pred['const'] = 1.0
-                        
-                        # Add variables in the same order as the model
-                        for var_name in fitted_model.model.exog_names:
-                            if var_name == 'const':
-                                continue
-                            
-                            # Check if this is an interaction term
-                            if ':' in var_name:
-                                # This is an interaction term - create it by multiplying component variables
-                                parts = var_name.split(':')
-                                print(f"DEBUG: Creating interaction term {var_name} from parts: {parts}")
-                                
-                                # Check if all parts are available
-                                if all(part in grid.columns for part in parts):
-                                    # Create interaction by multiplying component variables
-                                    interaction_value = grid[parts[0]]
-                                    for part in parts[1:]:
-                                        # Check if both variables are numeric
-                                        if pd.api.types.is_numeric_dtype(grid[parts[0]]) and pd.api.types.is_numeric_dtype(grid[part]):
-                                            # Both numeric - can multiply
-                                            val1 = pd.to_numeric(interaction_value, errors='coerce').fillna(0.0)
-                                            val2 = pd.to_numeric(grid[part], errors='coerce').fillna(0.0)
-                                            interaction_value = val1 * val2
-                                        else:
-                                            # At least one is categorical - use string concatenation for interaction
-                                            interaction_value = interaction_value.astype(str) + "_" + grid[part].astype(str)
-                                    grid_for_pred[var_name] = interaction_value
-                                    print(f"DEBUG: Created interaction {var_name} = {' * '.join(parts)}")
-                                else:
-                                    print(f"DEBUG: Warning - Cannot create interaction {var_name}, missing parts: {[p for p in parts if p not in grid.columns]}")
-                                    grid_for_pred[var_name] = 0.0
-                            elif var_name in grid.columns:
-                                # Use values from grid, but handle categorical variables properly
-                                values = grid[var_name]
-                                
-                                # For categorical variables, keep them as-is since C() wrapper handles them
-                                if not pd.api.types.is_numeric_dtype(values):
-                                    # Keep categorical variables as their original values
-                                    # The C() wrapper in the formula will handle the encoding
-                                    print(f"DEBUG: Keeping categorical variable '{var_name}' as-is: {values.iloc[0] if len(values) > 0 else 'empty'}")
-                                
-                                grid_for_pred[var_name] = values
-                            elif var_name in df.columns:
-                                # Use mean for missing variables
-                                if pd.api.types.is_numeric_dtype(df[var_name]):
-                                    grid_for_pred[var_name] = df[var_name].mean()
-                                else:
-                                    grid_for_pred[var_name] = df[var_name].mode().iloc[0]
-                            else:
-                                # Variable not found, use 0
-                                grid_for_pred[var_name] = 0.0
-                        
-                        # Ensure the order matches the model
-                        grid_for_pred = grid_for_pred[fitted_model.model.exog_names]
-                        
-                        print(f"DEBUG: Grid for prediction shape: {grid_for_pred.shape}")
-                        print(f"DEBUG: Grid for prediction columns: {grid_for_pred.columns.tolist()}")
-                        
-                        pred_probs = fitted_model.predict(grid_for_pred)
-                    
-                    # Check for NaNs and raise error if found
-                    if hasattr(pred_probs, 'isnull') and pred_probs.isnull().any().any():
-                        raise ValueError(
-                            f"Multinomial predict produced NaNs for {interaction} at {m}={mval}. "
-                            "This usually means the grid is missing required variables or has invalid values. "
-                            f"Grid columns: {grid.columns.tolist()}, "
-                            f"Grid shape: {grid.shape}, "
-                            f"Any NaN in grid: {grid.isnull().any().any()}"
-                        )
-                    
-                    print(f"DEBUG: pred_probs shape: {pred_probs.shape}")
-                    print(f"DEBUG: pred_probs columns: {pred_probs.columns.tolist() if hasattr(pred_probs, 'columns') else 'No columns'}")
-                    print(f"DEBUG: pred_probs sample (first row): {pred_probs.iloc[0].tolist() if hasattr(pred_probs, 'iloc') else pred_probs[0]}")
-                    print(f"DEBUG: pred_probs sum (first row): {pred_probs.iloc[0].sum() if hasattr(pred_probs, 'iloc') else pred_probs[0].sum()}")
-                    
-                    # Store predictions for each category
-                    level_predictions = {}
-                    
-                    # For multinomial regression, pred_probs is a DataFrame with columns for each category
-                    if hasattr(pred_probs, 'columns'):
-                        # Map each category to its predictions
-                        for i, category in enumerate(categories):
-                            if i < pred_probs.shape[1]:
-                                # Ensure all values are JSON-serializable
-                                x_values = x_grid.tolist() if hasattr(x_grid, 'tolist') else list(x_grid)
-                                probabilities = pred_probs.iloc[:, i].tolist() if hasattr(pred_probs.iloc[:, i], 'tolist') else list(pred_probs.iloc[:, i])
-                                
-                                # Convert numpy types to Python types, but preserve NaN values
-                                x_values = [float(x) if np.isfinite(x) else None for x in x_values]
-                                probabilities = [float(p) if np.isfinite(p) else None for p in probabilities]
-                                
-                                level_predictions[category] = {
-                                    'x_values': x_values,
-                                    'probabilities': probabilities
-                                }
-                                print(f"DEBUG: Stored predictions for category {category} (index {i}): {len(probabilities)} values")
-                    else:
-                        # If pred_probs is not a DataFrame, treat as array
-                        for i, category in enumerate(categories):
-                            if i < pred_probs.shape[1]:
-                                # Ensure all values are JSON-serializable
-                                x_values = x_grid.tolist() if hasattr(x_grid, 'tolist') else list(x_grid)
-                                probabilities = pred_probs[:, i].tolist() if hasattr(pred_probs[:, i], 'tolist') else list(pred_probs[:, i])
-                                
-                                # Convert numpy types to Python types, but preserve NaN values
-                                x_values = [float(x) if np.isfinite(x) else None for x in x_values]
-                                probabilities = [float(p) if np.isfinite(p) else None for p in probabilities]
-                                
-                                level_predictions[category] = {
-                                    'x_values': x_values,
-                                    'probabilities': probabilities
-                                }
-                                print(f"DEBUG: Stored predictions for category {category} (index {i}): {len(probabilities)} values")
-                    
-                    interaction_predictions[str(mval)] = level_predictions
-                    
-                except Exception as e:
-                    print(f"Error generating predictions for {interaction} at {m}={mval}: {e}")
-                    continue
-            
-            predictions[interaction] = interaction_predictions
-            
-        # Final JSON serialization check
-        try:
-            import json
-            json.dumps(predictions)  # Test if predictions are JSON-serializable
-            print(f"DEBUG: Predictions are JSON-serializable")
-        except Exception as e:
-            print(f"DEBUG: Predictions are NOT JSON-serializable: {e}")
-            # Convert any remaining non-serializable objects
-            predictions = RegressionModule._ensure_json_serializable(predictions)
-            
-        return predictions
+                        pred = fitted_model.predict(RegressionModule._multinomial_design(fitted_model, df, grid))
+                pred = np.asarray(pred, dtype=float)
+                if pred.ndim == 1:
+                    pred = pred[:, None]
+                if kind == 'multinomial' and np.isnan(pred).any():
+                    raise ValueError(
+                        f"Multinomial predict produced NaNs for {interaction}. "
+                        "This usually means the grid is missing required variables or has invalid values. "
+                        f"Grid columns: {grid.columns.tolist()}"
+                    )
+            except Exception as e:
+                print(f"Error generating {kind} predictions for {interaction}: {e}")
+                continue
+
+            n_cat = min(pred.shape[1], len(categories))
+            # (levels * x, categories) -> (levels, categories, x)
+            block = pred[:, :n_cat].reshape(len(mod_levels), len(x_grid), n_cat).transpose(0, 2, 1)
+            blocks.append((interaction, mod_levels, x_grid, block))
+
+        store = PrecomputedPredictions.from_blocks(kind, categories, blocks)
+        if store is not None:
+            print(f"DEBUG: Pre-generated {kind} predictions with shape {store.probabilities.shape}")
+        return store
 
     @staticmethod
-    def _ensure_json_serializable(obj):
-        """Recursively convert numpy types and other non-JSON-serializable objects to Python types."""
-        if isinstance(obj, dict):
-            return {key: RegressionModule._ensure_json_serializable(value) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [RegressionModule._ensure_json_serializable(item) for item in obj]
-        elif hasattr(obj, 'tolist'):  # numpy arrays
-            return obj.tolist()
-        elif hasattr(obj, 'item'):  # numpy scalars
-            return obj.item()
-        elif isinstance(obj, (np.integer, np.floating)):
-            return float(obj) if np.isfinite(obj) else None
-        else:
-            return obj
+    def _pre_generate_multinomial_predictions(fitted_model, df, interactions):
+        """Pre-generate probability predictions for all multinomial regression level/interaction combinations."""
+        if not interactions or not fitted_model:
+            return None
+        if not ('MultinomialResults' in str(type(fitted_model)) or hasattr(fitted_model, 'model') and 'mnlogit' in str(type(fitted_model.model))):
+            print(f"DEBUG: Not a multinomial model, returning None")
+            return None
+        return RegressionModule._pre_generate_predictions(fitted_model, df, interactions, 'multinomial')
 
     @staticmethod
     def _pre_generate_ordinal_predictions(fitted_model, df, interactions):
         """Pre-generate probability predictions for all ordinal regression level/interaction combinations."""
-        print(f"DEBUG: _pre_generate_ordinal_predictions called")
-        print(f"DEBUG: interactions = {interactions}")
-        print(f"DEBUG: fitted_model type = {type(fitted_model)}")
-        print(f"DEBUG: fitted_model str = {str(type(fitted_model))}")
-        
         if not interactions:
-            print(f"DEBUG: No interactions provided, returning None")
             return None
-            
         if 'OrderedModel' not in str(type(fitted_model.model)):
             print(f"DEBUG: Not an OrderedModel, returning None")
             return None
-            
-        # Get the dependent variable and its categories
-        y_var = fitted_model.model.endog_names
-        print(f"DEBUG: y_var = {y_var}")
-        if y_var not in df.columns:
-            print(f"DEBUG: y_var {y_var} not in df.columns, returning None")
-            return None
-            
-        categories = sorted(df[y_var].dropna().unique())
-        print(f"DEBUG: categories = {categories}")
-        predictions = {}
-        
-        for interaction in interactions:
-            print(f"DEBUG: Processing interaction: {interaction}")
-            if "*" in interaction:
-                x, m = [p.strip() for p in interaction.split("*", 1)]
-            else:
-                parts = interaction.split(":")
-                if len(parts) == 2:
-                    x, m = parts[0].strip(), parts[1].strip()
-                else:
-                    print(f"DEBUG: Invalid interaction format: {interaction}")
-                    continue
-                    
-            print(f"DEBUG: x = {x}, m = {m}")
-            if x not in df.columns or m not in df.columns:
-                print(f"DEBUG: Variables not found - x in df: {x in df.columns}, m in df: {m in df.columns}")
-                continue
-                
-            # Generate predictions for this interaction
-            interaction_predictions = {}
-            
-            # Create grid for predictions (similar to spotlight plot logic)
-            x_vals = df[x].dropna()
-            m_vals = df[m].dropna()
-            
-            if pd.api.types.is_numeric_dtype(x_vals):
-                x_grid = np.linspace(x_vals.min(), x_vals.max(), 50)
-            else:
-                x_grid = x_vals.unique()
-                
-            if pd.api.types.is_numeric_dtype(m_vals):
-                # Use mean ± 1sd for low/high moderator levels
-                mean_val = m_vals.mean()
-                std_val = m_vals.std()
-                mod_levels = [mean_val - std_val, mean_val + std_val]  # low and high
-            else:
-                # For categorical, use first and last unique values
-                unique_vals = m_vals.unique()
-                if len(unique_vals) >= 2:
-                    mod_levels = [unique_vals[0], unique_vals[-1]]
-                else:
-                    mod_levels = unique_vals
-            
-            # Generate predictions for each moderator level
-            for mval in mod_levels:
-                grid = pd.DataFrame({x: x_grid, m: mval}, index=range(len(x_grid)))
-                
-                # Build the grid properly for ordinal models (same as spotlight plot logic)
-                # Only include variables that are actually in the model parameters
-                param_vars = []
-                for param_name in fitted_model.params.index:
-                    # Skip threshold parameters (they don't correspond to variables)
-                    if not any(char.isdigit() for char in str(param_name)):
-                        param_vars.append(param_name)
-                
-                print(f"DEBUG: Variables from model params: {param_vars}")
-                
-                # Add missing regressors at default values
-                for nm in param_vars:
-                    if nm not in grid.columns:
-                        if nm in df.columns:
-                            if pd.api.types.is_numeric_dtype(df[nm]):
-                                grid[nm] = df[nm].mean()
-                                print(f"DEBUG: Used mean value for numeric '{nm}': {df[nm].mean()}")
-                            else:
-                                # For categorical variables, use the mode (most frequent value) as-is
-                                mode_val = df[nm].mode().iloc[0]
-                                grid[nm] = mode_val
-                                print(f"DEBUG: Used categorical value '{nm}' in ordinal grid: {mode_val}")
-                        else:
-                            # Check if this is actually a dummy variable by looking for patterns
-                            # Dummy variables typically have patterns like "VariableName[T.Category]"
-                            if '[' in nm and ']' in nm:
-                                # This is likely a dummy variable from categorical encoding
-                                grid[nm] = 0
-                                print(f"DEBUG: Set dummy variable '{nm}' to 0 in ordinal grid (categorical encoding)")
-                            else:
-                                # This might be a missing variable, try to find it in the dataframe
-                                # Check if there's a similar variable name (case-insensitive)
-                                similar_vars = [col for col in df.columns if col.lower() == nm.lower()]
-                                if similar_vars:
-                                    actual_var = similar_vars[0]
-                                    if pd.api.types.is_numeric_dtype(df[actual_var]):
-                                        mean_val = df[actual_var].mean()
-                                        grid[nm] = mean_val
-                                        print(f"DEBUG: Found similar variable '{actual_var}' for '{nm}', used mean: {mean_val}")
-                                    else:
-                                        mode_val = df[actual_var].mode().iloc[0]
-                                        grid[nm] = mode_val
-                                        print(f"DEBUG: Found similar variable '{actual_var}' for '{nm}', used mode: {mode_val}")
-                                else:
-                                    # No similar variable found, set to 0
-                                    grid[nm] = 0
-                                    print(f"DEBUG: Set missing variable '{nm}' to 0 in ordinal grid (no similar variable found)")
-            
-                # Create interaction terms in the grid
-                if f"{x}:{m}" in param_vars:
-                    grid[f"{x}:{m}"] = grid[x] * grid[m]
-                    print(f"DEBUG: Created interaction {x}:{m} in grid")
-                
-                print(f"DEBUG: Grid columns before prediction: {grid.columns.tolist()}")
-                print(f"DEBUG: Grid shape before prediction: {grid.shape}")
-                
-                try:
-                    # Get probability predictions for all categories
-                    pred_probs = fitted_model.predict(grid)
-                    
-                    # Store predictions for each category
-                    level_predictions = {}
-                    for i, category in enumerate(categories):
-                        if hasattr(pred_probs, 'iloc'):
-                            if i < pred_probs.shape[1]:
-                                level_predictions[category] = {
-                                    'x_values': x_grid.tolist(),
-                                    'probabilities': pred_probs.iloc[:, i].tolist()
-                                }
-                        else:
-                            if i < pred_probs.shape[1]:
-                                level_predictions[category] = {
-                                    'x_values': x_grid.tolist(),
-                                    'probabilities': pred_probs[:, i].tolist()
-                                }
-                    
-                    interaction_predictions[str(mval)] = level_predictions
-                    
-                except Exception as e:
-                    print(f"Error generating predictions for {interaction} at {m}={mval}: {e}")
-                    continue
-            
-            predictions[interaction] = interaction_predictions
-            
-        print(f"DEBUG: Final predictions: {predictions}")
-        return predictions
+        return RegressionModule._pre_generate_predictions(fitted_model, df, interactions, 'ordinal')
 
     @staticmethod
     def _unpack_fit_result(fit_result):
@@ -3453,19 +3221,26 @@ class RegressionModule:
         else:
             return fit_result[:5] + (None,)
     
+    @staticmethod
+    def _take_factorization(fitted_model):
+        """Detach the OLS QR factorization so it stays in memory and is not pickled with the model."""
+        factorization = getattr(fitted_model, "_ols_factorization", None)
+        if fitted_model is not None and hasattr(fitted_model, "_ols_factorization"):
+            delattr(fitted_model, "_ols_factorization")
+        return factorization
+    
     @staticmethod
     def _generate_predictions(fitted_model, regression_type, df, interactions):
-        """Generate ordinal/multinomial predictions if applicable."""
-        ordinal_predictions = None
-        multinomial_predictions = None
+        """Generate ordinal/multinomial predictions if applicable, packed as a compact binary payload."""
+        store = None
         
         if fitted_model is not None:
             if 'Ordinal regression' in regression_type:
-                ordinal_predictions = RegressionModule._pre_generate_ordinal_predictions(fitted_model, df, interactions)
+                store = RegressionModule._pre_generate_ordinal_predictions(fitted_model, df, interactions)
             elif 'Multinomial regression' in regression_type:
-                multinomial_predictions = RegressionModule._pre_generate_multinomial_predictions(fitted_model, df, interactions)
+                store = RegressionModule._pre_generate_multinomial_predictions(fitted_model, df, interactions)
         
-        return ordinal_predictions, multinomial_predictions
+        return store.to_bytes() if store is not None else None
     
     def run(df, formula, analysis_type, outdir, options, schema_types=None, schema_orders=None):
         # Check if this is a multi-equation format (multiple lines with ~)
@@ -3491,11 +3266,16 @@ class RegressionModule:
         fit_result = RegressionModule._fit_models(df, formula, options, schema_types, schema_orders)
         model_cols, model_rows, model_stats, fitted_model, regression_type, diagnostics = RegressionModule._unpack_fit_result(fit_result)
 
+        ols_factorization = RegressionModule._take_factorization(fitted_model)
+
+        # Absorbed fixed effects only matter for the fit itself
+        formula, _ = split_absorbed_formula(formula)
+
         # 2) Parse formula to get interactions
         _, _, interactions = _parse_formula(formula)
 
         # 2.5) Pre-generate predictions if applicable
-        ordinal_predictions, multinomial_predictions = RegressionModule._generate_predictions(fitted_model, regression_type, df, interactions)
+        precomputed_predictions = RegressionModule._generate_predictions(fitted_model, regression_type, df, interactions)
 
         # 3) Interactive spotlight (generate for all interactions)
         spotlight_json = None
@@ -3549,11 +3329,8 @@ class RegressionModule:
             # interactive figures as JSON blobs
             "spotlight_json": spotlight_json,
 
-            # ordinal regression pre-generated predictions
-            "ordinal_predictions": ordinal_predictions,
-            
-            # multinomial regression pre-generated predictions
-            "multinomial_predictions": multinomial_predictions,
+            # ordinal/multinomial pre-generated predictions (compressed float32 arrays)
+            "precomputed_predictions": precomputed_predictions,
 
             # regression table
             "model_table_cols": model_cols,
@@ -3577,6 +3354,9 @@ class RegressionModule:
 
             # regression type
             "regression_type": regression_type,
+
+            # OLS factorization kept per session for incremental refits
+            "ols_factorization": ols_factorization,
             
             # OLS diagnostics (for all regression types)
             "diagnostics": diagnostics_list,
@@ -3630,6 +3410,7 @@ class RegressionModule:
                 # For multi-equation regression, ensure all columns are included
                 # Create a copy of options with all display flags enabled
                 multi_eq_options = options.copy() if options else {}
+                multi_eq_options.pop('refit_key', None)  # Incremental refits track a single equation
                 multi_eq_options['show_se'] = True  # Always show standard errors
                 multi_eq_options['show_p'] = True   # Always show p-values
                 multi_eq_options['show_ci'] = True # Always show confidence intervals
@@ -3639,6 +3420,9 @@ class RegressionModule:
                 multi_eq_options['show_bic'] = True  # Always include BIC for model fit stats
                 multi_eq_options['show_n'] = True  # Always include N for model fit stats
                 
+                progress.report('equations', i, len(equation_lines), unit='equations',
+                                message=f'Fitting equation {i + 1} of {len(equation_lines)}: {eq_line}')
+                
                 # Fit this equation
                 fit_result = RegressionModule._fit_models(df, eq_line, multi_eq_options, schema_types, schema_orders)
                 
@@ -3651,6 +3435,7 @@ class RegressionModule:
                 else:
                     model_cols, model_rows, model_stats, fitted_model, regression_type = fit_result[:5]
                     diagnostics = None
+                RegressionModule._take_factorization(fitted_model)
                 
                 # Extract DV from equation
                 lhs, _ = eq_line.split('~', 1)
@@ -3667,6 +3452,8 @@ class RegressionModule:
                     'regression_type': regression_type,
                     'diagnostics': diagnostics
                 })
+            progress.report('equations', len(equation_lines), len(equation_lines), unit='equations',
+                            message='All equations fitted')
             
             # Organize results in grid format: rows = RHS vars, cols = DVs
             # Build a nested dict: {rhs_var: {dv: {coef, se, ci_low, ci_high, t, p, sig}}}
@@ -0,0 +1,231 @@
+# models/specification_curve.py
+"""
+Batch specification-curve runner.
+
+A base formula (outcome, coefficient of interest and fixed controls) is
+crossed with every subset of a list of optional control blocks. The design
+for the union of all terms is built once on the common complete-case
+sample and reduced to a centered cross-product (Gram) matrix, so each
+specification is an O(k^3) solve on a sub-block instead of a full refit
+over the data. Specifications are solved in parallel chunks and results are
+kept as compact float32 arrays.
+"""
+import io
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import patsy
+from scipy.stats import t as tdist
+
+MAX_SPECIFICATIONS = 4096
+
+_STAT_FIELDS = ("estimate", "se", "t", "p", "ci_low", "ci_high", "r2", "adj_r2", "aic", "bic")
+
+
+def enumerate_specifications(n_blocks, max_specs=MAX_SPECIFICATIONS):
+    """
+    All subsets of ``n_blocks`` control blocks, smallest first.
+
+    Returns:
+        Boolean membership matrix (n_specs x n_blocks)
+    """
+    n_specs = 2 ** n_blocks
+    if n_specs > max_specs:
+        raise ValueError(f"{n_blocks} control blocks give {n_specs} specifications (limit {max_specs})")
+    membership = np.zeros((n_specs, n_blocks), dtype=bool)
+    row = 0
+    for size in range(n_blocks + 1):
+        for combo in combinations(range(n_blocks), size):
+            membership[row, list(combo)] = True
+            row += 1
+    return membership
+
+
+def _uses(term, variable):
+    """Whether ``term`` references the column ``variable``."""
+    return re.search(rf'(?<![A-Za-z0-9_.]){re.escape(variable)}(?![A-Za-z0-9_.])', term) is not None
+
+
+def _term_columns(df, terms):
+    """Design columns (without intercept) for each term, built by patsy."""
+    if not terms:
+        return pd.DataFrame(index=df.index)
+    design = patsy.dmatrix("1 + " + " + ".join(terms), df, return_type='dataframe', NA_action='raise')
+    return design.drop(columns=['Intercept'])
+
+
+class SpecificationCurveResults:
+    """Per-specification statistics for one coefficient of interest."""
+
+    def __init__(self, outcome, focal, base_controls, blocks, membership, stats, nobs):
+        self.outcome = outcome
+        self.focal = focal
+        self.base_controls = list(base_controls)
+        self.blocks = list(blocks)
+        self.membership = np.asarray(membership, dtype=bool)
+        self.stats = {k: np.asarray(v, dtype=np.float32) for k, v in stats.items()}
+        self.nobs = int(nobs)
+
+    def __len__(self):
+        return self.membership.shape[0]
+
+    def formulas(self):
+        formulas = []
+        for row in self.membership:
+            terms = [self.focal] + self.base_controls + [b for b, used in zip(self.blocks, row) if used]
+            formulas.append(f"{self.outcome} ~ " + " + ".join(terms))
+        return formulas
+
+    def to_bytes(self):
+        """Serialize to a compressed ``.npz`` payload."""
+        buf = io.BytesIO()
+        np.savez_compressed(
+            buf,
+            meta=np.array([self.outcome, self.focal], dtype=str),
+            base_controls=np.array(self.base_controls, dtype=str),
+            blocks=np.array(self.blocks, dtype=str),
+            membership=np.packbits(self.membership, axis=1),
+            n_blocks=np.array(len(self.blocks)),
+            nobs=np.array(self.nobs),
+            **self.stats,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        if not payload:
+            return None
+        with np.load(io.BytesIO(bytes(payload)), allow_pickle=False) as data:
+            n_blocks = int(data['n_blocks'])
+            membership = np.unpackbits(data['membership'], axis=1, count=n_blocks).astype(bool)
+            outcome, focal = data['meta'].tolist()
+            return cls(outcome, focal, data['base_controls'].tolist(), data['blocks'].tolist(),
+                       membership, {k: data[k] for k in _STAT_FIELDS}, int(data['nobs']))
+
+    def to_dict(self):
+        """JSON-ready result set, with specifications ranked by estimate for the curve."""
+        def _clean(values):
+            return [None if not np.isfinite(v) else round(float(v), 6) for v in values]
+
+        order = np.argsort(np.nan_to_num(self.stats['estimate'], nan=np.inf), kind='stable')
+        return {
+            'outcome': self.outcome,
+            'focal': self.focal,
+            'base_controls': self.base_controls,
+            'blocks': self.blocks,
+            'n_specs': len(self),
+            'N': self.nobs,
+            'formulas': self.formulas(),
+            'membership': self.membership.astype(int).tolist(),
+            'rank_order': order.tolist(),
+            **{k: _clean(v) for k, v in self.stats.items()},
+        }
+
+
+def _solve_chunk(gram, fixed, block_cols, membership, n, alpha):
+    """Statistics for a chunk of specifications from the centered Gram matrix."""
+    y = gram.shape[0] - 1
+    out = np.full((len(membership), len(_STAT_FIELDS)), np.nan)
+    tss = gram[y, y]
+    for i, row in enumerate(membership):
+        cols = list(fixed)
+        for b, used in enumerate(row):
+            if used:
+                cols.extend(block_cols[b])
+        k = len(cols)
+        df_resid = n - k - 1
+        if df_resid <= 0:
+            continue
+        A = gram[np.ix_(cols, cols)]
+        rhs = gram[cols, y]
+        try:
+            A_inv = np.linalg.inv(A)
+        except np.linalg.LinAlgError:
+            A_inv = np.linalg.pinv(A)
+        beta = A_inv @ rhs
+        ssr = max(float(tss - rhs @ beta), 0.0)
+        sigma2 = ssr / df_resid
+        se = np.sqrt(max(sigma2 * A_inv[0, 0], 0.0))
+        t_stat = beta[0] / se if se > 0 else np.nan
+        p = 2 * tdist.sf(abs(t_stat), df_resid) if np.isfinite(t_stat) else np.nan
+        q = tdist.ppf(1 - alpha / 2, df_resid)
+        r2 = 1 - ssr / tss if tss > 0 else np.nan
+        adj_r2 = 1 - (1 - r2) * (n - 1) / df_resid
+        llf = -n / 2.0 * (np.log(2 * np.pi) + np.log(ssr / n) + 1.0) if ssr > 0 else np.nan
+        out[i] = (beta[0], se, t_stat, p, beta[0] - q * se, beta[0] + q * se, r2, adj_r2,
+                  -2 * llf + 2 * (k + 1), -2 * llf + np.log(n) * (k + 1))
+    return out
+
+
+def run_specification_curve(df, outcome, focal, base_controls, control_blocks, alpha=0.05,
+                            max_specs=MAX_SPECIFICATIONS, n_workers=None, progress=None):
+    """
+    Fit every combination of control blocks around a fixed base specification.
+
+    Args:
+        df: DataFrame with all variables
+        outcome: Dependent variable
+        focal: Term whose coefficient is reported (must map to one numeric column)
+        base_controls: Terms included in every specification
+        control_blocks: List of optional blocks, each a list of terms
+        alpha: Significance level for the confidence intervals
+        max_specs: Refuse to enumerate more specifications than this
+        n_workers: Threads used to solve chunks of specifications
+        progress: Optional callback progress(done, total)
+
+    Returns:
+        SpecificationCurveResults
+    """
+    membership = enumerate_specifications(len(control_blocks), max_specs)
+    block_labels = [" + ".join(block) for block in control_blocks]
+    all_terms = [focal] + list(base_controls) + [t for block in control_blocks for t in block]
+
+    # Common complete-case sample over every variable any specification uses
+    if outcome not in df.columns:
+        raise KeyError(f"Variable '{outcome}' not found in dataset")
+    variables = [outcome] + [v for v in df.columns if v != outcome and any(_uses(term, v) for term in all_terms)]
+    data = df[variables].replace([np.inf, -np.inf], np.nan).dropna()
+    n = len(data)
+
+    focal_cols = _term_columns(data, [focal])
+    if focal_cols.shape[1] != 1:
+        raise ValueError(f"The coefficient of interest '{focal}' must be a single numeric term")
+    base_cols = _term_columns(data, list(base_controls))
+    block_frames = [_term_columns(data, list(block)) for block in control_blocks]
+
+    # Shared design: focal, base controls, every block column, outcome last
+    pieces = [focal_cols, base_cols] + block_frames
+    design = np.column_stack([p.to_numpy(dtype=float) for p in pieces if p.shape[1]]
+                             + [pd.to_numeric(data[outcome]).to_numpy(dtype=float)])
+    design -= design.mean(axis=0)
+    gram = design.T @ design
+
+    fixed = list(range(1 + base_cols.shape[1]))
+    block_cols, start = [], len(fixed)
+    for frame in block_frames:
+        block_cols.append(list(range(start, start + frame.shape[1])))
+        start += frame.shape[1]
+
+    n_specs = len(membership)
+    n_workers = n_workers or min(4, os.cpu_count() or 1)
+    chunk = max(1, min(256, -(-n_specs // (n_workers * 4))))
+    bounds = [(i, min(i + chunk, n_specs)) for i in range(0, n_specs, chunk)]
+    stats = np.empty((n_specs, len(_STAT_FIELDS)))
+    done = 0
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        futures = [(lo, hi, pool.submit(_solve_chunk, gram, fixed, block_cols, membership[lo:hi], n, alpha))
+                   for lo, hi in bounds]
+        for lo, hi, future in futures:
+            stats[lo:hi] = future.result()
+            done += hi - lo
+            if progress is not None:
+                progress(done, n_specs)
+
+    return SpecificationCurveResults(
+        outcome, focal, base_controls, block_labels, membership,
+        {name: stats[:, j] for j, name in enumerate(_STAT_FIELDS)}, n,
+    )
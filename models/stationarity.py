@@ -0,0 +1,207 @@
+# models/stationarity.py
+"""
+ADF and KPSS stationarity tests for dataset columns, cached by content.
+
+Results are keyed by a digest of the column's non-missing values and the
+test settings, so a column is tested once however many VARX runs or
+stationarity fixes look at it. The cache has two tiers: a small LRU in the
+process and Django's configured cache, which lets web and job processes
+share results when a shared backend is set. Uncached columns are tested
+on a process pool when there are several of them.
+
+``is_stationary`` keeps its ADF meaning (unit root rejected at 5%). The
+KPSS test, whose null is stationarity, is reported alongside, and
+``consensus`` combines the two.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from models import process_pool
+
+# Test settings; part of every cache key
+ADF_SETTINGS = {'autolag': 'AIC', 'regression': 'c'}
+KPSS_SETTINGS = {'regression': 'c', 'nlags': 'auto'}
+SIGNIFICANCE = 0.05
+
+# Results kept in this process, most recently used last
+_MAX_CACHED = 512
+_RESULTS = OrderedDict()
+_LOCK = threading.Lock()
+
+# Seconds results stay in the shared Django cache
+_SHARED_TTL = 7 * 24 * 3600
+
+# Fewer uncached columns than this are tested in-process
+PARALLEL_MIN_COLUMNS = 3
+
+
+def _cache_key(values):
+    settings_repr = repr((sorted(ADF_SETTINGS.items()), sorted(KPSS_SETTINGS.items()), SIGNIFICANCE))
+    digest = hashlib.blake2b(np.ascontiguousarray(values, dtype=float).tobytes(), digest_size=16)
+    digest.update(settings_repr.encode())
+    return f'stationarity:{digest.hexdigest()}'
+
+
+def _empty_result(error):
+    return {
+        'test_statistic': None,
+        'p_value': None,
+        'critical_value_1pct': None,
+        'critical_value_5pct': None,
+        'critical_value_10pct': None,
+        'is_stationary': False,
+        'kpss_statistic': None,
+        'kpss_p_value': None,
+        'kpss_is_stationary': None,
+        'consensus': None,
+        'error': error,
+    }
+
+
+def _run_tests(values):
+    """ADF and KPSS on one column's non-missing values (runs in pool workers)."""
+    import warnings
+    from statsmodels.tsa.stattools import adfuller, kpss
+
+    if len(values) < 4:  # Need at least 4 observations for ADF test
+        return _empty_result('Insufficient data (need at least 4 observations)')
+    try:
+        stat, p_value, _, _, critical_values, _ = adfuller(values, **ADF_SETTINGS)
+    except Exception as e:
+        return _empty_result(str(e))
+    is_stationary = bool(p_value < SIGNIFICANCE)
+    result = {
+        'test_statistic': float(stat),
+        'p_value': float(p_value),
+        'critical_value_1pct': float(critical_values['1%']),
+        'critical_value_5pct': float(critical_values['5%']),
+        'critical_value_10pct': float(critical_values['10%']),
+        'is_stationary': is_stationary,
+        'interpretation': 'Stationary' if is_stationary else 'Non-stationary',
+        'kpss_statistic': None,
+        'kpss_p_value': None,
+        'kpss_is_stationary': None,
+        'consensus': None,
+    }
+    try:
+        with warnings.catch_warnings():
+            # KPSS warns when the p-value is outside its lookup table; the bound is still reported
+            warnings.simplefilter('ignore')
+            kpss_stat, kpss_p, _, _ = kpss(values, **KPSS_SETTINGS)
+        kpss_stationary = bool(kpss_p >= SIGNIFICANCE)
+        result.update({
+            'kpss_statistic': float(kpss_stat),
+            'kpss_p_value': float(kpss_p),
+            'kpss_is_stationary': kpss_stationary,
+        })
+        if is_stationary and kpss_stationary:
+            result['consensus'] = 'Stationary (ADF and KPSS agree)'
+        elif not is_stationary and not kpss_stationary:
+            result['consensus'] = 'Non-stationary (ADF and KPSS agree)'
+        elif is_stationary:
+            result['consensus'] = 'Inconclusive: ADF rejects a unit root but KPSS rejects stationarity'
+        else:
+            result['consensus'] = 'Inconclusive: neither test rejects its null (low power)'
+    except Exception as e:
+        result['kpss_error'] = str(e)
+    return result
+
+
+def _shared_cache():
+    """Django's default cache, or None outside a configured Django process."""
+    try:
+        from django.conf import settings
+        if not settings.configured:
+            return None
+        from django.core.cache import cache
+        return cache
+    except ImportError:
+        return None
+
+
+def _get_cached(keys):
+    found = {}
+    with _LOCK:
+        for key in keys:
+            if key in _RESULTS:
+                _RESULTS.move_to_end(key)
+                found[key] = _RESULTS[key]
+    missing = [k for k in keys if k not in found]
+    shared = _shared_cache() if missing else None
+    if shared is not None:
+        try:
+            found.update(shared.get_many(missing))
+        except Exception as e:
+            print(f"DEBUG: Stationarity shared cache unavailable: {e}")
+    return found
+
+
+def _store(results):
+    with _LOCK:
+        for key, value in results.items():
+            _RESULTS[key] = value
+            _RESULTS.move_to_end(key)
+        while len(_RESULTS) > _MAX_CACHED:
+            _RESULTS.popitem(last=False)
+    shared = _shared_cache()
+    if shared is not None and results:
+        try:
+            shared.set_many(results, timeout=_SHARED_TTL)
+        except Exception as e:
+            print(f"DEBUG: Stationarity shared cache unavailable: {e}")
+
+
+def _compute(pending):
+    """Test {key: values}, on the shared process pool when there are enough columns."""
+    keys = list(pending)
+    workers = None if len(keys) >= PARALLEL_MIN_COLUMNS else 1
+    return dict(zip(keys, process_pool.run(_run_tests, [pending[k] for k in keys], workers, label='Stationarity')))
+
+
+def check_columns(columns):
+    """
+    ADF and KPSS results for several columns, testing only those not cached.
+
+    Args:
+        columns: Mapping of name -> pandas Series (or array)
+
+    Returns:
+        Dict of name -> result dict (ADF fields as in ``adf_check`` plus
+        kpss_statistic, kpss_p_value, kpss_is_stationary, consensus and
+        'cached' telling whether the result was reused). A column that
+        cannot be tested (e.g. non-numeric) gets the ADF fields set to None
+        and an 'error' message; the other columns are still tested.
+    """
+    values, failed = {}, {}
+    for name, series in columns.items():
+        try:
+            arr = np.asarray(series, dtype=float)
+        except (TypeError, ValueError) as e:
+            failed[name] = {'variable': name, **_empty_result(str(e)), 'cached': False}
+            continue
+        values[name] = arr[~np.isnan(arr)]
+    keys = {name: _cache_key(v) for name, v in values.items()}
+
+    cached = _get_cached(list(set(keys.values())))
+    pending = {key: values[name] for name, key in keys.items() if key not in cached}
+    if pending:
+        print(f"DEBUG: Stationarity tests on {len(pending)} column(s); {len(keys) - len(pending)} cached")
+        fresh = _compute(pending)
+        # Errors are not cached, so a failure (e.g. a broken worker) is retried next time
+        _store({key: result for key, result in fresh.items() if not result.get('error')})
+        cached.update(fresh)
+
+    results = {
+        name: {'variable': name, **cached[key], 'cached': key not in pending}
+        for name, key in keys.items()
+    }
+    # Keep the caller's column order
+    return {name: failed.get(name) or results[name] for name in columns}
+
+
+def check_column(series, name):
+    """ADF and KPSS result for one column (cached)."""
+    return check_columns({name: series})[name]
@@ -0,0 +1,227 @@
+# models/structural_bootstrap.py
+"""
+Bootstrap confidence intervals for SUR / 2SLS / 3SLS systems.
+
+The equations are parsed once (``parse_equation``) into arrays of the
+dependent variable, exogenous regressors, endogenous regressors and
+instruments on the common sample, in the column order linearmodels uses for
+the point estimates. Each replication then refits the system through the
+linearmodels array interface, so no formula is parsed or identification
+checked again.
+
+Two schemes are available:
+
+- ``'pairs'``: resample observations (rows of every equation together)
+- ``'residual'``: keep the regressors fixed and add resampled rows of the
+  centred residuals (jointly across equations, so their correlation is
+  kept) to the fitted values. For 2SLS/3SLS this treats the endogenous
+  regressors as fixed; pairs is the safer choice there.
+
+All resampling is drawn up front as one (replications, n) index array from
+a seeded generator. Replications are refitted in fixed-size chunks on a
+process pool, so the draws, and therefore the intervals, do not depend on
+the worker count. Percentile and BCa intervals are reported; the BCa
+acceleration comes from a (grouped, for large samples) jackknife. The
+jackknife always deletes observations (pairs), under either scheme.
+"""
+from functools import partial
+
+import numpy as np
+
+from models import process_pool
+
+SCHEMES = ('pairs', 'residual')
+DEFAULT_REPLICATIONS = 999
+MAX_REPLICATIONS = 10000
+DEFAULT_SEED = 42
+
+# Replications per task; fixed so results do not depend on the worker count
+CHUNK_SIZE = 50
+
+# Samples larger than this use a delete-a-group jackknife with this many groups
+JACKKNIFE_GROUPS = 100
+
+
+def system_arrays(parsed, data, method):
+    """
+    Per-equation arrays of a system on its common complete-case sample.
+
+    Args:
+        parsed: ``parse_equation`` output for each equation
+        data: DataFrame with every variable (and 'const' for SUR)
+        method: 'SUR', '2SLS' or '3SLS'
+
+    Returns:
+        List of dicts with dependent (n,), exog (n, kx) or None, endog
+        (n, kw) or None and instruments (n, kz) or None
+    """
+    specs = []
+    for entry in parsed:
+        if method == 'SUR':
+            exog, endog, instr = ['const'] + entry['exog'] + entry['endog'], [], []
+        else:
+            exog, endog, instr = entry['exog'], entry['endog'], entry['instr']
+        specs.append((entry['dependent'], exog, endog, instr))
+    used = list(dict.fromkeys(c for dep, exog, endog, instr in specs for c in [dep] + exog + endog + instr))
+    frame = data[used].apply(lambda s: s.astype(float)).dropna()
+
+    def block(cols):
+        return frame[cols].to_numpy() if cols else None
+
+    return [
+        {'dependent': frame[dep].to_numpy(), 'exog': block(exog), 'endog': block(endog), 'instruments': block(instr)}
+        for dep, exog, endog, instr in specs
+    ]
+
+
+def _regressors(eq):
+    return np.hstack([b for b in (eq['exog'], eq['endog']) if b is not None])
+
+
+def fit_params(method, eqs):
+    """Stacked parameter vector of one fit, in linearmodels' order (exog then endog per equation)."""
+    from linearmodels.system import SUR, IV3SLS
+    from linearmodels.iv import IV2SLS
+
+    if method == 'SUR':
+        res = SUR({f'eq{i + 1}': {'dependent': eq['dependent'], 'exog': eq['exog']} for i, eq in enumerate(eqs)}).fit()
+    elif method == '2SLS':
+        eq = eqs[0]
+        res = IV2SLS(eq['dependent'], eq['exog'], eq['endog'], eq['instruments']).fit(cov_type='unadjusted')
+    else:
+        res = IV3SLS({f'eq{i + 1}': {k: v for k, v in eq.items() if v is not None}
+                      for i, eq in enumerate(eqs)}).fit()
+    return np.asarray(res.params, dtype=float)
+
+
+def _resampled(eqs, rows=None, fitted=None, resid=None):
+    """The system on bootstrap rows (pairs), or with resampled residual rows added to the fit (residual)."""
+    if resid is None:
+        return [{k: (None if v is None else v[rows]) for k, v in eq.items()} for eq in eqs]
+    return [{**eq, 'dependent': fitted[:, i] + resid[rows, i]} for i, eq in enumerate(eqs)]
+
+
+def _run_chunk(method, eqs, fitted, resid, n_params, indices):
+    """(len(indices), n_params) refitted parameters, NaN rows for failed fits (runs in pool workers)."""
+    out = np.full((len(indices), n_params), np.nan)
+    for r, rows in enumerate(indices):
+        try:
+            out[r] = fit_params(method, _resampled(eqs, rows, fitted, resid))
+        except Exception as e:
+            print(f"DEBUG: Bootstrap replication failed: {e}")
+    return out
+
+
+def _refit_all(method, eqs, fitted, resid, n_params, indices, workers):
+    """Refit every row set of ``indices``, in chunks on the pool when there is more than one."""
+    chunks = [indices[i:i + CHUNK_SIZE] for i in range(0, len(indices), CHUNK_SIZE)]
+    run = partial(_run_chunk, method, eqs, fitted, resid, n_params)
+    return np.concatenate(process_pool.run(run, chunks, workers, label='Structural bootstrap'))
+
+
+def _jackknife_indices(n, rng):
+    """Row sets leaving out one observation, or one of JACKKNIFE_GROUPS random groups for large n."""
+    groups = np.arange(n)[:, None] if n <= JACKKNIFE_GROUPS else np.array_split(rng.permutation(n), JACKKNIFE_GROUPS)
+    return [np.setdiff1d(np.arange(n), g, assume_unique=True) for g in groups]
+
+
+def intervals(theta_hat, boot, jack, alpha=0.05):
+    """
+    Percentile and BCa intervals per parameter.
+
+    Args:
+        theta_hat: (p,) full-sample estimates
+        boot: (B, p) bootstrap estimates (NaN rows are ignored)
+        jack: (G, p) jackknife estimates, or None to skip BCa
+        alpha: Two-sided level
+
+    Returns:
+        Dict of (p,) arrays: se, pct_low, pct_high, bca_low, bca_high
+    """
+    from scipy.stats import norm
+
+    boot = boot[~np.isnan(boot).any(axis=1)]
+    lo, hi = alpha / 2, 1 - alpha / 2
+    out = {
+        'se': boot.std(axis=0, ddof=1),
+        'pct_low': np.quantile(boot, lo, axis=0),
+        'pct_high': np.quantile(boot, hi, axis=0),
+        'bca_low': np.full(theta_hat.shape, np.nan),
+        'bca_high': np.full(theta_hat.shape, np.nan),
+    }
+    if jack is None:
+        return out
+    jack = jack[~np.isnan(jack).any(axis=1)]
+    # Bias correction from the share of replications below the estimate (ties count half)
+    share = ((boot < theta_hat).sum(axis=0) + 0.5 * (boot == theta_hat).sum(axis=0)) / boot.shape[0]
+    z0 = norm.ppf(np.clip(share, 1.0 / (boot.shape[0] + 1), 1 - 1.0 / (boot.shape[0] + 1)))
+    d = jack.mean(axis=0) - jack
+    denom = 6.0 * (d ** 2).sum(axis=0) ** 1.5
+    accel = np.divide((d ** 3).sum(axis=0), denom, out=np.zeros_like(denom), where=denom > 0)
+    for key, q in (('bca_low', lo), ('bca_high', hi)):
+        z = z0 + norm.ppf(q)
+        level = norm.cdf(z0 + z / (1 - accel * z))
+        out[key] = np.array([np.quantile(boot[:, j], level[j]) for j in range(boot.shape[1])])
+    return out
+
+
+def bootstrap_system(parsed, data, method, scheme='pairs', replications=DEFAULT_REPLICATIONS,
+                     seed=DEFAULT_SEED, alpha=0.05, bca=True, workers=None):
+    """
+    Bootstrap a structural system and summarize the parameter distribution.
+
+    Args:
+        parsed: ``parse_equation`` output for each equation (from the point fit)
+        data: DataFrame the system was estimated on
+        method: 'SUR', '2SLS' or '3SLS'
+        scheme: 'pairs' or 'residual'
+        replications: Number of bootstrap replications
+        seed: Seed of the resampling generator
+        alpha: Two-sided level of the intervals
+        bca: Whether to compute BCa intervals (needs a jackknife, which deletes
+            observations whatever the scheme)
+        workers: Worker processes (None reads ANALYSIS_POOL_WORKERS; 1 runs in-process)
+
+    Returns:
+        Dict with scheme, replications, successful, seed, alpha, estimates
+        and se / pct_low / pct_high / bca_low / bca_high, each an array
+        with one entry per parameter in the order of the point estimates
+
+    Raises:
+        ValueError: Unknown scheme or too few successful replications
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Bootstrap scheme must be {' or '.join(repr(s) for s in SCHEMES)}, not {scheme!r}")
+    workers = process_pool.configured_workers() if workers is None else workers
+    eqs = system_arrays(parsed, data, method)
+    n = len(eqs[0]['dependent'])
+    theta_hat = fit_params(method, eqs)
+
+    fitted = resid = None
+    if scheme == 'residual':
+        widths = [_regressors(eq).shape[1] for eq in eqs]
+        splits = np.split(theta_hat, np.cumsum(widths)[:-1])
+        fitted = np.column_stack([_regressors(eq) @ b for eq, b in zip(eqs, splits)])
+        resid = np.column_stack([eq['dependent'] for eq in eqs]) - fitted
+        # Systems without an intercept have residuals that do not average zero
+        resid = resid - resid.mean(axis=0)
+
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, n, size=(replications, n))
+    boot = _refit_all(method, eqs, fitted, resid, len(theta_hat), indices, workers)
+    successful = int((~np.isnan(boot).any(axis=1)).sum())
+    if successful < 2:
+        raise ValueError(f'Only {successful} of {replications} bootstrap replications could be estimated')
+
+    jack = _refit_all(method, eqs, None, None, len(theta_hat), _jackknife_indices(n, rng), workers) if bca else None
+    summary = intervals(theta_hat, boot, jack, alpha)
+    print(f"DEBUG: Structural bootstrap ({method}, {scheme}): {successful}/{replications} replications")
+    return {
+        'scheme': scheme,
+        'replications': replications,
+        'successful': successful,
+        'seed': seed,
+        'alpha': alpha,
+        'estimates': theta_hat,
+        **summary,
+    }
@@ -1500,6 +1500,28 @@ class StructuralModelModule:
                         except (ValueError, TypeError):
                             param[key] = str(value)
             
+            # Bootstrap intervals next to the asymptotic ones, from the equations the point fit used
+            bootstrap = None
+            scheme = (options or {}).get('bootstrap')
+            if scheme:
+                from models import structural_bootstrap
+                try:
+                    bootstrap = structural_bootstrap.bootstrap_system(
+                        [parse_equation(eq) for eq in formulas], df, method, scheme=scheme,
+                        replications=int(options.get('n_boot') or structural_bootstrap.DEFAULT_REPLICATIONS))
+                    estimates = bootstrap.pop('estimates')
+                    if len(estimates) != len(params_dict) or not np.allclose(
+                            estimates, [p['param'] for p in params_dict], rtol=1e-6, atol=1e-8):
+                        raise ValueError('Bootstrap estimates do not line up with the parameter table')
+                    for j, param in enumerate(params_dict):
+                        for key in ('se', 'pct_low', 'pct_high', 'bca_low', 'bca_high'):
+                            param[f'boot_{key}'] = float(bootstrap[key][j])
+                    bootstrap = {k: v for k, v in bootstrap.items() if not isinstance(v, np.ndarray)}
+                    bootstrap['confidence'] = int(round(100 * (1 - bootstrap['alpha'])))
+                except ValueError as e:
+                    print(f"DEBUG: Structural bootstrap failed: {e}")
+                    bootstrap = {'scheme': scheme, 'error': str(e)}
+            
             results = {
                 'success': True,
                 'has_results': True,
@@ -1509,6 +1531,7 @@ class StructuralModelModule:
                 'diagnostics': diagnostics_list,
                 'identification': identification_results,
                 'instrument_diagnostics': instrument_diagnostics,  # Add instrument diagnostics for 2SLS
+                'bootstrap': bootstrap,  # Scheme and replication counts; intervals are in params as boot_*
                 'n_obs': len(df),
                 'n_equations': len(formulas)
             }
@@ -0,0 +1,110 @@
+# models/var_lag_selection.py
+"""
+VAR/VARX lag-order selection from a single QR factorization.
+
+All candidate orders 1..p_max are compared on the same trimmed sample (the
+last T - p_max observations), as ``VAR.select_order`` does. The design
+[const, exog_t, y_{t-1}, ..., y_{t-p_max}] is built once with the lag blocks
+last, and the augmented matrix [Z | Y] is QR-factored once. Because each
+order's regressors are a leading block of columns, the residual
+cross-product of the order-p model comes straight from the R factor:
+
+    S_p = R_zy[q_p:]' R_zy[q_p:] + R_yy' R_yy,    q_p = 1 + m + k p
+
+so every order costs one k x k product and a log-determinant instead of a
+full estimation. The criteria use statsmodels' definitions for VAR results.
+
+Columns that are linear combinations of earlier ones (an exogenous constant,
+dummies summing to one) are dropped before the factorization. That gives
+the same residuals as statsmodels' pseudoinverse fit, and the parameter
+counts in the criteria stay nominal, as they are there.
+"""
+import numpy as np
+
+CRITERIA = ('aic', 'bic', 'hqic', 'fpe')
+
+# Relative size of a pivot below which a column is treated as dependent on earlier ones
+_RANK_TOL = 1e-10
+
+
+def _lagged_design(endog, exog, max_lags):
+    """(Y, Z) on the common sample; Z = [const, exog_t, lag 1 block, ..., lag max_lags block]."""
+    y = np.asarray(endog, dtype=float)
+    T, k = y.shape
+    n = T - max_lags
+    blocks = [np.ones((n, 1))]
+    if exog is not None:
+        x = np.asarray(exog, dtype=float).reshape(T, -1)
+        blocks.append(x[max_lags:])
+    blocks += [y[max_lags - lag:T - lag] for lag in range(1, max_lags + 1)]
+    return y[max_lags:], np.hstack(blocks)
+
+
+def _independent_columns(Z):
+    """Indices of the columns of Z that are not (near) linear combinations of earlier columns."""
+    keep = list(range(Z.shape[1]))
+    while keep:
+        diag = np.abs(np.diag(np.linalg.qr(Z[:, keep], mode='r')))
+        bad = np.flatnonzero(diag <= _RANK_TOL * max(diag.max(), 1e-300))
+        if not bad.size:
+            break
+        # Later pivots shift once a column goes, so drop the first dependent one and refactorize
+        del keep[bad[0]]
+    return np.array(keep, dtype=int)
+
+
+def var_lag_selection_table(endog, exog=None, max_lags=10):
+    """
+    Information criteria for VAR(X) lag orders 1..max_lags in one pass.
+
+    Args:
+        endog: (T, k) endogenous series (DataFrame or array)
+        exog: (T, m) exogenous series entering at time t, or None
+        max_lags: Largest lag order compared
+
+    Returns:
+        (table, optimal) where table is a list of dicts with lag, aic, bic,
+        hqic, fpe, log_likelihood and <criterion>_optimal flags (values are
+        None for orders that cannot be estimated), and optimal maps each
+        criterion to its selected lag (or None)
+    """
+    Y, Z = _lagged_design(endog, exog, max_lags)
+    n, k = Y.shape
+    n_det = Z.shape[1] - k * max_lags  # constant and exogenous columns
+
+    keep = _independent_columns(Z)
+    R = np.linalg.qr(np.hstack([Z[:, keep], Y]), mode='r')
+    q_max = len(keep)
+    R_zy = R[:q_max, q_max:]
+    R_yy = R[q_max:q_max + k, q_max:] if R.shape[0] > q_max else np.zeros((0, k))
+    base = R_yy.T @ R_yy
+
+    table = []
+    for lag in range(1, max_lags + 1):
+        q = n_det + k * lag
+        df_model = q  # regressors per equation
+        df_resid = n - df_model
+        row = {'lag': lag, 'aic': None, 'bic': None, 'hqic': None, 'fpe': None, 'log_likelihood': None}
+        if df_resid > 0:
+            # Order-p regressors are the kept columns among its first q
+            tail = R_zy[np.searchsorted(keep, q):]
+            sigma = (tail.T @ tail + base) / n
+            sign, ld = np.linalg.slogdet(sigma)
+            if sign > 0:
+                free_params = lag * k ** 2 + k * n_det
+                row.update({
+                    'aic': float(ld + 2.0 / n * free_params),
+                    'bic': float(ld + np.log(n) / n * free_params),
+                    'hqic': float(ld + 2.0 * np.log(np.log(n)) / n * free_params),
+                    'fpe': float(((n + df_model) / df_resid) ** k * np.exp(ld)),
+                    'log_likelihood': float(-0.5 * n * k * np.log(2 * np.pi) - 0.5 * n * ld - 0.5 * n * k),
+                })
+        table.append(row)
+
+    optimal = {}
+    for crit in CRITERIA:
+        scored = [(row[crit], row['lag']) for row in table if row[crit] is not None]
+        optimal[crit] = min(scored)[1] if scored else None
+        for row in table:
+            row[f'{crit}_optimal'] = row['lag'] == optimal[crit]
+    return table, optimal
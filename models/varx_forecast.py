@@ -0,0 +1,169 @@
+# models/varx_forecast.py
+"""
+Out-of-sample VARX forecasts with residual-bootstrap fan charts.
+
+The point forecast is statsmodels' ``VARResults.forecast`` given a future
+path for each exogenous variable. The fan comes from simulating the fitted
+system forward with innovations resampled from its residuals: every path
+is simulated at once as a (paths, horizon, k) array, so the only Python
+loop runs over the horizon (and the lag order).
+
+A scenario says how each exogenous variable continues past the sample:
+
+- ``'last'`` (default): hold the last observed value
+- ``'mean'``: the sample mean
+- a number: that constant
+- a list of numbers: that path, holding its last value if shorter than the horizon
+"""
+import hashlib
+import json
+import numpy as np
+
+DEFAULT_HORIZON = 12
+DEFAULT_PATHS = 2000
+DEFAULT_SEED = 42
+MAX_HORIZON = 100
+MAX_PATHS = 20000
+
+# Quantiles drawn as nested bands (outer to inner) plus the median
+FAN_QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+
+SCENARIO_RULES = ('last', 'mean')
+
+
+def _exog_names(model_results):
+    """Names of the user exogenous regressors, in parameter order."""
+    names = list(model_results.exog_names)
+    k_trend = int(model_results.k_trend)
+    return names[k_trend:k_trend + int(model_results.k_exog_user)]
+
+
+def scenario_key(scenario):
+    """Stable digest of a normalized scenario, for cache keys."""
+    return hashlib.blake2b(json.dumps(scenario, sort_keys=True).encode(), digest_size=12).hexdigest()
+
+
+def exog_future(model_results, horizon, scenario=None):
+    """
+    (horizon, m) future exogenous values for a scenario.
+
+    Args:
+        model_results: Fitted statsmodels VARResults (with exog)
+        horizon: Number of steps ahead
+        scenario: Mapping of exogenous name -> 'last', 'mean', number or list
+
+    Returns:
+        (array, normalized) where normalized maps every exogenous name to
+        its rule or path, for display and cache keys
+
+    Raises:
+        ValueError: Unknown variable names or malformed values
+    """
+    names = _exog_names(model_results)
+    scenario = dict(scenario or {})
+    unknown = sorted(set(scenario) - set(names))
+    if unknown:
+        raise ValueError(f"Unknown exogenous variable(s) in scenario: {', '.join(unknown)}")
+    if not names:
+        return None, {}
+
+    history = np.asarray(model_results.exog, dtype=float)
+    history = history[:, -len(names):]  # the user regressors are the last m columns
+    out = np.empty((horizon, len(names)))
+    normalized = {}
+    for j, name in enumerate(names):
+        spec = scenario.get(name, 'last')
+        if spec in (None, ''):
+            spec = 'last'
+        if spec == 'last':
+            out[:, j] = history[-1, j]
+        elif spec == 'mean':
+            out[:, j] = history[:, j].mean()
+        elif isinstance(spec, (int, float)) and not isinstance(spec, bool):
+            out[:, j] = float(spec)
+        elif isinstance(spec, (list, tuple)) and spec:
+            try:
+                path = [float(v) for v in spec][:horizon]
+            except (TypeError, ValueError):
+                raise ValueError(f"Scenario path for '{name}' must contain only numbers")
+            out[:len(path), j] = path
+            out[len(path):, j] = path[-1]
+            spec = path
+        else:
+            raise ValueError(
+                f"Scenario for '{name}' must be {' or '.join(repr(r) for r in SCENARIO_RULES)}, a number or a list of numbers")
+        normalized[name] = spec
+    return out, normalized
+
+
+def simulate_paths(model_results, endog, future_exog, horizon, paths=DEFAULT_PATHS, seed=DEFAULT_SEED):
+    """
+    Residual-bootstrap forecast paths, all simulated at once.
+
+    Args:
+        model_results: Fitted statsmodels VARResults
+        endog: (T, k) endogenous data the model was fitted on
+        future_exog: (horizon, m) future exogenous values, or None
+        horizon: Number of steps ahead
+        paths: Number of simulated paths
+        seed: Seed of the resampling generator
+
+    Returns:
+        ndarray (paths, horizon, k)
+    """
+    if model_results.trend not in ('c', 'n'):
+        raise ValueError(f"Forecast simulation supports constant or no trend, not '{model_results.trend}'")
+    rng = np.random.default_rng(seed)
+    coefs = np.asarray(model_results.coefs)  # (p, k, k)
+    p, k, _ = coefs.shape
+    params = np.asarray(model_results.params)
+    n_det = params.shape[0] - p * k
+    det = np.ones((horizon, int(model_results.k_trend)))
+    if future_exog is not None:
+        det = np.hstack([det, future_exog])
+    mean_part = det @ params[:n_det] if n_det else np.zeros((horizon, k))  # (horizon, k)
+
+    resid = np.asarray(model_results.resid, dtype=float)
+    resid = resid - resid.mean(axis=0)
+    draws = resid[rng.integers(0, resid.shape[0], size=(paths, horizon))]  # (paths, horizon, k)
+
+    history = np.asarray(endog, dtype=float)[-p:]
+    y = np.empty((paths, p + horizon, k))
+    y[:, :p] = history
+    for h in range(horizon):
+        t = p + h
+        step = mean_part[h] + draws[:, h]
+        for lag in range(p):
+            step = step + y[:, t - lag - 1] @ coefs[lag].T
+        y[:, t] = step
+    return y[:, p:]
+
+
+def forecast(model_results, endog, horizon=DEFAULT_HORIZON, scenario=None, paths=DEFAULT_PATHS,
+             seed=DEFAULT_SEED):
+    """
+    Point forecasts and fan-chart quantiles for one exogenous scenario.
+
+    Returns:
+        Dict with variables, horizon, scenario (normalized), exog_future,
+        point (horizon x k), quantiles (list of levels), bands
+        (len(quantiles) x horizon x k), paths and seed; arrays as lists
+    """
+    future, normalized = exog_future(model_results, horizon, scenario)
+    p = int(model_results.k_ar)
+    history = np.asarray(endog, dtype=float)
+    point = model_results.forecast(history[-p:], steps=horizon, exog_future=future)
+    simulated = simulate_paths(model_results, history, future, horizon, paths=paths, seed=seed)
+    bands = np.quantile(simulated, FAN_QUANTILES, axis=0)
+    variables = list(endog.columns) if hasattr(endog, 'columns') else [f'y{i + 1}' for i in range(history.shape[1])]
+    return {
+        'variables': variables,
+        'horizon': horizon,
+        'scenario': normalized,
+        'exog_future': {name: future[:, j].tolist() for j, name in enumerate(normalized)},
+        'point': np.asarray(point).tolist(),
+        'quantiles': list(FAN_QUANTILES),
+        'bands': bands.tolist(),
+        'paths': paths,
+        'seed': seed,
+    }
@@ -0,0 +1,250 @@
+# models/varx_rolling.py
+"""
+Rolling and expanding window re-estimation of a VAR(X) by recursive least squares.
+
+The lagged design ([const, exog_t, lag blocks], as in
+``models.var_lag_selection``) is built once for the whole sample. The
+first window is fitted by QR. After that the window moves one observation
+at a time, so only the window's inverse Gram matrix P = (Z'Z)^-1, its
+coefficients B and the residual cross-product need updating:
+
+    enter (z, y):  e = y - B'z,  g = P z / (1 + z'P z)
+                   B += g e',  P -= g (P z)',  SSR += e e' / (1 + z'P z)
+    leave (z, y):  e = y - B'z,  g = P z / (1 - z'P z)
+                   B -= g e',  P += g (P z)',  SSR -= e e' / (1 - z'P z)
+
+Rolling windows take one update and one downdate per step, expanding ones
+only updates. Each costs O(q^2 k) for q regressors, against O(n q^2) for a
+refit, so hundreds of windows cost about as much as a few full fits.
+Downdates slowly lose precision, so the window is refactorized from scratch
+after ``REFACTOR_EVERY`` row updates.
+
+Impulse responses of all windows come from one batched MA recursion.
+"""
+import numpy as np
+
+from models.var_lag_selection import _lagged_design
+
+WINDOW_MODES = ('rolling', 'expanding')
+
+DEFAULT_IRF_PERIODS = 10
+
+# Row updates between refactorizations of the window
+REFACTOR_EVERY = 250
+
+
+def param_names(endog_names, exog_names, lags):
+    """Regressor names in design order, as statsmodels names VAR parameters."""
+    names = ['const'] + list(exog_names)
+    names += [f'L{lag}.{name}' for lag in range(1, lags + 1) for name in endog_names]
+    return names
+
+
+def window_bounds(n, mode, size, step=1):
+    """
+    (start, end) design rows of each window, end exclusive.
+
+    Rolling windows keep ``size`` rows; expanding ones start at row 0 and
+    begin with ``size`` rows. Each window ends ``step`` rows after the last.
+    """
+    if mode not in WINDOW_MODES:
+        raise ValueError(f"Window mode must be {' or '.join(repr(m) for m in WINDOW_MODES)}, not {mode!r}")
+    if step < 1:
+        raise ValueError('Window step must be at least 1')
+    if size > n:
+        raise ValueError(f'Window size ({size}) exceeds the {n} usable observations')
+    ends = range(size, n + 1, step)
+    if mode == 'rolling':
+        return [(end - size, end) for end in ends]
+    return [(0, end) for end in ends]
+
+
+def _factorize(Z, Y):
+    """(P, B, SSR) of one window from scratch."""
+    Q, R = np.linalg.qr(Z)
+    B = np.linalg.solve(R, Q.T @ Y)
+    R_inv = np.linalg.solve(R, np.eye(R.shape[0]))
+    resid = Y - Z @ B
+    return R_inv @ R_inv.T, B, resid.T @ resid
+
+
+def _enter(P, B, SSR, z, y):
+    Pz = P @ z
+    denom = 1.0 + z @ Pz
+    e = y - z @ B
+    g = Pz / denom
+    B += np.outer(g, e)
+    P -= np.outer(g, Pz)
+    SSR += np.outer(e, e) / denom
+
+
+def _leave(P, B, SSR, z, y):
+    Pz = P @ z
+    denom = 1.0 - z @ Pz
+    if denom <= 1e-12:
+        raise np.linalg.LinAlgError('Downdate would make the window singular')
+    e = y - z @ B
+    g = Pz / denom
+    B -= np.outer(g, e)
+    P += np.outer(g, Pz)
+    SSR -= np.outer(e, e) / denom
+
+
+def _window_irfs(coefs, sigma_u, n_det, k, lags, periods):
+    """(W, periods, k, k) orthogonalized responses, [w, h, response, shock], for every window at once."""
+    W = coefs.shape[0]
+    A = [coefs[:, n_det + lag * k:n_det + (lag + 1) * k].transpose(0, 2, 1) for lag in range(lags)]
+    ma = np.zeros((W, periods, k, k))
+    ma[:, 0] = np.eye(k)
+    for h in range(1, periods):
+        for j in range(1, min(h, lags) + 1):
+            ma[:, h] += ma[:, h - j] @ A[j - 1]
+    try:
+        chol = np.linalg.cholesky(sigma_u)
+    except np.linalg.LinAlgError:
+        # A window with a singular residual covariance gets no orthogonalized responses
+        chol = np.full_like(sigma_u, np.nan)
+        for w, s in enumerate(sigma_u):
+            try:
+                chol[w] = np.linalg.cholesky(s)
+            except np.linalg.LinAlgError:
+                pass
+    return ma @ chol[:, None]
+
+
+def rolling_varx(endog, exog=None, lags=1, mode='rolling', window_size=None, step=1,
+                 irf_periods=DEFAULT_IRF_PERIODS):
+    """
+    Re-estimate a VAR(X) over rolling or expanding windows.
+
+    Args:
+        endog: (T, k) DataFrame of endogenous series
+        exog: (T, m) exogenous series entering at time t, or None
+        lags: VAR lag order
+        mode: 'rolling' (fixed-size windows) or 'expanding' (growing from the start)
+        window_size: Observations in each (first) window, counted after the
+            lags are dropped; None uses a third of the sample
+        step: Observations the window end moves between windows
+        irf_periods: Horizons of the orthogonalized responses (0..irf_periods-1)
+
+    Returns:
+        Dict of arrays, index w running over windows:
+        - start, end: first and last observation (row of endog) of each window
+        - coefs: (W, q, k) coefficients, rows named by param_names
+        - sigma_u: (W, k, k) residual covariance (degrees-of-freedom corrected)
+        - resid_variance: (W, k) its diagonal
+        - irf: (W, irf_periods, k, k) orthogonalized responses [w, h, response, shock]
+        - irf_cumulative: (W, k, k) responses summed over the horizons
+        plus variables, param_names, lags, mode, window_size, step and nobs
+
+    Raises:
+        ValueError: Unknown mode or a window too small to estimate
+    """
+    variables = list(endog.columns) if hasattr(endog, 'columns') else [f'y{i + 1}' for i in range(np.shape(endog)[1])]
+    exog_names = []
+    if exog is not None:
+        exog_names = list(exog.columns) if hasattr(exog, 'columns') else [
+            f'x{i + 1}' for i in range(np.asarray(exog).reshape(len(endog), -1).shape[1])]
+    Y, Z = _lagged_design(endog, exog, lags)
+    n, q = Z.shape
+    k = Y.shape[1]
+    if window_size is None:
+        window_size = max(q + k + 1, n // 3)
+    window_size = int(window_size)
+    if window_size <= q:
+        raise ValueError(f'Window size ({window_size}) must exceed the {q} coefficients per equation')
+    bounds = window_bounds(n, mode, window_size, int(step))
+    W = len(bounds)
+
+    coefs = np.empty((W, q, k))
+    ssr = np.empty((W, k, k))
+    nobs = np.empty(W, dtype=int)
+    start, end = bounds[0]
+    P, B, SSR = _factorize(Z[start:end], Y[start:end])
+    since_refactor = 0
+    for w, (new_start, new_end) in enumerate(bounds):
+        if w:
+            moves = (new_end - end) + (new_start - start)
+            refactor = since_refactor + moves > REFACTOR_EVERY or moves >= new_end - new_start
+            if not refactor:
+                try:
+                    for t in range(end, new_end):
+                        _enter(P, B, SSR, Z[t], Y[t])
+                    for t in range(start, new_start):
+                        _leave(P, B, SSR, Z[t], Y[t])
+                    since_refactor += moves
+                except np.linalg.LinAlgError:
+                    refactor = True
+            if refactor:
+                P, B, SSR = _factorize(Z[new_start:new_end], Y[new_start:new_end])
+                since_refactor = 0
+            start, end = new_start, new_end
+        coefs[w] = B
+        ssr[w] = SSR
+        nobs[w] = end - start
+
+    sigma_u = ssr / (nobs - q)[:, None, None]
+    n_det = q - k * lags
+    irf = _window_irfs(coefs, sigma_u, n_det, k, lags, int(irf_periods))
+    print(f"DEBUG: Rolling VARX: {W} {mode} windows of {window_size} observations, lags={lags}")
+    return {
+        'variables': variables,
+        'param_names': param_names(variables, exog_names, lags),
+        'lags': lags,
+        'mode': mode,
+        'window_size': window_size,
+        'step': int(step),
+        'nobs': nobs,
+        # Design row r is observation r + lags
+        'start': np.array([s for s, _ in bounds]) + lags,
+        'end': np.array([e for _, e in bounds]) + lags - 1,
+        'coefs': coefs,
+        'sigma_u': sigma_u,
+        'resid_variance': np.diagonal(sigma_u, axis1=1, axis2=2).copy(),
+        'irf': irf,
+        'irf_cumulative': irf.sum(axis=1),
+    }
+
+
+def build_rolling_plot_json(result, index=None):
+    """
+    Plotly figure (as a dict) of the window estimates against each window's last observation.
+
+    One row per equation shows the lag coefficients, then rows for the
+    residual variances and the cumulative orthogonalized own-shock responses.
+    """
+    import json
+    import plotly.io as pio
+    from plotly.subplots import make_subplots
+    import plotly.graph_objects as go
+
+    variables = result['variables']
+    k = len(variables)
+    names = result['param_names']
+    n_det = len(names) - k * result['lags']
+    x = [str(index[e]) for e in result['end']] if index is not None else result['end'].tolist()
+
+    titles = [f'Coefficients: {name}' for name in variables] + ['Residual variance', 'Cumulative response to own shock']
+    fig = make_subplots(rows=k + 2, cols=1, shared_xaxes=True, subplot_titles=titles, vertical_spacing=0.04)
+    for j, name in enumerate(variables):
+        for r in range(n_det, len(names)):
+            fig.add_trace(go.Scatter(x=x, y=result['coefs'][:, r, j].tolist(), mode='lines',
+                                     name=f'{name}: {names[r]}', showlegend=False,
+                                     hovertemplate=f'{names[r]}: %{{y:.4f}}<extra>{name}</extra>'), row=j + 1, col=1)
+    for j, name in enumerate(variables):
+        fig.add_trace(go.Scatter(x=x, y=result['resid_variance'][:, j].tolist(), mode='lines', name=name,
+                                 legendgroup=name), row=k + 1, col=1)
+        fig.add_trace(go.Scatter(x=x, y=result['irf_cumulative'][:, j, j].tolist(), mode='lines', name=name,
+                                 legendgroup=name, showlegend=False), row=k + 2, col=1)
+
+    fig.update_layout(
+        title=f"{result['mode'].capitalize()} window estimates ({result['window_size']} observations)",
+        height=220 * (k + 2),
+        hovermode='x',
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+    )
+    fig.update_xaxes(showgrid=True, gridcolor='lightgray')
+    fig.update_xaxes(title_text='Window end', row=k + 2, col=1)
+    fig.update_yaxes(showgrid=True, gridcolor='lightgray')
+    return json.loads(pio.to_json(fig))
@@ -413,3 +413,29 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+
+# Background analysis jobs (run by `manage.py run_analysis_worker`)
+ANALYSIS_WORKER_PROCESSES = int(os.environ.get('ANALYSIS_WORKER_PROCESSES', '2'))
+ANALYSIS_JOBS_PER_USER = int(os.environ.get('ANALYSIS_JOBS_PER_USER', '1'))
+# Running jobs without a progress update for this long are reported as stalled
+ANALYSIS_JOB_STALL_SECONDS = int(os.environ.get('ANALYSIS_JOB_STALL_SECONDS', '300'))
+# Seconds one progress event stream stays open before the browser reconnects (each holds a worker)
+ANALYSIS_EVENT_STREAM_SECONDS = int(os.environ.get('ANALYSIS_EVENT_STREAM_SECONDS', '30'))
+
+# Long-lived R processes (with BAS preloaded) used by BMA, per web or job process
+R_WORKER_PROCESSES = int(os.environ.get('R_WORKER_PROCESSES', '2'))
+R_JOB_TIMEOUT = int(os.environ.get('R_JOB_TIMEOUT', '600'))
+
+# BMA engine: 'r' (BAS in the R workers), 'native' (NumPy) or 'auto' (R when rpy2 is installed)
+BMA_BACKEND = os.environ.get('BMA_BACKEND', 'auto')
+
+# Preload the analysis stack when a web or job worker starts: '' (off), 'imports' or 'imports+r'
+ANALYSIS_WARMUP = os.environ.get('ANALYSIS_WARMUP', '')
+# Libraries imported by the warmup (comma-separated); empty uses engine.warmup.DEFAULT_LIBRARIES
+ANALYSIS_WARMUP_LIBRARIES = [lib.strip() for lib in os.environ.get('ANALYSIS_WARMUP_LIBRARIES', '').split(',') if lib.strip()]
+
+# Worker processes of the pool shared by the parallel analysis engines (1 runs everything in-process)
+ANALYSIS_POOL_WORKERS = int(os.environ.get('ANALYSIS_POOL_WORKERS', '2'))
+
+# Impulse-response bootstrap: default replications
+IRF_REPLICATIONS = int(os.environ.get('IRF_REPLICATIONS', '200'))
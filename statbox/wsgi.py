@@ -2,3 +2,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'statbox.settings')
 application = get_wsgi_application()
+
+# Preload the analysis stack (and optionally R) per worker process, see ANALYSIS_WARMUP
+from engine.warmup import warm_up_from_settings  # noqa: E402
+warm_up_from_settings('web')
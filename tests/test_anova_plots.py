@@ -0,0 +1,53 @@
+"""Tests for the vectorized ANOVA high/low split engine."""
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from models.ANOVA import anova_split_stats, generate_anova_plot
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.normal(size=400), 'g': (rng.random(400) > 0.5).astype(int)})
+    df['y'] = df.x + df.g + rng.normal(size=400) * (1 + df.g)
+    df.loc[::13, 'y'] = np.nan
+    df['label'] = rng.choice(['a', 'b'], size=400)
+    df['missing'] = np.nan
+    return df
+
+
+def test_welch_tests_match_scipy(frame):
+    result = anova_split_stats(frame, [{'x_var': 'x', 'y_var': 'y', 'group_var': 'g', 'x_std': 0.5}])[0]
+    x, y, g = frame.x.to_numpy(), frame.y.to_numpy(), frame.g.to_numpy()
+    high = x > x.mean() + 0.5 * x.std()
+    low = x < x.mean() - 0.5 * x.std()
+    pairs = {
+        'high_x': (high & (g == 1), high & (g == 0)),
+        'low_x': (low & (g == 1), low & (g == 0)),
+        'high_vs_low': (high, low),
+    }
+    for name, (a, b) in pairs.items():
+        reference = stats.ttest_ind(y[a], y[b], equal_var=False, nan_policy='omit')
+        assert result['tests'][name]['t'] == pytest.approx(reference.statistic, rel=1e-10)
+        assert result['tests'][name]['p_value'] == pytest.approx(reference.pvalue, rel=1e-8)
+    assert result['cells'][('high', 'high')]['mean'] == pytest.approx(np.nanmean(y[high & (g == 1)]))
+
+
+def test_batch_matches_single_requests(frame):
+    requests = [{'x_var': 'x', 'y_var': 'y'}, {'x_var': 'g', 'y_var': 'y', 'group_var': 'x', 'group_std': 1.5}]
+    batch = anova_split_stats(frame, requests)
+    for request, result in zip(requests, batch):
+        assert anova_split_stats(frame, [request])[0] == result
+
+
+def test_non_numeric_and_empty_columns(frame):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        label = generate_anova_plot(frame, 'label', 'y')
+        missing = generate_anova_plot(frame, 'missing', 'y')
+    assert not label['success'] and 'not numeric' in label['error']
+    assert not missing['success'] and 'Insufficient data' in missing['error']
@@ -0,0 +1,70 @@
+"""Tests for models.bayesian_model_cache: compiled NUTS log-densities reused across fits."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.bayesian_model_cache import CachedModel, CompiledModelCache
+
+bmb = pytest.importorskip('bambi')
+pm = pytest.importorskip('pymc')
+
+SAMPLER = dict(draws=200, tune=200, chains=2, cores=1, random_seed=42, progressbar=False)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': rng.normal(size=150)})
+    df['y'] = 1.0 + 2.0 * df.x + rng.normal(size=150)
+    return df
+
+
+@pytest.fixture
+def compile_calls(monkeypatch):
+    calls = []
+    original = pm.Model.logp_dlogp_function
+
+    def counting(self, *args, **kwargs):
+        calls.append(self)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(pm.Model, 'logp_dlogp_function', counting)
+    return calls
+
+
+def _fit(cached, initvals=None):
+    initial_points, step = cached.nuts_step(SAMPLER['chains'], 42, initvals)
+    return cached.model.fit(step=step, initvals=initial_points, **SAMPLER), step
+
+
+def test_second_fit_does_not_recompile(data, compile_calls):
+    cached = CachedModel(bmb.Model('y ~ x', data))
+    first, first_step = _fit(cached)
+    second, second_step = _fit(cached)
+    assert len(compile_calls) == 1 and cached.compilations == 1
+    # Each run adapts its own step from scratch, so identical seeds give identical draws
+    assert second_step is not first_step and second_step.potential is not first_step.potential
+    np.testing.assert_array_equal(first.posterior['x'].values, second.posterior['x'].values)
+
+
+def test_cached_sampler_matches_default_sampler(data):
+    cached = CachedModel(bmb.Model('y ~ x', data))
+    reused, _ = _fit(cached)
+    default = bmb.Model('y ~ x', data).fit(**SAMPLER)
+    for name in ('Intercept', 'x'):
+        assert float(reused.posterior[name].mean()) == pytest.approx(float(default.posterior[name].mean()), abs=0.05)
+
+
+def test_warm_start_jitters_around_initvals(data):
+    cached = CachedModel(bmb.Model('y ~ x', data))
+    initial_points, _ = cached.nuts_step(4, 42, {'x': np.array(2.0)})
+    starts = [float(point['x']) for point in initial_points]
+    assert all(1.0 <= s <= 3.0 for s in starts) and len(set(starts)) == 4
+
+
+def test_cache_evicts_least_recently_used():
+    cache = CompiledModelCache(max_entries=2)
+    for key in ('a', 'b', 'a', 'c'):
+        cache.get_or_build(key, object)
+    assert cache.stats()['hits'] == 1 and cache.stats()['evictions'] == 1
+    assert cache.get_or_build('a', object)[1] and not cache.get_or_build('b', object)[1]
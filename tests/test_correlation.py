@@ -0,0 +1,71 @@
+"""Tests for the vectorized correlation engine."""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import pearsonr
+
+from models.correlation import correlation_matrices, pairwise_correlation, partial_correlation
+
+VARIABLES = ['a', 'b', 'c', 'd']
+
+
+@pytest.fixture(scope='module')
+def df():
+    rng = np.random.default_rng(5)
+    n = 300
+    a = rng.normal(size=n)
+    b = 0.6 * a + rng.normal(size=n)
+    c = -0.3 * a + 0.5 * b + rng.normal(size=n)
+    d = rng.normal(loc=1e4, size=n)  # large offset: checks the centring
+    frame = pd.DataFrame({'a': a, 'b': b, 'c': c, 'd': d})
+    frame.loc[rng.choice(n, 30, replace=False), 'b'] = np.nan
+    frame.loc[rng.choice(n, 20, replace=False), 'c'] = np.nan
+    return frame
+
+
+def test_pairwise_matches_pandas_corr(df):
+    result = pairwise_correlation(df, VARIABLES)
+    np.testing.assert_allclose(result['r'], df[VARIABLES].corr().to_numpy(), atol=1e-12)
+    assert result['n'][0, 0] == len(df)
+    assert result['n'][1, 2] == int(df[['b', 'c']].notna().all(axis=1).sum())
+
+
+def test_pairwise_p_values_match_pearsonr(df):
+    result = pairwise_correlation(df, VARIABLES)
+    for i, x in enumerate(VARIABLES):
+        for j, y in enumerate(VARIABLES):
+            if i == j:
+                continue
+            pair = df[[x, y]].dropna()
+            r, p = pearsonr(pair[x], pair[y])
+            assert result['r'][i, j] == pytest.approx(r, abs=1e-12)
+            assert result['p'][i, j] == pytest.approx(p, rel=1e-8, abs=1e-300)
+
+
+def test_partial_matches_residual_regressions(df):
+    result = partial_correlation(df, VARIABLES)
+    data = df[VARIABLES].dropna()
+    assert result['n'] == len(data)
+    for i, x in enumerate(VARIABLES):
+        for j, y in enumerate(VARIABLES):
+            if i == j:
+                continue
+            others = [v for v in VARIABLES if v not in (x, y)]
+            Z = np.column_stack([np.ones(len(data)), data[others]])
+            rx = data[x] - Z @ np.linalg.lstsq(Z, data[x], rcond=None)[0]
+            ry = data[y] - Z @ np.linalg.lstsq(Z, data[y], rcond=None)[0]
+            r, _ = pearsonr(rx, ry)
+            assert result['r'][i, j] == pytest.approx(r, abs=1e-10)
+
+
+def test_too_few_rows_give_nan():
+    small = pd.DataFrame({'a': [1.0, 2.0], 'b': [2.0, 1.0], 'c': [np.nan, 3.0]})
+    assert np.isnan(pairwise_correlation(small, ['a', 'b'])['r'][0, 1])
+    assert np.isnan(partial_correlation(small, ['a', 'b', 'c'])['r'][0, 1])
+
+
+def test_correlation_matrices_slices_the_requested_rectangle(df):
+    corr, p = correlation_matrices(df, ['a', 'd'], ['c', 'b', 'a'])
+    full = df[VARIABLES].corr()
+    np.testing.assert_allclose(corr, full.loc[['c', 'b', 'a'], ['a', 'd']].to_numpy(), atol=1e-12)
+    assert corr.shape == p.shape == (3, 2)
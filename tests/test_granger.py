@@ -0,0 +1,84 @@
+"""Tests for models.granger against statsmodels' VARResults.test_causality."""
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+from models import granger
+from models.granger import granger_causality_matrix
+
+LAGS = 2
+
+
+@pytest.fixture(scope='module')
+def series():
+    rng = np.random.default_rng(11)
+    n, k = 300, 4
+    y = np.zeros((n, k))
+    x = rng.normal(size=(n, 1))
+    for t in range(1, n):
+        y[t, 0] = 0.4 * y[t - 1, 0] + rng.normal()
+        y[t, 1] = 0.3 * y[t - 1, 1] + 0.5 * y[t - 1, 0] + rng.normal()
+        y[t, 2] = 0.2 * y[t - 1, 2] + 0.3 * y[t - 1, 1] + 0.4 * x[t, 0] + rng.normal()
+        y[t, 3] = 0.5 * y[t - 1, 3] + rng.normal()
+    endog = pd.DataFrame(y, columns=['a', 'b', 'c', 'd'])
+    exog = pd.DataFrame(x, columns=['x'])
+    return endog, exog
+
+
+def _reference(endog, exog, caused, causing):
+    fit = VAR(endog, exog=exog).fit(LAGS)
+    return fit.test_causality(caused, causing, kind='f')
+
+
+@pytest.mark.parametrize('with_exog', [False, True])
+def test_pairwise_matches_statsmodels(series, with_exog):
+    endog, exog = series
+    exog = exog if with_exog else None
+    result = granger_causality_matrix(endog, exog, lags=LAGS)
+    fit = VAR(endog, exog=exog).fit(LAGS)
+    names = list(endog.columns)
+    for i, caused in enumerate(names):
+        assert result['f_stat'][i][i] is None
+        for j, causing in enumerate(names):
+            if i == j:
+                continue
+            reference = fit.test_causality(caused, causing, kind='f')
+            assert result['f_stat'][i][j] == pytest.approx(reference.test_statistic, rel=1e-8)
+            assert result['p_value'][i][j] == pytest.approx(reference.pvalue, rel=1e-6, abs=1e-14)
+    assert result['df_denom'] == fit.test_causality('a', 'b', kind='f').df[1]
+
+
+def test_blocks_match_statsmodels(series):
+    endog, exog = series
+    result = granger_causality_matrix(endog, exog, lags=LAGS, blocks={'ab': ['a', 'b']})
+    assert [t['caused'] for t in result['block_tests']] == ['c', 'd']
+    for test in result['block_tests']:
+        reference = _reference(endog, exog, test['caused'], test['causing'])
+        assert test['f_stat'] == pytest.approx(reference.test_statistic, rel=1e-8)
+        assert test['p_value'] == pytest.approx(reference.pvalue, rel=1e-6, abs=1e-14)
+        assert test['df_num'] == reference.df[0]
+    assert result['block_tests'][0]['significant']
+
+
+def test_default_blocks_are_all_others(series):
+    endog, _ = series
+    result = granger_causality_matrix(endog, lags=LAGS)
+    first = result['block_tests'][0]
+    assert first['caused'] == 'a' and first['causing'] == ['b', 'c', 'd']
+    reference = _reference(endog, None, 'a', ['b', 'c', 'd'])
+    assert first['f_stat'] == pytest.approx(reference.test_statistic, rel=1e-8)
+
+
+def test_pool_gives_the_same_results(series, monkeypatch):
+    endog, exog = series
+    serial = granger_causality_matrix(endog, exog, lags=LAGS, workers=1)
+    monkeypatch.setattr(granger, 'PARALLEL_MIN_TESTS', 1)
+    parallel = granger_causality_matrix(endog, exog, lags=LAGS, workers=2)
+    assert parallel == serial
+
+
+def test_unknown_block_member(series):
+    endog, _ = series
+    with pytest.raises(ValueError, match="Unknown variable"):
+        granger_causality_matrix(endog, lags=LAGS, blocks={'bad': ['a', 'zz']})
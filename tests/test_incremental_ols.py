@@ -0,0 +1,76 @@
+"""Tests for models.incremental_ols against statsmodels OLS."""
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+
+from models import incremental_ols
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(300, 4)), columns=['x1', 'x2', 'x3', 'x4'])
+    df['y'] = 1 + df.x1 - 0.5 * df.x2 + 0.2 * df.x3 + rng.standard_t(4, size=300) * (1 + df.x1.abs())
+    return df
+
+
+def _assert_matches_statsmodels(results, reference):
+    np.testing.assert_allclose(results.params, reference.params, rtol=1e-9)
+    np.testing.assert_allclose(results.bse, reference.bse, rtol=1e-9)
+    assert results.rsquared == pytest.approx(reference.rsquared, rel=1e-12)
+    for cov_type in ('HC0', 'HC1', 'HC3'):
+        np.testing.assert_allclose(results.get_robustcov_results(cov_type).bse,
+                                   reference.get_robustcov_results(cov_type).bse, rtol=1e-9)
+
+
+def test_full_fit_matches_statsmodels(data):
+    results, fact, incremental = incremental_ols.fit(smf.ols('y ~ x1 + x2', data))
+    assert fact is not None and not incremental
+    _assert_matches_statsmodels(results, smf.ols('y ~ x1 + x2', data).fit())
+
+
+@pytest.mark.parametrize('second', ['y ~ x1 + x2 + x3', 'y ~ x1 + x3', 'y ~ x2 + x3 + x4'])
+def test_incremental_update_matches_statsmodels(data, second):
+    key = f'test-{second}'
+    _, fact, _ = incremental_ols.fit(smf.ols('y ~ x1 + x2 + x3', data), key)
+    incremental_ols.remember(key, fact)
+    try:
+        results, _, incremental = incremental_ols.fit(smf.ols(second, data), key)
+    finally:
+        incremental_ols.forget(key)
+    assert incremental
+    _assert_matches_statsmodels(results, smf.ols(second, data).fit())
+
+
+def test_changed_sample_refits_from_scratch(data):
+    key = 'test-sample'
+    _, fact, _ = incremental_ols.fit(smf.ols('y ~ x1', data), key)
+    incremental_ols.remember(key, fact)
+    try:
+        results, _, incremental = incremental_ols.fit(smf.ols('y ~ x1 + x2', data.iloc[:250]), key)
+    finally:
+        incremental_ols.forget(key)
+    assert not incremental
+    _assert_matches_statsmodels(results, smf.ols('y ~ x1 + x2', data.iloc[:250]).fit())
+
+
+def test_pseudoinverse_is_only_built_when_read(data):
+    results, _, _ = incremental_ols.fit(smf.ols('y ~ x1 + x2', data))
+    assert '_pinv_wexog' not in results.model.__dict__
+    assert results.bse is not None and '_pinv_wexog' not in results.model.__dict__
+    np.testing.assert_allclose(results.model.pinv_wexog, np.linalg.pinv(results.model.wexog), atol=1e-12)
+    assert '_pinv_wexog' in results.model.__dict__
+
+
+def test_factorizations_stay_in_process(data, monkeypatch):
+    from django.core.cache import cache
+
+    monkeypatch.setattr(cache, 'set', lambda *args, **kwargs: pytest.fail('factorization sent to the Django cache'))
+    key = 'test-local'
+    _, fact, _ = incremental_ols.fit(smf.ols('y ~ x1', data), key)
+    incremental_ols.remember(key, fact)
+    try:
+        assert incremental_ols.fit(smf.ols('y ~ x1 + x2', data), key)[2]
+    finally:
+        incremental_ols.forget(key)
@@ -0,0 +1,31 @@
+"""Tests for the job progress event stream."""
+import pytest
+
+from engine.models import AnalysisJob
+from engine.services.job_service import JobService
+
+
+def _events(stream):
+    return [chunk for chunk in stream if chunk.startswith(('id:', 'event:'))]
+
+
+@pytest.mark.django_db
+def test_stream_ends_after_max_duration_and_resumes_without_repeating():
+    job = AnalysisJob.objects.create(module='regression', status=AnalysisJob.STATUS_RUNNING,
+                                     progress={'stage': 'fit', 'percent': 40})
+    first = _events(JobService.event_stream(job.pk, poll_interval=0.01, max_duration=0.05))
+    assert len(first) == 1 and 'event: progress' in first[0]
+    event_id = first[0].split('\n')[0][len('id: '):]
+
+    # Reconnecting with the last id does not resend an unchanged state
+    assert _events(JobService.event_stream(job.pk, event_id, poll_interval=0.01, max_duration=0.05)) == []
+
+    AnalysisJob.objects.filter(pk=job.pk).update(progress={'stage': 'fit', 'percent': 80})
+    resumed = _events(JobService.event_stream(job.pk, event_id, poll_interval=0.01, max_duration=0.05))
+    assert len(resumed) == 1 and '80' in resumed[0]
+
+
+@pytest.mark.django_db
+def test_stream_finishes_with_done_event():
+    job = AnalysisJob.objects.create(module='regression', status=AnalysisJob.STATUS_SUCCEEDED)
+    assert _events(JobService.event_stream(job.pk, max_duration=5))[-1].startswith('event: done')
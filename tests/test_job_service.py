@@ -0,0 +1,36 @@
+"""Tests for the background job claiming rules."""
+import pytest
+from django.contrib.auth.models import User
+
+from engine.models import AnalysisJob
+from engine.services.job_service import JobService
+
+
+@pytest.mark.django_db
+def test_per_user_cap_applies_to_signed_in_users(settings):
+    settings.ANALYSIS_JOBS_PER_USER = 1
+    user = User.objects.create_user('capped', password='x')
+    AnalysisJob.objects.create(user=user, module='regression', status=AnalysisJob.STATUS_RUNNING)
+    AnalysisJob.objects.create(user=user, module='regression')
+    other = AnalysisJob.objects.create(user=User.objects.create_user('other', password='x'), module='regression')
+    assert [job.pk for job in JobService.claimable_jobs(5)] == [other.pk]
+
+
+@pytest.mark.django_db
+def test_anonymous_jobs_do_not_share_one_slot(settings):
+    settings.ANALYSIS_JOBS_PER_USER = 1
+    AnalysisJob.objects.create(module='regression', status=AnalysisJob.STATUS_RUNNING)
+    queued = [AnalysisJob.objects.create(module='regression') for _ in range(3)]
+    assert {job.pk for job in JobService.claimable_jobs(5)} == {job.pk for job in queued}
+
+
+def test_worker_can_load_the_execution_service_first():
+    import os
+    import subprocess
+    import sys
+
+    # A fresh worker process imports the service before anything has loaded engine.views
+    code = ("import django, os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'statbox.settings'); "
+            "django.setup(); import engine.services.analysis_execution_service")
+    subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+"""Tests for the posterior summary diagnostics."""
+import numpy as np
+import pytest
+
+from models.posterior_store import _ess, _hdi, _split_rhat
+
+
+@pytest.fixture(scope='module')
+def chains():
+    rng = np.random.default_rng(0)
+    iid = rng.normal(size=(4, 2000))
+    ar = np.zeros((4, 2000))
+    shocks = rng.normal(size=(4, 2000))
+    for t in range(1, 2000):
+        ar[:, t] = 0.8 * ar[:, t - 1] + shocks[:, t]
+    return {'iid': iid, 'ar': ar, 'shifted': iid + np.array([[0.0], [0.0], [0.0], [1.0]])}
+
+
+def _split(values):
+    half = values.shape[1] // 2
+    return np.concatenate([values[:, :half], values[:, -half:]], axis=0)
+
+
+def test_iid_chains_have_rhat_one_and_ess_n(chains):
+    iid = chains['iid']
+    assert _split_rhat(iid) == pytest.approx(1.0, abs=0.01)
+    assert _ess(iid) == pytest.approx(iid.size, rel=0.1)
+
+
+def test_autocorrelation_and_disagreeing_chains_are_flagged(chains):
+    # AR(1) with rho 0.8: ESS is about n (1 - rho) / (1 + rho), far below n
+    assert _ess(chains['ar']) < chains['ar'].size * 0.2
+    assert _split_rhat(chains['shifted']) > 1.05
+
+
+def test_hdi_of_uniform_grid():
+    values = np.random.default_rng(1).permutation(np.arange(1001) / 1000)
+    low, high = _hdi(values, 0.9)
+    assert high - low == pytest.approx(0.9)
+    assert _hdi(np.array([]), 0.9)[0] != _hdi(np.array([]), 0.9)[0]  # NaN
+
+
+def test_degenerate_inputs():
+    assert _split_rhat(np.ones((2, 3))) is None
+    assert _split_rhat(np.ones((2, 100))) is None
+    assert _ess(np.ones((2, 100))) == 200.0
+
+
+@pytest.mark.parametrize('name', ['iid', 'ar', 'shifted'])
+def test_against_arviz(chains, name):
+    az = pytest.importorskip('arviz')
+    values = chains[name]
+    assert _split_rhat(values) == pytest.approx(float(az.rhat(values, method='split')), rel=1e-10)
+    lo, hi = az.hdi(values.ravel(), hdi_prob=0.94)
+    assert _hdi(values.ravel(), 0.94) == pytest.approx((lo, hi), rel=1e-12)
+
+
+@pytest.mark.parametrize('name', ['iid', 'ar'])
+def test_ess_against_arviz(chains, name):
+    az = pytest.importorskip('arviz')
+    values = chains[name]
+    # ArviZ's 'mean' ESS splits each chain in two first; its truncated sum keeps one more term
+    assert _ess(_split(values)) == pytest.approx(float(az.ess(values, method='mean')), rel=1e-2)
@@ -0,0 +1,37 @@
+"""Tests for models.prediction_store."""
+import numpy as np
+
+from models.prediction_store import PrecomputedPredictions
+
+
+def _store():
+    rng = np.random.default_rng(0)
+    blocks = [
+        ('x:m1', ['1', '2', '3'], [0.0, 0.5, 1.0], rng.random((3, 2, 3))),
+        ('x:m2', ['low', 'high'], [0.0, 1.0], rng.random((2, 2, 2))),
+    ]
+    return PrecomputedPredictions.from_blocks('ordinal', ['0', '1'], blocks), blocks
+
+
+def test_round_trip_with_different_level_counts():
+    store, blocks = _store()
+    loaded = PrecomputedPredictions.from_bytes(store.to_bytes())
+    assert loaded.levels == [['1', '2', '3'], ['low', 'high']]
+    assert loaded.n_levels.tolist() == [3, 2]
+    np.testing.assert_array_equal(loaded.probabilities, store.probabilities)
+
+
+def test_slice_reads_each_interactions_last_level():
+    store, blocks = _store()
+    for interaction, levels, x_grid, probs in blocks:
+        x, low, high = store.slice(interaction, '1')
+        assert x == list(x_grid)
+        np.testing.assert_allclose(low, probs[0, 1], rtol=1e-6)
+        np.testing.assert_allclose(high, probs[len(levels) - 1, 1], rtol=1e-6)
+
+
+def test_slice_tolerates_float_category_labels():
+    store, _ = _store()
+    assert store.slice('x:m1', 1.0) == store.slice('x:m1', '1')
+    assert store.slice('x:m1', 'missing') is None
+    assert store.slice('unknown', '1') is None
@@ -0,0 +1,36 @@
+"""Tests for the shared analysis process pool."""
+from concurrent.futures.process import BrokenProcessPool
+
+from models import process_pool
+
+
+def _square(x):
+    return x * x
+
+
+def test_results_keep_input_order_and_report_each_call():
+    seen = []
+    results = process_pool.run(_square, range(8), workers=2, on_result=lambda i, r: seen.append(i))
+    assert results == [x * x for x in range(8)]
+    assert sorted(seen) == list(range(8))
+
+
+def test_one_pool_is_shared_between_callers():
+    process_pool.run(_square, range(4), workers=2)
+    pool = process_pool._POOL
+    process_pool.run(_square, range(4), workers=2)
+    assert process_pool._POOL is pool
+
+
+def test_single_worker_runs_in_process():
+    process_pool.shutdown()
+    assert process_pool.run(_square, range(4), workers=1) == [0, 1, 4, 9]
+    assert process_pool._POOL is None
+
+
+def test_broken_pool_falls_back_to_in_process(monkeypatch):
+    def broken(workers):
+        raise BrokenProcessPool('worker died')
+
+    monkeypatch.setattr(process_pool, 'get_pool', broken)
+    assert process_pool.run(_square, range(4), workers=2) == [0, 1, 4, 9]
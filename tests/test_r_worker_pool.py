@@ -0,0 +1,130 @@
+"""Tests for the R worker pool, with a stub in place of the R worker process."""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models import r_worker_pool
+from models.r_worker_pool import RJobCancelled, RJobError, RJobTimeout, RWorkerPool
+
+
+def _stub_worker_main(conn, preload):
+    """Speaks the worker protocol; the job's ``code`` says what to do instead of R."""
+    if preload == 'fail':
+        conn.send(('failed', None, 'package BAS not found'))
+        return
+    conn.send(('ready', None, None))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        job_id, code, data_path, inputs, outputs = job
+        if code == 'sleep':
+            time.sleep(60)
+        elif code == 'exit':
+            os._exit(3)
+        elif code == 'error':
+            conn.send(('error', job_id, 'object x not found'))
+        else:
+            df = r_worker_pool._read_frame(data_path)
+            conn.send(('console', None, 'fitting\n'))
+            conn.send(('done', job_id, {'n': len(df), 'pid': os.getpid(), **(inputs or {})}))
+
+
+@pytest.fixture
+def pool():
+    pool = RWorkerPool(size=1, preload='', timeout=30, worker_main=_stub_worker_main)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'y': [1.0, 2.0, 3.0], 'x': [0.5, 0.1, 0.2]})
+
+
+def test_job_returns_outputs_and_forwards_console(pool, df):
+    printed = []
+    result = pool.submit('run', df, inputs={'k': 2}, on_console=printed.append)
+    assert result['n'] == 3 and result['k'] == 2
+    assert printed == ['fitting\n']
+
+
+def test_worker_is_reused_between_jobs(pool, df):
+    first = pool.submit('run', df)['pid']
+    assert pool.submit('run', df)['pid'] == first
+
+
+def test_r_error_keeps_the_worker(pool, df):
+    pid = pool.submit('run', df)['pid']
+    with pytest.raises(RJobError, match='object x not found'):
+        pool.submit('error', df)
+    assert pool.submit('run', df)['pid'] == pid
+
+
+def test_timeout_kills_the_worker_and_a_replacement_runs_the_next_job(pool, df):
+    pid = pool.submit('run', df)['pid']
+    start = time.monotonic()
+    with pytest.raises(RJobTimeout):
+        pool.submit('sleep', df, timeout=1)
+    assert time.monotonic() - start < 10
+    assert pool._started == 0
+    assert pool.submit('run', df)['pid'] != pid
+
+
+def test_cancel_kills_the_worker(pool, df):
+    pid = pool.submit('run', df)['pid']
+    calls = []
+
+    def cancel_check():
+        calls.append(1)
+        return len(calls) > 2
+
+    with pytest.raises(RJobCancelled):
+        pool.submit('sleep', df, cancel_check=cancel_check)
+    assert pool._started == 0
+    assert pool.submit('run', df)['pid'] != pid
+
+
+def test_worker_death_is_reported_and_replaced(pool, df):
+    pid = pool.submit('run', df)['pid']
+    with pytest.raises(RJobError, match='exited unexpectedly'):
+        pool.submit('exit', df)
+    assert pool._started == 0
+    assert pool.submit('run', df)['pid'] != pid
+
+
+def test_worker_that_cannot_start_is_discarded(df):
+    pool = RWorkerPool(size=1, preload='fail', timeout=30, worker_main=_stub_worker_main)
+    try:
+        with pytest.raises(RJobError, match='could not start: package BAS not found'):
+            pool.submit('run', df)
+        assert pool._started == 0
+    finally:
+        pool.shutdown()
+
+
+class _FakeRList(list):
+    """Stands in for an rpy2 vector: iterable, with R ``names``."""
+
+    def __init__(self, values, names=None):
+        super().__init__(values)
+        self.names = names
+
+
+def test_to_python_keeps_names_of_r_lists():
+    fit = _FakeRList([np.array([0.1, 0.2]), 'BAS', _FakeRList([1.0, 2.0])],
+                     names=['probne0', 'method', 'which'])
+    assert r_worker_pool._to_python(fit) == {'probne0': [0.1, 0.2], 'method': 'BAS', 'which': [1.0, 2.0]}
+
+
+def test_to_python_unnamed_and_partly_named_lists():
+    assert r_worker_pool._to_python(_FakeRList([1, 2])) == [1, 2]
+    assert r_worker_pool._to_python(_FakeRList([1, 2], names=['', ''])) == [1, 2]
+    assert r_worker_pool._to_python(_FakeRList([1, 2], names=['a', ''])) == {'a': 1, '2': 2}
+    assert r_worker_pool._to_python(None) is None
@@ -0,0 +1,102 @@
+"""Tests for models.specification_curve against statsmodels OLS, and its background-job path."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.formula.api as smf
+
+from models.specification_curve import SpecificationCurveResults, run_specification_curve
+
+BLOCKS = [['z1'], ['z2 + C(group)'], ['np.log(w)']]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(4)
+    n = 250
+    df = pd.DataFrame({
+        'x': rng.normal(size=n),
+        'age': rng.normal(40, 10, size=n),
+        'z1': rng.normal(size=n),
+        'z2': rng.normal(size=n),
+        'w': rng.uniform(1, 5, size=n),
+        'group': rng.choice(['a', 'b', 'c'], size=n),
+    })
+    df['y'] = 0.5 * df.x + 0.02 * df.age + 0.3 * df.z1 + (df.group == 'b') + np.log(df.w) + rng.normal(size=n)
+    # Missing values in one optional control: every specification uses the common complete-case sample
+    df.loc[::17, 'z2'] = np.nan
+    return df
+
+
+def _blocks():
+    return [[term.strip() for term in block[0].split('+')] for block in BLOCKS]
+
+
+def test_every_specification_matches_statsmodels(data):
+    results = run_specification_curve(data, 'y', 'x', ['age'], _blocks(), alpha=0.1)
+    sample = data.dropna()
+    assert len(results) == 8 and results.nobs == len(sample)
+    for i, formula in enumerate(results.formulas()):
+        reference = smf.ols(formula, sample).fit()
+        low, high = reference.conf_int(alpha=0.1).loc['x']
+        expected = {
+            'estimate': reference.params['x'], 'se': reference.bse['x'], 't': reference.tvalues['x'],
+            'p': reference.pvalues['x'], 'ci_low': low, 'ci_high': high, 'r2': reference.rsquared,
+            'adj_r2': reference.rsquared_adj, 'aic': reference.aic, 'bic': reference.bic,
+        }
+        for name, value in expected.items():
+            # Results are stored as float32
+            assert results.stats[name][i] == pytest.approx(value, rel=1e-5, abs=1e-6), (formula, name)
+
+
+def test_results_round_trip_through_bytes(data):
+    results = run_specification_curve(data, 'y', 'x', [], _blocks())
+    restored = SpecificationCurveResults.from_bytes(results.to_bytes())
+    assert restored.to_dict() == results.to_dict()
+
+
+def test_focal_term_must_be_one_column(data):
+    with pytest.raises(ValueError, match='single numeric term'):
+        run_specification_curve(data, 'y', 'C(group)', [], _blocks())
+
+
+@pytest.mark.django_db
+def test_background_job_stores_the_batch(data, tmp_path):
+    from engine.models import AnalysisJob, Dataset
+    from engine.services.job_service import JobService
+    from engine.services.specification_curve_service import SpecificationCurveService
+
+    path = tmp_path / 'spec.csv'
+    data.to_csv(path, index=False)
+    dataset = Dataset.objects.create(name='spec', file_path=str(path))
+    spec, error = SpecificationCurveService.parse_request(
+        {'formula': 'y ~ x + age', 'control_blocks': [block[0] for block in BLOCKS]})
+    assert error is None
+    job = AnalysisJob.objects.create(module='spec_curve', dataset=dataset,
+                                     payload={'dataset_id': dataset.pk, 'spec': spec})
+
+    template_name, context = JobService._compute(job)
+    session = context['session']
+    job.session = session
+    job.status = AnalysisJob.STATUS_SUCCEEDED
+    stored = json.loads(JobService.render_result(None, job).content)
+    assert template_name == '' and session.module == 'spec_curve'
+    assert stored['session_id'] == session.id and stored['results']['n_specs'] == 8
+
+
+@pytest.mark.django_db
+def test_background_request_queues_a_job(client, data, tmp_path):
+    from django.urls import reverse
+
+    from engine.models import AnalysisJob, Dataset
+
+    path = tmp_path / 'spec.csv'
+    data.to_csv(path, index=False)
+    dataset = Dataset.objects.create(name='spec', file_path=str(path))
+    response = client.post(reverse('run_specification_curve'), json.dumps({
+        'dataset_id': dataset.pk, 'formula': 'y ~ x + age', 'control_blocks': ['z1'], 'run_in_background': True,
+    }), content_type='application/json')
+    assert response.status_code == 202
+    job = AnalysisJob.objects.get(pk=response.json()['job_id'])
+    assert job.module == 'spec_curve' and job.payload['spec']['control_blocks'] == [['z1']]
@@ -0,0 +1,43 @@
+"""Tests for models.stationarity against statsmodels' adfuller and kpss."""
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.stattools import adfuller, kpss
+
+from models import stationarity
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'noise': rng.normal(size=150),
+        'walk': rng.normal(size=150).cumsum(),
+        'label': ['a', 'b', 'c'] * 50,
+        'short': [1.0, 2.0, 3.0] + [np.nan] * 147,
+    })
+
+
+def test_results_match_statsmodels(frame):
+    results = stationarity.check_columns({name: frame[name] for name in ('noise', 'walk')})
+    for name in ('noise', 'walk'):
+        stat, p_value, *_ = adfuller(frame[name], **stationarity.ADF_SETTINGS)
+        kpss_stat, kpss_p, *_ = kpss(frame[name], **stationarity.KPSS_SETTINGS)
+        assert results[name]['test_statistic'] == pytest.approx(stat)
+        assert results[name]['p_value'] == pytest.approx(p_value)
+        assert results[name]['kpss_statistic'] == pytest.approx(kpss_stat)
+    assert results['noise']['is_stationary'] and not results['walk']['is_stationary']
+
+
+def test_non_numeric_column_does_not_abort_the_batch(frame):
+    results = stationarity.check_columns({name: frame[name] for name in ('label', 'noise')})
+    assert list(results) == ['label', 'noise']
+    assert results['label']['error'] and results['label']['test_statistic'] is None
+    assert results['noise']['test_statistic'] is not None
+
+
+def test_error_results_are_not_cached(frame):
+    first = stationarity.check_columns({'short': frame['short']})['short']
+    second = stationarity.check_columns({'short': frame['short']})['short']
+    assert first['error'] and second['error']
+    assert not second['cached']
@@ -0,0 +1,54 @@
+"""Tests for models.var_lag_selection against statsmodels' VAR.select_order."""
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+from models.var_lag_selection import var_lag_selection_table
+
+
+def _series(T=200, seed=0):
+    rng = np.random.default_rng(seed)
+    y = np.zeros((T, 3))
+    for t in range(2, T):
+        y[t] = 0.5 * y[t - 1] - 0.2 * y[t - 2] + rng.normal(size=3)
+    return pd.DataFrame(y, columns=['y1', 'y2', 'y3']), rng
+
+
+def _assert_matches(table, reference, max_lags):
+    ics = reference.ics
+    for row in table:
+        lag = row['lag']
+        for crit in ('aic', 'bic', 'hqic', 'fpe'):
+            assert row[crit] == pytest.approx(ics[crit][lag], rel=1e-8), (crit, lag)
+
+
+def test_matches_statsmodels_without_exog():
+    endog, _ = _series()
+    table, optimal = var_lag_selection_table(endog, None, max_lags=6)
+    reference = VAR(endog).select_order(6, trend='c')
+    _assert_matches(table, reference, 6)
+    # statsmodels also scores lag 0; the table starts at lag 1
+    assert optimal == {crit: int(np.argmin(reference.ics[crit][1:])) + 1 for crit in optimal}
+
+
+def test_matches_statsmodels_with_exog():
+    endog, rng = _series(seed=1)
+    exog = pd.DataFrame({'x': rng.normal(size=len(endog))})
+    table, _ = var_lag_selection_table(endog, exog, max_lags=5)
+    _assert_matches(table, VAR(endog, exog=exog).select_order(5, trend='c'), 5)
+
+
+@pytest.mark.parametrize('kind', ['constant', 'dummies'])
+def test_exog_collinear_with_constant_is_not_blanked(kind):
+    endog, rng = _series(seed=2)
+    T = len(endog)
+    if kind == 'constant':
+        exog = pd.DataFrame({'x': rng.normal(size=T), 'one': np.ones(T)})
+    else:
+        group = rng.integers(0, 3, size=T)
+        exog = pd.DataFrame({f'd{g}': (group == g).astype(float) for g in range(3)})
+    table, optimal = var_lag_selection_table(endog, exog, max_lags=4)
+    assert all(row['aic'] is not None for row in table)
+    assert all(optimal[crit] is not None for crit in optimal)
+    _assert_matches(table, VAR(endog, exog=exog).select_order(4, trend='c'), 4)
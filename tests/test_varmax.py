@@ -0,0 +1,72 @@
+"""Tests for the restricted VARMAX fit and its order search."""
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models import VARMAX as varmax
+
+EXOG_MAP = {'a': ['x1'], 'b': ['x2']}
+
+
+@pytest.fixture(autouse=True)
+def _quiet_statsmodels():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yield
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    T = 150
+    exog = pd.DataFrame(rng.normal(size=(T, 2)), columns=['x1', 'x2'])
+    y = np.zeros((T, 2))
+    for t in range(1, T):
+        y[t] = np.array([[0.5, 0.1], [0.2, 0.3]]) @ y[t - 1] + [0.4 * exog.x1[t], 0.3 * exog.x2[t]] + rng.normal(size=2)
+    return pd.DataFrame(y, columns=['a', 'b']), exog
+
+
+def _two_step_fit(endog, exog, order, trend):
+    """The previous procedure: an unconstrained fit, then the constrained fit."""
+    mod = varmax._build_model(endog, exog, order, trend, True)
+    mod.fit(disp=False)
+    constraints = varmax._exog_constraints(mod, list(endog.columns), list(exog.columns), EXOG_MAP)
+    return mod.fit_constrained(constraints, disp=False)
+
+
+@pytest.mark.parametrize('order, trend', [((1, 0), 'c'), ((2, 0), 'ct')])
+def test_restricted_fit_reaches_the_two_step_likelihood(data, order, trend):
+    endog, exog = data
+    res = varmax._fit_restricted(endog, exog, EXOG_MAP, order, trend, True)
+    # At least as high: the two-step fit sometimes stops a little short of the optimum
+    assert res.llf >= _two_step_fit(endog, exog, order, trend).llf - 1e-4
+    assert res.params['beta.x2.a'] == 0 and res.params['beta.x1.b'] == 0
+
+
+def test_ols_start_params_are_placed_by_name(data):
+    endog, exog = data
+    mod = varmax._build_model(endog, exog, (1, 0), 'c', True)
+    start = pd.Series(varmax._ols_start_params(mod, endog, exog, EXOG_MAP), index=mod.param_names)
+
+    X = np.column_stack([np.ones(len(endog) - 1), exog.x1[1:], endog.a[:-1], endog.b[:-1]])
+    coef = np.linalg.lstsq(X, endog.a[1:], rcond=None)[0]
+    np.testing.assert_allclose(start[['intercept.a', 'beta.x1.a', 'L1.a.a', 'L1.b.a']], coef)
+    assert start['beta.x2.a'] == 0
+    assert start['sqrt.var.a'] > 0 and start['sqrt.var.b'] > 0
+
+
+def test_order_search_is_the_same_in_process_and_on_the_pool(data):
+    endog, exog = data
+    serial = varmax.select_varmax_order(endog, exog, EXOG_MAP, max_p=2, max_q=1, workers=1)
+    pooled = varmax.select_varmax_order(endog, exog, EXOG_MAP, max_p=2, max_q=1, workers=2)
+    assert serial[0] == pooled[0]
+    np.testing.assert_allclose(serial[1], pooled[1])
+    assert [(row['p'], row['q']) for row in serial[2]] == [(row['p'], row['q']) for row in pooled[2]]
+
+
+def test_order_search_rejects_unknown_criterion(data):
+    endog, exog = data
+    with pytest.raises(ValueError, match='Order criterion'):
+        varmax.select_varmax_order(endog, exog, EXOG_MAP, ic='fpe')
@@ -0,0 +1,96 @@
+"""Tests for VARX forecasts and the forecast service cache."""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+from models import varx_forecast
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(3)
+    T = 200
+    exog = pd.DataFrame({'x1': rng.normal(size=T).cumsum() * 0.1, 'x2': rng.normal(size=T)})
+    y = np.zeros((T, 2))
+    for t in range(2, T):
+        y[t] = (0.2 + np.array([[0.5, 0.1], [0.0, 0.4]]) @ y[t - 1] + np.array([[0.1, 0.0], [0.2, -0.1]]) @ y[t - 2]
+                + [0.5 * exog.x1[t], -0.3 * exog.x2[t]] + rng.normal(scale=0.5, size=2))
+    endog = pd.DataFrame(y, columns=['y1', 'y2'])
+    return VAR(endog, exog=exog).fit(2), endog, exog
+
+
+@pytest.mark.parametrize('scenario, future', [
+    (None, lambda x, h: np.tile(x.iloc[-1].to_numpy(), (h, 1))),
+    ({'x1': 'mean', 'x2': 'last'}, lambda x, h: np.tile([x.x1.mean(), x.x2.iloc[-1]], (h, 1))),
+    ({'x1': 1.5, 'x2': -2}, lambda x, h: np.tile([1.5, -2.0], (h, 1))),
+    ({'x1': [0.1, 0.2, 0.3], 'x2': ''}, lambda x, h: np.column_stack(
+        [[0.1, 0.2] + [0.3] * (h - 2), np.full(h, x.x2.iloc[-1])])),
+])
+def test_point_forecast_matches_statsmodels(fitted, scenario, future):
+    res, endog, exog = fitted
+    h = 8
+    out = varx_forecast.forecast(res, endog, horizon=h, scenario=scenario, paths=200)
+    expected = res.forecast(endog.to_numpy()[-2:], steps=h, exog_future=future(exog, h))
+    np.testing.assert_allclose(out['point'], expected, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(np.column_stack([out['exog_future']['x1'], out['exog_future']['x2']]), future(exog, h))
+
+
+def test_mean_of_simulated_paths_converges_to_point_forecast(fitted):
+    res, endog, _ = fitted
+    future, _ = varx_forecast.exog_future(res, 10, {'x1': 'mean'})
+    paths = varx_forecast.simulate_paths(res, endog, future, 10, paths=20000, seed=1)
+    point = res.forecast(endog.to_numpy()[-2:], steps=10, exog_future=future)
+    assert paths.shape == (20000, 10, 2)
+    np.testing.assert_allclose(paths.mean(axis=0), point, atol=2e-2)
+
+
+def test_fan_is_reproducible_for_a_seed(fitted):
+    res, endog, _ = fitted
+    first = varx_forecast.forecast(res, endog, horizon=5, paths=300, seed=7)
+    second = varx_forecast.forecast(res, endog, horizon=5, paths=300, seed=7)
+    assert first['bands'] == second['bands']
+
+
+def test_equivalent_scenarios_normalize_the_same(fitted):
+    res, _, _ = fitted
+    keys = {varx_forecast.scenario_key(varx_forecast.exog_future(res, 6, s)[1])
+            for s in ({}, None, {'x1': 'last'}, {'x1': '', 'x2': None})}
+    assert len(keys) == 1
+
+
+@pytest.mark.parametrize('scenario, message', [
+    ({'z': 'last'}, 'Unknown exogenous variable'),
+    ({'x1': 'median'}, "Scenario for 'x1'"),
+    ({'x1': True}, "Scenario for 'x1'"),
+    ({'x1': []}, "Scenario for 'x1'"),
+    ({'x2': [1, 'a']}, "path for 'x2' must contain only numbers"),
+])
+def test_bad_scenarios_raise(fitted, scenario, message):
+    res, _, _ = fitted
+    with pytest.raises(ValueError, match=message):
+        varx_forecast.exog_future(res, 6, scenario)
+
+
+@pytest.mark.django_db
+def test_service_caches_per_normalized_scenario(fitted):
+    from django.core.cache import cache
+    from engine.models import AnalysisSession
+    from engine.services.forecast_service import ForecastService
+
+    res, endog, _ = fitted
+    cache.clear()
+    session = AnalysisSession.objects.create(
+        name='varx', module='varx', formula='y1 + y2 ~ x1 + x2',
+        fitted_model=pickle.dumps({'model_results': res, 'endog_data': endog, 'dependent_vars': ['y1', 'y2']}))
+
+    first = ForecastService.generate_forecast(session, 6, {}, paths=100)
+    assert first['success'] and not first['cached']
+    for scenario in ({'x1': 'last'}, {'x1': ''}, {'x1': 'last', 'x2': None}):
+        assert ForecastService.generate_forecast(session, 6, scenario, paths=100)['cached']
+    assert not ForecastService.generate_forecast(session, 6, {'x1': 'mean'}, paths=100)['cached']
+
+    bad = ForecastService.generate_forecast(session, 6, {'z': 1}, paths=100)
+    assert not bad['success'] and bad['status'] == 400
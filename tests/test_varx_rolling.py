@@ -0,0 +1,64 @@
+"""Tests for models.varx_rolling against a statsmodels VAR fitted on each window."""
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.api import VAR
+
+from models import varx_rolling
+from models.varx_rolling import rolling_varx, window_bounds
+
+LAGS = 2
+PERIODS = 6
+
+
+@pytest.fixture(scope='module')
+def series():
+    rng = np.random.default_rng(2)
+    n = 400
+    y = np.zeros((n, 3))
+    x = rng.normal(size=(n, 1))
+    for t in range(1, n):
+        drift = 0.3 * t / n
+        y[t, 0] = (0.2 + drift) * y[t - 1, 0] + 0.3 * x[t, 0] + rng.normal()
+        y[t, 1] = 0.4 * y[t - 1, 1] + 0.2 * y[t - 1, 0] + rng.normal()
+        y[t, 2] = 0.1 * y[t - 1, 2] - 0.3 * y[t - 1, 1] + rng.normal(scale=1.0 + drift)
+    return pd.DataFrame(y, columns=['a', 'b', 'c']), pd.DataFrame(x, columns=['x'])
+
+
+def _check_against_statsmodels(result, endog, exog):
+    for w in range(len(result['start'])):
+        first, last = result['start'][w], result['end'][w]
+        rows = slice(first - LAGS, last + 1)
+        fit = VAR(endog.iloc[rows], exog=None if exog is None else exog.iloc[rows]).fit(LAGS)
+        assert result['nobs'][w] == fit.nobs
+        assert list(fit.params.index) == result['param_names']
+        np.testing.assert_allclose(result['coefs'][w], fit.params.to_numpy(), rtol=1e-7, atol=1e-9)
+        np.testing.assert_allclose(result['sigma_u'][w], fit.sigma_u.to_numpy(), rtol=1e-7, atol=1e-9)
+        np.testing.assert_allclose(result['irf'][w], fit.orth_ma_rep(maxn=PERIODS)[:PERIODS],
+                                   rtol=1e-6, atol=1e-9)
+
+
+@pytest.mark.parametrize('mode, step', [('rolling', 1), ('rolling', 7), ('expanding', 5)])
+def test_windows_match_statsmodels(series, mode, step):
+    endog, exog = series
+    result = rolling_varx(endog, exog, lags=LAGS, mode=mode, window_size=80, step=step,
+                          irf_periods=PERIODS)
+    assert result['coefs'].shape == (len(result['start']), 1 + 1 + 3 * LAGS, 3)
+    _check_against_statsmodels(result, endog, exog)
+
+
+def test_long_downdate_chain_matches_statsmodels(series, monkeypatch):
+    endog, _ = series
+    # Never refactorize: every window after the first comes from rank-one updates
+    monkeypatch.setattr(varx_rolling, 'REFACTOR_EVERY', 10 ** 6)
+    result = rolling_varx(endog, lags=LAGS, window_size=60, irf_periods=PERIODS)
+    _check_against_statsmodels(result, endog, None)
+
+
+def test_window_bounds():
+    assert window_bounds(10, 'rolling', 4, 3) == [(0, 4), (3, 7), (6, 10)]
+    assert window_bounds(10, 'expanding', 4, 3) == [(0, 4), (0, 7), (0, 10)]
+    with pytest.raises(ValueError, match='exceeds'):
+        window_bounds(3, 'rolling', 4)
+    with pytest.raises(ValueError, match='Window mode'):
+        window_bounds(10, 'sliding', 4)